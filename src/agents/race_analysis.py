@@ -4,6 +4,7 @@
 LLM未設定時はルールベースのフォールバック分析を返す。
 """
 
+import heapq
 from typing import Any
 
 from src.agents.base import BaseAgent
@@ -67,7 +68,7 @@ class RaceAnalysisAgent(BaseAgent):
             lines.append(f"バリューベット: {len(value_bets)}頭検出")
             for vb in value_bets[:3]:
                 details = vb.get("factor_details", {})
-                top_factors = sorted(details.items(), key=lambda x: abs(x[1]), reverse=True)[:3]
+                top_factors = heapq.nlargest(3, details.items(), key=lambda x: abs(x[1]))
                 factor_str = ", ".join(f"{k}({v:+.1f})" for k, v in top_factors)
                 lines.append(
                     f"- 馬番{vb['umaban']}: "
@@ -99,6 +99,8 @@ class RaceDayPipeline:
             email_from=notif_cfg.get("email_from", ""),
             email_to=notif_cfg.get("email_to", []),
             min_level=notif_cfg.get("min_level", "INFO"),
+            sync=notif_cfg.get("sync", False),
+            dedup_ttl=notif_cfg.get("dedup_ttl", 7200.0),
         ))
 
         # 安全機構
@@ -416,7 +418,8 @@ class RaceDayPipeline:
                 lines.append(f"  - {err[:100]}")
 
         level = "INFO" if result.status == "SUCCESS" else "WARNING"
-        self._notifier.send(title, "\n".join(lines), level)
+        # エラーを含む結果は配信成否を確認できるよう同期送信する
+        self._notifier.send(title, "\n".join(lines), level, sync=level != "INFO")
 
     # --- DB操作ヘルパー ---
 
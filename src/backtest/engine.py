@@ -5,7 +5,7 @@
 
 バックテストフロー:
     1. 対象期間のレースリストを受け取る
-    2. 各レースに対して戦略のrun()を実行（ライブと同一パス）
+    2. 戦略のprepare()に全レースを渡し、各レースに対してrun()を実行（ライブと同一パス）
     3. ベット分だけ仮想bankrollを減算し、実績払戻を加算
     4. 日次スナップショットを記録
     5. 実績ベースでKPIメトリクスを算出
@@ -107,6 +107,20 @@ def _build_race_key(race_data: dict[str, Any]) -> str:
     )
 
 
+def _race_date(race_data: dict[str, Any]) -> str:
+    """race_dataから開催日（YYYYMMDD）を取り出す。"""
+    return f"{race_data.get('Year', '')}{race_data.get('MonthDay', '')}"
+
+
+def _build_strategy_params(race_data: dict[str, Any], config: BacktestConfig) -> dict[str, Any]:
+    """レースごとの戦略実行パラメータを構築する。"""
+    params: dict[str, Any] = {}
+    race_date = _race_date(race_data)
+    if config.exclude_overlapping_factors and race_date:
+        params["as_of_date"] = f"{race_date[:4]}-{race_date[4:6]}-{race_date[6:8]}"
+    return params
+
+
 class BacktestEngine:
     """バックテストエンジン。
 
@@ -153,6 +167,11 @@ class BacktestEngine:
             f"初期資金={config.initial_bankroll:,}円, レース数={len(races)}"
         )
 
+        # 戦略実行パラメータは残高に依存しないため先に全レース分を構築し、
+        # スコアリング等の前処理を戦略側でまとめて行えるようにする
+        race_params = [_build_strategy_params(race.get("race_info", {}), config) for race in races]
+        self._strategy.prepare(races, race_params)
+
         for race_idx, race in enumerate(races):
             race_data = race.get("race_info", {})
             entries = race.get("entries", [])
@@ -160,7 +179,7 @@ class BacktestEngine:
             payouts = race.get("payouts", {})
 
             # 日付取得
-            race_date = f"{race_data.get('Year', '')}{race_data.get('MonthDay', '')}"
+            race_date = _race_date(race_data)
 
             # 日次データ初期化
             if race_date and race_date not in daily_data:
@@ -170,19 +189,13 @@ class BacktestEngine:
                     "payout": 0,
                 }
 
-            # 戦略実行パラメータ構築
-            strategy_params: dict[str, Any] = {}
-            if config.exclude_overlapping_factors and race_date:
-                as_of = f"{race_date[:4]}-{race_date[4:6]}-{race_date[6:8]}"
-                strategy_params["as_of_date"] = as_of
-
             # 戦略実行（ライブと同一パス）
             bets = self._strategy.run(
                 race_data=race_data,
                 entries=entries,
                 odds=odds,
                 bankroll=bankroll,
-                params=strategy_params,
+                params=race_params[race_idx],
             )
             all_bets.extend(bets)
 
@@ -90,7 +90,7 @@ def _run_backtest_bg(
         progress_callback(0, len(target_races), f"バックテスト開始: {len(target_races)}レース")
 
     # 戦略・エンジン構築
-    strategy = GYValueStrategy(ext_db, jvlink_db=jvlink_db, ev_threshold=ev_threshold)
+    strategy = GYValueStrategy(ext_db, jvlink_db=jvlink_db, ev_threshold=ev_threshold, n_jobs=-1)
     engine = BacktestEngine(strategy)
     config = BacktestConfig(
         date_from=date_from,
@@ -84,7 +84,7 @@ def _run_calibrator(
     scores, labels = trainer.build_training_data_from_batch(
         date_from, date_to, max_races, target_jyuni, min_samples=10,
     )
-    probs = np.array([calibrator.predict_proba(s) for s in scores])
+    probs = calibrator.predict_proba_batch(scores)
     brier = float(np.mean((probs - labels) ** 2))
     return {
         "calibrator": calibrator, "brier": brier,
@@ -6,7 +6,7 @@ WALモード、自動コミット/ロールバック、dict形式結果変換を
 """
 
 import sqlite3
-from collections.abc import Generator
+from collections.abc import Generator, Iterable, Iterator
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any
@@ -32,6 +32,12 @@ class DatabaseManager:
         if not self._db_path.exists():
             logger.warning(f"DBファイルが存在しません（初回接続時に自動生成）: {self._db_path}")
 
+    def __getstate__(self) -> dict[str, Any]:
+        """pickle時は接続を持ち越さない（ワーカープロセスでは各自が接続を開く）。"""
+        state = self.__dict__.copy()
+        state["_persistent_conn"] = None
+        return state
+
     @property
     def db_path(self) -> Path:
         """DBファイルパスを返す。"""
@@ -112,6 +118,72 @@ class DatabaseManager:
             columns = [desc[0] for desc in cursor.description] if cursor.description else []
             return [dict(zip(columns, row, strict=False)) for row in cursor.fetchall()]
 
+    def execute_query_tuples(self, sql: str, params: tuple[Any, ...] = ()) -> list[tuple[Any, ...]]:
+        """SELECTクエリを実行し、結果をプレーンなタプルのリストで返す。
+
+        execute_query() と異なり行ごとのdictを構築しない。
+        列位置が既知で、行をアンパックして消費するホットパス向け。
+
+        Args:
+            sql: SELECT文（パラメータプレースホルダ ? を使用）
+            params: バインドパラメータのタプル
+
+        Returns:
+            SELECT列順のタプルのリスト
+        """
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            return cursor.execute(sql, params).fetchall()
+
+    def iter_query(
+        self, sql: str, params: tuple[Any, ...] = (), chunk_size: int = 1000
+    ) -> Iterator[dict[str, Any]]:
+        """SELECTクエリを実行し、結果をdict形式で1行ずつ返す。
+
+        execute_query() と異なり結果全体をメモリに展開せず、
+        cursor.fetchmany(chunk_size) で分割取得する。接続はイテレーション完了
+        （または途中破棄）まで保持される。
+
+        Args:
+            sql: SELECT文（パラメータプレースホルダ ? を使用）
+            params: バインドパラメータのタプル
+            chunk_size: 1回のfetchmanyで取得する行数
+
+        Yields:
+            カラム名→値のdict
+        """
+        with self.connect() as conn:
+            cursor = conn.execute(sql, params)
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
+            while rows := cursor.fetchmany(chunk_size):
+                for row in rows:
+                    yield dict(zip(columns, row, strict=False))
+
+    def iter_chunks(
+        self, sql: str, params: tuple[Any, ...] = (), chunk_size: int = 10_000
+    ) -> Iterator[list[tuple[Any, ...]]]:
+        """SELECTクエリを実行し、結果を生タプルのチャンク単位で返す。
+
+        iter_query() と異なり行ごとのdictを構築しない。列位置が既知で、
+        呼び出し側がNumPy配列などへ直接詰め替える大量行の読み出し向け。
+
+        Args:
+            sql: SELECT文（パラメータプレースホルダ ? を使用）
+            params: バインドパラメータのタプル
+            chunk_size: 1回のfetchmanyで取得する行数
+
+        Yields:
+            最大chunk_size行のタプルのリスト
+        """
+        with self.connect() as conn:
+            # sqlite3.Rowを介さずプレーンなタプルで受け取る
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(sql, params)
+            while rows := cursor.fetchmany(chunk_size):
+                yield rows
+
     def execute_write(self, sql: str, params: tuple[Any, ...] = ()) -> int:
         """INSERT/UPDATE/DELETEクエリを実行し、影響行数を返す。
 
@@ -126,6 +198,24 @@ class DatabaseManager:
             cursor = conn.execute(sql, params)
             return cursor.rowcount
 
+    def execute_many(self, sql: str, rows: Iterable[tuple[Any, ...]]) -> int:
+        """同一のDML文を複数パラメータで一括実行し、影響行数を返す。
+
+        cursor.executemany() を1つのトランザクション内で実行するため、
+        execute_write() を行数分呼ぶ場合と異なりコミットは1回で済む。
+        途中で失敗した場合は全行がロールバックされる。
+
+        Args:
+            sql: DML文（パラメータプレースホルダ ? を使用）
+            rows: バインドパラメータのタプルの列
+
+        Returns:
+            影響を受けた行数の合計
+        """
+        with self.connect() as conn:
+            cursor = conn.executemany(sql, rows)
+            return cursor.rowcount
+
     def table_exists(self, table_name: str) -> bool:
         """テーブルの存在を確認する。
 
@@ -41,6 +41,18 @@ _RACE_KEY_PATTERN = re.compile(r"^\d{16}$")
 # 実テーブルの主キーカラム名
 _ID_COLUMNS = ["idYear", "idMonthDay", "idJyoCD", "idKaiji", "idNichiji", "idRaceNum"]
 
+# 前走データとして取得するNL_SE_RACE_UMAのカラム
+_PREV_ENTRY_COLUMNS = """
+    Wakuban, Umaban, KettoNum, Bamei,
+    SexCD, Barei, Futan,
+    KisyuRyakusyo, ChokyosiRyakusyo,
+    BaTaijyu, ZogenFugo, ZogenSa,
+    KakuteiJyuni, Ninki, Odds, Time,
+    HaronTimeL3, HaronTimeL4,
+    DMJyuni, KyakusituKubun,
+    Jyuni1c, Jyuni2c, Jyuni3c, Jyuni4c
+"""
+
 
 class JVLinkDataProvider:
     """JVLinkToSQLite DBからのデータ取得を提供するクラス。
@@ -53,6 +65,9 @@ class JVLinkDataProvider:
     # 下流コードとの互換性のため、出力キー名は旧名を維持
     RACE_KEY_COLUMNS = ["Year", "MonthDay", "JyoCD", "Kaiji", "Nichiji", "RaceNum"]
 
+    # get_previous_race_entries() のIN句1回あたりのKettoNum数（SQLite変数上限対策）
+    PREV_ENTRY_QUERY_CHUNK = 500
+
     def __init__(self, db: DatabaseManager) -> None:
         self._db = db
 
@@ -579,16 +594,8 @@ class JVLinkDataProvider:
             return None
 
         results = self._db.execute_query(
-            """
-            SELECT
-                Wakuban, Umaban, KettoNum, Bamei,
-                SexCD, Barei, Futan,
-                KisyuRyakusyo, ChokyosiRyakusyo,
-                BaTaijyu, ZogenFugo, ZogenSa,
-                KakuteiJyuni, Ninki, Odds, Time,
-                HaronTimeL3, HaronTimeL4,
-                DMJyuni, KyakusituKubun,
-                Jyuni1c, Jyuni2c, Jyuni3c, Jyuni4c
+            f"""
+            SELECT {_PREV_ENTRY_COLUMNS}
             FROM NL_SE_RACE_UMA
             WHERE KettoNum = ?
               AND (idYear < ? OR (idYear = ? AND idMonthDay < ?))
@@ -599,6 +606,59 @@ class JVLinkDataProvider:
         )
         return results[0] if results else None
 
+    def get_previous_race_entries(
+        self, ketto_nums: list[str], current_race_key: str,
+    ) -> dict[str, dict[str, Any]]:
+        """複数馬の前走（直近1走前）の出走データを一括取得する。
+
+        get_previous_race_entry() を馬ごとに呼ぶ代わりに、KettoNumのIN句と
+        ウィンドウ関数で1レース分の前走を1クエリで取得する。
+
+        Args:
+            ketto_nums: 馬登録番号のリスト（空文字は無視）
+            current_race_key: 現在レースのrace_key（16桁）
+
+        Returns:
+            KettoNum→前走の出走馬データdict。前走なしの馬は含まない。
+        """
+        kettos = sorted({k for k in ketto_nums if k and k.strip()})
+        if not kettos:
+            return {}
+
+        parts = self._parse_race_key(current_race_key)
+        if parts is None:
+            return {}
+
+        cur_year, cur_monthday = parts[0], parts[1]
+
+        if not self._db.table_exists("NL_SE_RACE_UMA"):
+            return {}
+
+        result: dict[str, dict[str, Any]] = {}
+        chunk = self.PREV_ENTRY_QUERY_CHUNK
+        for start in range(0, len(kettos), chunk):
+            batch = kettos[start:start + chunk]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute_query(
+                f"""
+                SELECT {_PREV_ENTRY_COLUMNS}
+                FROM (
+                    SELECT {_PREV_ENTRY_COLUMNS},
+                        ROW_NUMBER() OVER (
+                            PARTITION BY KettoNum ORDER BY idYear DESC, idMonthDay DESC
+                        ) AS rn
+                    FROM NL_SE_RACE_UMA
+                    WHERE KettoNum IN ({placeholders})
+                      AND (idYear < ? OR (idYear = ? AND idMonthDay < ?))
+                )
+                WHERE rn = 1
+                """,
+                (*batch, cur_year, cur_year, cur_monthday),
+            )
+            for row in rows:
+                result[str(row["KettoNum"])] = row
+        return result
+
     def get_race_list(
         self,
         year: str | None = None,
@@ -3,10 +3,16 @@
 全てのファクタールールはこの基底クラスを継承する。
 """
 
+import sys
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Mapping
 from dataclasses import dataclass
+from enum import StrEnum
 from typing import Any
 
+import numpy as np
+from numpy.typing import NDArray
+
 
 @dataclass
 class FactorResult:
@@ -20,6 +26,74 @@ class FactorResult:
     detail: str  # 判定理由の説明
 
 
+class FactorCategory(StrEnum):
+    """ファクターのカテゴリー（factor_rules.category の値）。
+
+    str のサブクラスのため、DB・JSONにはそのまま文字列として保存される。
+    """
+
+    FORM = "form"        # 前走成績
+    DM = "dm"            # JRAマイニング予想
+    COURSE = "course"    # コース・距離
+    GATE = "gate"        # 枠順
+    WEIGHT = "weight"    # 馬体重・斤量
+    GENDER = "gender"    # 性別・馬齢
+    PACE = "pace"        # 脚質・展開
+    SPEED = "speed"      # 上がり3F
+    ODDS = "odds"        # オッズ・人気
+    JOCKEY = "jockey"    # 騎手
+    COMBO = "combo"      # 複合条件
+    OTHER = "other"      # その他
+
+
+@dataclass(slots=True, frozen=True)
+class FactorRule:
+    """式ベースのファクタールール（factor_rulesテーブルの1行）の型付き表現。"""
+
+    name: str
+    expression: str
+    weight: float = 1.0
+    category: str = ""
+    rule_id: int | None = None
+
+    @classmethod
+    def from_dict(cls, rule: Mapping[str, Any]) -> "FactorRule":
+        """ルールdict（get_active_rules() の行、GY_INITIAL_FACTORSの要素）から生成する。"""
+        return cls(
+            name=str(rule["rule_name"]),
+            expression=str(rule.get("sql_expression", "") or ""),
+            weight=float(rule.get("weight", 1.0)),
+            category=sys.intern(str(rule.get("category", "") or "")),
+            rule_id=rule.get("rule_id"),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class RuleSet:
+    """ルール群の列指向表現（名前・式・重みの並列配列）。
+
+    スコアリングのホットループでルールdictのキー参照を繰り返さないよう、
+    評価前に一度だけ変換して使用する。
+    """
+
+    names: tuple[str, ...]
+    expressions: tuple[str, ...]
+    weights: NDArray[np.float64]
+
+    @classmethod
+    def from_rules(cls, rules: Iterable[Mapping[str, Any] | FactorRule]) -> "RuleSet":
+        """ルールdictまたはFactorRuleのリストから生成する。"""
+        typed = [r if isinstance(r, FactorRule) else FactorRule.from_dict(r) for r in rules]
+        return cls(
+            names=tuple(r.name for r in typed),
+            expressions=tuple(r.expression for r in typed),
+            weights=np.array([r.weight for r in typed], dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
 class BaseFactor(ABC):
     """ファクタールールの基底クラス。"""
 
@@ -7,6 +7,7 @@ factor_rulesテーブルとfactor_review_logテーブルを通じて
     DRAFT → TESTING → APPROVED → DEPRECATED
 """
 
+from collections import OrderedDict
 from datetime import UTC, datetime
 from typing import Any
 
@@ -37,8 +38,14 @@ class FactorRegistry:
     全てのルール操作はfactor_review_logに変更履歴として記録される。
     """
 
+    # 時点日ごとに保持する有効ルールの件数上限（LRU）
+    ACTIVE_RULES_CACHE_SIZE = 32
+
     def __init__(self, db: DatabaseManager) -> None:
         self._db = db
+        # as_of_date → 有効ルール行。バックテストでレースごとに同じ時点日で
+        # 再取得するケースのDB往復を省く。本インスタンス経由の更新時に破棄する
+        self._active_rules_cache: OrderedDict[str, list[dict[str, Any]]] = OrderedDict()
 
     def get_active_rules(self, as_of_date: str | None = None) -> list[dict[str, Any]]:
         """有効な（APPROVED かつ is_active = 1 かつ有効期間内の）ルールを取得する。
@@ -48,6 +55,7 @@ class FactorRegistry:
                        ルールのみ返す（データリーケージ防止）。
                        training_to が NULL のルールは含める（訓練期間未記録）。
                        Noneの場合は現在時刻でフィルタ（既存動作）。
+                       時点日指定の結果はインスタンス内にキャッシュされる（clear_cache() 参照）。
 
         Returns:
             有効なルールのdictリスト（category, rule_id順）
@@ -66,18 +74,35 @@ class FactorRegistry:
                 (now, now),
             )
 
-        return self._db.execute_query(
-            """
-            SELECT * FROM factor_rules
-            WHERE review_status = 'APPROVED'
-              AND is_active = 1
-              AND (effective_from IS NULL OR effective_from <= ?)
-              AND (effective_to IS NULL OR effective_to >= ?)
-              AND (training_to IS NULL OR training_to < ?)
-            ORDER BY category, rule_id
-            """,
-            (as_of_date, as_of_date, as_of_date),
-        )
+        cached = self._active_rules_cache.get(as_of_date)
+        if cached is None:
+            cached = self._db.execute_query(
+                """
+                SELECT * FROM factor_rules
+                WHERE review_status = 'APPROVED'
+                  AND is_active = 1
+                  AND (effective_from IS NULL OR effective_from <= ?)
+                  AND (effective_to IS NULL OR effective_to >= ?)
+                  AND (training_to IS NULL OR training_to < ?)
+                ORDER BY category, rule_id
+                """,
+                (as_of_date, as_of_date, as_of_date),
+            )
+            self._active_rules_cache[as_of_date] = cached
+            if len(self._active_rules_cache) > self.ACTIVE_RULES_CACHE_SIZE:
+                self._active_rules_cache.popitem(last=False)
+        else:
+            self._active_rules_cache.move_to_end(as_of_date)
+        # 呼び出し側での変更がキャッシュに波及しないよう行dictは複製して返す
+        return [dict(row) for row in cached]
+
+    def clear_cache(self) -> None:
+        """get_active_rules(as_of_date) のキャッシュを破棄する。
+
+        本インスタンスの更新系メソッドは自動で破棄する。
+        DBを直接更新した場合や、別インスタンスで更新した場合に呼び出す。
+        """
+        self._active_rules_cache.clear()
 
     def check_training_overlap(
         self, backtest_from: str, backtest_to: str,
@@ -181,6 +206,7 @@ class FactorRegistry:
             row = cursor.fetchone()
             rule_id = row[0] if row else 0
 
+        self.clear_cache()
         self._log_change(rule_id, "CREATED", reason="新規ルール作成", changed_by=rule_data.get("changed_by", "user"))
         logger.info(f"ルール作成: {rule_data['rule_name']} (ID: {rule_id})")
         return rule_id
@@ -204,6 +230,7 @@ class FactorRegistry:
             "UPDATE factor_rules SET weight = ?, updated_at = ? WHERE rule_id = ?",
             (new_weight, now, rule_id),
         )
+        self.clear_cache()
         self._log_change(
             rule_id, "UPDATED", old_weight=old_weight, new_weight=new_weight, reason=reason, changed_by=changed_by
         )
@@ -243,6 +270,7 @@ class FactorRegistry:
             """,
             (new_status, is_active, now, now, rule_id),
         )
+        self.clear_cache()
 
         action = _STATUS_ACTION_MAP.get(new_status, "UPDATED")
         self._log_change(rule_id, action, reason=reason, changed_by=changed_by)
@@ -386,6 +414,7 @@ class FactorRegistry:
             )
             restored += 1
 
+        self.clear_cache()
         logger.info(f"Restored {restored} rules from snapshot {snapshot_id}")
         return restored
 
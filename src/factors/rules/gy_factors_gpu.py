@@ -0,0 +1,127 @@
+"""GY指数ファクターのGPU（cuDF）評価バックエンド。
+
+バックフィル等で大量の出走馬をまとめて評価する用途向け（BatchScorer の backend="cudf"）。
+複数レースを連結した評価変数の列をcuDF経由で一度だけGPUへ転送し、全ルールをGPU上で
+評価した後、評価値行列のみをホストへ戻す。1レース（18頭以下）単位では転送・同期の
+コストが演算量を上回るため、ScoringEngine のレース単位評価には使用しない。
+
+ルール式は evaluator.compile_vectorized と同じコンパイル結果を
+cupy（numpy互換API）の名前空間で実行するため、式の意味はNumPy版と同一。
+cudf / cupy が未導入の環境では is_available() が False となり、
+BatchScorer はNumPyバックエンドを使用する。
+"""
+
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from src.scoring.evaluator import (
+    VectorizedRule,
+    compile_vectorized_with,
+    evaluate_rule_vectorized,
+    make_vector_namespace,
+)
+
+
+def is_available() -> bool:
+    """cudf / cupy が利用可能かを返す。"""
+    try:
+        import cudf  # noqa: F401
+        import cupy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@lru_cache(maxsize=1)
+def _gpu_namespace() -> dict[str, Any]:
+    import cupy
+
+    return make_vector_namespace(cupy)
+
+
+@lru_cache(maxsize=512)
+def compile_gpu(expression: str) -> VectorizedRule | None:
+    """ルール式をGPU配列（cupy）上で評価する関数にコンパイルする。
+
+    Args:
+        expression: Python式文字列
+
+    Returns:
+        `f(columns) -> cupy.ndarray` の関数。変換不能な式はNone。
+    """
+    return compile_vectorized_with(expression, _gpu_namespace())
+
+
+def to_device_columns(columns: Mapping[str, NDArray[Any]]) -> dict[str, Any]:
+    """数値・真偽値の列をcuDF経由でGPUへ転送する。
+
+    文字列列（object配列）はGPU演算できないためホストに残す。
+    これらを参照するルールは評価時にエラーとなり、NumPy版で評価される。
+
+    Args:
+        columns: 変数名→np.ndarray のdict（build_eval_columns() の戻り値）
+
+    Returns:
+        変数名→cupy.ndarray（文字列列はnp.ndarrayのまま）のdict
+    """
+    import cudf
+    import pandas as pd
+
+    numeric = {name: col for name, col in columns.items() if col.dtype != object}
+    gdf = cudf.from_pandas(pd.DataFrame(numeric))
+    device: dict[str, Any] = {name: gdf[name].values for name in numeric}
+    device.update({name: col for name, col in columns.items() if col.dtype == object})
+    return device
+
+
+def evaluate_rules_gpu(
+    expressions: Sequence[str],
+    columns: Mapping[str, NDArray[Any]],
+    n_rows: int,
+) -> NDArray[np.float64]:
+    """全ルールをGPU上で評価し、評価値行列（重み適用前）を返す。
+
+    GPUで評価できないルール（文字列列の参照・型エラー・数値以外の結果・ゼロ除算による
+    非有限値等）は evaluate_rule_vectorized() で評価し、結果を行単位評価と一致させる。
+    非有限値の判定は全ルール分をまとめて1回だけホストへ戻す。
+
+    Args:
+        expressions: ルール式のリスト
+        columns: 変数名→np.ndarray のdict（複数レースを連結した列）
+        n_rows: 行数（出走馬数の合計）
+
+    Returns:
+        shape=(len(expressions), n_rows) の評価値行列（ホスト配列）
+    """
+    import cupy
+
+    if not expressions:
+        return np.zeros((0, n_rows), dtype=np.float64)
+
+    device = to_device_columns(columns)
+    out = cupy.zeros((len(expressions), n_rows), dtype=cupy.float64)
+    evaluated = np.zeros(len(expressions), dtype=bool)
+    for j, expression in enumerate(expressions):
+        fn = compile_gpu(expression) if expression.strip() else None
+        if fn is None:
+            continue
+        try:
+            values = fn(device)
+            if values is None or (isinstance(values, np.ndarray) and values.dtype == object):
+                continue
+            out[j] = cupy.asarray(values, dtype=cupy.float64)
+            evaluated[j] = True
+        except Exception as e:
+            logger.debug(f"GPU評価エラーのためNumPy評価にフォールバック ({expression[:50]}): {e}")
+
+    # ホストへの転送は有限判定と評価値行列の2回のみ
+    finite = cupy.asnumpy(cupy.isfinite(out).all(axis=1))
+    matrix: NDArray[np.float64] = cupy.asnumpy(out)
+    for k in np.flatnonzero(~(evaluated & finite)).tolist():
+        matrix[k] = evaluate_rule_vectorized(expressions[k], columns, n_rows)
+    return matrix
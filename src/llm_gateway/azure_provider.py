@@ -1,9 +1,12 @@
 """Azure AI Foundry LLMプロバイダー。"""
 
+import asyncio
 import os
+from collections.abc import AsyncIterator
 from typing import Any
 
-import requests
+import httpx
+import orjson
 from loguru import logger
 
 from src.llm_gateway.gateway import BaseLLMProvider, LLMResponse
@@ -13,14 +16,70 @@ class AzureProvider(BaseLLMProvider):
     """Azure AI Foundry経由のLLMプロバイダー。
 
     REST APIを直接使用し、openai SDKへの依存を排除。
+    httpx.AsyncClientで非同期に送信するため、複数のgenerate()をasyncio.gatherで並行実行できる。
+    応答JSONは orjson でバイト列から直接パースする。
+    クライアント（接続プール）はイベントループごとに1つ生成して再利用し、
+    呼び出しごとのTCP/TLS接続確立を避ける。
     """
 
+    MAX_CONNECTIONS = 32
+
     def __init__(self, config: dict[str, Any]) -> None:
         self._config = config
         self._endpoint = config.get("endpoint", os.environ.get("AZURE_OPENAI_ENDPOINT", ""))
         self._api_key = os.environ.get("AZURE_OPENAI_API_KEY", "")
         self._api_version = config.get("api_version", "2024-12-01-preview")
         self._timeout = config.get("timeout", 60)
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        self._closing: set[asyncio.Task[None]] = set()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """実行中のイベントループに紐づくHTTPクライアントを返す。
+
+        接続プールはイベントループに束縛されるため、ループが変わった場合
+        （呼び出しごとに新規ループを作る実行環境等）は古いクライアントを閉じて新しく生成する。
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            if self._client is not None:
+                self._discard_client(self._client, self._client_loop)
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout,
+                limits=httpx.Limits(max_connections=self.MAX_CONNECTIONS),
+                headers={"Content-Type": "application/json"},
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _discard_client(
+        self, client: httpx.AsyncClient, client_loop: asyncio.AbstractEventLoop | None,
+    ) -> None:
+        """別ループに紐づく古いクライアントの接続プールを閉じる。
+
+        元のループが別スレッドで稼働中ならそのループでaclose()を実行し、
+        停止・終了済みなら実行中のループでaclose()を行う（失敗は無視する）。
+        """
+        if client_loop is not None and client_loop.is_running() and not client_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+            return
+
+        async def aclose_quietly() -> None:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug(f"旧HTTPクライアントのクローズに失敗: {e}")
+
+        task = asyncio.get_running_loop().create_task(aclose_quietly())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close(self) -> None:
+        """HTTPクライアントの接続プールを閉じる。"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
 
     def name(self) -> str:
         return "azure"
@@ -28,24 +87,20 @@ class AzureProvider(BaseLLMProvider):
     def is_available(self) -> bool:
         return bool(self._endpoint and self._api_key)
 
-    async def generate(
+    def _build_request(
         self,
         prompt: str,
         model: str,
-        system_prompt: str = "",
-        temperature: float = 0.7,
-        max_tokens: int = 4096,
-    ) -> LLMResponse:
-        """Azure AI Foundry REST API経由でテキスト生成を実行する。"""
+        system_prompt: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> tuple[str, dict[str, Any]]:
+        """Chat Completions APIのURLとリクエストボディを組み立てる。"""
         endpoint = self._endpoint.rstrip("/")
         url = (
             f"{endpoint}/openai/deployments/{model}"
             f"/chat/completions?api-version={self._api_version}"
         )
-        headers = {
-            "Content-Type": "application/json",
-            "api-key": self._api_key,
-        }
 
         messages: list[dict[str, str]] = []
         if system_prompt:
@@ -60,13 +115,26 @@ class AzureProvider(BaseLLMProvider):
         else:
             body["temperature"] = temperature
             body["max_tokens"] = max_tokens
+        return url, body
 
-        resp = requests.post(url, headers=headers, json=body, timeout=self._timeout)
+    async def generate(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> LLMResponse:
+        """Azure AI Foundry REST API経由でテキスト生成を実行する。"""
+        url, body = self._build_request(prompt, model, system_prompt, temperature, max_tokens)
+        headers = {"api-key": self._api_key}
+
+        resp = await self._get_client().post(url, headers=headers, json=body)
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
 
         content = data["choices"][0]["message"]["content"]
-        usage_data = data.get("usage", {})
+        usage_data = data.get("usage") or {}
         usage = {
             "prompt_tokens": usage_data.get("prompt_tokens", 0),
             "completion_tokens": usage_data.get("completion_tokens", 0),
@@ -81,3 +149,29 @@ class AzureProvider(BaseLLMProvider):
             usage=usage,
             raw_response=data,
         )
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> AsyncIterator[str]:
+        """Azure AI Foundry REST API（SSE）で生成テキストを逐次返す。"""
+        url, body = self._build_request(prompt, model, system_prompt, temperature, max_tokens)
+        body["stream"] = True
+        headers = {"api-key": self._api_key}
+
+        async with self._get_client().stream("POST", url, headers=headers, json=body) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                choices = orjson.loads(payload).get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if delta:
+                    yield delta
@@ -1,5 +1,6 @@
 """LLM Gatewayの設定管理モジュール。"""
 
+import copy
 from pathlib import Path
 from typing import Any
 
@@ -8,6 +9,7 @@ from loguru import logger
 
 from src.llm_gateway.azure_provider import AzureProvider
 from src.llm_gateway.gateway import LLMGateway
+from src.llm_gateway.response_cache import LLMResponseCache
 from src.llm_gateway.vertex_provider import VertexProvider
 
 
@@ -16,7 +18,11 @@ def create_gateway(config_path: str | None = None) -> LLMGateway:
     config = _load_config(config_path)
     llm_config = config.get("llm_gateway", {})
 
-    gateway = LLMGateway(llm_config)
+    # 応答キャッシュ（temperature≒0の生成のみ対象）
+    cache_config = llm_config.get("response_cache", {})
+    cache = LLMResponseCache(cache_config.get("path", "data/llm_cache.db")) if cache_config.get("enabled") else None
+
+    gateway = LLMGateway(llm_config, cache=cache)
 
     # Azure AI Foundryプロバイダー
     azure_config = llm_config.get("azure", {})
@@ -39,15 +45,35 @@ def create_gateway(config_path: str | None = None) -> LLMGateway:
     return gateway
 
 
+# libyaml（C実装）が利用可能な場合はCSafeLoaderを使用
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# (絶対パス, 更新時刻ns) → パース済み設定
+_CONFIG_CACHE: dict[tuple[str, int], dict[str, Any]] = {}
+
+
 def _load_config(config_path: str | None = None) -> dict[str, Any]:
-    """設定ファイルをロードする。"""
+    """設定ファイルをロードする。
+
+    パース結果はファイルパスと更新時刻をキーにキャッシュし、ファイルが
+    更新されるまで再パースしない。呼び出し側での変更がキャッシュに波及しないよう複製を返す。
+    """
     if config_path is None:
         config_path = "config/config.yaml"
 
     path = Path(config_path)
-    if not path.exists():
+    try:
+        key = (str(path.resolve()), path.stat().st_mtime_ns)
+    except OSError:
         logger.warning(f"設定ファイルが見つかりません: {path}")
         return {}
 
-    with open(path, encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+    cached = _CONFIG_CACHE.get(key)
+    if cached is None:
+        with open(path, encoding="utf-8") as f:
+            cached = yaml.load(f, Loader=_YAML_LOADER) or {}  # noqa: S506
+        # 同一ファイルの古い世代は破棄する
+        for stale in [k for k in _CONFIG_CACHE if k[0] == key[0]]:
+            del _CONFIG_CACHE[stale]
+        _CONFIG_CACHE[key] = cached
+    return copy.deepcopy(cached)
@@ -7,14 +7,28 @@ Azure AI FoundryとGCP Vertex AIを統一的に利用する
     config.yamlのmodel_routingセクションで、用途(use_case)ごとに
     プライマリ/フォールバックのモデルパス("provider/model_key")を指定。
     プライマリが失敗した場合、自動的にフォールバックに切替。
+    hedge_msを指定した用途では、プライマリがhedge_ms以内に応答しない場合に
+    フォールバックを並行して起動し、先に成功した応答を採用する（ヘッジリクエスト）。
+
+同時実行数制限:
+    プロバイダー設定の max_concurrency（既定: DEFAULT_MAX_CONCURRENCY）を上限として、
+    プロバイダーごとに実行中のAPI呼び出し数をセマフォで制限する。
+    asyncio.gather で大量の generate() を発行してもレート制限（429）を誘発しない。
 """
 
+import asyncio
+import sqlite3
+import time
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from loguru import logger
 
+if TYPE_CHECKING:
+    from src.llm_gateway.response_cache import LLMResponseCache
+
 
 @dataclass
 class LLMResponse:
@@ -40,6 +54,7 @@ class BaseLLMProvider(ABC):
 
     新しいプロバイダーを追加する場合はこのクラスを継承し、
     name(), generate(), is_available() を実装する。
+    ストリーミングに対応するプロバイダーは generate_stream() をオーバーライドする。
     """
 
     @abstractmethod
@@ -70,6 +85,33 @@ class BaseLLMProvider(ABC):
         """
         ...
 
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> AsyncIterator[str]:
+        """生成テキストをチャンク単位で逐次返す。
+
+        既定実装は generate() の完了を待って全文を1チャンクとして返す。
+
+        Args:
+            generate() と同じ
+
+        Yields:
+            生成テキストのチャンク
+        """
+        response = await self.generate(
+            prompt=prompt,
+            model=model,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        yield response.content
+
     @abstractmethod
     def is_available(self) -> bool:
         """プロバイダーが利用可能か確認する（認証情報の有無等）。"""
@@ -81,11 +123,30 @@ class LLMGateway:
 
     model_routingの設定に基づき、用途ごとに最適なモデルを選択。
     プライマリ失敗時は自動的にフォールバックに切替。
+
+    モデルパス（"provider/model_key"）→（プロバイダー, モデルID）の解決結果は
+    初回にキャッシュし、プロバイダー登録時に破棄する。プロバイダーの
+    is_available() の結果は AVAILABILITY_TTL 秒間再利用する。
+    API呼び出しはプロバイダーごとのセマフォで同時実行数を制限する。
+    応答キャッシュ指定時は temperature≒0 の応答をディスクに保存して再利用する。
     """
 
-    def __init__(self, config: dict[str, Any]) -> None:
+    AVAILABILITY_TTL = 30.0
+    DEFAULT_MAX_CONCURRENCY = 16
+
+    def __init__(self, config: dict[str, Any], cache: "LLMResponseCache | None" = None) -> None:
+        """
+        Args:
+            config: llm_gateway設定（model_routing, プロバイダー別設定）
+            cache: 応答キャッシュ（temperature≒0の生成のみ使用。Noneでキャッシュなし）
+        """
         self._config = config
+        self._cache = cache
+        self._routing: dict[str, dict[str, Any]] = config.get("model_routing", {})
         self._providers: dict[str, BaseLLMProvider] = {}
+        self._resolved: dict[str, tuple[BaseLLMProvider, str] | None] = {}
+        self._availability: dict[str, tuple[bool, float]] = {}
+        self._semaphores: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
 
     def register_provider(self, provider: BaseLLMProvider) -> None:
         """プロバイダーを登録する。
@@ -94,6 +155,9 @@ class LLMGateway:
             provider: BaseLLMProviderの実装インスタンス
         """
         self._providers[provider.name()] = provider
+        self._resolved.clear()
+        self._availability.pop(provider.name(), None)
+        self._semaphores.pop(provider.name(), None)
         logger.info(f"LLMプロバイダー登録: {provider.name()}")
 
     async def generate(
@@ -107,6 +171,8 @@ class LLMGateway:
         """用途に応じたモデルでテキスト生成を実行する。
 
         プライマリモデルが失敗した場合、フォールバックモデルに自動切替する。
+        model_routing.<use_case>.hedge_ms が設定されている場合は、プライマリが
+        その時間内に応答しなければフォールバックを並行起動し、先に成功した応答を返す。
 
         Args:
             use_case: 用途キー（factor_generation, race_analysis等）
@@ -121,9 +187,19 @@ class LLMGateway:
         Raises:
             RuntimeError: プライマリ・フォールバック両方失敗した場合
         """
-        routing = self._config.get("model_routing", {}).get(use_case, {})
+        routing = self._routing.get(use_case, {})
         primary = routing.get("primary", "")
         fallback = routing.get("fallback", "")
+        hedge_ms = routing.get("hedge_ms")
+
+        if primary and fallback and hedge_ms is not None:
+            hedged = await self._generate_hedged(
+                primary, fallback, float(hedge_ms) / 1000.0,
+                prompt, system_prompt, temperature, max_tokens,
+            )
+            if hedged:
+                return hedged
+            raise RuntimeError(f"用途 '{use_case}' で利用可能なモデルがありません")
 
         # プライマリモデルで試行
         if primary:
@@ -141,47 +217,218 @@ class LLMGateway:
 
         raise RuntimeError(f"用途 '{use_case}' で利用可能なモデルがありません")
 
-    async def _try_generate(
+    async def generate_stream(
         self,
-        model_path: str,
+        use_case: str,
+        prompt: str,
+        system_prompt: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> AsyncIterator[str]:
+        """用途に応じたモデルで生成テキストをチャンク単位で逐次返す。
+
+        最初のチャンクを受信する前にプライマリが失敗した場合はフォールバックに切替える。
+        受信開始後のエラーは呼び出し側に送出する（部分出力の重複を避けるため）。
+
+        Args:
+            generate() と同じ
+
+        Yields:
+            生成テキストのチャンク
+
+        Raises:
+            RuntimeError: プライマリ・フォールバック両方が開始前に失敗した場合
+        """
+        routing = self._routing.get(use_case, {})
+        for model_path in (routing.get("primary", ""), routing.get("fallback", "")):
+            if not model_path:
+                continue
+            resolved = self._resolve(model_path)
+            if resolved is None:
+                continue
+            provider, model_id = resolved
+            if not self._is_available(provider):
+                logger.warning(f"プロバイダー {provider.name()} は現在利用不可")
+                continue
+
+            started = False
+            try:
+                async with self._semaphore(provider):
+                    async for chunk in provider.generate_stream(
+                        prompt=prompt,
+                        model=model_id,
+                        system_prompt=system_prompt,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                    ):
+                        started = True
+                        yield chunk
+                return
+            except Exception as e:
+                if started:
+                    raise
+                logger.error(f"モデル {model_path} (ID: {model_id}) でストリーミング開始エラー: {e}")
+
+        raise RuntimeError(f"用途 '{use_case}' で利用可能なモデルがありません")
+
+    async def _generate_hedged(
+        self,
+        primary: str,
+        fallback: str,
+        hedge_delay: float,
         prompt: str,
         system_prompt: str,
         temperature: float,
         max_tokens: int,
     ) -> LLMResponse | None:
-        """指定モデルでの生成を試行する。
+        """プライマリを起動し、hedge_delay秒以内に成功しなければフォールバックと競争させる。
+
+        プライマリが hedge_delay 以内に失敗した場合は即座にフォールバックを起動する。
+        先に成功した応答を採用し、残りのタスクはキャンセルする。
+        """
+        args = (prompt, system_prompt, temperature, max_tokens)
+        primary_task = asyncio.create_task(self._try_generate(primary, *args))
+        done, _ = await asyncio.wait({primary_task}, timeout=hedge_delay)
+        if done:
+            result = primary_task.result()
+            if result:
+                return result
+            logger.warning(f"プライマリモデル {primary} 失敗。フォールバックに切替")
+            return await self._try_generate(fallback, *args)
+
+        logger.info(f"プライマリモデル {primary} が{hedge_delay * 1000:.0f}ms以内に応答せず。フォールバックを並行起動")
+        pending: set[asyncio.Task[LLMResponse | None]] = {
+            primary_task,
+            asyncio.create_task(self._try_generate(fallback, *args)),
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result:
+                        return result
+        finally:
+            for task in pending:
+                task.cancel()
+        logger.error(f"プライマリ {primary}・フォールバック {fallback} ともに失敗")
+        return None
+
+    def _resolve(self, model_path: str) -> tuple[BaseLLMProvider, str] | None:
+        """モデルパスを（プロバイダー, モデルID）に解決する（結果はキャッシュ）。
 
         model_pathの形式: "provider_name/model_key"
         （例: "azure/claude", "vertex/gemini"）
         """
+        if model_path in self._resolved:
+            return self._resolved[model_path]
+
+        resolved: tuple[BaseLLMProvider, str] | None = None
         parts = model_path.split("/", 1)
         if len(parts) != 2:
             logger.error(f"不正なモデルパス（'provider/model_key' 形式が必要）: {model_path}")
-            return None
+        elif parts[0] not in self._providers:
+            logger.error(f"未登録プロバイダー: {parts[0]}")
+        else:
+            provider_name, model_key = parts
+            # プロバイダー設定からモデルIDを解決
+            models = self._config.get(provider_name, {}).get("models", {})
+            resolved = (self._providers[provider_name], models.get(model_key, model_key))
+        self._resolved[model_path] = resolved
+        return resolved
+
+    def _is_available(self, provider: BaseLLMProvider) -> bool:
+        """provider.is_available() の結果をAVAILABILITY_TTL秒間キャッシュして返す。"""
+        now = time.monotonic()
+        cached = self._availability.get(provider.name())
+        if cached is not None and now - cached[1] < self.AVAILABILITY_TTL:
+            return cached[0]
+        available = provider.is_available()
+        self._availability[provider.name()] = (available, now)
+        return available
+
+    def _semaphore(self, provider: BaseLLMProvider) -> asyncio.Semaphore:
+        """実行中のイベントループにおけるプロバイダーの同時実行数制限セマフォを返す。
+
+        セマフォはイベントループに束縛されるため、ループが変わった場合は作り直す。
+        """
+        loop = asyncio.get_running_loop()
+        cached = self._semaphores.get(provider.name())
+        if cached is not None and cached[0] is loop:
+            return cached[1]
+        limit = self._config.get(provider.name(), {}).get("max_concurrency", self.DEFAULT_MAX_CONCURRENCY)
+        semaphore = asyncio.Semaphore(max(int(limit), 1))
+        self._semaphores[provider.name()] = (loop, semaphore)
+        return semaphore
 
-        provider_name, model_key = parts
-        provider = self._providers.get(provider_name)
-        if not provider:
-            logger.error(f"未登録プロバイダー: {provider_name}")
+    async def _try_generate(
+        self,
+        model_path: str,
+        prompt: str,
+        system_prompt: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> LLMResponse | None:
+        """指定モデルでの生成を試行する。
+
+        model_pathの形式: "provider_name/model_key"
+        （例: "azure/claude", "vertex/gemini"）
+        """
+        resolved = self._resolve(model_path)
+        if resolved is None:
             return None
+        provider, model_id = resolved
 
-        if not provider.is_available():
-            logger.warning(f"プロバイダー {provider_name} は現在利用不可")
+        if not self._is_available(provider):
+            logger.warning(f"プロバイダー {provider.name()} は現在利用不可")
             return None
 
-        # プロバイダー設定からモデルIDを解決
-        provider_config = self._config.get(provider_name, {})
-        models = provider_config.get("models", {})
-        model_id = models.get(model_key, model_key)
+        cache_key = None
+        if self._cache is not None:
+            cache_key = self._cache.make_key(
+                provider.name(), model_id, prompt, system_prompt, temperature, max_tokens,
+            )
+            cached = await self._cache_get(self._cache, cache_key) if cache_key else None
+            if cached is not None:
+                logger.debug(f"LLM応答キャッシュヒット: {model_path}")
+                return cached
 
         try:
-            return await provider.generate(
-                prompt=prompt,
-                model=model_id,
-                system_prompt=system_prompt,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
+            async with self._semaphore(provider):
+                response = await provider.generate(
+                    prompt=prompt,
+                    model=model_id,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
         except Exception as e:
             logger.error(f"モデル {model_path} (ID: {model_id}) でエラー: {e}")
             return None
+
+        if self._cache is not None and cache_key:
+            await self._cache_put(self._cache, cache_key, response)
+        return response
+
+    @staticmethod
+    async def _cache_get(cache: "LLMResponseCache", key: str) -> LLMResponse | None:
+        """キャッシュを別スレッドで参照する（SQLiteの待ちでイベントループを止めない）。
+
+        読み込みに失敗した場合はキャッシュミスとして扱う。
+        """
+        try:
+            return await asyncio.to_thread(cache.get, key)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"LLM応答キャッシュの読み込みに失敗（ミスとして扱う）: {e}")
+            return None
+
+    @staticmethod
+    async def _cache_put(cache: "LLMResponseCache", key: str, response: LLMResponse) -> None:
+        """応答を別スレッドでキャッシュに保存する。
+
+        保存に失敗しても取得済みの応答は返せるよう、ログのみ出して続行する。
+        """
+        try:
+            await asyncio.to_thread(cache.put, key, response)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"LLM応答キャッシュの保存に失敗（スキップ）: {e}")
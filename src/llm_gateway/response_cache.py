@@ -0,0 +1,90 @@
+"""LLM応答のディスクキャッシュ。
+
+temperature≒0の生成は同一入力に対してほぼ決定的なため、
+（プロバイダー, モデルID, システムプロンプト, プロンプト, temperature, max_tokens）の
+SHA-256をキーとしてSQLiteに応答を保存し、パイプライン再実行時のAPI呼び出しを省く。
+raw_response はプロバイダー固有オブジェクトのため保存しない。
+"""
+
+import hashlib
+import json
+from datetime import UTC, datetime
+
+from src.data.db import DatabaseManager
+from src.llm_gateway.gateway import LLMResponse
+
+# キャッシュ対象とするtemperatureの上限
+CACHEABLE_MAX_TEMPERATURE = 0.01
+
+
+class LLMResponseCache:
+    """SQLiteベースのLLM応答キャッシュ。"""
+
+    def __init__(self, db_path: str = "data/llm_cache.db") -> None:
+        """
+        Args:
+            db_path: キャッシュDBファイルパス（存在しない場合は自動生成）
+        """
+        self._db = DatabaseManager(db_path)
+        self._db.execute_write(
+            """
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                model TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                usage TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        prompt: str,
+        system_prompt: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> str | None:
+        """キャッシュキーを生成する。キャッシュ対象外（temperatureが高い）場合はNone。"""
+        if temperature > CACHEABLE_MAX_TEMPERATURE:
+            return None
+        # 区切り文字の連結では "a|b"+"c" と "a"+"b|c" が衝突するため、JSON配列で一意に符号化する
+        source = json.dumps([provider, model, system_prompt, prompt, temperature, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> LLMResponse | None:
+        """キャッシュ済み応答を返す。未登録の場合はNone。"""
+        rows = self._db.execute_query(
+            "SELECT content, model, provider, usage FROM llm_response_cache WHERE cache_key = ?",
+            (key,),
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return LLMResponse(
+            content=row["content"],
+            model=row["model"],
+            provider=row["provider"],
+            usage=json.loads(row["usage"]),
+        )
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        """応答をキャッシュに保存する（同一キーは上書き）。"""
+        self._db.execute_write(
+            """
+            INSERT OR REPLACE INTO llm_response_cache
+            (cache_key, content, model, provider, usage, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                key,
+                response.content,
+                response.model,
+                response.provider,
+                json.dumps(response.usage),
+                datetime.now(UTC).isoformat(),
+            ),
+        )
@@ -1,6 +1,8 @@
 """GCP Vertex AI LLMプロバイダー。"""
 
+import asyncio
 import os
+from collections.abc import AsyncIterator
 from typing import Any
 
 from loguru import logger
@@ -9,12 +11,26 @@ from src.llm_gateway.gateway import BaseLLMProvider, LLMResponse
 
 
 class VertexProvider(BaseLLMProvider):
-    """GCP Vertex AI経由のLLMプロバイダー。"""
+    """GCP Vertex AI経由のLLMプロバイダー。
+
+    SDKの初期化（vertexai.init）はプロバイダーごとに初回のみ行い、
+    生成呼び出しは generate_content_async（未提供のSDKではスレッド実行）で
+    イベントループをブロックせずに実行する。
+    """
 
     def __init__(self, config: dict[str, Any]) -> None:
         self._config = config
         self._project_id = config.get("project_id", os.environ.get("GCP_PROJECT_ID", ""))
         self._location = config.get("location", "us-central1")
+        self._initialized = False
+
+    def _ensure_initialized(self) -> None:
+        """vertexai.init を初回のみ実行する。"""
+        if not self._initialized:
+            import vertexai
+
+            vertexai.init(project=self._project_id, location=self._location)
+            self._initialized = True
 
     def name(self) -> str:
         return "vertex"
@@ -22,6 +38,16 @@ class VertexProvider(BaseLLMProvider):
     def is_available(self) -> bool:
         return bool(self._project_id) and not self._project_id.startswith("your-")
 
+    def _build_model(self, model: str, system_prompt: str) -> Any:
+        """SDKを初期化し、GenerativeModelを生成する。"""
+        from vertexai.generative_models import GenerativeModel
+
+        self._ensure_initialized()
+        return GenerativeModel(
+            model_name=model,
+            system_instruction=system_prompt if system_prompt else None,
+        )
+
     async def generate(
         self,
         prompt: str,
@@ -31,23 +57,19 @@ class VertexProvider(BaseLLMProvider):
         max_tokens: int = 4096,
     ) -> LLMResponse:
         """Vertex AI経由でテキスト生成を実行する。"""
-        import vertexai
-        from vertexai.generative_models import GenerativeModel
-
-        vertexai.init(project=self._project_id, location=self._location)
-
-        generative_model = GenerativeModel(
-            model_name=model,
-            system_instruction=system_prompt if system_prompt else None,
-        )
-
-        response = generative_model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": temperature,
-                "max_output_tokens": max_tokens,
-            },
-        )
+        generative_model = self._build_model(model, system_prompt)
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+        }
+        if hasattr(generative_model, "generate_content_async"):
+            response = await generative_model.generate_content_async(
+                prompt, generation_config=generation_config,
+            )
+        else:
+            response = await asyncio.to_thread(
+                generative_model.generate_content, prompt, generation_config=generation_config,
+            )
 
         content = response.text if response.text else ""
         usage = {
@@ -64,3 +86,34 @@ class VertexProvider(BaseLLMProvider):
             usage=usage,
             raw_response=response,
         )
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> AsyncIterator[str]:
+        """Vertex AIのストリーミング生成でテキストを逐次返す。"""
+        generative_model = self._build_model(model, system_prompt)
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+        }
+        if hasattr(generative_model, "generate_content_async"):
+            stream = await generative_model.generate_content_async(
+                prompt, generation_config=generation_config, stream=True,
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+            return
+
+        # 非同期APIがないSDKでは同期イテレータをスレッドで1チャンクずつ進める
+        iterator = iter(generative_model.generate_content(
+            prompt, generation_config=generation_config, stream=True,
+        ))
+        while (chunk := await asyncio.to_thread(next, iterator, None)) is not None:
+            if chunk.text:
+                yield chunk.text
@@ -1,16 +1,26 @@
 """通知システム。
 
 Slack Webhook / SMTP Email / コンソールログの3チャネルで通知を送信する。
+Slack・Emailの送信（TLS接続・SMTPログイン等で数秒かかる）は既定でバックグラウンドの
+スレッドプールに投入し、呼び出し元のパイプラインを待たせない。
+Slack Webhookへの送信は接続プール付きのHTTPクライアント、Emailは認証済みのSMTP接続を
+再利用し、通知ごとのTLSハンドシェイク・SMTPログインを避ける。
 """
 
+import hashlib
 import json
 import smtplib
-import urllib.error
-import urllib.request
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from email.mime.text import MIMEText
+from types import MappingProxyType
 from typing import Any
 
+import httpx
 from loguru import logger
 
 
@@ -33,18 +43,46 @@ class NotificationConfig:
     # 通知レベル閾値
     min_level: str = "INFO"  # DEBUG / INFO / WARNING / ERROR
 
+    # 送信方式: True=呼び出しスレッドで同期送信 / False=バックグラウンド送信
+    sync: bool = False
+    # バックグラウンド送信失敗時の再試行回数（指数バックオフ: retry_backoff × 2^n 秒）
+    max_retries: int = 3
+    retry_backoff: float = 1.0
+
+    # 同一内容（タイトル・本文・レベル・データ）の通知を抑止する秒数（0で無効）
+    dedup_ttl: float = 7200.0
+
 
 class Notifier:
     """マルチチャネル通知クラス。
 
     Slack Webhook、SMTP Email、コンソールログの3チャネルをサポート。
     設定されていないチャネルはスキップされる。
+    config.sync=False（既定）の場合、Slack・Emailはバックグラウンドで送信し、
+    send() の戻り値は送信キューへの投入可否を表す。完了を待つ場合は flush() を呼ぶか、
+    send(..., sync=True) で呼び出しスレッドから送信して送信成否を受け取る。
+    同一内容の通知は config.dedup_ttl 秒間再送しない（再スコアリング・再試行時の重複防止）。
+    ただし有効な外部チャネルがいずれも送信に失敗した場合は記録を取り消し、次回の再送を許す。
     """
 
     LEVEL_ORDER = {"DEBUG": 0, "INFO": 1, "WARNING": 2, "ERROR": 3}
+    SLACK_EMOJI = MappingProxyType({
+        "DEBUG": ":mag:", "INFO": ":white_check_mark:",
+        "WARNING": ":warning:", "ERROR": ":x:",
+    })
+    MAX_WORKERS = 2
+    DEDUP_MAX_ENTRIES = 1024
 
     def __init__(self, config: NotificationConfig | None = None) -> None:
         self._config = config or NotificationConfig()
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: set[Future[bool]] = set()
+        self._pending_lock = threading.Lock()
+        self._sent: OrderedDict[str, float] = OrderedDict()
+        self._sent_lock = threading.Lock()
+        self._http: httpx.Client | None = None
+        self._smtp: smtplib.SMTP | None = None
+        self._smtp_lock = threading.Lock()
 
     def send(
         self,
@@ -52,6 +90,7 @@ class Notifier:
         message: str,
         level: str = "INFO",
         data: dict[str, Any] | None = None,
+        sync: bool | None = None,
     ) -> dict[str, bool]:
         """通知を送信する。
 
@@ -60,22 +99,183 @@ class Notifier:
             message: 本文
             level: ログレベル (DEBUG/INFO/WARNING/ERROR)
             data: 追加データ（JSON化して付加）
+            sync: Trueで呼び出しスレッドで送信し、送信完了まで待つ（Noneで config.sync に従う）。
+                エラー通知など、配信結果を確認したい場合に指定する
 
         Returns:
-            チャネルごとの送信結果 {"slack": bool, "email": bool, "console": bool}
+            チャネルごとの結果 {"slack": bool, "email": bool, "console": bool}。
+            同期送信では送信成否、バックグラウンド送信ではSlack・Emailの値は
+            送信キューへの投入可否を表す（投入後の送信失敗は反映されない）。
         """
+        if sync is None:
+            sync = self._config.sync
         min_lvl = self.LEVEL_ORDER.get(self._config.min_level, 1)
         cur_lvl = self.LEVEL_ORDER.get(level, 1)
         if cur_lvl < min_lvl:
             return {"slack": False, "email": False, "console": False}
+        digest = self._dedup_digest(title, message, level, data)
+        claimed_at = self._claim(digest) if digest is not None else None
+        if digest is not None and claimed_at is None:
+            logger.debug(f"同一内容の通知を抑止: {title}")
+            return {"slack": False, "email": False, "console": False}
+
+        console = self._send_console(title, message, level, data)
+        slack_enabled = bool(self._config.slack_webhook_url)
+        email_enabled = bool(self._config.smtp_host and self._config.email_to)
+        slack = self._dispatch(self._send_slack, slack_enabled, sync, title, message, level, data)
+        email = self._dispatch(self._send_email, email_enabled, sync, title, message, level, data)
+        if digest is not None and claimed_at is not None:
+            outcomes = [o for o, enabled in ((slack, slack_enabled), (email, email_enabled)) if enabled]
+            self._release_unless_delivered(digest, claimed_at, outcomes)
 
         results = {
-            "console": self._send_console(title, message, level, data),
-            "slack": self._send_slack(title, message, level, data),
-            "email": self._send_email(title, message, level, data),
+            "console": console,
+            "slack": slack if isinstance(slack, bool) else True,
+            "email": email if isinstance(email, bool) else True,
         }
         return results
 
+    def _dedup_digest(self, title: str, message: str, level: str, data: dict[str, Any] | None) -> str | None:
+        """重複判定用のダイジェストを返す（dedup_ttl<=0 で重複抑止が無効な場合はNone）。"""
+        if self._config.dedup_ttl <= 0:
+            return None
+        source = json.dumps([title, message, level, data], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.md5(source.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+    def _claim(self, digest: str) -> float | None:
+        """dedup_ttl 秒以内に同一内容を送信（または送信中）でなければ記録し、記録時刻を返す。
+
+        送信済み・送信中の場合はNoneを返す。判定と記録はバックグラウンド送信スレッドからの
+        取り消しと競合しないよう _sent_lock 下で行う。
+        """
+        ttl = self._config.dedup_ttl
+        now = time.monotonic()
+        with self._sent_lock:
+            # 期限切れを古い順に除去
+            while self._sent:
+                oldest, sent_at = next(iter(self._sent.items()))
+                if now - sent_at < ttl and len(self._sent) < self.DEDUP_MAX_ENTRIES:
+                    break
+                self._sent.pop(oldest)
+
+            if digest in self._sent:
+                return None
+            self._sent[digest] = now
+            return now
+
+    def _release_unless_delivered(
+        self, digest: str, claimed_at: float, outcomes: "list[bool | Future[bool]]",
+    ) -> None:
+        """有効な外部チャネルがいずれも送信に成功しなかった場合、記録を取り消して再送を許す。
+
+        バックグラウンド送信では全チャネルの完了時（再試行を含む）に判定する。
+        外部チャネルが未設定（コンソールのみ）の場合は記録を残す。
+        """
+        if not outcomes:
+            return
+
+        def release_if_failed(_: "Future[bool] | None" = None) -> None:
+            if not all(not isinstance(o, Future) or o.done() for o in outcomes):
+                return
+            if any(self._succeeded(o) for o in outcomes):
+                return
+            with self._sent_lock:
+                if self._sent.get(digest) == claimed_at:
+                    del self._sent[digest]
+
+        futures = [o for o in outcomes if isinstance(o, Future)]
+        if not futures:
+            release_if_failed()
+        for future in futures:
+            future.add_done_callback(release_if_failed)
+
+    @staticmethod
+    def _succeeded(outcome: "bool | Future[bool]") -> bool:
+        if isinstance(outcome, bool):
+            return outcome
+        return outcome.exception() is None and outcome.result()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """バックグラウンド送信中の通知の完了を待つ。
+
+        Args:
+            timeout: 最大待機秒数（Noneで無制限）
+
+        Returns:
+            全通知の送信処理が完了した場合True
+        """
+        with self._pending_lock:
+            pending = list(self._pending)
+        if not pending:
+            return True
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+    def close(self) -> None:
+        """未送信の通知の完了を待ち、送信スレッドとHTTP接続を終了する。"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        with self._smtp_lock:
+            self._close_smtp()
+
+    def _http_client(self) -> httpx.Client:
+        """Slack送信用のHTTPクライアント（keep-alive接続を再利用）を返す。"""
+        if self._http is None:
+            self._http = httpx.Client(
+                timeout=10,
+                limits=httpx.Limits(max_connections=self.MAX_WORKERS * 2),
+                headers={"Content-Type": "application/json"},
+            )
+        return self._http
+
+    def _dispatch(
+        self,
+        send_fn: Callable[[str, str, str, dict[str, Any] | None], bool],
+        enabled: bool,
+        sync: bool,
+        title: str,
+        message: str,
+        level: str,
+        data: dict[str, Any] | None,
+    ) -> "bool | Future[bool]":
+        """チャネル送信を同期実行した結果、またはバックグラウンドに投入したFutureを返す。"""
+        if sync:
+            return send_fn(title, message, level, data)
+        if not enabled:
+            return False
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="notifier")
+        future = self._executor.submit(self._send_with_retry, send_fn, title, message, level, data)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future: "Future[bool]") -> None:
+        with self._pending_lock:
+            self._pending.discard(future)
+
+    def _send_with_retry(
+        self,
+        send_fn: Callable[[str, str, str, dict[str, Any] | None], bool],
+        title: str,
+        message: str,
+        level: str,
+        data: dict[str, Any] | None,
+    ) -> bool:
+        """送信に失敗した場合、指数バックオフで再試行する（バックグラウンドスレッドで実行）。"""
+        for attempt in range(self._config.max_retries + 1):
+            if send_fn(title, message, level, data):
+                return True
+            if attempt < self._config.max_retries:
+                time.sleep(self._config.retry_backoff * 2 ** attempt)
+        logger.error(f"通知送信失敗（{self._config.max_retries}回再試行）: {title}")
+        return False
+
     def notify_bet_result(self, bet_summary: dict[str, Any]) -> dict[str, bool]:
         """ベット結果を通知する。"""
         total = bet_summary.get("total_bets", 0)
@@ -122,19 +322,22 @@ class Notifier:
     def _send_console(
         self, title: str, message: str, level: str, data: dict[str, Any] | None
     ) -> bool:
-        """コンソール（loguru）に通知する。"""
+        """コンソール（loguru）に通知する。
+
+        本文の組み立て（dataのJSON化を含む）はloguruの遅延評価に任せ、
+        どのシンクもそのレベルを受け付けない場合は行わない。
+        """
+        log_level = level if level in self.LEVEL_ORDER else "INFO"
+        logger.opt(lazy=True).log(log_level, "{}", lambda: self._console_text(title, message, data))
+        return True
+
+    @staticmethod
+    def _console_text(title: str, message: str, data: dict[str, Any] | None) -> str:
+        """コンソール通知の本文を組み立てる。"""
         log_msg = f"[通知] {title}\n{message}"
         if data:
             log_msg += f"\ndata={json.dumps(data, ensure_ascii=False, default=str)[:500]}"
-
-        log_fn = {
-            "DEBUG": logger.debug,
-            "INFO": logger.info,
-            "WARNING": logger.warning,
-            "ERROR": logger.error,
-        }.get(level, logger.info)
-        log_fn(log_msg)
-        return True
+        return log_msg
 
     def _send_slack(
         self, title: str, message: str, level: str, data: dict[str, Any] | None
@@ -144,11 +347,7 @@ class Notifier:
         if not url:
             return False
 
-        emoji_map = {
-            "DEBUG": ":mag:", "INFO": ":white_check_mark:",
-            "WARNING": ":warning:", "ERROR": ":x:",
-        }
-        emoji = emoji_map.get(level, ":bell:")
+        emoji = self.SLACK_EMOJI.get(level, ":bell:")
         payload = {
             "text": f"{emoji} *{title}*\n```{message}```",
         }
@@ -156,15 +355,10 @@ class Notifier:
             payload["channel"] = self._config.slack_channel
 
         try:
-            req = urllib.request.Request(
-                url,
-                data=json.dumps(payload).encode("utf-8"),
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                return bool(resp.status == 200)
-        except (urllib.error.URLError, Exception) as e:
+            resp = self._http_client().post(url, content=json.dumps(payload).encode("utf-8"))
+            logger.trace(f"Slack応答: status={resp.status_code}")
+            return resp.status_code == 200
+        except Exception as e:
             logger.error(f"Slack通知エラー: {e}")
             return False
 
@@ -186,12 +380,49 @@ class Notifier:
             msg["From"] = cfg.email_from or cfg.smtp_user
             msg["To"] = ", ".join(cfg.email_to)
 
-            with smtplib.SMTP(cfg.smtp_host, cfg.smtp_port, timeout=15) as server:
-                server.starttls()
-                if cfg.smtp_user and cfg.smtp_password:
-                    server.login(cfg.smtp_user, cfg.smtp_password)
-                server.send_message(msg)
+            with self._smtp_lock:
+                try:
+                    self._ensure_smtp().send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # NOOP確認後に切断された場合は1回だけ再接続して再送
+                    self._smtp = None
+                    self._ensure_smtp().send_message(msg)
             return True
         except Exception as e:
             logger.error(f"Email通知エラー: {e}")
             return False
+
+    def _ensure_smtp(self) -> smtplib.SMTP:
+        """認証済みのSMTP接続を返す（_smtp_lock 保持下で呼ぶ）。
+
+        既存接続はNOOPで生存確認し、切断されていれば接続・STARTTLS・ログインをやり直す。
+        """
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._close_smtp()
+
+        cfg = self._config
+        server = smtplib.SMTP(cfg.smtp_host, cfg.smtp_port, timeout=15)
+        try:
+            server.starttls()
+            if cfg.smtp_user and cfg.smtp_password:
+                server.login(cfg.smtp_user, cfg.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        self._smtp = server
+        return server
+
+    def _close_smtp(self) -> None:
+        """SMTP接続を閉じる（_smtp_lock 保持下で呼ぶ）。"""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except smtplib.SMTPException:
+            self._smtp.close()
+        self._smtp = None
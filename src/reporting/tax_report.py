@@ -53,6 +53,7 @@ class TaxReportGenerator:
     """税務レポート生成器。
 
     betsテーブルの照合済みデータから年次の税務サマリーを生成する。
+    月次集計・高額払戻の抽出はSQL（GROUP BY / ORDER BY ... LIMIT）で行う。
     """
 
     def __init__(self, ext_db: DatabaseManager) -> None:
@@ -73,68 +74,70 @@ class TaxReportGenerator:
             logger.warning("betsテーブルが存在しません")
             return report
 
-        # 対象年の照合済みベットを取得
-        bets = self._db.execute_query(
-            """SELECT race_key, bet_type, selection, stake_yen,
-                      odds_at_bet, status, result, payout_yen, settled_at
+        # 月次集計（SQLiteで集計し、Python側は月数分の行を逐次処理）
+        monthly_rows = self._db.iter_query(
+            """SELECT CASE WHEN length(settled_at) >= 7
+                           THEN substr(settled_at, 1, 7) ELSE ? END AS month,
+                      COALESCE(SUM(stake_yen), 0) AS total_stake,
+                      COALESCE(SUM(payout_yen), 0) AS total_payout,
+                      COALESCE(SUM(CASE WHEN result = 'WIN' THEN stake_yen ELSE 0 END), 0)
+                          AS winning_stake,
+                      COUNT(*) AS n_bets,
+                      SUM(CASE WHEN result = 'WIN' THEN 1 ELSE 0 END) AS n_wins
                FROM bets
                WHERE settled_at IS NOT NULL
                  AND settled_at LIKE ?
-               ORDER BY settled_at""",
-            (f"{year}%",),
+               GROUP BY month
+               ORDER BY month""",
+            (f"{year}-01", f"{year}%"),
         )
 
-        if not bets:
+        for row in monthly_rows:
+            m = MonthlyBreakdown(
+                month=row["month"],
+                total_stake=row["total_stake"],
+                total_payout=row["total_payout"],
+                winning_stake=row["winning_stake"],
+                pnl=row["total_payout"] - row["total_stake"],
+                n_bets=row["n_bets"],
+                n_wins=row["n_wins"],
+            )
+            report.monthly_breakdown.append(m)
+
+            # 年次集計
+            report.total_stake += m.total_stake
+            report.total_payout += m.total_payout
+            report.winning_stake += m.winning_stake
+            report.n_bets += m.n_bets
+            report.n_wins += m.n_wins
+
+        if not report.monthly_breakdown:
             logger.info(f"{year}年の照合済みベットがありません")
             return report
 
-        monthly: dict[str, MonthlyBreakdown] = {}
-
-        for bet in bets:
-            stake = bet.get("stake_yen", 0)
-            payout = bet.get("payout_yen", 0)
-            is_win = bet.get("result") == "WIN"
-            settled = bet.get("settled_at", "")
-
-            # 月次集計
-            month_key = settled[:7] if len(settled) >= 7 else f"{year}-01"
-            if month_key not in monthly:
-                monthly[month_key] = MonthlyBreakdown(month=month_key)
-            m = monthly[month_key]
-            m.total_stake += stake
-            m.total_payout += payout
-            m.pnl += payout - stake
-            m.n_bets += 1
-            if is_win:
-                m.winning_stake += stake
-                m.n_wins += 1
-
-            # 年次集計
-            report.total_stake += stake
-            report.total_payout += payout
-            report.n_bets += 1
-            if is_win:
-                report.winning_stake += stake
-                report.n_wins += 1
-
-            # 高額払戻追跡
-            if payout > 0:
-                report.top_payouts.append({
-                    "race_key": bet.get("race_key", ""),
-                    "bet_type": bet.get("bet_type", ""),
-                    "selection": bet.get("selection", ""),
-                    "stake": stake,
-                    "payout": payout,
-                    "profit": payout - stake,
-                    "date": settled[:10] if settled else "",
-                })
-
-        # 高額払戻を降順ソート（上位10件）
-        report.top_payouts.sort(key=lambda x: x["payout"], reverse=True)
-        report.top_payouts = report.top_payouts[:10]
-
-        # 月次集計をソートして格納
-        report.monthly_breakdown = sorted(monthly.values(), key=lambda m: m.month)
+        # 高額払戻（上位10件）
+        top_rows = self._db.execute_query(
+            """SELECT race_key, bet_type, selection, stake_yen, payout_yen, settled_at
+               FROM bets
+               WHERE settled_at IS NOT NULL
+                 AND settled_at LIKE ?
+                 AND payout_yen > 0
+               ORDER BY payout_yen DESC, settled_at
+               LIMIT 10""",
+            (f"{year}%",),
+        )
+        report.top_payouts = [
+            {
+                "race_key": row.get("race_key", ""),
+                "bet_type": row.get("bet_type", ""),
+                "selection": row.get("selection", ""),
+                "stake": row["stake_yen"],
+                "payout": row["payout_yen"],
+                "profit": row["payout_yen"] - row["stake_yen"],
+                "date": (row.get("settled_at") or "")[:10],
+            }
+            for row in top_rows
+        ]
 
         # 一時所得計算
         report.gross_income = report.total_payout
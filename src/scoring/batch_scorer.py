@@ -5,35 +5,145 @@ horse_scoresテーブルが空でも、過去レースデータから直接
 Weight最適化・キャリブレーター学習の訓練データ供給源。
 """
 
+import itertools
+import os
 import time
-from typing import Any
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from typing import Any, NamedTuple
 
 import numpy as np
 from loguru import logger
+from numpy.typing import NDArray
 
 from src.data.db import DatabaseManager
 from src.data.provider import JVLinkDataProvider
+from src.factors.base import RuleSet
 from src.factors.registry import FactorRegistry
-from src.scoring.evaluator import evaluate_rule
+from src.factors.rules import gy_factors_gpu
+from src.scoring.evaluator import (
+    PREV_CONTEXT_FIELDS,
+    build_race_columns,
+    compile_rule_set,
+    evaluate_rules_vectorized,
+    prepare_features,
+    race_bindings,
+    specialize_rule_set,
+)
+
+
+class PrevRecord(NamedTuple):
+    """前走データのうちルール評価で参照する値（PREV_CONTEXT_FIELDS と同順）。"""
+
+    jyuni: int
+    last_3f: float
+    running_style: int
+    corner4_pos: int
+
+    def as_context(self) -> dict[str, Any]:
+        """build_eval_context() の prev_context 形式に変換する。"""
+        return dict(zip(PREV_CONTEXT_FIELDS, self, strict=True))
+
+
+def _ketto_key(ketto: str) -> int | str:
+    """血統登録番号をキャッシュキーに変換する（数字のみの場合は整数）。"""
+    return int(ketto) if ketto.isdigit() else ketto
+
+
+# レース単位の評価入力: (entries, race_info, 各馬のprev_context, 全馬の前走上がり3F)
+RaceTask = tuple[list[dict[str, Any]], dict[str, Any], list[dict[str, Any] | None], NDArray[np.float64]]
+
+
+# (ルール式群, レース条件の束縛) -> (特化後のルール式群, コンパイル済みルール群)
+CompiledRuleCache = dict[
+    tuple[tuple[str, ...], tuple[tuple[str, Any], ...]],
+    tuple[tuple[str, ...], Callable[[Mapping[str, Any]], list[Any]]],
+]
+
+
+def _score_race(
+    task: RaceTask,
+    expressions: tuple[str, ...],
+    compiled_cache: CompiledRuleCache | None = None,
+) -> NDArray[np.float64]:
+    """1レースの全馬×全ルールのraw値行列 (N_horses, N_rules) を返す。
+
+    前走キャッシュ等の共有状態を参照しないため、ワーカープロセスで実行できる。
+    compiled_cache を渡した場合、レース種別ごとの特化・コンパイル結果をそこに保持し、
+    同じレース種別の2レース目以降はルール式の解析・コンパイルを行わない。
+    """
+    entries, race_info, prev_contexts, all_prev_l3f = task
+    columns = prepare_features(build_race_columns(race_info, entries, prev_contexts, all_prev_l3f))
+    bindings = race_bindings(expressions, columns)
+    if compiled_cache is None:
+        specialized = specialize_rule_set(expressions, bindings)
+        return evaluate_rules_vectorized(list(specialized), columns, len(entries)).T
+
+    key = (expressions, bindings)
+    entry = compiled_cache.get(key)
+    if entry is None:
+        specialized = specialize_rule_set(expressions, bindings)
+        entry = compiled_cache[key] = (specialized, compile_rule_set(specialized))
+    specialized, compiled = entry
+    return evaluate_rules_vectorized(list(specialized), columns, len(entries), compiled=compiled).T
+
+
+def _score_race_chunk(tasks: Sequence[RaceTask], expressions: tuple[str, ...]) -> list[NDArray[np.float64]]:
+    """ワーカープロセスでレース群をまとめて評価する。
+
+    コンパイル結果（コードオブジェクト）はpickleできないため、チャンク内で共有する
+    ローカルキャッシュを使い、同じレース種別のルール式を再コンパイルしない。
+    """
+    compiled_cache: CompiledRuleCache = {}
+    return [_score_race(task, expressions, compiled_cache) for task in tasks]
 
 
 class BatchScorer:
-    """過去レースをファクター別に一括評価し、訓練データを生成する。"""
+    """過去レースをファクター別に一括評価し、訓練データを生成する。
+
+    ルールはレース単位で全馬・全ルールを列単位にまとめて評価し（ScoringEngineと同じ方式）、
+    total_score はファクター行列と重みベクトルの積で求める。
+    backend="cudf" では全レースの評価変数を連結し、GPU上で全ルールを一括評価する。
+
+    Attributes:
+        BACKENDS: 対応するルール評価バックエンド
+    """
 
     BASE_SCORE = 100
+    BACKENDS = ("numpy", "cudf")
+    # プロセス並列化する最小レース数（これ未満はワーカー起動コストが上回る）
+    PARALLEL_MIN_RACES = 500
+    # ワーカーへ一度に渡すレース数（チャンク内でルール式のコンパイル結果を共有する）
+    PARALLEL_BATCH_SIZE = 50
 
     def __init__(
         self,
         jvlink_db: DatabaseManager,
         ext_db: DatabaseManager,
+        n_jobs: int = 1,
+        backend: str = "numpy",
     ) -> None:
         """
         Args:
             jvlink_db: JVLink DBマネージャ
             ext_db: 拡張DBマネージャ（factor_rules取得用）
+            n_jobs: ルール評価の並列プロセス数（1で逐次、-1でCPUコア数）
+            backend: ルール評価バックエンド（"numpy" / "cudf"）。
+                "cudf" はGPU評価（cudf / cupy 未導入時はnumpyにフォールバック）。
+
+        Raises:
+            ValueError: 未対応のbackendが指定された場合
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"未対応のbackend: {backend}（{', '.join(self.BACKENDS)}のいずれか）")
+        if backend == "cudf" and not gy_factors_gpu.is_available():
+            logger.warning("cudfが利用できないため、NumPyバックエンドで評価します")
+            backend = "numpy"
+        self._backend = backend
         self._jvlink_db = jvlink_db
         self._ext_db = ext_db
+        self._n_jobs = (os.cpu_count() or 1) if n_jobs < 0 else max(1, n_jobs)
+        # レース種別ごとの特化・コンパイル済みルール群（build_factor_matrix() 呼び出し間で再利用）
+        self._compiled_rules: CompiledRuleCache = {}
         self._provider = JVLinkDataProvider(jvlink_db)
         self._registry = FactorRegistry(ext_db)
 
@@ -55,15 +165,19 @@ class BatchScorer:
             {
                 "race_keys": list[str],
                 "factor_names": list[str],
-                "X": NDArray (N_horses, N_factors) — ファクターraw値
-                "y": NDArray (N_horses,) — 1着=1, それ以外=0
-                "scores": NDArray (N_horses,) — total_score (BASE+加重合計)
-                "odds": NDArray (N_horses,) — 単勝オッズ
-                "jyuni": NDArray (N_horses,) — 確定着順
+                "X": NDArray[float32] (N_horses, N_factors) — ファクターraw値
+                "y": NDArray[int32] (N_horses,) — 1着=1, それ以外=0
+                "scores": NDArray[float32] (N_horses,) — total_score (BASE+加重合計)
+                "odds": NDArray[float32] (N_horses,) — 単勝オッズ
+                "jyuni": NDArray[int32] (N_horses,) — 確定着順
                 "track_types": NDArray (N_horses,) — トラック種別 ("turf"/"dirt")
-                "distances": NDArray (N_horses,) — 距離（メートル）
+                "distances": NDArray[int32] (N_horses,) — 距離（メートル）
             }
 
+            ファクター値・オッズの有効桁は3〜4桁のためFP32で保持し、
+            下流の行列演算のメモリ帯域を半減させる。float64が必要な
+            計算（校正器の学習など）は利用側でキャストすること。
+
         Raises:
             ValueError: 有効なレースが見つからない場合
         """
@@ -74,6 +188,7 @@ class BatchScorer:
             raise ValueError("APPROVEDルールが存在しません")
 
         factor_names = [r["rule_name"] for r in rules]
+        rule_set = RuleSet.from_rules(rules)
 
         # 日付フィルタパラメータをログ出力
         if date_from or date_to:
@@ -100,13 +215,16 @@ class BatchScorer:
             f"{len(rules)}ファクター"
         )
 
+        # 出力配列を事前確保（全出走頭数が行数の上限）し、レースごとにスライス代入する
+        offsets = np.cumsum([0] + [len(race_data["entries"]) for race_data in batch_data])
+        capacity = int(offsets[-1])
         all_race_keys: list[str] = []
-        all_X: list[list[float]] = []
-        all_scores: list[float] = []
-        all_odds: list[float] = []
-        all_jyuni: list[int] = []
-        all_track_types: list[str] = []
-        all_distances: list[int] = []
+        X_buf = np.empty((capacity, len(rules)), dtype=np.float32)
+        odds_buf = np.empty(capacity, dtype=np.float32)
+        jyuni_buf = np.empty(capacity, dtype=np.int32)
+        distances_buf = np.empty(capacity, dtype=np.int32)
+        track_types_buf = np.empty(capacity, dtype="<U4")
+        n_rows = 0
 
         races_with_odds = 0
         races_without_odds = 0
@@ -114,90 +232,95 @@ class BatchScorer:
 
         # 前走データキャッシュ（KettoNum -> 直近出走データ）
         # レースはASC順（古い順）で処理し、各馬の出走後にキャッシュを更新する
-        prev_entry_cache: dict[str, dict[str, Any]] = {}
+        # 出走馬dictの複製は保持せず、ルール評価で参照する値のみを保持する
+        prev_entry_cache: dict[int | str, PrevRecord] = {}
 
-        processed = 0
-        for race_data in batch_data:
-            race_key = race_data["race_key"]
+        # 確定着順は全レース分を一括で数値変換（変換不能値は0=未確定扱い）
+        jyuni_all = self._to_int_array(
+            [horse.get("KakuteiJyuni") for race_data in batch_data for horse in race_data["entries"]],
+        )
+
+        # 1) 前走キャッシュの参照・更新はレース順序に依存するため逐次で行い、
+        #    各レースの評価に必要な入力（前走コンテキスト・有効馬）を確定させる
+        tasks: list[tuple[int, NDArray[np.intp], RaceTask]] = []
+        for race_idx, race_data in enumerate(batch_data):
             race_info = race_data["race_info"]
             entries = race_data["entries"]
-            odds_map = race_data["odds"]
 
-            if odds_map:
+            if race_data["odds"]:
                 races_with_odds += 1
             else:
                 races_without_odds += 1
 
-            # 各馬の前走データを取得（evaluate_rule呼び出し前に全馬分準備）
+            # 各馬の前走データを取得（ルール評価前に全馬分準備）
             horse_prev_contexts: list[dict[str, Any] | None] = []
-            all_prev_l3f: list[float] = []
-            for horse in entries:
+            all_prev_l3f = np.zeros(len(entries), dtype=np.float64)
+            for j, horse in enumerate(entries):
                 ketto = str(horse.get("KettoNum", ""))
-                prev = prev_entry_cache.get(ketto) if ketto else None
-                horse_prev_contexts.append(prev)
-                all_prev_l3f.append(
-                    self._safe_float(prev.get("HaronTimeL3", 0)) if prev else 0.0
-                )
-
-            for idx, horse in enumerate(entries):
-                jyuni = self._safe_int(horse.get("KakuteiJyuni", 0))
-                if jyuni <= 0:
-                    skipped_entries += 1
-                    continue  # 未確定馬はスキップ
-
-                umaban = str(horse.get("Umaban", ""))
-                horse_odds = odds_map.get(umaban, 0.0)
-                prev_ctx = horse_prev_contexts[idx]
-
-                # 各ファクターのraw値を計算
-                factor_values: list[float] = []
-                total_score = self.BASE_SCORE
-                for rule in rules:
-                    raw = evaluate_rule(
-                        rule.get("sql_expression", ""),
-                        horse,
-                        race_info,
-                        entries,
-                        prev_context=prev_ctx,
-                        all_prev_l3f=all_prev_l3f,
-                    )
-                    factor_values.append(raw)
-                    total_score += raw * rule.get("weight", 1.0)
-
-                all_race_keys.append(race_key)
-                all_X.append(factor_values)
-                all_scores.append(total_score)
-                all_odds.append(horse_odds)
-                all_jyuni.append(jyuni)
-
-                # 層別キャリブレーション用: トラック種別と距離
-                track_cd = str(race_info.get("TrackCD", ""))
-                track_type = "dirt" if track_cd.startswith("2") else "turf"
-                distance = self._safe_int(race_info.get("Kyori", 0))
-                all_track_types.append(track_type)
-                all_distances.append(distance)
+                prev = prev_entry_cache.get(_ketto_key(ketto)) if ketto else None
+                horse_prev_contexts.append(prev.as_context() if prev else None)
+                if prev:
+                    all_prev_l3f[j] = prev.last_3f
+
+            # 確定着順のある馬のみ訓練データとする（未確定馬も出走頭数には含める）
+            jyuni_race = jyuni_all[offsets[race_idx]:offsets[race_idx + 1]]
+            valid = np.flatnonzero(jyuni_race > 0)
+            skipped_entries += len(entries) - len(valid)
+            if len(valid):
+                tasks.append((race_idx, valid, (entries, race_info, horse_prev_contexts, all_prev_l3f)))
 
             # レース処理後: 全馬のキャッシュを更新
             for horse in entries:
                 ketto = str(horse.get("KettoNum", ""))
                 if ketto:
-                    prev_entry_cache[ketto] = dict(horse)
+                    prev_entry_cache[_ketto_key(ketto)] = PrevRecord(
+                        jyuni=self._safe_int(horse.get("KakuteiJyuni", 0)),
+                        last_3f=self._safe_float(horse.get("HaronTimeL3", 0)),
+                        running_style=self._safe_int(horse.get("KyakusituKubun", 0)),
+                        corner4_pos=self._safe_int(horse.get("Jyuni4c", 0)),
+                    )
+
+        # 2) ルール評価はレース間で独立なので、レース数が多ければプロセス並列で行う
+        results = self._evaluate_races([task for _, _, task in tasks], rule_set.expressions)
+
+        # 3) レース順に出力バッファへスライス代入
+        for processed, ((race_idx, valid, _), X_full) in enumerate(zip(tasks, results, strict=True), start=1):
+            race_data = batch_data[race_idx]
+            race_info = race_data["race_info"]
+            entries = race_data["entries"]
+            odds_map = race_data["odds"]
+
+            X_race = X_full[valid]
+            rows = slice(n_rows, n_rows + len(valid))
+            X_buf[rows] = X_race
+            odds_buf[rows] = [odds_map.get(str(entries[idx].get("Umaban", "")), 0.0) for idx in valid]
+            jyuni_buf[rows] = jyuni_all[offsets[race_idx] + valid]
+
+            # 層別キャリブレーション用: トラック種別と距離
+            track_cd = str(race_info.get("TrackCD", ""))
+            track_types_buf[rows] = "dirt" if track_cd.startswith("2") else "turf"
+            distances_buf[rows] = self._safe_int(race_info.get("Kyori", 0))
+            all_race_keys.extend([race_data["race_key"]] * len(valid))
+            n_rows += len(valid)
 
-            processed += 1
             if progress_callback:
                 progress_callback(
-                    processed, len(batch_data),
-                    f"レース処理中 {processed}/{len(batch_data)}"
+                    processed, len(tasks),
+                    f"レース処理中 {processed}/{len(tasks)}"
                 )
             elif processed % 500 == 0:
-                logger.info(f"  処理済み: {processed}/{len(batch_data)}レース")
+                logger.info(f"  処理済み: {processed}/{len(tasks)}レース")
 
-        if not all_X:
+        if n_rows == 0:
             raise ValueError("有効なスコアリングデータがありません")
+        X = X_buf[:n_rows]
+        jyuni = jyuni_buf[:n_rows]
+        # total_score は全レース分をまとめて1回の行列ベクトル積（FP32 BLAS GEMV）で求める
+        scores = X @ rule_set.weights.astype(np.float32) + np.float32(self.BASE_SCORE)
 
         elapsed = time.perf_counter() - t_start
         logger.info(
-            f"バッチスコアリング完了: {processed}レース, {len(all_X)}頭 "
+            f"バッチスコアリング完了: {len(batch_data)}レース, {n_rows}頭 "
             f"(elapsed={elapsed:.2f}s)"
         )
         logger.info(
@@ -208,22 +331,70 @@ class BatchScorer:
             f"  スキップ統計: 未確定馬(jyuni<=0)={skipped_entries}件"
         )
         logger.debug(
-            f"  行列形状: X={np.array(all_X).shape}, "
-            f"jyuni={len(all_jyuni)}, odds={len(all_odds)}"
+            f"  行列形状: X={X.shape}, "
+            f"jyuni={len(jyuni)}, odds={n_rows}"
         )
 
         return {
             "race_keys": all_race_keys,
             "factor_names": factor_names,
-            "X": np.array(all_X, dtype=np.float64),
-            "y": (np.array(all_jyuni) == 1).astype(np.int64),
-            "scores": np.array(all_scores, dtype=np.float64),
-            "odds": np.array(all_odds, dtype=np.float64),
-            "jyuni": np.array(all_jyuni, dtype=np.int64),
-            "track_types": np.array(all_track_types),
-            "distances": np.array(all_distances, dtype=np.int64),
+            "X": X,
+            "y": (jyuni == 1).astype(np.int32),
+            "scores": scores,
+            "odds": odds_buf[:n_rows],
+            "jyuni": jyuni,
+            "track_types": track_types_buf[:n_rows],
+            "distances": distances_buf[:n_rows],
         }
 
+    def _evaluate_races(
+        self,
+        tasks: Sequence[RaceTask],
+        expressions: tuple[str, ...],
+    ) -> Iterator[NDArray[np.float64]]:
+        """各レースのraw値行列をレース順に返す。
+
+        n_jobs > 1 かつレース数が PARALLEL_MIN_RACES 以上の場合は
+        joblib (loky) でプロセス並列に評価する。backend="cudf" の場合はGPUで一括評価する。
+        """
+        if self._backend == "cudf":
+            return self._evaluate_races_gpu(tasks, expressions)
+        if self._n_jobs == 1 or len(tasks) < self.PARALLEL_MIN_RACES:
+            return (_score_race(task, expressions, self._compiled_rules) for task in tasks)
+
+        from joblib import Parallel, delayed
+
+        logger.info(f"  ルール評価を並列実行: n_jobs={self._n_jobs}")
+        size = self.PARALLEL_BATCH_SIZE
+        chunks = (tasks[i:i + size] for i in range(0, len(tasks), size))
+        parallel = Parallel(n_jobs=self._n_jobs, backend="loky", return_as="generator")
+        chunk_results: Iterator[list[NDArray[np.float64]]] = parallel(
+            delayed(_score_race_chunk)(chunk, expressions) for chunk in chunks
+        )
+        return itertools.chain.from_iterable(chunk_results)
+
+    @staticmethod
+    def _evaluate_races_gpu(
+        tasks: Sequence[RaceTask],
+        expressions: tuple[str, ...],
+    ) -> Iterator[NDArray[np.float64]]:
+        """全レースの評価変数を連結し、GPU上で全ルールを一括評価してレースごとに分割する。
+
+        評価変数（順位・頭数等のレース内集計を含む）はレースごとに構築済みで、ルール式は
+        行ごとの値のみを参照するため、連結して評価してもレース単位の評価と同じ値になる。
+        """
+        if not tasks:
+            return iter(())
+        per_race = [
+            prepare_features(build_race_columns(race_info, entries, prev_contexts, all_prev_l3f))
+            for entries, race_info, prev_contexts, all_prev_l3f in tasks
+        ]
+        columns = {name: np.concatenate([race[name] for race in per_race]) for name in per_race[0]}
+        bounds = np.cumsum([0, *(len(entries) for entries, *_ in tasks)])
+        logger.info(f"  ルール評価をGPUで一括実行: {len(tasks)}レース, {int(bounds[-1])}頭")
+        matrix = gy_factors_gpu.evaluate_rules_gpu(expressions, columns, int(bounds[-1]))
+        return (matrix[:, start:stop].T for start, stop in itertools.pairwise(bounds))
+
     def _get_race_list(
         self,
         date_from: str,
@@ -266,6 +437,14 @@ class BatchScorer:
             tuple(params),
         )
 
+    @staticmethod
+    def _to_int_array(values: list[Any]) -> np.ndarray:
+        """値のリストを一括で整数配列に変換する（_safe_int() と同じ規則で、変換不能値は0）。
+
+        pd.to_numeric は "1.5" や "1e1" を数値とみなし全角数字を解釈しないため使用しない。
+        """
+        return np.fromiter(map(BatchScorer._safe_int, values), dtype=np.int64, count=len(values))
+
     @staticmethod
     def _safe_int(value: Any, default: int = 0) -> int:
         """安全に整数変換する。"""
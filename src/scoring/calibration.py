@@ -5,10 +5,130 @@
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from functools import lru_cache
+from math import exp as _exp
 from pathlib import Path
+from typing import Any
 
 import numpy as np
 from numpy.typing import NDArray
+from scipy.special import expit
+
+# exp overflow/underflowを防ぐためのlogitクリップ幅
+_LOGIT_CLIP = 500.0
+
+
+def _joblib_compress() -> tuple[str, int]:
+    """joblib.dump() の圧縮設定を返す（lz4があれば優先）。"""
+    try:
+        import lz4  # noqa: F401
+    except ImportError:
+        return ("zlib", 3)
+    return ("lz4", 3)
+
+
+def _pav_loop(y: NDArray[np.float64], w: NDArray[np.float64]) -> NDArray[np.float64]:
+    """重み付きPAVで単調非減少の当てはめ値を返す（スタック方式の1パス、numba.njit用）。
+
+    Args:
+        y: スコア昇順に並んだ（同一スコア集約済みの）平均ラベル
+        w: 各点の重み（件数）
+    """
+    n = y.shape[0]
+    values = np.empty(n, dtype=np.float64)
+    block_w = np.empty(n, dtype=np.float64)
+    ends = np.empty(n, dtype=np.int64)
+    k = 0
+    for i in range(n):
+        values[k] = y[i]
+        block_w[k] = w[i]
+        ends[k] = i
+        k += 1
+        # 直前のブロックより値が小さければ併合（単調性違反の解消）
+        while k > 1 and values[k - 2] > values[k - 1]:
+            total = block_w[k - 2] + block_w[k - 1]
+            values[k - 2] = (values[k - 2] * block_w[k - 2] + values[k - 1] * block_w[k - 1]) / total
+            block_w[k - 2] = total
+            ends[k - 2] = ends[k - 1]
+            k -= 1
+    fitted = np.empty(n, dtype=np.float64)
+    start = 0
+    for j in range(k):
+        for i in range(start, ends[j] + 1):
+            fitted[i] = values[j]
+        start = ends[j] + 1
+    return fitted
+
+
+def _pav_sklearn(y: NDArray[np.float64], w: NDArray[np.float64]) -> NDArray[np.float64]:
+    """sklearnのC実装PAVで当てはめ値を返す（numba未導入時）。"""
+    from sklearn.isotonic import isotonic_regression
+
+    result: NDArray[np.float64] = np.asarray(isotonic_regression(y, sample_weight=w), dtype=np.float64)
+    return result
+
+
+@lru_cache(maxsize=1)
+def _pav_kernel() -> Callable[[NDArray[np.float64], NDArray[np.float64]], NDArray[np.float64]]:
+    """PAVの実装を返す（numbaがあればループ版をJITコンパイル、なければsklearn）。"""
+    try:
+        import numba
+    except ImportError:
+        return _pav_sklearn
+    compiled: Callable[[NDArray[np.float64], NDArray[np.float64]], NDArray[np.float64]] = (
+        numba.njit(cache=True)(_pav_loop)
+    )
+    return compiled
+
+
+NewtonSums = tuple[float, float, float, float, float]
+
+
+def _platt_sums_numpy(x: NDArray[np.float64], y: NDArray[np.float64], a: float, b: float) -> NewtonSums:
+    """Platt対数尤度の勾配・ヘッセ行列の要素 (g_a, g_b, h_aa, h_ab, h_bb) をNumPyで求める。"""
+    p = expit(a * x + b)
+    w = p * (1.0 - p)
+    r = p - y
+    wx = w * x
+    return float(r @ x), float(r.sum()), float(wx @ x), float(wx.sum()), float(w.sum())
+
+
+def _platt_sums_loop(x: NDArray[np.float64], y: NDArray[np.float64], a: float, b: float) -> NewtonSums:
+    """_platt_sums_numpy() と同じ値を1パスのループで求める（numba.njit用）。"""
+    g_a = g_b = h_aa = h_ab = h_bb = 0.0
+    for i in range(x.shape[0]):
+        t = a * x[i] + b
+        if t >= 0.0:
+            p = 1.0 / (1.0 + _exp(-t))
+        else:
+            e = _exp(t)
+            p = e / (1.0 + e)
+        w = p * (1.0 - p)
+        r = p - y[i]
+        g_a += r * x[i]
+        g_b += r
+        h_aa += w * x[i] * x[i]
+        h_ab += w * x[i]
+        h_bb += w
+    return g_a, g_b, h_aa, h_ab, h_bb
+
+
+@lru_cache(maxsize=1)
+def _platt_newton_sums() -> Callable[[NDArray[np.float64], NDArray[np.float64], float, float], NewtonSums]:
+    """Newton法の各反復で使う集計関数を返す。
+
+    numba が利用可能ならループ版をJITコンパイルし（中間配列なしの1パス）、
+    なければNumPy版を返す。
+    """
+    try:
+        import numba
+    except ImportError:
+        return _platt_sums_numpy
+    compiled: Callable[[NDArray[np.float64], NDArray[np.float64], float, float], NewtonSums] = (
+        numba.njit(cache=True, fastmath=True)(_platt_sums_loop)
+    )
+    return compiled
 
 
 class ProbabilityCalibrator(ABC):
@@ -24,16 +144,30 @@ class ProbabilityCalibrator(ABC):
         """スコアから確率を予測する。"""
         ...
 
+    def predict_proba_batch(self, scores: NDArray[np.float64]) -> NDArray[np.float64]:
+        """スコア配列をまとめて確率に変換する。
+
+        サブクラスはベクトル化した実装で上書きする。既定実装は
+        predict_proba() を要素ごとに呼び出す。
+        """
+        arr = np.asarray(scores, dtype=np.float64)
+        return np.array([self.predict_proba(float(s)) for s in arr], dtype=np.float64)
+
     def save(self, path: Path) -> None:
         """校正モデルをファイルに保存する。
 
+        lz4がインストールされていればlz4、なければzlib（レベル3）で圧縮する。
+        読込時の形式判定はjoblib.load()が自動で行う。
+
         Args:
             path: 保存先パス（.joblibファイル）
         """
+        import pickle
+
         import joblib
 
         path.parent.mkdir(parents=True, exist_ok=True)
-        joblib.dump(self, path)
+        joblib.dump(self, path, compress=_joblib_compress(), protocol=pickle.HIGHEST_PROTOCOL)
 
     @staticmethod
     def load(path: Path) -> "ProbabilityCalibrator":
@@ -70,14 +204,39 @@ class PlattCalibrator(ProbabilityCalibrator):
         self._b: float = 0.0
         self._is_fitted: bool = False
 
+    # Newton法の最大反復回数と収束判定閾値
+    MAX_NEWTON_ITER = 50
+    NEWTON_TOL = 1e-10
+
     def fit(self, scores: NDArray[np.float64], labels: NDArray[np.int64]) -> None:
-        """スコアとラベルからPlattスケーリングのパラメータを学習する。"""
-        from sklearn.linear_model import LogisticRegression
+        """スコアとラベルからPlattスケーリングのパラメータを学習する。
 
-        model = LogisticRegression()
-        model.fit(scores.reshape(-1, 1), labels)
-        self._a = float(model.coef_[0][0])
-        self._b = float(model.intercept_[0])
+        1次元ロジスティック回帰をNewton法（IRLS）で直接解く。
+        係数を縮めるL2正則化の代わりにPlatt (1999) の平滑化ターゲット
+        (N+ + 1)/(N+ + 2), 1/(N- + 2) を用いるため、完全分離データでも
+        パラメータが発散しない。sklearnのソルバー起動コストもかからない。
+        """
+        x = np.asarray(scores, dtype=np.float64).ravel()
+        positive = np.asarray(labels).ravel() > 0
+        n_pos = int(positive.sum())
+        n_neg = positive.size - n_pos
+        y = np.where(positive, (n_pos + 1.0) / (n_pos + 2.0), 1.0 / (n_neg + 2.0))
+        a = b = 0.0
+        ridge = 1e-8 * np.eye(2)
+        newton_sums = _platt_newton_sums()
+        for _ in range(self.MAX_NEWTON_ITER):
+            g_a, g_b, h_aa, h_ab, h_bb = newton_sums(x, y, a, b)
+            grad = np.array([g_a, g_b])
+            hess = np.array([[h_aa, h_ab], [h_ab, h_bb]]) + ridge
+            step = np.linalg.solve(hess, -grad)
+            if not np.all(np.isfinite(step)):
+                break
+            a += float(step[0])
+            b += float(step[1])
+            if abs(step[0]) + abs(step[1]) < self.NEWTON_TOL:
+                break
+        self._a = a
+        self._b = b
         self._is_fitted = True
 
     def predict_proba(self, score: float) -> float:
@@ -85,31 +244,76 @@ class PlattCalibrator(ProbabilityCalibrator):
         if not self._is_fitted:
             raise RuntimeError("校正モデルが未訓練です。fit()を先に呼び出してください。")
         logit = self._a * score + self._b
-        # 極端なlogit値でのexp overflow/underflowを防止
-        logit = float(np.clip(logit, -500, 500))
-        return float(1.0 / (1.0 + np.exp(-logit)))
+        # 極端なlogit値でのexp overflow/underflowを防止（スカラーはmathで0-d配列生成を回避）
+        logit = min(max(logit, -_LOGIT_CLIP), _LOGIT_CLIP)
+        return 1.0 / (1.0 + _exp(-logit))
+
+    def predict_proba_batch(self, scores: NDArray[np.float64]) -> NDArray[np.float64]:
+        """スコア配列を一括で確率に変換する。"""
+        if not self._is_fitted:
+            raise RuntimeError("校正モデルが未訓練です。fit()を先に呼び出してください。")
+        logit = self._a * np.asarray(scores, dtype=np.float64) + self._b
+        # expitは極端なlogitでも0/1に飽和するためクリップ不要
+        result: NDArray[np.float64] = expit(logit)
+        return result
 
 
 class IsotonicCalibrator(ProbabilityCalibrator):
     """Isotonic Regressionによる確率校正。
 
-    単調性を保証するノンパラメトリック校正。
+    単調性を保証するノンパラメトリック校正。PAV (Pool Adjacent Violators) で
+    階段関数を学習し、折れ点 (_x_thresholds, _y_thresholds) を np.interp で補間する。
+    範囲外のスコアは端の値にクリップされる。
     """
 
     def __init__(self) -> None:
-        from sklearn.isotonic import IsotonicRegression
-
-        self._model = IsotonicRegression(out_of_bounds="clip")
+        self._x_thresholds: NDArray[np.float64] = np.zeros(0, dtype=np.float64)
+        self._y_thresholds: NDArray[np.float64] = np.zeros(0, dtype=np.float64)
         self._is_fitted: bool = False
 
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """sklearn IsotonicRegressionを保持していた旧形式の保存ファイルを読み込めるようにする。"""
+        model = state.pop("_model", None)
+        if model is not None and state.get("_is_fitted"):
+            state["_x_thresholds"] = np.asarray(model.X_thresholds_, dtype=np.float64)
+            state["_y_thresholds"] = np.asarray(model.y_thresholds_, dtype=np.float64)
+        self.__dict__.update(state)
+
     def fit(self, scores: NDArray[np.float64], labels: NDArray[np.int64]) -> None:
         """スコアとラベルからIsotonic Regressionモデルを学習する。"""
-        self._model.fit(scores, labels)
+        x = np.asarray(scores, dtype=np.float64).ravel()
+        y = np.asarray(labels, dtype=np.float64).ravel()
+        if x.size == 0:
+            raise ValueError("学習データが空です")
+
+        # スコア順に並べ、同一スコアは平均ラベル・件数を重みとして1点に集約する
+        order = np.argsort(x, kind="mergesort")
+        x_sorted = x[order]
+        x_unique, first, counts = np.unique(x_sorted, return_index=True, return_counts=True)
+        weights = counts.astype(np.float64)
+        y_unique = np.add.reduceat(y[order], first) / weights
+
+        fitted = _pav_kernel()(y_unique, weights)
+
+        # 値が変化しない区間の内部点は補間結果に影響しないため除去する
+        keep = np.ones(len(fitted), dtype=bool)
+        if len(fitted) > 2:
+            keep[1:-1] = (fitted[1:-1] != fitted[:-2]) | (fitted[1:-1] != fitted[2:])
+        self._x_thresholds = x_unique[keep]
+        self._y_thresholds = np.asarray(fitted, dtype=np.float64)[keep]
         self._is_fitted = True
 
     def predict_proba(self, score: float) -> float:
         """スコアを確率に変換する。"""
         if not self._is_fitted:
             raise RuntimeError("校正モデルが未訓練です。fit()を先に呼び出してください。")
-        result = self._model.predict([score])
-        return float(result[0])
+        return float(self.predict_proba_batch(np.array([score], dtype=np.float64))[0])
+
+    def predict_proba_batch(self, scores: NDArray[np.float64]) -> NDArray[np.float64]:
+        """スコア配列を一括で確率に変換する。"""
+        if not self._is_fitted:
+            raise RuntimeError("校正モデルが未訓練です。fit()を先に呼び出してください。")
+        result: NDArray[np.float64] = np.interp(
+            np.asarray(scores, dtype=np.float64), self._x_thresholds, self._y_thresholds,
+        )
+        return result
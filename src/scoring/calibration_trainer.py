@@ -27,13 +27,26 @@ class CalibrationTrainer:
     PlattCalibrator / IsotonicCalibrator を訓練する。
     """
 
+    # 確定着順の一括取得で1クエリに含めるレース数（6パラメータ/レース、SQLite上限999未満）
+    KAKUTEI_QUERY_CHUNK = 150
+    # horse_scores読み出し時の1回のfetchmany行数
+    SCORE_FETCH_CHUNK = 10_000
+
     def __init__(
         self,
         jvlink_db: DatabaseManager,
         ext_db: DatabaseManager,
+        n_jobs: int = 1,
     ) -> None:
+        """
+        Args:
+            jvlink_db: JVLink DBマネージャ
+            ext_db: 拡張DBマネージャ
+            n_jobs: BatchScorerで訓練データを構築する際のルール評価並列数（-1でCPUコア数）
+        """
         self._jvlink_db = jvlink_db
         self._ext_db = ext_db
+        self._n_jobs = n_jobs
 
     def build_training_data(
         self,
@@ -59,48 +72,59 @@ class CalibrationTrainer:
         if not self._ext_db.table_exists("horse_scores"):
             raise ValueError("horse_scoresテーブルが存在しません")
 
-        # horse_scores全件取得
-        score_rows = self._ext_db.execute_query(
-            "SELECT race_key, umaban, total_score FROM horse_scores"
-        )
-        if len(score_rows) < min_samples:
+        # 件数を先に取得して配列を確保し、fetchmanyのチャンクを直接詰める
+        # （全行のdict化を避け、ピークメモリを抑える）
+        count = int(self._ext_db.execute_query("SELECT COUNT(*) AS n FROM horse_scores")[0]["n"])
+        if count < min_samples:
             raise ValueError(
-                f"サンプル数不足: {len(score_rows)}件 (最低{min_samples}件必要)"
+                f"サンプル数不足: {count}件 (最低{min_samples}件必要)"
             )
 
-        scores_list: list[float] = []
-        labels_list: list[int] = []
+        race_keys = np.empty(count, dtype=object)
+        umabans = np.empty(count, dtype=object)
+        scores_arr = np.empty(count, dtype=np.float64)
+        n_rows = 0
+        for chunk in self._ext_db.iter_chunks(
+            "SELECT race_key, umaban, total_score FROM horse_scores",
+            chunk_size=self.SCORE_FETCH_CHUNK,
+        ):
+            # COUNT後に追加された行は無視する
+            take = min(len(chunk), count - n_rows)
+            if take <= 0:
+                break
+            rk_col, ub_col, score_col = zip(*chunk[:take], strict=True)
+            end = n_rows + take
+            race_keys[n_rows:end] = rk_col
+            umabans[n_rows:end] = ub_col
+            scores_arr[n_rows:end] = score_col
+            n_rows = end
+        race_keys = race_keys[:n_rows]
+        umabans = umabans[:n_rows]
+        scores_arr = scores_arr[:n_rows]
 
         # 全レースの確定着順を一括取得（N+1 → 1クエリに削減）
-        unique_race_keys = {row["race_key"] for row in score_rows if len(row["race_key"]) == 16}
+        unique_race_keys = {rk for rk in set(race_keys.tolist()) if len(rk) == 16}
         kakutei_map = self._batch_get_kakutei_jyuni(unique_race_keys)
 
-        for row in score_rows:
-            race_key = row["race_key"]
-            umaban = row["umaban"]
-            total_score = row["total_score"]
-
-            kakutei = kakutei_map.get((race_key, str(umaban)), 0)
-            if kakutei == 0:
-                continue
-
-            scores_list.append(total_score)
-            labels_list.append(1 if kakutei <= target_jyuni else 0)
+        kakutei_arr = np.fromiter(
+            (kakutei_map.get((rk, str(ub)), 0) for rk, ub in zip(race_keys.tolist(), umabans.tolist(), strict=True)),
+            dtype=np.int64, count=n_rows,
+        )
+        mask = kakutei_arr != 0
+        scores = scores_arr[mask]
+        labels = (kakutei_arr[mask] <= target_jyuni).astype(np.int64)
 
-        if len(scores_list) < min_samples:
+        if len(scores) < min_samples:
             raise ValueError(
-                f"有効サンプル数不足: {len(scores_list)}件 (最低{min_samples}件必要)"
+                f"有効サンプル数不足: {len(scores)}件 (最低{min_samples}件必要)"
             )
 
         logger.info(
-            f"訓練データ構築完了: {len(scores_list)}件 "
-            f"(的中率={sum(labels_list)/len(labels_list):.1%})"
+            f"訓練データ構築完了: {len(scores)}件 "
+            f"(的中率={labels.mean():.1%})"
         )
 
-        return (
-            np.array(scores_list, dtype=np.float64),
-            np.array(labels_list, dtype=np.int64),
-        )
+        return scores, labels
 
     def build_training_data_from_batch(
         self,
@@ -130,7 +154,7 @@ class CalibrationTrainer:
         """
         from src.scoring.batch_scorer import BatchScorer
 
-        batch = BatchScorer(self._jvlink_db, self._ext_db)
+        batch = BatchScorer(self._jvlink_db, self._ext_db, n_jobs=self._n_jobs)
         matrix = batch.build_factor_matrix(date_from, date_to, max_races)
 
         scores = matrix["scores"]
@@ -217,7 +241,7 @@ class CalibrationTrainer:
             progress_callback(2, 3, "校正品質を評価中...")
 
         # フィット後の確率範囲を確認
-        sample_probs = np.array([calibrator.predict_proba(s) for s in scores])
+        sample_probs = calibrator.predict_proba_batch(scores)
         logger.info(
             f"  校正後確率範囲: min={sample_probs.min():.4f}, "
             f"max={sample_probs.max():.4f}, mean={sample_probs.mean():.4f}"
@@ -266,7 +290,7 @@ class CalibrationTrainer:
 
         from src.scoring.batch_scorer import BatchScorer
 
-        batch = BatchScorer(self._jvlink_db, self._ext_db)
+        batch = BatchScorer(self._jvlink_db, self._ext_db, n_jobs=self._n_jobs)
         matrix = batch.build_factor_matrix(date_from, date_to, max_races)
 
         scores = matrix["scores"]
@@ -311,30 +335,32 @@ class CalibrationTrainer:
         scores, labels = self.build_training_data(target_jyuni, min_samples=10)
 
         # 予測確率を算出
-        probs = np.array([calibrator.predict_proba(s) for s in scores])
+        probs = calibrator.predict_proba_batch(scores)
 
         # ブライアースコア
         brier = float(np.mean((probs - labels) ** 2))
 
         # キャリブレーションエラー（ECE: Expected Calibration Error）
+        # 各サンプルのビン番号を求め、ビン別の件数・予測確率和・的中数をbincountで一括集計する
+        # ビンは [下限, 上限) の半開区間（確率1.0ちょうどはどのビンにも入らない）
         bin_edges = np.linspace(0, 1, n_bins + 1)
-        bin_details = []
-        ece = 0.0
-
-        for i in range(n_bins):
-            mask = (probs >= bin_edges[i]) & (probs < bin_edges[i + 1])
-            if not mask.any():
-                continue
-            bin_prob = float(probs[mask].mean())
-            bin_actual = float(labels[mask].mean())
-            bin_count = int(mask.sum())
-            ece += abs(bin_prob - bin_actual) * (bin_count / len(labels))
-            bin_details.append({
+        bin_idx = np.searchsorted(bin_edges, probs, side="right") - 1
+        in_range = (bin_idx >= 0) & (bin_idx < n_bins)
+        bin_idx = bin_idx[in_range]
+        counts = np.bincount(bin_idx, minlength=n_bins)
+        sum_prob = np.bincount(bin_idx, weights=probs[in_range], minlength=n_bins)
+        sum_actual = np.bincount(bin_idx, weights=labels[in_range], minlength=n_bins)
+        ece = float(np.abs(sum_prob - sum_actual).sum() / len(labels))
+
+        bin_details = [
+            {
                 "bin_range": f"{bin_edges[i]:.2f}-{bin_edges[i+1]:.2f}",
-                "predicted_prob": bin_prob,
-                "actual_rate": bin_actual,
-                "count": bin_count,
-            })
+                "predicted_prob": float(sum_prob[i] / counts[i]),
+                "actual_rate": float(sum_actual[i] / counts[i]),
+                "count": int(counts[i]),
+            }
+            for i in np.flatnonzero(counts)
+        ]
 
         logger.info(f"校正評価: Brier={brier:.4f} ECE={ece:.4f}")
         return {
@@ -360,40 +386,30 @@ class CalibrationTrainer:
         if not self._jvlink_db.table_exists("NL_SE_RACE_UMA"):
             return {}
 
-        # 日付範囲の境界を算出
-        parsed = []
-        for rk in race_keys:
-            if len(rk) != 16:
-                continue
-            parsed.append({"year": rk[0:4], "monthday": rk[4:8], "rk": rk})
-
-        if not parsed:
-            return {}
-
-        min_year = min(p["year"] for p in parsed)
-        max_year = max(p["year"] for p in parsed)
-        min_md = min(p["monthday"] for p in parsed if p["year"] == min_year)
-        max_md = max(p["monthday"] for p in parsed if p["year"] == max_year)
-
-        rows = self._jvlink_db.execute_query(
-            """SELECT idYear, idMonthDay, idJyoCD, idKaiji, idNichiji, idRaceNum,
-                      Umaban, KakuteiJyuni
-               FROM NL_SE_RACE_UMA
-               WHERE (idYear > ? OR (idYear = ? AND idMonthDay >= ?))
-                 AND (idYear < ? OR (idYear = ? AND idMonthDay <= ?))""",
-            (min_year, min_year, min_md, max_year, max_year, max_md),
+        # レースキーを主キー列の組に分解し、行値IN句で対象レースのみをインデックス検索する
+        # （日付範囲スキャン + Python側の絞り込みを行わない）
+        race_ids = sorted(
+            (rk[0:4], rk[4:8], rk[8:10], rk[10:12], rk[12:14], rk[14:16])
+            for rk in race_keys if len(rk) == 16
         )
-
         result: dict[tuple[str, str], int] = {}
-        for row in rows:
-            rk = (
-                f"{row['idYear']}{row['idMonthDay']}{row['idJyoCD']}"
-                f"{row['idKaiji']}{row['idNichiji']}{row['idRaceNum']}"
+        chunk = self.KAKUTEI_QUERY_CHUNK
+        for start in range(0, len(race_ids), chunk):
+            batch = race_ids[start:start + chunk]
+            placeholders = ",".join(["(?,?,?,?,?,?)"] * len(batch))
+            # 行はタプルで受け取り、列位置でアンパックする（行ごとのdict構築・キー参照を避ける）
+            rows = self._jvlink_db.execute_query_tuples(
+                f"""SELECT idYear, idMonthDay, idJyoCD, idKaiji, idNichiji, idRaceNum,
+                          Umaban, KakuteiJyuni
+                   FROM NL_SE_RACE_UMA
+                   WHERE (idYear, idMonthDay, idJyoCD, idKaiji, idNichiji, idRaceNum)
+                         IN (VALUES {placeholders})""",
+                tuple(value for race_id in batch for value in race_id),
             )
-            if rk in race_keys:
-                jyuni_str = row.get("KakuteiJyuni", "0")
+            for year, monthday, jyo_cd, kaiji, nichiji, race_num, umaban, jyuni_str in rows:
+                rk = year + monthday + jyo_cd + kaiji + nichiji + race_num
                 jyuni = int(jyuni_str) if jyuni_str and str(jyuni_str) != "0" else 0
-                result[(rk, str(row["Umaban"]))] = jyuni
+                result[(rk, str(umaban))] = jyuni
 
         return result
 
@@ -50,19 +50,21 @@ class CorrelationAnalyzer:
             corr = np.corrcoef(X.T)
         corr = np.nan_to_num(corr, nan=0.0)
 
-        # 冗長ペア検出 (|r| > 0.7)
-        redundant_pairs = []
-        for i in range(len(factor_names)):
-            for j in range(i + 1, len(factor_names)):
-                r = float(corr[i, j])
-                if abs(r) > 0.7:
-                    redundant_pairs.append({
-                        "factor_a": factor_names[i],
-                        "factor_b": factor_names[j],
-                        "correlation": round(r, 3),
-                    })
-
-        redundant_pairs.sort(key=lambda x: abs(x["correlation"]), reverse=True)
+        # 冗長ペア検出 (|r| > 0.7): 上三角の全ペアをまとめて判定し、該当ペアのみdict化する
+        i_idx, j_idx = np.triu_indices(len(factor_names), 1)
+        rs = corr[i_idx, j_idx]
+        hit = np.flatnonzero(np.abs(rs) > 0.7)
+        rounded = np.round(rs[hit], 3)
+        # |r|降順（同値はペアの走査順を維持）
+        order = np.argsort(-np.abs(rounded), kind="stable")
+        redundant_pairs = [
+            {
+                "factor_a": factor_names[i_idx[hit[k]]],
+                "factor_b": factor_names[j_idx[hit[k]]],
+                "correlation": float(rounded[k]),
+            }
+            for k in order
+        ]
 
         logger.info(
             f"相関分析完了: {len(factor_names)}ファクター, "
@@ -119,18 +121,15 @@ class CorrelationAnalyzer:
         rules = registry.get_active_rules()
         weight_map = {r["rule_name"]: r.get("weight", 1.0) for r in rules}
 
-        # 各ファクターの各変動幅でのスコア変化
-        sensitivity = []
-        for i, name in enumerate(factor_names):
-            row = []
-            current_w = weight_map.get(name, 1.0)
-            col = X[:, i]
-            for delta in weight_deltas:
-                new_w = current_w * (1 + delta)
-                # スコア変化 = (new_w - current_w) * factor_raw_value の平均絶対値
-                score_change = float(np.mean(np.abs(col * (new_w - current_w))))
-                row.append(round(score_change, 3))
-            sensitivity.append(row)
+        # スコア変化 = |(new_w - current_w) * factor_raw_value| の平均
+        #           = |current_w * delta| * mean(|factor_raw_value|)
+        # 列ごとの平均絶対値を1パスで求め、変動幅は外積で展開する
+        current_w = np.array([weight_map.get(name, 1.0) for name in factor_names], dtype=np.float64)
+        deltas_arr = np.asarray(weight_deltas, dtype=np.float64)
+        mean_abs = np.abs(X).mean(axis=0, dtype=np.float64)
+        sensitivity = np.round(
+            np.abs(current_w[:, None] * deltas_arr[None, :]) * mean_abs[:, None], 3
+        ).tolist()
 
         logger.info(f"感度分析完了: {len(factor_names)}ファクター x {len(weight_deltas)}変動幅")
 
@@ -5,24 +5,118 @@ GY指数方式に基づき、各馬にファクタースコアを付与し、
 
 スコアリングフロー:
     1. APPROVEDルール群を取得
-    2. 各馬に対してルールを適用し、weighted_scoreを合算
+    2. 各ルールを全馬分まとめて列単位で評価し（ベクトル化）、weighted_scoreを合算
     3. BASE_SCORE(100) + 合算値 = total_score
     4. 確率校正モデルで確率変換 → EV = prob × odds
     5. EV > ev_threshold のベットを「バリューベット」と判定
 """
 
-import json
+import os
+import pickle
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+import orjson
 from loguru import logger
+from numpy.typing import NDArray
 
 from src.data.db import DatabaseManager
 from src.data.provider import JVLinkDataProvider
+from src.factors.base import RuleSet
 from src.factors.registry import FactorRegistry
+from src.scoring import fused_scorer
 from src.scoring.calibration import ProbabilityCalibrator
-from src.scoring.evaluator import evaluate_rule
+from src.scoring.evaluator import (
+    build_eval_context,
+    build_race_columns,
+    compile_row_scorer,
+    evaluate_rules_vectorized,
+    prepare_features,
+    specialize_for_race,
+)
+from src.scoring.fused_scorer import FusedRuleScorer
+
+
+def _encode_factor_details(details: dict[str, Any]) -> str:
+    """factor_detailsをhorse_scores.factor_details用のJSON文字列にする。
+
+    orjson（C実装）で直接UTF-8バイト列へ符号化する。非ASCII文字はエスケープせず、
+    未対応の型はstr()で文字列化する（json.dumps(ensure_ascii=False, default=str) 相当）。
+    """
+    return orjson.dumps(
+        details, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    ).decode()
+
+
+# score_many() の入力1件: (race, entries, odds_map, race_key)
+RaceInput = tuple[dict[str, Any], list[dict[str, Any]], dict[str, float], str]
+
+
+# score_many() のワーカープロセスが保持するエンジン（_init_score_worker() で起動時に1回だけ復元）
+_WORKER_ENGINE: "ScoringEngine | None" = None
+
+
+def _init_score_worker(payload: bytes) -> None:
+    """ワーカープロセス起動時に、pickle済みのエンジンを復元して保持する（score_many() 用）。
+
+    エンジンはワーカーごとに1回だけ受け渡し、レース群（チャンク）ごとには送らない。
+    """
+    global _WORKER_ENGINE
+    _WORKER_ENGINE = pickle.loads(payload)
+
+
+def _score_race_chunk(
+    chunk: tuple[tuple[RaceInput, str | None], ...],
+    top_k: int | None,
+) -> list[list[dict[str, Any]]]:
+    """ワーカープロセスでレース群をまとめてスコアリングする（score_many() 用）。"""
+    engine = _WORKER_ENGINE
+    if engine is None:
+        raise RuntimeError("score_many() のワーカーが初期化されていません")
+    return [
+        engine.score_race(race, entries, odds_map, race_key, as_of_date, top_k)
+        for (race, entries, odds_map, race_key), as_of_date in chunk
+    ]
+
+
+@dataclass(slots=True, frozen=True)
+class ScoreResult:
+    """1頭分のスコア・期待値（score_race() の結果dict1件に対応する軽量表現）。
+
+    ファクター内訳はルール名のタプルをレース内の全馬で共有し、値のみを馬ごとに持つ。
+    """
+
+    umaban: str
+    total_score: float
+    estimated_prob: float
+    fair_odds: float
+    actual_odds: float
+    expected_value: float
+    is_value_bet: bool
+    factor_names: tuple[str, ...] = ()
+    factor_values: tuple[float, ...] = ()
+
+    @property
+    def factor_details(self) -> dict[str, float]:
+        """ルール名→重み付きスコアのdict。"""
+        return dict(zip(self.factor_names, self.factor_values, strict=True))
+
+    def to_dict(self) -> dict[str, Any]:
+        """score_race() の結果dictと同じ形式に変換する。"""
+        return {
+            "umaban": self.umaban,
+            "total_score": self.total_score,
+            "factor_details": self.factor_details,
+            "estimated_prob": self.estimated_prob,
+            "fair_odds": self.fair_odds,
+            "actual_odds": self.actual_odds,
+            "expected_value": self.expected_value,
+            "is_value_bet": self.is_value_bet,
+        }
 
 
 class ScoringEngine:
@@ -30,9 +124,21 @@ class ScoringEngine:
 
     Attributes:
         BASE_SCORE: 全馬共通の基礎スコア（100点）
+        BACKENDS: 対応するルール評価バックエンド
     """
 
     BASE_SCORE = 100
+    BACKENDS = ("numpy", "numba")
+    # score_many() でプロセス並列化する最小レース数（これ未満はワーカー起動コストが上回る）
+    PARALLEL_MIN_RACES = 200
+    # score_many() でワーカーへ一度に渡すレース数
+    PARALLEL_CHUNK_SIZE = 16
+
+    _INSERT_SCORE_SQL = """INSERT INTO horse_scores
+        (race_key, umaban, total_score, factor_details,
+         estimated_prob, fair_odds, actual_odds, expected_value,
+         strategy_version, calculated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
 
     def __init__(
         self,
@@ -41,6 +147,7 @@ class ScoringEngine:
         calibrator_path: str | Path | None = None,
         ev_threshold: float = 1.05,
         jvlink_provider: JVLinkDataProvider | None = None,
+        backend: str = "numpy",
     ) -> None:
         """
         Args:
@@ -49,13 +156,26 @@ class ScoringEngine:
             calibrator_path: 校正モデルファイルパス（calibrator未指定時に使用）
             ev_threshold: バリューベット判定の期待値閾値
             jvlink_provider: JVLinkデータプロバイダ（前走データ取得用、Noneで前走なし）
+            backend: ルール評価バックエンド（"numpy" / "numba"）。
+                "numba" は全ルールの融合JITカーネル。未導入時はnumpyにフォールバック。
+                GPU評価はバックフィル向けに BatchScorer(backend="cudf") で行う。
+
+        Raises:
+            ValueError: 未対応のbackendが指定された場合
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"未対応のbackend: {backend}（{', '.join(self.BACKENDS)}のいずれか）")
+        if backend == "numba" and not fused_scorer.is_available():
+            logger.warning("numbaが利用できないため、NumPyバックエンドでスコアリングします")
+            backend = "numpy"
         self._db = db
         self._registry = FactorRegistry(db)
         self._calibrator = calibrator
         self._ev_threshold = ev_threshold
         self._fallback_warned = False
         self._provider = jvlink_provider
+        self._backend = backend
+        self._fused_scorer: tuple[tuple[Any, ...], FusedRuleScorer] | None = None
 
         # calibrator未設定でパス指定があればファイルからロード
         if self._calibrator is None and calibrator_path:
@@ -72,9 +192,9 @@ class ScoringEngine:
         horse: dict[str, Any],
         race: dict[str, Any],
         all_entries: list[dict[str, Any]],
-        rules: list[dict[str, Any]],
+        rules: list[dict[str, Any]] | RuleSet,
         prev_context: dict[str, Any] | None = None,
-        all_prev_l3f: list[float] | None = None,
+        all_prev_l3f: NDArray[np.float64] | list[float] | None = None,
     ) -> dict[str, Any]:
         """1頭の馬に対してスコアを計算する。
 
@@ -82,26 +202,26 @@ class ScoringEngine:
             horse: 対象馬データ（NL_SEレコード）
             race: レース情報（NL_RAレコード）
             all_entries: 同レース全出走馬データ
-            rules: 適用するファクタールールのリスト
+            rules: 適用するファクタールールのリスト、またはRuleSet。
+                複数頭を続けて評価する場合は RuleSet.from_rules() で一度だけ変換して渡すと、
+                馬×ルールごとのdictキー参照を省ける。
             prev_context: 前走の出走馬データ（Noneで前走なし）
-            all_prev_l3f: 同レース全馬の前走HaronTimeL3リスト
+            all_prev_l3f: 同レース全馬の前走HaronTimeL3配列
 
         Returns:
             {"umaban", "total_score", "factor_details"} のdict
         """
-        total_score = self.BASE_SCORE
+        rule_set = rules if isinstance(rules, RuleSet) else RuleSet.from_rules(rules)
+        # 全ルールを1関数に展開した融合関数（式の組ごとにキャッシュ）で、ルールごとのevalを省く
+        ctx = build_eval_context(horse, race, all_entries, prev_context, all_prev_l3f)
+        values = compile_row_scorer(rule_set.expressions)(ctx)
+        total_score = float(self.BASE_SCORE)
         factor_details: dict[str, float] = {}
 
-        for rule in rules:
-            expression = rule.get("sql_expression", "")
-            rule_result = evaluate_rule(
-                expression, horse, race, all_entries,
-                prev_context=prev_context,
-                all_prev_l3f=all_prev_l3f,
-            )
-            weighted = rule_result * rule.get("weight", 1.0)
+        for name, value, weight in zip(rule_set.names, values, rule_set.weights.tolist(), strict=True):
+            weighted = value * weight
             total_score += weighted
-            factor_details[rule["rule_name"]] = weighted
+            factor_details[name] = weighted
 
         return {
             "umaban": horse.get("Umaban", ""),
@@ -141,11 +261,82 @@ class ScoringEngine:
                 estimated_prob = self._calibrator.predict_proba(total_score)
         else:
             # 校正モデルがない場合のフォールバック（線形変換）
-            if not self._fallback_warned:
-                logger.warning("確率校正モデルが未設定です。線形変換(score/200)を使用します。")
-                self._fallback_warned = True
+            self._warn_fallback()
             estimated_prob = max(0.01, min(0.99, total_score / 200.0))
 
+        return self._with_ev(score_result, actual_odds, estimated_prob)
+
+    def estimate_probs(
+        self,
+        scores: NDArray[np.float64],
+        track_type: str = "turf",
+        distance: int = 1600,
+    ) -> NDArray[np.float64]:
+        """スコア配列を推定勝率の配列に変換する（calculate_ev() の確率校正部分の一括版）。
+
+        同一レースの全馬は (track_type, distance) を共有するため、
+        校正モデルの呼び出しは1レースにつき1回にまとめる。
+
+        Args:
+            scores: total_scoreの配列
+            track_type: トラック種別 ("turf"/"dirt") — 層別キャリブレーション用
+            distance: 距離（メートル） — 層別キャリブレーション用
+
+        Returns:
+            推定勝率の配列（scoresと同じ長さ）
+        """
+        # 確率校正（StratifiedCalibrator対応）
+        if self._calibrator:
+            from src.scoring.stratified_calibrator import StratifiedCalibrator
+
+            if isinstance(self._calibrator, StratifiedCalibrator):
+                return self._calibrator.predict_proba_batch(scores, track_type=track_type, distance=distance)
+            return np.asarray(self._calibrator.predict_proba_batch(scores), dtype=np.float64)
+
+        # 校正モデルがない場合のフォールバック（線形変換）
+        self._warn_fallback()
+        return np.clip(np.asarray(scores, dtype=np.float64) / 200.0, 0.01, 0.99)
+
+    def calculate_ev_batch(
+        self,
+        total_scores: NDArray[np.float64],
+        odds: NDArray[np.float64],
+        track_type: str = "turf",
+        distance: int = 1600,
+    ) -> dict[str, NDArray[Any]]:
+        """スコア配列とオッズ配列から期待値を一括算出する（calculate_ev() の配列版）。
+
+        Args:
+            total_scores: total_scoreの配列
+            odds: 実際のオッズの配列（total_scoresと同じ長さ）
+            track_type: トラック種別 ("turf"/"dirt") — 層別キャリブレーション用
+            distance: 距離（メートル） — 層別キャリブレーション用
+
+        Returns:
+            {"estimated_prob", "fair_odds", "expected_value", "is_value_bet"} → 配列のdict
+        """
+        probs = self.estimate_probs(total_scores, track_type=track_type, distance=distance)
+        odds = np.asarray(odds, dtype=np.float64)
+        with np.errstate(divide="ignore"):
+            fair_odds = np.where(probs > 0, 1.0 / probs, np.inf)
+        expected_value = probs * odds
+        return {
+            "estimated_prob": probs,
+            "fair_odds": fair_odds,
+            "expected_value": expected_value,
+            "is_value_bet": expected_value > self._ev_threshold,
+        }
+
+    def _warn_fallback(self) -> None:
+        """校正モデル未設定の警告を初回のみ出力する。"""
+        if not self._fallback_warned:
+            logger.warning("確率校正モデルが未設定です。線形変換(score/200)を使用します。")
+            self._fallback_warned = True
+
+    def _with_ev(
+        self, score_result: dict[str, Any], actual_odds: float, estimated_prob: float,
+    ) -> dict[str, Any]:
+        """score_resultに推定勝率・公正オッズ・期待値を付与する。"""
         fair_odds = 1.0 / estimated_prob if estimated_prob > 0 else float("inf")
         expected_value = estimated_prob * actual_odds
 
@@ -174,6 +365,17 @@ class ScoringEngine:
         except (ValueError, TypeError):
             return default
 
+    def _get_fused_scorer(self, rules: list[dict[str, Any]]) -> FusedRuleScorer:
+        """ルール群に対応する融合スコアラーを返す（ルールが変わった場合のみ再生成）。"""
+        key = tuple((r.get("rule_id"), r.get("sql_expression"), r.get("weight")) for r in rules)
+        if self._fused_scorer is None or self._fused_scorer[0] != key:
+            scorer = FusedRuleScorer(rules)
+            # 列の型は build_race_columns() で固定されるため、1頭分のダミー列で評価すると
+            # 実レースと同じカーネルがここでJITコンパイルされ、初回レースの遅延にならない
+            scorer.evaluate(prepare_features(build_race_columns({}, [{}])), 1)
+            self._fused_scorer = (key, scorer)
+        return self._fused_scorer[1]
+
     def score_race(
         self,
         race: dict[str, Any],
@@ -181,6 +383,7 @@ class ScoringEngine:
         odds_map: dict[str, float],
         race_key: str = "",
         as_of_date: str | None = None,
+        top_k: int | None = None,
     ) -> list[dict[str, Any]]:
         """1レース全馬のスコアと期待値を計算する。
 
@@ -191,29 +394,47 @@ class ScoringEngine:
             race_key: レースキー（前走データ取得用、空文字で前走なし）
             as_of_date: 時点日 (YYYY-MM-DD)。指定時は訓練期間が
                 この日付より前のファクターのみ使用する。
+            top_k: 指定時はEV上位k頭のみ返す（結果dictもk頭分のみ構築する）。Noneで全馬。
 
         Returns:
             EV降順にソートされたスコア結果リスト（オッズ0の馬は除外）
         """
+        return [
+            result.to_dict()
+            for result in self.iter_score_race(race, entries, odds_map, race_key, as_of_date, top_k)
+        ]
+
+    def iter_score_race(
+        self,
+        race: dict[str, Any],
+        entries: list[dict[str, Any]],
+        odds_map: dict[str, float],
+        race_key: str = "",
+        as_of_date: str | None = None,
+        top_k: int | None = None,
+    ) -> Iterator[ScoreResult]:
+        """score_race() と同じ計算を行い、EV降順に ScoreResult を1頭ずつ返す。
+
+        バックテスト等で多数のレースを処理する際、結果dictのリストを保持せず
+        逐次フィルタ・集計するためのジェネレータ版。引数は score_race() と同じ。
+
+        Yields:
+            EV降順（同値は出走順）の ScoreResult（オッズ0の馬は除外）
+        """
         rules = self._registry.get_active_rules(as_of_date=as_of_date)
-        results = []
 
         # 前走データ取得（provider + race_keyが揃っている場合のみ）
         prev_contexts: list[dict[str, Any] | None] = []
-        all_prev_l3f: list[float] | None = None
+        all_prev_l3f: NDArray[np.float64] | None = None
         if self._provider and race_key:
-            l3f_list: list[float] = []
-            for horse in entries:
-                ketto = str(horse.get("KettoNum", ""))
-                prev = (
-                    self._provider.get_previous_race_entry(ketto, race_key)
-                    if ketto else None
-                )
-                prev_contexts.append(prev)
-                l3f_list.append(
-                    self._safe_float(prev.get("HaronTimeL3", 0)) if prev else 0.0
-                )
-            all_prev_l3f = l3f_list
+            # 全馬の前走を1クエリで取得する
+            kettos = [str(horse.get("KettoNum", "")) for horse in entries]
+            prev_by_ketto = self._provider.get_previous_race_entries(kettos, race_key)
+            prev_contexts = [prev_by_ketto.get(ketto) for ketto in kettos]
+            all_prev_l3f = np.fromiter(
+                (self._safe_float(prev.get("HaronTimeL3", 0)) if prev else 0.0 for prev in prev_contexts),
+                dtype=np.float64, count=len(prev_contexts),
+            )
         else:
             prev_contexts = [None] * len(entries)
 
@@ -222,23 +443,121 @@ class ScoringEngine:
         track_type = "dirt" if track_cd.startswith("2") else "turf"
         distance = self._safe_int(race.get("Kyori", 1600))
 
-        for i, horse in enumerate(entries):
-            score_result = self.score_horse(
-                horse, race, entries, rules,
-                prev_context=prev_contexts[i],
-                all_prev_l3f=all_prev_l3f,
+        # ルールごとに全馬分を列単位で一括評価（馬×ルールのeval呼び出しを排除）
+        # フラグ変数は全ルール共通のため、ルール評価前に全馬分を一度だけ算出する
+        columns = prepare_features(build_race_columns(race, entries, prev_contexts, all_prev_l3f))
+        n_entries = len(entries)
+        if self._backend == "numba":
+            weighted_matrix = self._get_fused_scorer(rules).evaluate(columns, n_entries)
+            total_scores = self.BASE_SCORE + weighted_matrix.sum(axis=0)
+            rule_names = [rule["rule_name"] for rule in rules]
+        else:
+            # レース条件（芝/ダート・距離区分等）を定数として畳み込んだ特化ルール群を、
+            # 共通部分式（prev_jyuni > 0 等）を共有して一括評価
+            rule_set = RuleSet.from_rules(rules)
+            expressions = specialize_for_race(rule_set.expressions, columns)
+            value_matrix = evaluate_rules_vectorized(list(expressions), columns, n_entries)
+            # 合計スコアは重みベクトルと (ルール数, 頭数) 行列の積1回で求める
+            total_scores = self.BASE_SCORE + rule_set.weights @ value_matrix
+            weighted_matrix = value_matrix * rule_set.weights[:, None]
+            rule_names = list(rule_set.names)
+
+        # オッズのある馬のみ対象とし、確率校正はレース単位で一括実行する
+        odds = np.array(
+            [odds_map.get(str(horse.get("Umaban", "")), 0.0) for horse in entries], dtype=np.float64,
+        )
+        rated = np.flatnonzero(odds > 0)
+        ev = self.calculate_ev_batch(total_scores[rated], odds[rated], track_type=track_type, distance=distance)
+
+        # EV降順（同値は出走順）に並べる。dictのキー関数ソートを避け、EV配列のargsortで順序を決める
+        order = np.argsort(-ev["expected_value"], kind="stable")
+        if top_k is not None:
+            order = order[:max(top_k, 0)]
+        ranked = rated[order]
+        # ファクター内訳は返す馬の列だけを取り出し、馬ごとの行としてまとめてPython値に変換する
+        factor_names = tuple(rule_names)
+        details_rows = weighted_matrix[:, ranked].T.tolist()
+        columns_out = zip(
+            ranked.tolist(),
+            ev["estimated_prob"][order].tolist(),
+            ev["fair_odds"][order].tolist(),
+            ev["expected_value"][order].tolist(),
+            ev["is_value_bet"][order].tolist(),
+            details_rows,
+            strict=True,
+        )
+        for i, estimated_prob, fair_odds, expected_value, is_value_bet, details in columns_out:
+            yield ScoreResult(
+                umaban=entries[i].get("Umaban", ""),
+                total_score=float(total_scores[i]),
+                estimated_prob=estimated_prob,
+                fair_odds=fair_odds,
+                actual_odds=float(odds[i]),
+                expected_value=expected_value,
+                is_value_bet=is_value_bet,
+                factor_names=factor_names,
+                factor_values=tuple(details),
             )
-            umaban = str(horse.get("Umaban", ""))
-            actual_odds = odds_map.get(umaban, 0.0)
 
-            if actual_odds > 0:
-                ev_result = self.calculate_ev(
-                    score_result, actual_odds,
-                    track_type=track_type, distance=distance,
-                )
-                results.append(ev_result)
+    def score_many(
+        self,
+        races: Iterable[RaceInput],
+        as_of_date: str | None = None,
+        top_k: int | None = None,
+        n_jobs: int = 1,
+        as_of_dates: Sequence[str | None] | None = None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """複数レースを score_race() でスコアリングし、入力順に結果を返す。
 
-        return sorted(results, key=lambda x: x["expected_value"], reverse=True)
+        バッチ・過去レースのスコアリング向け。各レースは独立しているため、
+        n_jobs > 1 かつレース数が PARALLEL_MIN_RACES 以上の場合は
+        joblib (loky) でプロセス並列に評価する。本エンジンはワーカーの起動時に
+        1回だけpickleして渡し、DB接続はワーカー側で各自開く（読み取りのみ）。
+
+        Args:
+            races: (race, entries, odds_map, race_key) の列
+            as_of_date: 時点日 (YYYY-MM-DD)。score_race() と同じ
+            top_k: 各レースでEV上位k頭のみ返す。score_race() と同じ
+            n_jobs: 並列プロセス数（1で逐次、-1でCPUコア数）
+            as_of_dates: レースごとの時点日（racesと同順）。指定時は as_of_date より優先
+
+        Yields:
+            レースごとの score_race() の結果リスト（入力順）
+        """
+        inputs = list(races)
+        dates = list(as_of_dates) if as_of_dates is not None else [as_of_date] * len(inputs)
+        if len(dates) != len(inputs):
+            raise ValueError(f"as_of_dates の件数がレース数と一致しません: {len(dates)} != {len(inputs)}")
+        tasks = list(zip(inputs, dates, strict=True))
+        workers = (os.cpu_count() or 1) if n_jobs < 0 else max(1, n_jobs)
+        if workers == 1 or len(tasks) < self.PARALLEL_MIN_RACES:
+            for (race, entries, odds_map, race_key), date in tasks:
+                yield self.score_race(race, entries, odds_map, race_key, date, top_k)
+            return
+
+        from joblib import Parallel, delayed
+
+        # 時点日指定時は有効ルールをpickle前にキャッシュへ載せ、ワーカーごとのDB再取得を省く
+        for date in dict.fromkeys(dates):
+            if date is not None:
+                self._registry.get_active_rules(as_of_date=date)
+        logger.info(f"スコアリングを並列実行: {len(tasks)}レース, n_jobs={workers}")
+        # エンジンはpickle済みバイト列としてワーカー初期化時に渡す。内容が前回と同一なら
+        # lokyは起動済みワーカーを再利用し、状態が変わっていればワーカーを作り直す
+        parallel = Parallel(
+            n_jobs=workers, backend="loky", return_as="generator",
+            initializer=_init_score_worker, initargs=(pickle.dumps(self),),
+        )
+        size = self.PARALLEL_CHUNK_SIZE
+        chunks = (tuple(tasks[i:i + size]) for i in range(0, len(tasks), size))
+        for chunk_results in parallel(delayed(_score_race_chunk)(chunk, top_k) for chunk in chunks):
+            yield from chunk_results
+
+    def __getstate__(self) -> dict[str, Any]:
+        """pickle時はJITカーネル（融合スコアラー）を除く。ワーカー側で必要時に再構築される。"""
+        state = self.__dict__.copy()
+        state["_fused_scorer"] = None
+        return state
 
     def save_scores(
         self,
@@ -263,37 +582,35 @@ class ScoringEngine:
             return 0
 
         now = datetime.now(UTC).isoformat()
-        saved = 0
-
-        for result in scored_results:
-            try:
-                factor_json = json.dumps(
-                    result.get("factor_details", {}),
-                    ensure_ascii=False,
-                    default=str,
-                )
-                ext_db.execute_write(
-                    """INSERT INTO horse_scores
-                       (race_key, umaban, total_score, factor_details,
-                        estimated_prob, fair_odds, actual_odds, expected_value,
-                        strategy_version, calculated_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        race_key,
-                        result.get("umaban", ""),
-                        result.get("total_score", 0.0),
-                        factor_json,
-                        result.get("estimated_prob"),
-                        result.get("fair_odds"),
-                        result.get("actual_odds"),
-                        result.get("expected_value"),
-                        strategy_version,
-                        now,
-                    ),
-                )
-                saved += 1
-            except Exception as e:
-                logger.error(f"スコア保存エラー: umaban={result.get('umaban')} {e}")
+
+        def to_row(result: dict[str, Any]) -> tuple[Any, ...]:
+            factor_json = _encode_factor_details(result.get("factor_details", {}))
+            return (
+                race_key,
+                result.get("umaban", ""),
+                result.get("total_score", 0.0),
+                factor_json,
+                result.get("estimated_prob"),
+                result.get("fair_odds"),
+                result.get("actual_odds"),
+                result.get("expected_value"),
+                strategy_version,
+                now,
+            )
+
+        # 全行を1トランザクションのexecutemanyで挿入する（行ごとのコミットを避ける）
+        try:
+            saved = ext_db.execute_many(self._INSERT_SCORE_SQL, [to_row(r) for r in scored_results])
+        except Exception as e:
+            # 一括挿入はロールバック済み。不正な行だけを除外するため1行ずつ再試行する
+            logger.warning(f"スコア一括保存エラー、1行ずつ再試行します: {e}")
+            saved = 0
+            for result in scored_results:
+                try:
+                    ext_db.execute_write(self._INSERT_SCORE_SQL, to_row(result))
+                    saved += 1
+                except Exception as e:
+                    logger.error(f"スコア保存エラー: umaban={result.get('umaban')} {e}")
 
         logger.info(f"スコア保存完了: race_key={race_key} {saved}件")
         return saved
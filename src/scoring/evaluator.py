@@ -6,6 +6,11 @@ factor_rulesテーブルのsql_expressionを安全に評価し、
 評価方式:
     - Python式: 馬データ・レースデータの値を変数として参照可能
     - 条件式は制限された安全な環境（__builtins__無効化）で評価
+    - ベクトル化: 式をASTからNumPy演算に変換し、1レース全馬を列単位で一括評価
+      （変換不能な式・評価エラー時は行単位evalにフォールバック）
+    - ルール群の一括評価: 複数ルールに共通する部分式を一時変数に括り出し、一度だけ計算
+    - レース単位の部分評価: レース条件（芝/ダート・距離区分等）を定数として畳み込み、
+      レース種別ごとに特化したルール群を生成・キャッシュ
 
 対応データソース:
     JVLinkToSQLite の NL_RA_RACE / NL_SE_RACE_UMA テーブル。
@@ -13,10 +18,16 @@ factor_rulesテーブルのsql_expressionを安全に評価し、
     代替: DMJyuni（マイニング予想順位）、HaronTimeL3（上がり3F）。
 """
 
+import ast
 import re
+from collections.abc import Callable, Mapping
+from functools import lru_cache
+from types import CodeType
 from typing import Any
 
+import numpy as np
 from loguru import logger
+from numpy.typing import NDArray
 
 # 許可する組み込み関数（安全なもののみ）
 _SAFE_BUILTINS = {
@@ -31,6 +42,10 @@ _SAFE_BUILTINS = {
     "bool": bool,
 }
 
+# 行単位eval()のグローバル名前空間。呼び出しごとにdictを生成しないよう共有する
+# （変数はlocals側の評価コンテキストから解決され、式からグローバルへは代入できない）
+_EVAL_GLOBALS: dict[str, Any] = {"__builtins__": {}}
+
 # 禁止するキーワード（コードインジェクション防止）
 _FORBIDDEN_PATTERNS = re.compile(
     r"(__import__|import |exec\b|eval\b|compile\b|open\b"
@@ -38,8 +53,84 @@ _FORBIDDEN_PATTERNS = re.compile(
 )
 
 
+# ルール式に許可する構文ノード（これ以外を含む式は拒否する）
+_SAFE_NODES = (
+    ast.Expression, ast.Constant, ast.Name, ast.Attribute, ast.Call, ast.keyword,
+    ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.Compare, ast.IfExp,
+    ast.Tuple, ast.List, ast.Set, ast.Subscript, ast.Slice,
+    ast.GeneratorExp, ast.ListComp, ast.SetComp, ast.comprehension,
+    ast.boolop, ast.operator, ast.unaryop, ast.cmpop, ast.expr_context,
+)
+
+# ルール式から参照してよい属性（文字列の判定・整形のみ。format等は許可しない）
+_SAFE_ATTRIBUTES = frozenset({"startswith", "endswith", "strip", "lower", "upper", "isdigit"})
+
+# 基本変数から導出される真偽値フラグの定義（ルール式と同じ構文）。
+# 行単位のコンテキスト構築（build_race_context / build_horse_context）と列単位の
+# prepare_features() はいずれもこの定義から値を求める（build_eval_context(include_flags=False) で省略される）
+FLAG_DEFINITIONS: dict[str, str] = {
+    "is_inner_gate": "Umaban <= max(num_entries // 3, 1)",
+    "is_outer_gate": "Umaban > (num_entries * 2) // 3",
+    "is_front_runner": "running_style in (1, 2)",  # 逃げ or 先行
+    "is_closer": "running_style in (3, 4)",  # 差し or 追込
+    "is_good_baba": "baba_cd == '1' or dirt_baba_cd == '1'",
+    "is_heavy_baba": "baba_cd in ('3', '4') or dirt_baba_cd in ('3', '4')",
+    "is_graded": "grade_cd in ('A', 'B', 'C')",
+    "is_favorite": "Ninki <= 3",
+    "is_longshot": "Ninki >= max(num_entries - 3, 4)",
+    "is_turf": "'1' <= TrackCD < '2'",  # 先頭が1（10-19: 芝系）
+    "is_dirt": "'2' <= TrackCD < '3'",  # 先頭が2（20-29: ダート系）
+    "is_sprint": "Kyori <= 1400",
+    "is_mile": "1400 < Kyori <= 1800",
+    "is_middle": "1800 < Kyori <= 2200",
+    "is_long": "Kyori > 2200",
+    "is_male": "SexCD == '1'",
+    "is_female": "SexCD == '2'",
+    "is_gelding": "SexCD == '3'",
+    "prev_is_front_runner": "prev_running_style in (1, 2)",
+    "prev_is_closer": "prev_running_style in (3, 4)",
+}
+
+FLAG_VARIABLES: tuple[str, ...] = tuple(FLAG_DEFINITIONS)
+
+# レース条件のみから決まるフラグ（build_race_context() でレースごとに1回だけ求める）
+RACE_FLAG_VARIABLES: tuple[str, ...] = (
+    "is_good_baba", "is_heavy_baba", "is_graded", "is_turf", "is_dirt",
+    "is_sprint", "is_mile", "is_middle", "is_long",
+)
+
+# build_eval_context() が前走データ（prev_context）から参照するフィールド
+PREV_CONTEXT_FIELDS: tuple[str, ...] = ("KakuteiJyuni", "HaronTimeL3", "KyakusituKubun", "Jyuni4c")
+
+# build_horse_context() で馬ごとに求めるフラグ
+_HORSE_FLAG_VARIABLES: tuple[str, ...] = tuple(name for name in FLAG_VARIABLES if name not in RACE_FLAG_VARIABLES)
+
+
+# 評価エラーのログを1回だけ出力済みの (メッセージ, 式, 例外型) の集合と、その上限件数
+_LOGGED_RULE_ERRORS: set[tuple[str, str, str]] = set()
+_LOGGED_RULE_ERRORS_LIMIT = 1024
+
+
+def _log_rule_error(message: str, label: str, error: Exception) -> None:
+    """ルール評価エラーをDEBUGログに出力する（同じ式・例外型の組は1回のみ）。
+
+    行単位評価では同じ式のエラーが馬×レースの回数だけ発生するため、
+    2回目以降はメッセージの整形・ログ出力を行わない。集合が上限に達したら空にする。
+    """
+    key = (message, label, type(error).__name__)
+    if key in _LOGGED_RULE_ERRORS:
+        return
+    if len(_LOGGED_RULE_ERRORS) >= _LOGGED_RULE_ERRORS_LIMIT:
+        _LOGGED_RULE_ERRORS.clear()
+    _LOGGED_RULE_ERRORS.add(key)
+    logger.debug(f"{message} ({label[:50]}): {error}")
+
+
 def _safe_int(value: Any, default: int = 0) -> int:
     """安全に整数変換する。"""
+    # 欠損値（None・空文字）は頻出するため、例外送出を経ずに既定値を返す
+    if value is None or (type(value) is str and not value):
+        return default
     try:
         return int(value)
     except (ValueError, TypeError):
@@ -48,29 +139,123 @@ def _safe_int(value: Any, default: int = 0) -> int:
 
 def _safe_float(value: Any, default: float = 0.0) -> float:
     """安全に浮動小数点変換する。"""
+    if value is None or (type(value) is str and not value):
+        return default
     try:
         return float(value)
     except (ValueError, TypeError):
         return default
 
 
-def build_eval_context(
-    horse: dict[str, Any],
+@lru_cache(maxsize=8)
+def _definition_function(names: tuple[str, ...]) -> Callable[[Mapping[str, Any]], tuple[Any, ...]]:
+    """FLAG_DEFINITIONS の定義式群を、変数dictから全フラグの値をタプルで返す
+    1つの関数にコンパイルする（行単位のコンテキスト構築用）。"""
+    rewriter = _ContextNameRewriter(keep=frozenset(_SAFE_BUILTINS))
+    values = [ast.unparse(rewriter.visit(ast.parse(FLAG_DEFINITIONS[name], mode="eval").body)) for name in names]
+    source = f"lambda _x: ({', '.join(values)},)"
+    namespace: dict[str, Any] = {"__builtins__": {}, **_SAFE_BUILTINS}
+    fn: Callable[[Mapping[str, Any]], tuple[Any, ...]] = eval(  # noqa: S307
+        compile(source, "<definitions>", "eval"), namespace,
+    )
+    return fn
+
+
+def build_race_context(
     race: dict[str, Any],
     all_entries: list[dict[str, Any]],
-    prev_context: dict[str, Any] | None = None,
-    all_prev_l3f: list[float] | None = None,
+    all_prev_l3f: NDArray[np.float64] | list[float] | None = None,
 ) -> dict[str, Any]:
-    """ルール評価用のコンテキスト変数を構築する。
+    """レース単位で不変な評価変数を1回だけ構築する。
 
-    JVLinkToSQLiteの実カラム名（BaTaijyu, ZogenFugo, ZogenSa, DMJyuni等）に対応。
+    build_horse_context() に渡して馬ごとのコンテキストを組み立てる。出走頭数・
+    レース条件・派生フラグに加え、上がり3F順位用に同レースの有効値（>0）を
+    昇順ソートした配列を保持する。
 
     Args:
-        horse: 対象馬データ（NL_SE_RACE_UMAレコード、provider正規化済み）
         race: レース情報（NL_RA_RACEレコード、provider正規化済み）
         all_entries: 同レース全出走馬データ
+        all_prev_l3f: 同レース全馬の前走HaronTimeL3配列（前走なしは0.0）
+
+    出走順の上がり3F順位（l3f_ranks / prev_l3f_ranks）もまとめて求めておき、
+    build_horse_context() に出走順の位置を渡せば馬ごとの探索も不要になる。
+
+    Returns:
+        {"num_entries", "l3f_sorted", "prev_l3f_sorted", "l3f_ranks", "prev_l3f",
+        "prev_l3f_ranks", "variables", "flags"} のdict
+    """
+    l3f = np.fromiter(
+        (_safe_float(e.get("HaronTimeL3", 0)) for e in all_entries), dtype=np.float64, count=len(all_entries),
+    )
+    prev_l3f = np.asarray(all_prev_l3f if all_prev_l3f is not None else [], dtype=np.float64)
+
+    # トラックコード判定
+    track_cd = str(race.get("TrackCD", ""))
+    kyori = _safe_int(race.get("Kyori", 0))
+    baba_cd = str(race.get("SibaBabaCD", ""))
+    dirt_baba_cd = str(race.get("DirtBabaCD", ""))
+    grade_cd = str(race.get("GradeCD", ""))
+
+    num_entries = len(all_entries)
+    variables: dict[str, Any] = {
+        # --- NL_RA_RACE 直接値 ---
+        "Kyori": kyori,
+        "TrackCD": track_cd,
+        "TenkoCD": str(race.get("TenkoCD", "")),
+        "RaceNum": _safe_int(race.get("RaceNum", 0)),
+        # --- 馬場状態 ---
+        "baba_cd": baba_cd,
+        "dirt_baba_cd": dirt_baba_cd,
+        # --- レースグレード ---
+        "grade_cd": grade_cd,
+        "syubetu_cd": str(race.get("SyubetuCD", "")),
+        # --- 出走頭数（DB値） ---
+        "syusso_tosu": _safe_int(race.get("SyussoTosu", 0)),
+    }
+    return {
+        "num_entries": num_entries,
+        "l3f_sorted": np.sort(l3f[l3f > 0]),
+        "prev_l3f_sorted": np.sort(prev_l3f[prev_l3f > 0]),
+        # 出走順の順位（同値は上位）。馬ごとの値参照はPythonリストの方が速い
+        "l3f_ranks": _rank_among_valid(l3f, l3f, num_entries).tolist(),
+        "prev_l3f": prev_l3f.tolist(),
+        "prev_l3f_ranks": _rank_among_valid(prev_l3f, prev_l3f, num_entries).tolist(),
+        "variables": variables,
+        "flags": dict(zip(RACE_FLAG_VARIABLES, _definition_function(RACE_FLAG_VARIABLES)(variables), strict=True)),
+    }
+
+
+def _sorted_rank(sorted_values: NDArray[np.float64], value: float, default: int) -> int:
+    """昇順ソート済みの有効値配列におけるvalueの順位（同値は上位）を返す。
+
+    valueが0以下または配列に含まれない場合はdefaultとする。
+    """
+    if value <= 0:
+        return default
+    pos = int(np.searchsorted(sorted_values, value, side="left"))
+    if pos < len(sorted_values) and sorted_values[pos] == value:
+        return pos + 1
+    return default
+
+
+def build_horse_context(
+    horse: dict[str, Any],
+    race_ctx: dict[str, Any],
+    prev_context: dict[str, Any] | None = None,
+    include_flags: bool = True,
+    position: int | None = None,
+    out: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """build_race_context() の結果に馬ごとの評価変数を加えてコンテキストを構築する。
+
+    Args:
+        horse: 対象馬データ（NL_SE_RACE_UMAレコード、provider正規化済み）
+        race_ctx: build_race_context() の戻り値
         prev_context: 前走の出走馬データ（NL_SE_RACE_UMAレコード）。Noneで前走なし。
-        all_prev_l3f: 同レース全馬の前走HaronTimeL3リスト（prev_last_3f_rank計算用）
+        include_flags: FLAG_VARIABLES（is_*系の派生フラグ）を含めるか。
+        position: all_entries中の horse の位置。指定時は事前計算済みの順位を参照する。
+        out: 書き込み先のdict。指定時は新しいdictを生成せずこれを上書きして返す
+            （EvalContextFactory が馬ごとに同じdictを再利用するために使う）。
 
     Returns:
         eval()で使用する変数辞書
@@ -81,7 +266,7 @@ def build_eval_context(
     zogen_sa = _safe_int(horse.get("ZogenSa", 0))
     weight_diff = -zogen_sa if zogen_fugo == "-" else zogen_sa
 
-    num_entries = len(all_entries)
+    num_entries: int = race_ctx["num_entries"]
 
     # 馬番の相対位置（内枠=小, 外枠=大）
     umaban = _safe_int(horse.get("Umaban", 0))
@@ -95,12 +280,11 @@ def build_eval_context(
     # --- 上がり3ハロン ---
     last_3f = _safe_float(horse.get("HaronTimeL3", 0))
 
-    # 上がり3F 順位（小さいほど速い）
-    horse_l3f = last_3f
-    l3f_values = sorted(
-        [_safe_float(e.get("HaronTimeL3", 0)) for e in all_entries if _safe_float(e.get("HaronTimeL3", 0)) > 0],
-    )
-    last_3f_rank = l3f_values.index(horse_l3f) + 1 if horse_l3f > 0 and horse_l3f in l3f_values else num_entries
+    # 上がり3F 順位（小さいほど速い）。位置が分かれば事前計算済み、なければ二分探索
+    if position is not None:
+        last_3f_rank = race_ctx["l3f_ranks"][position]
+    else:
+        last_3f_rank = _sorted_rank(race_ctx["l3f_sorted"], last_3f, num_entries)
 
     # 人気順
     ninki = _safe_int(horse.get("Ninki", 0))
@@ -117,9 +301,6 @@ def build_eval_context(
     # 単勝オッズ（NL_SE_RACE_UMA内のOddsカラム）
     odds = _safe_float(horse.get("Odds", 0))
 
-    # トラックコード判定
-    track_cd = str(race.get("TrackCD", ""))
-
     # --- 前走データ（prev_context） ---
     prev = prev_context or {}
     prev_jyuni = _safe_int(prev.get("KakuteiJyuni", 0))
@@ -128,121 +309,1310 @@ def build_eval_context(
     prev_corner4_pos = _safe_int(prev.get("Jyuni4c", 0))
 
     # 前走上がり3Fランク（同レース全馬の前走L3F中の順位）
-    if all_prev_l3f and prev_last_3f > 0:
-        sorted_l3f = sorted([v for v in all_prev_l3f if v > 0])
-        prev_last_3f_rank = sorted_l3f.index(prev_last_3f) + 1 if prev_last_3f in sorted_l3f else num_entries
+    # all_prev_l3f と前走データが同じ値を指す場合のみ事前計算済みの順位を使う
+    prev_l3f: list[float] = race_ctx["prev_l3f"]
+    if position is not None and position < len(prev_l3f) and prev_l3f[position] == prev_last_3f:
+        prev_last_3f_rank = race_ctx["prev_l3f_ranks"][position]
+    else:
+        prev_last_3f_rank = _sorted_rank(race_ctx["prev_l3f_sorted"], prev_last_3f, num_entries)
+
+    sex_cd = str(horse.get("SexCD", ""))
+    race_vars: dict[str, Any] = race_ctx["variables"]
+
+    # 一時dictを組み立てずキーごとに代入する（out指定時は既存のdictを上書きして再利用する）
+    ctx: dict[str, Any] = out if out is not None else {}
+    # --- NL_SE_RACE_UMA 直接値 ---
+    ctx["Umaban"] = umaban
+    ctx["Wakuban"] = _safe_int(horse.get("Wakuban", 0))
+    ctx["SexCD"] = sex_cd
+    ctx["Barei"] = _safe_int(horse.get("Barei", 0))
+    ctx["Futan"] = _safe_float(horse.get("Futan", 0))
+    ctx["Ninki"] = ninki
+    ctx["KakuteiJyuni"] = kakutei_jyuni
+    ctx["Odds"] = odds
+    # --- NL_RA_RACE 直接値 ---
+    ctx["Kyori"] = race_vars["Kyori"]
+    ctx["TrackCD"] = race_vars["TrackCD"]
+    ctx["TenkoCD"] = race_vars["TenkoCD"]
+    ctx["RaceNum"] = race_vars["RaceNum"]
+    # --- 派生変数 ---
+    ctx["weight"] = weight_val
+    ctx["weight_diff"] = weight_diff
+    ctx["num_entries"] = num_entries
+    ctx["gate_position"] = gate_position
+    # --- JRA公式AIデータ ---
+    ctx["dm_rank"] = dm_rank
+    ctx["last_3f"] = last_3f
+    ctx["last_3f_rank"] = last_3f_rank
+    # --- 脚質・位置取り ---
+    ctx["running_style"] = running_style
+    ctx["corner1_pos"] = _safe_int(horse.get("Jyuni1c", 0))
+    ctx["corner2_pos"] = _safe_int(horse.get("Jyuni2c", 0))
+    ctx["corner3_pos"] = _safe_int(horse.get("Jyuni3c", 0))
+    ctx["corner4_pos"] = corner4_pos
+    ctx["position_change"] = _safe_int(horse.get("Jyuni1c", 0)) - corner4_pos
+    # --- 馬場状態 ---
+    ctx["baba_cd"] = race_vars["baba_cd"]
+    ctx["dirt_baba_cd"] = race_vars["dirt_baba_cd"]
+    # --- レースグレード ---
+    ctx["grade_cd"] = race_vars["grade_cd"]
+    ctx["syubetu_cd"] = race_vars["syubetu_cd"]
+    # --- 出走頭数（DB値） ---
+    ctx["syusso_tosu"] = race_vars["syusso_tosu"]
+    # --- 単勝オッズ ---
+    ctx["odds"] = odds
+    # --- 前走データ ---
+    ctx["prev_jyuni"] = prev_jyuni
+    ctx["prev_last_3f"] = prev_last_3f
+    ctx["prev_last_3f_rank"] = prev_last_3f_rank
+    ctx["prev_running_style"] = prev_running_style
+    ctx["prev_corner4_pos"] = prev_corner4_pos
+    if include_flags:
+        ctx.update(race_ctx["flags"])
+        # --- 馬ごとのフラグ（FLAG_DEFINITIONS） ---
+        ctx.update(zip(_HORSE_FLAG_VARIABLES, _definition_function(_HORSE_FLAG_VARIABLES)(ctx), strict=True))
+    # --- 安全な組み込み ---
+    ctx.update(_SAFE_BUILTINS)
+    return ctx
+
+
+class EvalContextFactory:
+    """1回のスコアリング処理の中で、馬ごとの評価コンテキスト用dictを使い回す。
+
+    build() は毎回同じdictを上書きして返すため、戻り値は次の build() 呼び出しまでの
+    間だけ有効（ルール評価中のみ参照し、保持しないこと）。評価中にキーが追加された場合は、
+    次の build() の前に空にして持ち越さない。
+    """
+
+    def __init__(self) -> None:
+        self._buf: dict[str, Any] = {}
+        self._size = 0
+
+    def build(
+        self,
+        horse: dict[str, Any],
+        race_ctx: dict[str, Any],
+        prev_context: dict[str, Any] | None = None,
+        position: int | None = None,
+    ) -> dict[str, Any]:
+        """build_horse_context() と同じ内容を、使い回しのdictに書き込んで返す。"""
+        if len(self._buf) != self._size:
+            self._buf.clear()
+        ctx = build_horse_context(horse, race_ctx, prev_context, position=position, out=self._buf)
+        self._size = len(ctx)
+        return ctx
+
+
+def build_eval_context(
+    horse: dict[str, Any],
+    race: dict[str, Any],
+    all_entries: list[dict[str, Any]],
+    prev_context: dict[str, Any] | None = None,
+    all_prev_l3f: NDArray[np.float64] | list[float] | None = None,
+    include_flags: bool = True,
+) -> dict[str, Any]:
+    """ルール評価用のコンテキスト変数を構築する。
+
+    JVLinkToSQLiteの実カラム名（BaTaijyu, ZogenFugo, ZogenSa, DMJyuni等）に対応。
+    1頭分のみ評価する場合の簡便版。1レース全馬を評価する場合は build_race_context() を
+    1回だけ呼び、馬ごとに build_horse_context() を使う。
+
+    Args:
+        horse: 対象馬データ（NL_SE_RACE_UMAレコード、provider正規化済み）
+        race: レース情報（NL_RA_RACEレコード、provider正規化済み）
+        all_entries: 同レース全出走馬データ
+        prev_context: 前走の出走馬データ（NL_SE_RACE_UMAレコード）。Noneで前走なし。
+        all_prev_l3f: 同レース全馬の前走HaronTimeL3配列（prev_last_3f_rank計算用、前走なしは0.0）
+        include_flags: FLAG_VARIABLES（is_*系の派生フラグ）を含めるか。
+            列単位評価ではFalseとし、prepare_features() で全馬分まとめて算出する。
+
+    Returns:
+        eval()で使用する変数辞書
+    """
+    race_ctx = build_race_context(race, all_entries, all_prev_l3f)
+    return build_horse_context(horse, race_ctx, prev_context, include_flags)
+
+
+@lru_cache(maxsize=1024)
+def is_safe_expression(expression: str) -> bool:
+    """ルール式が安全に評価できるかを検査する（式ごとに1回のみ、結果をキャッシュ）。
+
+    禁止キーワードの正規表現に加え、ASTの全ノードを許可リストと照合する。
+    許可するのは _SAFE_NODES の構文、_SAFE_BUILTINS の関数呼び出し、_SAFE_ATTRIBUTES の属性のみで、
+    `().__class__` や `"{0.__class__}".format(x)` のような属性経由の脱出、ダンダー名の参照を拒否する。
+    評価コンテキストは同じ馬の全ルールで共有するため、変数を書き換えられる代入式（:=）も拒否する。
+    構文エラーの式は安全性の問題ではないためTrueとし、コンパイル時にNoneとなる。
+
+    Args:
+        expression: Python式文字列
+
+    Returns:
+        評価してよい式ならTrue
+    """
+    if _FORBIDDEN_PATTERNS.search(expression):
+        logger.warning(f"禁止パターンを検出: {expression[:80]}")
+        return False
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except (SyntaxError, ValueError):
+        return True
+    for node in ast.walk(tree):
+        if not _is_allowed_node(node):
+            logger.warning(f"禁止パターンを検出: {expression[:80]}")
+            return False
+    return True
+
+
+def _is_allowed_node(node: ast.AST) -> bool:
+    """ASTノードがルール式の許可リストに含まれるかを判定する。"""
+    if not isinstance(node, _SAFE_NODES):
+        return False
+    if isinstance(node, ast.Attribute):
+        return node.attr in _SAFE_ATTRIBUTES
+    if isinstance(node, ast.Name):
+        return not node.id.startswith("__")
+    if isinstance(node, ast.Call):
+        func = node.func
+        return (isinstance(func, ast.Name) and func.id in _SAFE_BUILTINS) or isinstance(func, ast.Attribute)
+    return True
+
+
+@lru_cache(maxsize=1024)
+def compile_rule(expression: str) -> CodeType | None:
+    """ルール式を行単位評価用のコードオブジェクトにコンパイルする（式ごとに1回のみ）。
+
+    eval(str) は呼び出しごとに字句解析・コンパイルを行うため、
+    コードオブジェクトをキャッシュして再利用する。
+
+    Args:
+        expression: Python式文字列
+
+    Returns:
+        コードオブジェクト。構文エラーの場合はNone。
+    """
+    try:
+        # eval(str) と同様に先頭の空白・タブを除去する
+        return compile(expression.lstrip(" \t"), "<rule>", "eval")
+    except (SyntaxError, ValueError) as e:
+        logger.debug(f"ルール式の構文エラー ({expression[:50]}): {e}")
+        return None
+
+
+def compile_checked_rule(expression: str) -> CodeType | None:
+    """空式・禁止パターンを検査した上でルール式をコンパイルする。
+
+    evaluate_rule() の前処理を切り出したもの。ルール群を事前にコンパイルしておき、
+    evaluate_compiled() で馬ごとのコンテキストに対して繰り返し評価する用途向け。
+
+    Args:
+        expression: Python式文字列
+
+    Returns:
+        コードオブジェクト。空式・禁止パターン・構文エラーの場合はNone。
+    """
+    if not expression or not expression.strip():
+        return None
+
+    # セキュリティチェック（式ごとにキャッシュされ、評価のたびには走らない）
+    if not is_safe_expression(expression):
+        return None
+
+    return compile_rule(expression)
+
+
+def evaluate_compiled(code: CodeType | None, ctx: dict[str, Any], label: str = "") -> float:
+    """compile_checked_rule() 済みのコードを評価コンテキスト上で評価する。
+
+    Args:
+        code: コードオブジェクト（Noneの場合は0.0）
+        ctx: build_eval_context() で構築した評価コンテキスト（複数ルールで共有可）
+        label: エラーログ用の識別子（式文字列・ルール名等）
+
+    Returns:
+        評価結果のスコア（float）。評価失敗時は0.0。
+    """
+    if code is None:
+        return 0.0
+    try:
+        return float(eval(code, _EVAL_GLOBALS, ctx))  # noqa: S307
+    except Exception as e:
+        _log_rule_error("ルール評価エラー", label, e)
+        return 0.0
+
+
+def evaluate_rule(
+    expression: str,
+    horse: dict[str, Any],
+    race: dict[str, Any],
+    all_entries: list[dict[str, Any]],
+    prev_context: dict[str, Any] | None = None,
+    all_prev_l3f: NDArray[np.float64] | list[float] | None = None,
+) -> float:
+    """ファクタールールの式を評価し、スコアを返す。
+
+    Args:
+        expression: Python式文字列（例: '1 if is_longshot and dm_rank <= 3 else 0'）
+        horse: 対象馬データ
+        race: レース情報
+        all_entries: 同レース全出走馬データ
+        prev_context: 前走の出走馬データ（Noneで前走なし）
+        all_prev_l3f: 同レース全馬の前走HaronTimeL3配列
+
+    Returns:
+        評価結果のスコア（float）。評価失敗時は0.0。
+    """
+    code = compile_checked_rule(expression)
+    if code is None:
+        return 0.0
+
+    ctx = build_eval_context(horse, race, all_entries, prev_context, all_prev_l3f)
+    return evaluate_compiled(code, ctx, expression)
+
+
+# ===== 行単位評価のルール群融合 =====
+
+# 行単位の融合関数に展開せず、個別evalで評価するノード（独自スコープ・代入を持つ構文）
+_ROW_UNFUSABLE_NODES = (ast.ListComp, ast.SetComp, ast.GeneratorExp)
+
+
+class _ContextNameRewriter(ast.NodeTransformer):
+    """変数参照 `name` を評価コンテキストの参照 `_x["name"]` に置き換える（keep の名前は除く）。"""
+
+    def __init__(self, keep: frozenset[str] = frozenset()) -> None:
+        self._keep = keep
+
+    def visit_Name(self, node: ast.Name) -> ast.expr:
+        if node.id in self._keep:
+            return node
+        return ast.copy_location(
+            ast.Subscript(value=ast.Name(id="_x", ctx=ast.Load()), slice=ast.Constant(node.id), ctx=ast.Load()),
+            node,
+        )
+
+
+@lru_cache(maxsize=64)
+def compile_row_scorer(expressions: tuple[str, ...]) -> Callable[[Mapping[str, Any]], list[float]]:
+    """ルール式群を、1頭分の評価コンテキストから全ルールの値を返す1つの関数にコンパイルする。
+
+    ルールごとのeval()呼び出しを、各式を展開した1関数の呼び出しに置き換える。
+    結果は各式を evaluate_compiled() で評価した値と同じ（空式・禁止パターン・
+    構文エラー・評価エラーは0.0）。内包表記等を含む式は個別のevalで評価する。
+
+    Args:
+        expressions: ルール式のタプル
+
+    Returns:
+        `f(ctx) -> list[float]` の関数（ctxは build_eval_context() 等で構築したもの）
+    """
+    codes = tuple(compile_checked_rule(expr) for expr in expressions)
+    stmts: list[ast.stmt] = [
+        ast.Assign(
+            targets=[ast.Name(id="_r", ctx=ast.Store())],
+            value=ast.BinOp(left=ast.List(elts=[ast.Constant(0.0)], ctx=ast.Load()), op=ast.Mult(),
+                            right=ast.Constant(len(expressions))),
+        ),
+    ]
+    for j, (expression, code) in enumerate(zip(expressions, codes, strict=True)):
+        if code is None:
+            continue
+        target = ast.Subscript(value=ast.Name(id="_r", ctx=ast.Load()), slice=ast.Constant(j), ctx=ast.Store())
+        body = ast.parse(expression.lstrip(" \t"), mode="eval").body
+        if any(isinstance(node, _ROW_UNFUSABLE_NODES) for node in ast.walk(body)):
+            call = ast.parse(f"_ev(_k[{j}], _x, _l[{j}])", mode="eval").body
+            stmts.append(ast.Assign(targets=[target], value=call))
+            continue
+        value = ast.Call(
+            func=ast.Name(id="float", ctx=ast.Load()), args=[_ContextNameRewriter().visit(body)], keywords=[],
+        )
+        handler = ast.parse(f"_log('ルール評価エラー', _l[{j}], _e)").body
+        stmts.append(ast.Try(
+            body=[ast.Assign(targets=[target], value=value)],
+            handlers=[ast.ExceptHandler(type=ast.Name(id="Exception", ctx=ast.Load()), name="_e", body=handler)],
+            orelse=[],
+            finalbody=[],
+        ))
+    stmts.append(ast.Return(value=ast.Name(id="_r", ctx=ast.Load())))
+
+    module = ast.parse("def _row_rules(_x):\n    pass\n")
+    func = module.body[0]
+    assert isinstance(func, ast.FunctionDef)
+    func.body = stmts
+    ast.fix_missing_locations(module)
+    namespace: dict[str, Any] = {
+        "__builtins__": {}, "float": float, "Exception": Exception,
+        "_ev": evaluate_compiled, "_log": _log_rule_error, "_k": codes, "_l": expressions,
+    }
+    exec(compile(module, "<rule:row>", "exec"), namespace)  # noqa: S102
+    fn: Callable[[Mapping[str, Any]], list[float]] = namespace["_row_rules"]
+    return fn
+
+
+# ===== ベクトル化評価 =====
+
+VectorizedRule = Callable[[Mapping[str, Any]], Any]
+"""列マッピング（pd.DataFrame または 変数名→np.ndarray のdict）を受け取り、全馬分の値を返す関数。"""
+
+
+class _UnvectorizableError(Exception):
+    """NumPy演算に変換できない式構造。"""
+
+
+def make_vector_namespace(xp: Any) -> dict[str, Any]:
+    """ベクトル化式の実行名前空間を配列モジュール（numpy / cupy）ごとに生成する。
+
+    cupy は numpy と同じAPIを持つため、同じコンパイル済み式をGPU配列にも適用できる。
+
+    Args:
+        xp: 配列モジュール（numpy互換）
+
+    Returns:
+        compile_vectorized() が生成する関数のグローバル名前空間
+    """
+
+    def _truth(x: Any) -> Any:
+        """要素ごとのPython真偽値（bool()相当）を返す。"""
+        arr = xp.asarray(x)
+        if arr.dtype == xp.bool_:
+            return arr
+        if arr.dtype == object:
+            return np.frompyfunc(bool, 1, 1)(arr).astype(np.bool_)
+        return arr.astype(xp.bool_)
+
+    def _vec_and(a: Any, b: Any) -> Any:
+        """`a and b` の要素ごと版（Pythonの短絡評価と同じ値を返す）。"""
+        a_arr, b_arr = xp.asarray(a), xp.asarray(b)
+        if a_arr.dtype == xp.bool_ and b_arr.dtype == xp.bool_:
+            return a_arr & b_arr
+        return xp.where(_truth(a_arr), b_arr, a_arr)
+
+    def _vec_or(a: Any, b: Any) -> Any:
+        """`a or b` の要素ごと版（Pythonの短絡評価と同じ値を返す）。"""
+        a_arr, b_arr = xp.asarray(a), xp.asarray(b)
+        if a_arr.dtype == xp.bool_ and b_arr.dtype == xp.bool_:
+            return a_arr | b_arr
+        return xp.where(_truth(a_arr), a_arr, b_arr)
+
+    def _vec_where(cond: Any, body: Any, orelse: Any) -> Any:
+        """`body if cond else orelse` の要素ごと版。"""
+        return xp.where(_truth(cond), body, orelse)
+
+    def _vec_int(x: Any) -> Any:
+        """int() の要素ごと版（0方向への切り捨て）。"""
+        arr = xp.asarray(x)
+        if arr.dtype == object:
+            raise TypeError("object配列のint変換は行単位評価で行う")
+        return xp.trunc(arr).astype(xp.int64)
+
+    def _vec_float(x: Any) -> Any:
+        """float() の要素ごと版。"""
+        return xp.asarray(x, dtype=xp.float64)
+
+    calls: dict[str, Callable[..., Any]] = {
+        "abs": xp.abs,
+        "max": xp.maximum,
+        "min": xp.minimum,
+        "round": xp.round,
+        "int": _vec_int,
+        "float": _vec_float,
+        "bool": _truth,
+    }
+    return {
+        "__builtins__": {},
+        "_and": _vec_and,
+        "_or": _vec_or,
+        "_not": lambda x: ~_truth(x),
+        "_where": _vec_where,
+        "_isin": lambda x, values: xp.isin(xp.asarray(x), xp.asarray(values)),
+        **{f"_fn_{name}": fn for name, fn in calls.items()},
+    }
+
+
+# ベクトル化式から呼び出せる組み込み名と許容引数数
+_VEC_CALLS: dict[str, tuple[int, ...]] = {
+    "abs": (1,),
+    "max": (2,),
+    "min": (2,),
+    "round": (1, 2),
+    "int": (1,),
+    "float": (1,),
+    "bool": (1,),
+}
+
+_VEC_GLOBALS: dict[str, Any] = make_vector_namespace(np)
+
+
+def _is_boolean_node(node: ast.expr) -> bool:
+    """式の値が常にbool（比較・not・フラグ変数とそれらのand/or）かを返す。"""
+    if isinstance(node, ast.Compare):
+        return True
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return True
+    if isinstance(node, ast.Name):
+        return node.id in FLAG_VARIABLES
+    if isinstance(node, ast.Constant):
+        return isinstance(node.value, bool)
+    if isinstance(node, ast.BoolOp):
+        return all(_is_boolean_node(v) for v in node.values)
+    return False
+
+
+def _numeric_constant(node: ast.expr) -> float | None:
+    """数値定数（単項マイナス付きを含む、boolを除く）の値を返す。定数でなければNone。"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub | ast.UAdd):
+        value = _numeric_constant(node.operand)
+        return None if value is None else (-value if isinstance(node.op, ast.USub) else value)
+    if isinstance(node, ast.Constant) and isinstance(node.value, int | float) and not isinstance(node.value, bool):
+        return node.value
+    return None
+
+
+def _threshold_implies(strict: ast.expr, loose: ast.expr) -> bool:
+    """単一比較 strict が成り立てば loose も必ず成り立つか（同一左辺・同方向の定数閾値）を返す。"""
+    if not (
+        isinstance(strict, ast.Compare) and isinstance(loose, ast.Compare)
+        and len(strict.ops) == 1 and len(loose.ops) == 1
+        and ast.dump(strict.left) == ast.dump(loose.left)
+    ):
+        return False
+    a, b = _numeric_constant(strict.comparators[0]), _numeric_constant(loose.comparators[0])
+    if a is None or b is None:
+        return False
+    s_op, l_op = strict.ops[0], loose.ops[0]
+    if isinstance(s_op, ast.Gt | ast.GtE) and isinstance(l_op, ast.Gt | ast.GtE):
+        return a > b or (a == b and (isinstance(s_op, ast.Gt) or isinstance(l_op, ast.GtE)))
+    if isinstance(s_op, ast.Lt | ast.LtE) and isinstance(l_op, ast.Lt | ast.LtE):
+        return a < b or (a == b and (isinstance(s_op, ast.Lt) or isinstance(l_op, ast.LtE)))
+    return False
+
+
+def _scaled(value: float, cond: ast.expr) -> ast.expr:
+    """`value * cond` のASTを返す（value=1 の場合は乗算を省く）。"""
+    if value == 1:
+        return cond
+    return ast.BinOp(left=ast.Constant(value), op=ast.Mult(), right=cond)
+
+
+def _branchless(node: ast.expr) -> ast.expr | None:
+    """定数値の条件式を分岐なしの積和に変換する。変換できない場合はNone。
+
+    - `X if C else 0` → `X * C`
+    - `A if C2 else (B if C1 else 0)`（C2ならば必ずC1）→ `B * C1 + (A - B) * C2`
+    - `X if C else Y` → `X * C + Y * (not C)`
+    """
+    constant = _numeric_constant(node)
+    if constant is not None:
+        return ast.Constant(constant)
+    if not isinstance(node, ast.IfExp) or not _is_boolean_node(node.test):
+        return None
+    body = _numeric_constant(node.body)
+    if body is None:
+        return None
+    orelse = _numeric_constant(node.orelse)
+    if orelse == 0:
+        return _scaled(body, node.test)
+    inner = node.orelse
+    if (
+        isinstance(inner, ast.IfExp)
+        and _numeric_constant(inner.orelse) == 0
+        and _threshold_implies(node.test, inner.test)
+    ):
+        inner_body = _numeric_constant(inner.body)
+        if inner_body is not None:
+            step = body - inner_body
+            base = _scaled(inner_body, inner.test)
+            return base if step == 0 else ast.BinOp(left=base, op=ast.Add(), right=_scaled(step, node.test))
+    rest = _branchless(node.orelse)
+    if rest is None:
+        return None
+    negated = ast.BinOp(left=rest, op=ast.Mult(), right=ast.UnaryOp(op=ast.Not(), operand=node.test))
+    return ast.BinOp(left=_scaled(body, node.test), op=ast.Add(), right=negated)
+
+
+def normalize_branchless(node: ast.expr) -> ast.expr:
+    """式中の定数値の条件式（`X if C else 0` 等）を分岐なしの積和形に書き換える。
+
+    条件がbool値（比較・not・フラグ変数）で、各分岐が数値定数の場合のみ変換する。
+    分岐がなくなるため、列単位評価では np.where の2配列生成を避けられ、
+    融合カーネル（Numba）ではループが自動ベクトル化されやすくなる。
+    変換対象外の式はそのまま返す（入力ASTは変更しない）。
+
+    Args:
+        node: ルール式のAST（ast.Expression.body）
+
+    Returns:
+        変換後のAST
+    """
+    converted = _branchless(node)
+    if converted is not None:
+        return converted
+    if isinstance(node, ast.IfExp):
+        return ast.IfExp(
+            test=node.test, body=normalize_branchless(node.body), orelse=normalize_branchless(node.orelse),
+        )
+    if isinstance(node, ast.BinOp):
+        return ast.BinOp(left=normalize_branchless(node.left), op=node.op, right=normalize_branchless(node.right))
+    return node
+
+
+class _Vectorizer(ast.NodeTransformer):
+    """ルール式のASTを列単位のNumPy演算に書き換える。
+
+    変数参照は `_c["name"]`、`and`/`or`/`not`/条件式/`in` は要素ごとのヘルパー呼び出しに変換する。
+    ホワイトリスト外のノード（属性参照・添字・内包表記等）は _UnvectorizableError を送出する。
+    """
+
+    _ALLOWED_LEAVES = (ast.Constant, ast.Load, ast.operator, ast.unaryop, ast.cmpop, ast.boolop)
+
+    @staticmethod
+    def _helper(name: str, *args: ast.expr) -> ast.Call:
+        return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=list(args), keywords=[])
+
+    def visit_Name(self, node: ast.Name) -> ast.expr:
+        if node.id.startswith("_"):
+            raise _UnvectorizableError(f"不正な変数名: {node.id}")
+        return ast.Subscript(
+            value=ast.Name(id="_c", ctx=ast.Load()),
+            slice=ast.Constant(value=node.id),
+            ctx=ast.Load(),
+        )
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.expr:
+        helper = "_and" if isinstance(node.op, ast.And) else "_or"
+        values: list[ast.expr] = [self.visit(v) for v in node.values]
+        result = values[0]
+        for value in values[1:]:
+            result = self._helper(helper, result, value)
+        return result
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.expr:
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.Not):
+            return self._helper("_not", operand)
+        return ast.UnaryOp(op=node.op, operand=operand)
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.expr:
+        return self._helper("_where", self.visit(node.test), self.visit(node.body), self.visit(node.orelse))
+
+    def visit_Compare(self, node: ast.Compare) -> ast.expr:
+        # 連鎖比較 a < b < c → (a < b) and (b < c)
+        operands = [node.left, *node.comparators]
+        parts: list[ast.expr] = []
+        for op, left, right in zip(node.ops, operands[:-1], operands[1:], strict=True):
+            parts.append(self._compare_pair(op, self.visit(left), right))
+        result = parts[0]
+        for part in parts[1:]:
+            result = self._helper("_and", result, part)
+        return result
+
+    def _compare_pair(self, op: ast.cmpop, left: ast.expr, right: ast.expr) -> ast.expr:
+        if isinstance(op, ast.In | ast.NotIn):
+            if not isinstance(right, ast.Tuple | ast.List | ast.Set) or not all(
+                isinstance(e, ast.Constant) for e in right.elts
+            ):
+                raise _UnvectorizableError("in の右辺は定数のタプル/リストのみ対応")
+            values = ast.List(elts=list(right.elts), ctx=ast.Load())
+            isin = self._helper("_isin", left, values)
+            return self._helper("_not", isin) if isinstance(op, ast.NotIn) else isin
+        if isinstance(op, ast.Is | ast.IsNot):
+            raise _UnvectorizableError("is 比較は非対応")
+        return ast.Compare(left=left, ops=[op], comparators=[self.visit(right)])
+
+    def visit_Call(self, node: ast.Call) -> ast.expr:
+        if not isinstance(node.func, ast.Name) or node.func.id not in _VEC_CALLS or node.keywords:
+            raise _UnvectorizableError("非対応の関数呼び出し")
+        if len(node.args) not in _VEC_CALLS[node.func.id]:
+            raise _UnvectorizableError(f"{node.func.id}() の引数数が非対応")
+        return self._helper(f"_fn_{node.func.id}", *(self.visit(a) for a in node.args))
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.expr:
+        return ast.BinOp(left=self.visit(node.left), op=node.op, right=self.visit(node.right))
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        if isinstance(node, self._ALLOWED_LEAVES):
+            return node
+        raise _UnvectorizableError(f"非対応の構文: {type(node).__name__}")
+
+
+def _vectorize_expression(expression: str) -> ast.expr | None:
+    """ルール式を列単位演算のAST（`_c[...]` とヘルパー呼び出し）に変換する。変換不能な式はNone。"""
+    if not expression or not expression.strip() or not is_safe_expression(expression):
+        return None
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+        body: ast.expr = _Vectorizer().visit(normalize_branchless(tree.body))
+    except (SyntaxError, _UnvectorizableError) as e:
+        logger.debug(f"ベクトル化不可のため行単位評価を使用 ({expression[:50]}): {e}")
+        return None
+    return body
+
+
+def _lambda_code(body: ast.expr, filename: str) -> CodeType:
+    """`lambda _c: <body>` をコンパイルする。"""
+    args = ast.arguments(posonlyargs=[], args=[ast.arg(arg="_c")], kwonlyargs=[], kw_defaults=[], defaults=[])
+    lambda_expr = ast.fix_missing_locations(ast.Expression(body=ast.Lambda(args=args, body=body)))
+    return compile(lambda_expr, filename, "eval")
+
+
+@lru_cache(maxsize=512)
+def _vectorized_code(expression: str) -> CodeType | None:
+    """ルール式を列単位評価用のlambdaコード（配列モジュール非依存）にコンパイルする。"""
+    body = _vectorize_expression(expression)
+    return None if body is None else _lambda_code(body, "<rule:vec>")
+
+
+def compile_vectorized_with(expression: str, namespace: dict[str, Any]) -> VectorizedRule | None:
+    """ルール式を指定の名前空間（make_vector_namespace() の戻り値）で関数化する。
+
+    Args:
+        expression: Python式文字列
+        namespace: 配列モジュールごとのヘルパー名前空間
+
+    Returns:
+        `f(columns) -> 配列` の関数。変換不能な式はNone。
+    """
+    code = _vectorized_code(expression)
+    if code is None:
+        return None
+    fn: VectorizedRule = eval(code, namespace)  # noqa: S307
+    return fn
+
+
+@lru_cache(maxsize=512)
+def compile_vectorized(expression: str) -> VectorizedRule | None:
+    """ルール式を列単位で評価するNumPy関数にコンパイルする。
+
+    変数名を `df["<name>"]`、`X if C else Y` を `np.where` に置換した関数を生成する。
+    定数値の条件式は normalize_branchless() で分岐なしの積和形に変換してから置換する。
+    `//` や `abs()` を含む式にも対応するため DataFrame.eval は使用しない。
+
+    Args:
+        expression: Python式文字列（例: '1 if is_longshot and dm_rank <= 3 else 0'）
+
+    Returns:
+        `f(df) -> np.ndarray` の関数。空式・禁止パターン・変換不能な式はNone（行単位評価を使用）。
+    """
+    return compile_vectorized_with(expression, _VEC_GLOBALS)
+
+
+def build_eval_columns(contexts: list[dict[str, Any]]) -> dict[str, NDArray[Any]]:
+    """馬ごとの評価コンテキストを変数名→列配列のdictに転置する。
+
+    Args:
+        contexts: build_eval_context() の戻り値リスト（1レース全馬分）
+
+    Returns:
+        変数名→np.ndarray（文字列変数はobject配列）のdict
+    """
+    if not contexts:
+        return {}
+    columns: dict[str, NDArray[Any]] = {}
+    for name, first in contexts[0].items():
+        if callable(first):
+            continue  # 組み込み関数は列に含めない
+        values = [ctx[name] for ctx in contexts]
+        if isinstance(first, str):
+            columns[name] = np.array(values, dtype=object)
+        else:
+            columns[name] = np.asarray(values)
+    return columns
+
+
+def _rank_among_valid(values: NDArray[np.float64], targets: NDArray[np.float64], default: int) -> NDArray[np.int64]:
+    """targets各値の、values中の有効値（>0）における昇順順位（同値は上位）を返す。
+
+    build_eval_context() の last_3f_rank / prev_last_3f_rank と同じ規則で、
+    対象値が0以下またはvaluesの有効値に含まれない場合はdefaultとする。
+    """
+    valid = np.sort(values[values > 0])
+    ranks = np.full(len(targets), default, dtype=np.int64)
+    if len(valid) == 0:
+        return ranks
+    pos = np.searchsorted(valid, targets, side="left")
+    found = (targets > 0) & (valid[np.minimum(pos, len(valid) - 1)] == targets)
+    ranks[found] = pos[found] + 1
+    return ranks
+
+
+def build_race_columns(
+    race: dict[str, Any],
+    all_entries: list[dict[str, Any]],
+    prev_contexts: list[dict[str, Any] | None] | None = None,
+    all_prev_l3f: NDArray[np.float64] | list[float] | None = None,
+) -> dict[str, NDArray[Any]]:
+    """1レース全馬の評価変数を、馬ごとのコンテキストを経由せず直接列配列として構築する。
+
+    build_eval_columns([build_eval_context(..., include_flags=False) for 各馬]) と
+    同じキー・値・dtypeを返す。レース単位の値は1回だけ解釈して全馬分に展開し、
+    上がり3F順位はソート済み配列への二分探索でまとめて求める。
+
+    Args:
+        race: レース情報（NL_RA_RACEレコード、provider正規化済み）
+        all_entries: 同レース全出走馬データ
+        prev_contexts: 各馬の前走データ（all_entriesと同順、Noneで前走なし）
+        all_prev_l3f: 同レース全馬の前走HaronTimeL3配列
+
+    Returns:
+        変数名→np.ndarray（文字列変数はobject配列）のdict
+    """
+    n = len(all_entries)
+    if n == 0:
+        return {}
+    prevs = [p or {} for p in prev_contexts] if prev_contexts is not None else [{}] * n
+
+    def ints(rows: list[dict[str, Any]], key: str) -> NDArray[np.int64]:
+        return np.array([_safe_int(r.get(key, 0)) for r in rows], dtype=np.int64)
+
+    def floats(rows: list[dict[str, Any]], key: str) -> NDArray[np.float64]:
+        return np.array([_safe_float(r.get(key, 0)) for r in rows], dtype=np.float64)
+
+    def strs(rows: list[dict[str, Any]], key: str) -> NDArray[Any]:
+        return np.array([str(r.get(key, "")) for r in rows], dtype=object)
+
+    def race_int(key: str) -> NDArray[np.int64]:
+        return np.full(n, _safe_int(race.get(key, 0)), dtype=np.int64)
+
+    def race_str(key: str) -> NDArray[Any]:
+        return np.full(n, str(race.get(key, "")), dtype=object)
+
+    umaban = ints(all_entries, "Umaban")
+    zogen_sa = ints(all_entries, "ZogenSa")
+    minus = np.array([str(e.get("ZogenFugo", "")).strip() == "-" for e in all_entries], dtype=bool)
+    dm_rank = ints(all_entries, "DMJyuni")
+    dm_rank[dm_rank == 0] = n
+    last_3f = floats(all_entries, "HaronTimeL3")
+    odds = floats(all_entries, "Odds")
+    corner1_pos = ints(all_entries, "Jyuni1c")
+    corner4_pos = ints(all_entries, "Jyuni4c")
+    prev_last_3f = floats(prevs, "HaronTimeL3")
+    if all_prev_l3f is not None and len(all_prev_l3f):
+        prev_last_3f_rank = _rank_among_valid(np.asarray(all_prev_l3f, dtype=np.float64), prev_last_3f, n)
     else:
-        prev_last_3f_rank = num_entries
+        prev_last_3f_rank = np.full(n, n, dtype=np.int64)
 
-    ctx = {
+    return {
         # --- NL_SE_RACE_UMA 直接値 ---
         "Umaban": umaban,
-        "Wakuban": _safe_int(horse.get("Wakuban", 0)),
-        "SexCD": str(horse.get("SexCD", "")),
-        "Barei": _safe_int(horse.get("Barei", 0)),
-        "Futan": _safe_float(horse.get("Futan", 0)),
-        "Ninki": ninki,
-        "KakuteiJyuni": kakutei_jyuni,
+        "Wakuban": ints(all_entries, "Wakuban"),
+        "SexCD": strs(all_entries, "SexCD"),
+        "Barei": ints(all_entries, "Barei"),
+        "Futan": floats(all_entries, "Futan"),
+        "Ninki": ints(all_entries, "Ninki"),
+        "KakuteiJyuni": ints(all_entries, "KakuteiJyuni"),
         "Odds": odds,
         # --- NL_RA_RACE 直接値 ---
-        "Kyori": _safe_int(race.get("Kyori", 0)),
-        "TrackCD": track_cd,
-        "TenkoCD": str(race.get("TenkoCD", "")),
-        "RaceNum": _safe_int(race.get("RaceNum", 0)),
+        "Kyori": race_int("Kyori"),
+        "TrackCD": race_str("TrackCD"),
+        "TenkoCD": race_str("TenkoCD"),
+        "RaceNum": race_int("RaceNum"),
         # --- 派生変数 ---
-        "weight": weight_val,
-        "weight_diff": weight_diff,
-        "num_entries": num_entries,
-        "gate_position": gate_position,
-        "is_inner_gate": umaban <= max(num_entries // 3, 1),
-        "is_outer_gate": umaban > (num_entries * 2) // 3,
+        "weight": ints(all_entries, "BaTaijyu"),
+        "weight_diff": np.where(minus, -zogen_sa, zogen_sa),
+        "num_entries": np.full(n, n, dtype=np.int64),
+        "gate_position": umaban / max(n, 1),
         # --- JRA公式AIデータ ---
         "dm_rank": dm_rank,
         "last_3f": last_3f,
-        "last_3f_rank": last_3f_rank,
+        "last_3f_rank": _rank_among_valid(last_3f, last_3f, n),
         # --- 脚質・位置取り ---
-        "running_style": running_style,
-        "corner1_pos": _safe_int(horse.get("Jyuni1c", 0)),
-        "corner2_pos": _safe_int(horse.get("Jyuni2c", 0)),
-        "corner3_pos": _safe_int(horse.get("Jyuni3c", 0)),
+        "running_style": ints(all_entries, "KyakusituKubun"),
+        "corner1_pos": corner1_pos,
+        "corner2_pos": ints(all_entries, "Jyuni2c"),
+        "corner3_pos": ints(all_entries, "Jyuni3c"),
         "corner4_pos": corner4_pos,
-        "position_change": _safe_int(horse.get("Jyuni1c", 0)) - corner4_pos,
-        "is_front_runner": running_style in (1, 2),  # 逃げ or 先行
-        "is_closer": running_style in (3, 4),  # 差し or 追込
+        "position_change": corner1_pos - corner4_pos,
         # --- 馬場状態 ---
-        "baba_cd": str(race.get("SibaBabaCD", "")),
-        "dirt_baba_cd": str(race.get("DirtBabaCD", "")),
-        "is_good_baba": str(race.get("SibaBabaCD", "")) == "1" or str(race.get("DirtBabaCD", "")) == "1",
-        "is_heavy_baba": str(race.get("SibaBabaCD", "")) in ("3", "4")
-        or str(race.get("DirtBabaCD", "")) in ("3", "4"),
+        "baba_cd": race_str("SibaBabaCD"),
+        "dirt_baba_cd": race_str("DirtBabaCD"),
         # --- レースグレード ---
-        "grade_cd": str(race.get("GradeCD", "")),
-        "syubetu_cd": str(race.get("SyubetuCD", "")),
-        "is_graded": str(race.get("GradeCD", "")) in ("A", "B", "C"),
+        "grade_cd": race_str("GradeCD"),
+        "syubetu_cd": race_str("SyubetuCD"),
         # --- 出走頭数（DB値） ---
-        "syusso_tosu": _safe_int(race.get("SyussoTosu", 0)),
+        "syusso_tosu": race_int("SyussoTosu"),
         # --- 単勝オッズ ---
         "odds": odds,
-        # --- フラグ ---
-        "is_favorite": ninki <= 3,
-        "is_longshot": ninki >= max(num_entries - 3, 4),
-        "is_turf": track_cd.startswith("1"),  # 10-19: 芝系
-        "is_dirt": track_cd.startswith("2"),  # 20-29: ダート系
-        "is_sprint": _safe_int(race.get("Kyori", 0)) <= 1400,
-        "is_mile": 1400 < _safe_int(race.get("Kyori", 0)) <= 1800,
-        "is_middle": 1800 < _safe_int(race.get("Kyori", 0)) <= 2200,
-        "is_long": _safe_int(race.get("Kyori", 0)) > 2200,
-        "is_male": str(horse.get("SexCD", "")) == "1",
-        "is_female": str(horse.get("SexCD", "")) == "2",
-        "is_gelding": str(horse.get("SexCD", "")) == "3",
         # --- 前走データ ---
-        "prev_jyuni": prev_jyuni,
+        "prev_jyuni": ints(prevs, "KakuteiJyuni"),
         "prev_last_3f": prev_last_3f,
         "prev_last_3f_rank": prev_last_3f_rank,
-        "prev_running_style": prev_running_style,
-        "prev_corner4_pos": prev_corner4_pos,
-        "prev_is_front_runner": prev_running_style in (1, 2),
-        "prev_is_closer": prev_running_style in (3, 4),
-        # --- 安全な組み込み ---
-        **_SAFE_BUILTINS,
+        "prev_running_style": ints(prevs, "KyakusituKubun"),
+        "prev_corner4_pos": ints(prevs, "Jyuni4c"),
     }
-    return ctx
 
 
-def evaluate_rule(
+def prepare_features(columns: dict[str, NDArray[Any]]) -> dict[str, NDArray[Any]]:
+    """フラグ変数（FLAG_VARIABLES）を全馬分まとめて算出し、列として格納する。
+
+    build_race_columns() / build_eval_columns() の列に対して呼び出す想定。
+    各フラグは FLAG_DEFINITIONS の定義式を列単位で一度だけ評価して求め、
+    以降のルール評価は格納済みの列を参照する。
+
+    Args:
+        columns: 変数名→列配列のdict。その場で更新される。
+
+    Returns:
+        フラグ列（np.bool_配列）を追加した columns
+    """
+    if not columns:
+        return columns
+    for name, expression in FLAG_DEFINITIONS.items():
+        columns[name] = np.asarray(_definition_vectorized(expression)(columns), dtype=np.bool_)
+    return columns
+
+
+def _definition_vectorized(expression: str) -> VectorizedRule:
+    fn = compile_vectorized(expression)
+    if fn is None:
+        raise ValueError(f"定義式を列単位に変換できません: {expression}")
+    return fn
+
+
+@lru_cache(maxsize=1024)
+def _code_names(code: CodeType) -> frozenset[str]:
+    """コードオブジェクト（内包表記等の入れ子を含む）が参照する名前の集合を返す。"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= _code_names(const)
+    return frozenset(names)
+
+
+def _row_columns(columns: Mapping[str, Any], code: CodeType) -> tuple[list[tuple[str, Any]], dict[str, Any]]:
+    """行単位評価用に、式が参照する列（Python値のリスト）と組み込み関数だけを取り出す。
+
+    列はtolist()で一括してPython値に変換し、馬ごと・変数ごとの配列要素アクセスを行わない。
+    """
+    names = _code_names(code)
+    builtins = {name: fn for name, fn in _SAFE_BUILTINS.items() if name in names}
+    used = [(name, np.asarray(col).tolist()) for name, col in columns.items() if name in names]
+    return used, builtins
+
+
+def _float_result(raw: Any) -> NDArray[np.float64]:
+    """ベクトル評価の結果をfloat配列に変換する。
+
+    None・オブジェクト型の結果は np.asarray(..., float64) でNaNになり、行単位評価
+    （float(None) がエラーとなり0.0）と一致しないため TypeError とし、行単位評価に回す。
+    """
+    values = np.asarray(raw)
+    if values.dtype == object:
+        raise TypeError(f"数値以外の評価結果: {values.dtype}")
+    return values.astype(np.float64, copy=False)
+
+
+def evaluate_rule_vectorized(
     expression: str,
-    horse: dict[str, Any],
-    race: dict[str, Any],
-    all_entries: list[dict[str, Any]],
-    prev_context: dict[str, Any] | None = None,
-    all_prev_l3f: list[float] | None = None,
-) -> float:
-    """ファクタールールの式を評価し、スコアを返す。
+    columns: Mapping[str, Any],
+    n_rows: int,
+) -> NDArray[np.float64]:
+    """ファクタールールを1レース全馬分まとめて評価する。
+
+    ベクトル化できない式、またはベクトル評価中にエラー（型不一致・ゼロ除算等）が
+    発生した場合は行単位のevalにフォールバックし、evaluate_rule() と同一の結果を返す。
 
     Args:
-        expression: Python式文字列（例: '1 if is_longshot and dm_rank <= 3 else 0'）
-        horse: 対象馬データ
-        race: レース情報
-        all_entries: 同レース全出走馬データ
-        prev_context: 前走の出走馬データ（Noneで前走なし）
-        all_prev_l3f: 同レース全馬の前走HaronTimeL3リスト
+        expression: Python式文字列
+        columns: 変数名→列配列のマッピング（build_eval_columns() の戻り値等）
+        n_rows: 馬数
 
     Returns:
-        評価結果のスコア（float）。評価失敗時は0.0。
+        shape=(n_rows,) のスコア配列。評価失敗した馬は0.0。
     """
-    if not expression or not expression.strip():
-        return 0.0
+    if not expression or not expression.strip() or n_rows == 0:
+        return np.zeros(n_rows, dtype=np.float64)
 
-    # セキュリティチェック
-    if _FORBIDDEN_PATTERNS.search(expression):
-        logger.warning(f"禁止パターンを検出: {expression[:80]}")
-        return 0.0
+    fn = compile_vectorized(expression)
+    if fn is not None:
+        try:
+            with np.errstate(divide="raise", invalid="raise", over="raise"):
+                values = _float_result(fn(columns))
+            if values.ndim == 0:
+                return np.full(n_rows, float(values), dtype=np.float64)
+            if values.shape == (n_rows,):
+                return values
+        except Exception as e:
+            _log_rule_error("ベクトル評価エラーのため行単位評価にフォールバック", expression, e)
 
-    ctx = build_eval_context(horse, race, all_entries, prev_context, all_prev_l3f)
+    if not is_safe_expression(expression):
+        return np.zeros(n_rows, dtype=np.float64)
+
+    result = np.zeros(n_rows, dtype=np.float64)
+    code = compile_rule(expression)
+    if code is None:
+        return result
+    used, builtins = _row_columns(columns, code)
+    for i in range(n_rows):
+        try:
+            ctx = {name: values[i] for name, values in used}
+            ctx.update(builtins)
+            result[i] = float(eval(code, _EVAL_GLOBALS, ctx))  # noqa: S307
+        except Exception as e:
+            _log_rule_error("ルール評価エラー", expression, e)
+    return result
+
+
+# ===== ルール群の共通部分式除去 =====
+
+# 共通部分式として一時変数に括り出すノード型（列参照・定数は括り出さない）
+_CSE_NODE_TYPES = (ast.Call, ast.Compare, ast.BinOp, ast.UnaryOp)
+
+# 評価に失敗した一時変数を表す番兵
+_FAIL = object()
+
+
+class _SubexpressionHoister(ast.NodeTransformer):
+    """複数回出現する部分式を一時変数 `_tN` に置換し、定義を出現順（依存順）に記録する。"""
+
+    def __init__(self, counts: dict[str, int]) -> None:
+        self._counts = counts
+        self._names: dict[str, str] = {}
+        self.definitions: list[tuple[str, ast.expr]] = []
+
+    def visit(self, node: ast.AST) -> ast.AST:
+        key = ast.dump(node) if isinstance(node, _CSE_NODE_TYPES) else None
+        if key is not None and key in self._names:
+            return ast.Name(id=self._names[key], ctx=ast.Load())
+        node = self.generic_visit(node)
+        if key is not None and self._counts.get(key, 0) > 1 and isinstance(node, ast.expr):
+            name = f"_t{len(self.definitions)}"
+            self._names[key] = name
+            self.definitions.append((name, node))
+            return ast.Name(id=name, ctx=ast.Load())
+        return node
+
+
+def _temp_refs(node: ast.AST) -> list[str]:
+    """式が参照する一時変数名を返す。"""
+    return sorted({n.id for n in ast.walk(node) if isinstance(n, ast.Name) and n.id.startswith("_t")})
+
+
+def _guarded_assign(target: ast.expr, value: ast.expr, deps: list[str], on_error: ast.expr | None) -> ast.stmt:
+    """依存する一時変数が全て評価済みの場合のみ代入し、例外は on_error の代入（None時は無視）に置換する。"""
+    handler_body: list[ast.stmt] = (
+        [ast.Assign(targets=[target], value=on_error)] if on_error is not None else [ast.Pass()]
+    )
+    stmt: ast.stmt = ast.Try(
+        body=[ast.Assign(targets=[target], value=value)],
+        handlers=[ast.ExceptHandler(type=ast.Name(id="Exception", ctx=ast.Load()), name=None, body=handler_body)],
+        orelse=[],
+        finalbody=[],
+    )
+    if deps:
+        checks: list[ast.expr] = [
+            ast.Compare(
+                left=ast.Name(id=d, ctx=ast.Load()), ops=[ast.IsNot()],
+                comparators=[ast.Name(id="_FAIL", ctx=ast.Load())],
+            )
+            for d in deps
+        ]
+        test = checks[0] if len(checks) == 1 else ast.BoolOp(op=ast.And(), values=checks)
+        stmt = ast.If(test=test, body=[stmt], orelse=[] if on_error is None else [
+            ast.Assign(targets=[target], value=on_error),
+        ])
+    return stmt
+
+
+@lru_cache(maxsize=64)
+def compile_rule_set(expressions: tuple[str, ...]) -> Callable[[Mapping[str, Any]], list[Any]]:
+    """ルール式群を、共通部分式を一度だけ計算する1つの列単位関数にコンパイルする。
+
+    各ルールの変換後ASTを ast.dump をキーに突き合わせ、2回以上出現する部分式
+    （例: `prev_jyuni > 0`, `dm_rank <= 5`）を一時変数に括り出す。
+    部分式の評価エラーはそれを参照するルールのみに波及し、そのルールの結果はNoneとなる。
+
+    Args:
+        expressions: ルール式のタプル
+
+    Returns:
+        `f(columns) -> list[配列 | None]` の関数（ベクトル化不可・評価失敗のルールはNone）
+    """
+    bodies = [_vectorize_expression(expr) for expr in expressions]
+
+    counts: dict[str, int] = {}
+    for body in bodies:
+        if body is not None:
+            for node in ast.walk(body):
+                if isinstance(node, _CSE_NODE_TYPES):
+                    key = ast.dump(node)
+                    counts[key] = counts.get(key, 0) + 1
+
+    hoister = _SubexpressionHoister(counts)
+    rule_exprs: list[ast.expr | None] = []
+    for body in bodies:
+        hoisted = None if body is None else hoister.visit(body)
+        rule_exprs.append(hoisted if isinstance(hoisted, ast.expr) else None)
+
+    fail = ast.Name(id="_FAIL", ctx=ast.Load())
+    stmts: list[ast.stmt] = [
+        ast.Assign(
+            targets=[ast.Name(id="_r", ctx=ast.Store())],
+            value=ast.BinOp(left=ast.List(elts=[ast.Constant(None)], ctx=ast.Load()), op=ast.Mult(),
+                            right=ast.Constant(len(expressions))),
+        ),
+    ]
+    for name, definition in hoister.definitions:
+        stmts.append(_guarded_assign(ast.Name(id=name, ctx=ast.Store()), definition, _temp_refs(definition), fail))
+    for j, expr in enumerate(rule_exprs):
+        if expr is not None:
+            target = ast.Subscript(value=ast.Name(id="_r", ctx=ast.Load()), slice=ast.Constant(j), ctx=ast.Store())
+            stmts.append(_guarded_assign(target, expr, _temp_refs(expr), None))
+    stmts.append(ast.Return(value=ast.Name(id="_r", ctx=ast.Load())))
+
+    module = ast.parse("def _rule_set(_c):\n    pass\n")
+    func = module.body[0]
+    assert isinstance(func, ast.FunctionDef)
+    func.body = stmts
+    ast.fix_missing_locations(module)
+    namespace = {**_VEC_GLOBALS, "_FAIL": _FAIL, "Exception": Exception}
+    exec(compile(module, "<rule:set>", "exec"), namespace)  # noqa: S102
+    fn: Callable[[Mapping[str, Any]], list[Any]] = namespace["_rule_set"]
+    return fn
+
+
+def evaluate_rules_vectorized(
+    expressions: list[str],
+    columns: Mapping[str, Any],
+    n_rows: int,
+    compiled: Callable[[Mapping[str, Any]], list[Any]] | None = None,
+) -> NDArray[np.float64]:
+    """ルール群を共通部分式を共有して一括評価する。
+
+    compile_rule_set() の結果がスカラーまたは shape=(n_rows,) の数値配列にならないルール、
+    評価エラーとなったルールは evaluate_rule_vectorized() で個別に評価する。
+
+    Args:
+        expressions: ルール式のリスト
+        columns: 変数名→列配列のマッピング
+        n_rows: 馬数
+        compiled: 呼び出し側で保持している compile_rule_set(tuple(expressions)) の結果
+            （省略時はモジュールキャッシュから取得）
+
+    Returns:
+        shape=(len(expressions), n_rows) の評価値行列（重み適用前）
+    """
+    matrix = np.zeros((len(expressions), n_rows), dtype=np.float64)
+    if not expressions or n_rows == 0:
+        return matrix
 
     try:
-        result = eval(expression, {"__builtins__": {}}, ctx)  # noqa: S307
-        return float(result)
+        with np.errstate(divide="raise", invalid="raise", over="raise"):
+            if compiled is None:
+                compiled = compile_rule_set(tuple(expressions))
+            results = compiled(columns)
     except Exception as e:
-        logger.debug(f"ルール評価エラー ({expression[:50]}): {e}")
-        return 0.0
+        logger.debug(f"ルール群の一括評価エラーのため個別評価にフォールバック: {e}")
+        results = [None] * len(expressions)
+
+    for j, expression in enumerate(expressions):
+        values = None
+        if results[j] is not None:
+            try:
+                values = _float_result(results[j])
+            except (TypeError, ValueError):
+                values = None
+        if values is not None and values.ndim == 0:
+            matrix[j] = float(values)
+        elif values is not None and values.shape == (n_rows,):
+            matrix[j] = values
+        else:
+            matrix[j] = evaluate_rule_vectorized(expression, columns, n_rows)
+    return matrix
+
+
+# ===== レース単位の部分評価 =====
+
+# 同一レースの全馬で値が共通する変数（レース条件）
+RACE_LEVEL_VARIABLES: tuple[str, ...] = (
+    "Kyori", "TrackCD", "TenkoCD", "RaceNum", "num_entries",
+    "baba_cd", "dirt_baba_cd", "grade_cd", "syubetu_cd", "syusso_tosu",
+    "is_good_baba", "is_heavy_baba", "is_graded", "is_turf", "is_dirt",
+    "is_sprint", "is_mile", "is_middle", "is_long",
+)
+
+_RACE_LEVEL_SET = frozenset(RACE_LEVEL_VARIABLES)
+
+# 部分評価で埋め込む定数の型
+_FOLDABLE_TYPES = (bool, int, float, str)
+
+
+def _race_level_names(node: ast.AST) -> set[str] | None:
+    """ノードが参照する変数名を返す。レース条件以外の変数・関数呼び出しを含む場合はNone。"""
+    names: set[str] = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Call | ast.Attribute | ast.Subscript):
+            return None
+        if isinstance(child, ast.Name):
+            if child.id not in _RACE_LEVEL_SET:
+                return None
+            names.add(child.id)
+    return names
+
+
+def _collect_race_atoms(node: ast.AST, atoms: dict[str, frozenset[str]]) -> None:
+    """レース条件のみを参照する最大の比較式・変数参照（アトム）を収集する。"""
+    if isinstance(node, ast.Compare | ast.Name):
+        names = _race_level_names(node)
+        if names:
+            atoms.setdefault(ast.unparse(node), frozenset(names))
+            return
+    for child in ast.iter_child_nodes(node):
+        _collect_race_atoms(child, atoms)
+
+
+@lru_cache(maxsize=64)
+def race_atoms(expressions: tuple[str, ...]) -> tuple[tuple[str, frozenset[str]], ...]:
+    """ルール式群に含まれるレース条件アトム（例: `is_turf`, `RaceNum >= 11`）を返す。
+
+    Returns:
+        (アトムの式文字列, 参照変数名) のタプル
+    """
+    atoms: dict[str, frozenset[str]] = {}
+    for expression in expressions:
+        if not expression or not expression.strip() or not is_safe_expression(expression):
+            continue
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError:
+            continue
+        _collect_race_atoms(tree.body, atoms)
+    return tuple(atoms.items())
+
+
+def race_bindings(
+    expressions: tuple[str, ...],
+    columns: Mapping[str, Any],
+) -> tuple[tuple[str, Any], ...]:
+    """レース条件アトムをこのレースの列値で評価し、部分評価の束縛を返す。
+
+    参照列が欠落している・全馬で値が一致しない・評価エラーとなるアトムは束縛しない
+    （ルール式に残り、通常どおり列単位で評価される）。
+
+    Args:
+        expressions: ルール式のタプル
+        columns: 変数名→列配列のマッピング
+
+    Returns:
+        (アトムの式文字列, 定数値) のタプル（specialize_rule_set() のキャッシュキー）
+    """
+    bindings: list[tuple[str, Any]] = []
+    for atom, names in race_atoms(expressions):
+        ctx: dict[str, Any] = {}
+        for name in names:
+            col = columns.get(name)
+            if col is None:
+                break
+            arr = np.asarray(col)
+            if arr.ndim != 1 or len(arr) == 0 or not bool(np.all(arr == arr[0])):
+                break
+            value = arr[0]
+            ctx[name] = value.item() if isinstance(value, np.generic) else value
+        else:
+            code = compile_rule(atom)
+            if code is None:
+                continue
+            try:
+                result = eval(code, _EVAL_GLOBALS, ctx)  # noqa: S307
+            except Exception:
+                continue
+            if isinstance(result, np.generic):
+                result = result.item()
+            if isinstance(result, _FOLDABLE_TYPES):
+                bindings.append((atom, result))
+    return tuple(bindings)
+
+
+class _ConstantFolder(ast.NodeTransformer):
+    """束縛済みアトムを定数に置換し、定数部分式・短絡評価・条件式を畳み込む。
+
+    畳み込み後の式は元の式と同じ値（真偽値の解釈を含む）を返す。
+    評価エラーとなる定数部分式は畳み込まず、元の式のまま残す。
+    """
+
+    def __init__(self, bindings: Mapping[str, Any]) -> None:
+        self._bindings = bindings
+
+    def visit(self, node: ast.AST) -> Any:
+        if isinstance(node, ast.Compare | ast.Name):
+            key = ast.unparse(node)
+            if key in self._bindings:
+                return ast.Constant(self._bindings[key])
+        return super().visit(node)
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.expr:
+        values: list[ast.expr] = [self.visit(v) for v in node.values]
+        is_and = isinstance(node.op, ast.And)
+        kept: list[ast.expr] = []
+        for k, value in enumerate(values):
+            if isinstance(value, ast.Constant):
+                # and: 真の定数は次の値に委ねる / 偽の定数で確定（or は逆）
+                if bool(value.value) == is_and:
+                    if k < len(values) - 1:
+                        continue
+                else:
+                    kept.append(value)
+                    break
+            kept.append(value)
+        if len(kept) == 1 or isinstance(kept[0], ast.Constant):
+            return kept[0]
+        return ast.BoolOp(op=node.op, values=kept)
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.expr:
+        test = self.visit(node.test)
+        if isinstance(test, ast.Constant):
+            branch: ast.expr = self.visit(node.body if test.value else node.orelse)
+            return branch
+        return ast.IfExp(test=test, body=self.visit(node.body), orelse=self.visit(node.orelse))
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        node = super().generic_visit(node)
+        if isinstance(node, ast.Compare | ast.BinOp | ast.UnaryOp) and all(
+            isinstance(child, ast.Constant) for child in ast.iter_child_nodes(node)
+            if isinstance(child, ast.expr)
+        ):
+            try:
+                expression = ast.Expression(body=node)
+                value = eval(compile(ast.fix_missing_locations(expression), "<fold>", "eval"),  # noqa: S307
+                             {"__builtins__": {}})
+            except Exception:
+                return node
+            if isinstance(value, _FOLDABLE_TYPES):
+                return ast.Constant(value)
+        return node
+
+
+@lru_cache(maxsize=64)
+def specialize_rule_set(
+    expressions: tuple[str, ...],
+    bindings: tuple[tuple[str, Any], ...],
+) -> tuple[str, ...]:
+    """レース条件を定数として埋め込み、レース種別に特化したルール式群を生成する。
+
+    例: 芝・短距離のレースでは `is_turf and is_sprint and is_inner_gate` が
+    `is_inner_gate` に、ダートのレースでは `is_turf and ...` を含むルールが定数 `0` になる。
+    生成結果は束縛（レース種別）ごとにキャッシュされ、compile_rule_set() のキャッシュキーにもなる。
+
+    Args:
+        expressions: ルール式のタプル
+        bindings: race_bindings() の戻り値
+
+    Returns:
+        特化後のルール式のタプル（変換不能な式は元の式のまま）
+    """
+    if not bindings:
+        return expressions
+    folder = _ConstantFolder(dict(bindings))
+    specialized: list[str] = []
+    for expression in expressions:
+        if not expression or not expression.strip() or not is_safe_expression(expression):
+            specialized.append(expression)
+            continue
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+            specialized.append(ast.unparse(folder.visit(tree.body)))
+        except SyntaxError:
+            specialized.append(expression)
+    return tuple(specialized)
+
+
+def specialize_for_race(expressions: tuple[str, ...], columns: Mapping[str, Any]) -> tuple[str, ...]:
+    """ルール式群をこのレースのレース条件で部分評価する（race_bindings() + specialize_rule_set()）。"""
+    return specialize_rule_set(expressions, race_bindings(expressions, columns))
@@ -12,13 +12,25 @@
 """
 
 import math
-from collections import defaultdict
+from dataclasses import dataclass, field
 from typing import Any
 
+import numpy as np
+import pandas as pd
 from loguru import logger
+from numpy.typing import NDArray
 
 from src.data.db import DatabaseManager
 
+# NL_SE_RACE_UMA から取得する出走馬の列
+_ENTRY_COLUMNS = (
+    "Umaban", "Wakuban", "SexCD", "Barei", "Futan",
+    "Ninki", "KakuteiJyuni", "Odds",
+    "BaTaijyu", "ZogenFugo", "ZogenSa",
+    "DMJyuni", "HaronTimeL3", "HaronTimeL4",
+    "KyakusituKubun", "Jyuni4c",
+)
+
 
 def _safe_float(v: Any, default: float = 0.0) -> float:
     try:
@@ -34,58 +46,135 @@ def _safe_int(v: Any, default: int = 0) -> int:
         return default
 
 
-def _auc_from_labels(scores: list[float], labels: list[int]) -> float:
-    """AUC (Area Under ROC Curve) を計算する。
+def _float_column(values: pd.Series) -> NDArray[np.float64]:
+    """DB値の列を数値配列に一括変換する（数値に変換できない値は0）。"""
+    converted: NDArray[np.float64] = pd.to_numeric(values, errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+    return converted
+
+
+def _int_column(values: pd.Series | None, n: int = 0) -> NDArray[np.int64]:
+    """DB値の列を整数配列に一括変換する（整数でない値は0、列が無ければn件の0）。"""
+    if values is None:
+        return np.zeros(n, dtype=np.int64)
+    numbers = pd.to_numeric(values, errors="coerce")
+    converted: NDArray[np.int64] = numbers.where(numbers % 1 == 0, 0).to_numpy(dtype=np.int64)
+    return converted
+
 
-    ソートベースのランク法で O(n log n) で計算する。
-    旧実装の O(n_pos × n_neg) = O(n²) から大幅に高速化。
+def _str_column(values: pd.Series | None, n: int = 0) -> NDArray[np.str_]:
+    """DB値の列を文字列配列にする（列が無ければn件の空文字）。"""
+    if values is None:
+        return np.full(n, "", dtype=str)
+    return np.array([str(v) for v in values], dtype=str).reshape(len(values))
+
+
+def _sorted_auc(sorted_scores: NDArray[np.float64], sorted_labels: NDArray[Any]) -> NDArray[np.float64]:
+    """列ごとに昇順ソート済みの (スコア, ラベル) 行列から各列のAUCを求める。
+
+    同値グループの先頭・末尾位置を累積max/minで求めて平均ランク（1-indexed）を割り当て、
+    正例のランク和から Mann-Whitney U 統計量として算出する。
+    正例・負例のどちらかが無い列は0.5。
     """
-    if not scores or not labels:
-        return 0.5
-    n = len(scores)
-    n_pos = sum(labels)
+    n = sorted_scores.shape[0]
+    position = np.arange(n)[:, None]
+    is_first = np.ones(sorted_scores.shape, dtype=bool)
+    is_first[1:] = sorted_scores[1:] != sorted_scores[:-1]
+    is_last = np.ones(sorted_scores.shape, dtype=bool)
+    is_last[:-1] = is_first[1:]
+    first = np.maximum.accumulate(np.where(is_first, position, 0), axis=0)
+    last = np.minimum.accumulate(np.where(is_last, position, n)[::-1], axis=0)[::-1]
+    avg_rank = (first + last) / 2.0 + 1.0
+
+    n_pos = sorted_labels.sum(axis=0)
     n_neg = n - n_pos
-    if n_pos == 0 or n_neg == 0:
+    rank_sum = (avg_rank * sorted_labels).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        auc = (rank_sum - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+    aucs: NDArray[np.float64] = np.where((n_pos > 0) & (n_neg > 0), auc, 0.5)
+    return aucs
+
+
+def _sort_columns(
+    matrix: NDArray[np.float64], labels: NDArray[Any],
+) -> tuple[NDArray[np.float64], NDArray[np.int64]]:
+    """特徴行列の各列を昇順に安定ソートし、(ソート済み値, 同順に並べたラベル) を返す。
+
+    AUC・五分位分析はこの結果を共有し、列ごとのargsortを1回で済ませる。
+    同値は元の並び順を保つ（五分位の区間割当てが入力順に依存するため）。
+    """
+    order = np.argsort(matrix, axis=0, kind="stable")
+    y = np.asarray(labels, dtype=np.int64)
+    return np.take_along_axis(matrix, order, axis=0), y[order]
+
+
+def _auc_columns(matrix: NDArray[np.float64], labels: NDArray[Any]) -> NDArray[np.float64]:
+    """特徴行列 (サンプル数, 特徴数) の各列のAUCを一括計算する。"""
+    return _sorted_auc(*_sort_columns(matrix, labels))
+
+
+def _auc_from_labels(scores: list[float], labels: list[int]) -> float:
+    """AUC (Area Under ROC Curve) を計算する（1特徴分の _auc_columns()）。"""
+    if not scores or not labels:
         return 0.5
+    return float(_auc_columns(np.asarray(scores, dtype=np.float64)[:, None], np.asarray(labels))[0])
 
-    # スコアでソート
-    paired = sorted(zip(scores, labels, strict=False), key=lambda x: x[0])
 
-    # タイ（同値）を考慮したランク割当てで正例のランク和を計算
-    rank_sum = 0.0
-    i = 0
-    while i < n:
-        j = i
-        while j < n and paired[j][0] == paired[i][0]:
-            j += 1
-        # 同値グループの平均ランク（1-indexed）
-        avg_rank = (i + 1 + j) / 2.0
-        for k in range(i, j):
-            if paired[k][1] == 1:
-                rank_sum += avg_rank
-        i = j
+def _point_biserial_columns(matrix: NDArray[np.float64], labels: NDArray[Any]) -> NDArray[np.float64]:
+    """特徴行列 (サンプル数, 特徴数) の各列の点双列相関係数を一括計算する。
 
-    return (rank_sum - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+    サンプル2件未満・正例/負例のどちらかが無い場合・定数列は0。
+    """
+    n = matrix.shape[0]
+    y = np.asarray(labels, dtype=bool)
+    n1 = int(y.sum())
+    n0 = n - n1
+    if n < 2 or n0 == 0 or n1 == 0:
+        return np.zeros(matrix.shape[1])
+    mean_1 = matrix[y].mean(axis=0)
+    mean_0 = matrix[~y].mean(axis=0)
+    std = matrix.std(axis=0)
+    constant = (std == 0) | (matrix.max(axis=0) == matrix.min(axis=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_pb = (mean_1 - mean_0) / std * math.sqrt(n1 * n0 / (n * n))
+    corrs: NDArray[np.float64] = np.where(constant, 0.0, r_pb)
+    return corrs
 
 
 def _point_biserial(scores: list[float], labels: list[int]) -> float:
-    """点双列相関係数を計算する。"""
+    """点双列相関係数を計算する（1特徴分の _point_biserial_columns()）。"""
     if len(scores) < 2:
         return 0.0
-    n = len(scores)
-    n1 = sum(labels)
-    n0 = n - n1
-    if n0 == 0 or n1 == 0:
-        return 0.0
+    matrix = np.asarray(scores, dtype=np.float64)[:, None]
+    return float(_point_biserial_columns(matrix, np.asarray(labels))[0])
 
-    mean_1 = sum(s for s, lb in zip(scores, labels, strict=False) if lb == 1) / n1
-    mean_0 = sum(s for s, lb in zip(scores, labels, strict=False) if lb == 0) / n0
-    overall_mean = sum(scores) / n
-    overall_var = sum((s - overall_mean) ** 2 for s in scores) / n
-    if overall_var == 0:
-        return 0.0
-    std = math.sqrt(overall_var)
-    return (mean_1 - mean_0) / std * math.sqrt(n1 * n0 / (n * n))
+
+@dataclass
+class FeatureTable:
+    """分析用データセット（列指向）。
+
+    Attributes:
+        columns: 特徴名→サンプル順の1次元配列
+        labels: 0/1ラベル（columnsの各配列と同順）
+    """
+
+    columns: dict[str, NDArray[Any]] = field(default_factory=dict)
+    labels: NDArray[np.int64] = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+
+    @property
+    def n_samples(self) -> int:
+        """サンプル数。"""
+        return len(self.labels)
+
+    def numeric_names(self) -> list[str]:
+        """数値特徴の名前を名前順で返す（TrackCD等の文字列列は除く）。"""
+        return sorted(name for name, col in self.columns.items() if col.dtype.kind in "biuf")
+
+    def matrix(self, names: list[str]) -> NDArray[np.float64]:
+        """指定した特徴を (サンプル数, 特徴数) のfloat64行列にまとめる。"""
+        matrix = np.empty((self.n_samples, len(names)))
+        for j, name in enumerate(names):
+            matrix[:, j] = self.columns[name]
+        return matrix
 
 
 class FactorDiscovery:
@@ -142,18 +231,18 @@ class FactorDiscovery:
         date_to: str = "",
         max_races: int = 3000,
         target_jyuni: int = 1,
-    ) -> tuple[list[dict[str, Any]], list[int]]:
+    ) -> FeatureTable:
         """分析用データセットを構築する。
 
         Returns:
-            (features_list, labels) — features_listは各馬のdict、labelsは0/1
+            各馬の特徴量（列指向）と着順ラベル（target_jyuni以内で1）
         """
         if not self._jvlink_db.table_exists("NL_SE_RACE_UMA"):
-            return [], []
+            return FeatureTable()
         if not self._jvlink_db.table_exists("NL_RA_RACE"):
-            return [], []
+            return FeatureTable()
 
-        # レースキー取得
+        # 対象レースの日付条件
         where_parts = []
         params: list[Any] = []
         if date_from:
@@ -168,172 +257,142 @@ class FactorDiscovery:
         where_clause = "WHERE " + " AND ".join(where_parts) if where_parts else ""
         params.append(max_races)
 
-        race_keys = self._jvlink_db.execute_query(
-            f"""SELECT r.idYear, r.idMonthDay, r.idJyoCD, r.idKaiji,
-                       r.idNichiji, r.idRaceNum,
-                       r.Kyori, r.TrackCD, r.SyussoTosu
-                FROM NL_RA_RACE r
-                {where_clause}
-                ORDER BY r.idYear DESC, r.idMonthDay DESC
-                LIMIT ?""",
+        # 対象レース（新しい順にmax_races件）と出走馬をJOINで一括取得する。
+        # race_orderは対象レースの新しい順の連番で、出力はレース順・馬番順に並ぶ
+        rows = self._jvlink_db.execute_query_tuples(
+            f"""SELECT r.race_order, {', '.join(f'u.{col}' for col in _ENTRY_COLUMNS)},
+                       r.Kyori, r.TrackCD
+                FROM (
+                    SELECT r.idYear, r.idMonthDay, r.idJyoCD, r.idKaiji,
+                           r.idNichiji, r.idRaceNum, r.Kyori, r.TrackCD,
+                           ROW_NUMBER() OVER (ORDER BY r.idYear DESC, r.idMonthDay DESC) AS race_order
+                    FROM NL_RA_RACE r
+                    {where_clause}
+                    ORDER BY race_order
+                    LIMIT ?
+                ) r
+                JOIN NL_SE_RACE_UMA u
+                  USING (idYear, idMonthDay, idJyoCD, idKaiji, idNichiji, idRaceNum)
+                ORDER BY r.race_order, CAST(u.Umaban AS INTEGER)""",
             tuple(params),
         )
-
-        if not race_keys:
-            return [], []
-
-        # レースキーのセットとレース情報マップを構築
-        valid_keys: set[tuple[str, ...]] = set()
-        race_info_map: dict[tuple[str, ...], dict[str, Any]] = {}
-        for rk in race_keys:
-            key: tuple[str, ...] = (rk["idYear"], rk["idMonthDay"], rk["idJyoCD"],
-                   rk["idKaiji"], rk["idNichiji"], rk["idRaceNum"])
-            valid_keys.add(key)
-            race_info_map[key] = rk
-
-        # 日付範囲で一括取得（N+1 → 1クエリに削減）
-        # race_keysはDESC順 → 最後が最古、最初が最新
-        first_race = race_keys[-1]
-        last_race = race_keys[0]
-        bound_parts = [
-            "(idYear > ? OR (idYear = ? AND idMonthDay >= ?))",
-            "(idYear < ? OR (idYear = ? AND idMonthDay <= ?))",
-        ]
-        bound_params: list[Any] = [
-            first_race["idYear"], first_race["idYear"], first_race["idMonthDay"],
-            last_race["idYear"], last_race["idYear"], last_race["idMonthDay"],
-        ]
-
-        all_entries = self._jvlink_db.execute_query(
-            f"""SELECT idYear, idMonthDay, idJyoCD, idKaiji, idNichiji, idRaceNum,
-                       Umaban, Wakuban, SexCD, Barei, Futan,
-                       Ninki, KakuteiJyuni, Odds,
-                       BaTaijyu, ZogenFugo, ZogenSa,
-                       DMJyuni, HaronTimeL3, HaronTimeL4,
-                       KyakusituKubun, Jyuni4c
-                FROM NL_SE_RACE_UMA
-                WHERE {' AND '.join(bound_parts)}
-                ORDER BY idYear, idMonthDay, idJyoCD, idKaiji, idNichiji, idRaceNum,
-                         CAST(Umaban AS INTEGER)""",
-            tuple(bound_params),
+        if not rows:
+            return FeatureTable()
+
+        # 値の変換は特徴量算出時に行うため、DB値のままobject列で保持する
+        frame = pd.DataFrame(rows, columns=["race_order", *_ENTRY_COLUMNS, "Kyori", "TrackCD"], dtype=object)
+        # 頭数は着順未確定の馬も含めてレースごとに数える
+        num_entries = frame.groupby("race_order")["Umaban"].transform("size").to_numpy(dtype=np.int64)
+
+        # 3頭未満のレース・着順未確定（jyuni<=0）の馬を除外
+        jyuni = _int_column(frame["KakuteiJyuni"])
+        keep = (num_entries >= 3) & (jyuni > 0)
+        frame = frame[keep].reset_index(drop=True)
+        num_entries = num_entries[keep]
+        table = FeatureTable(
+            columns=self._build_features(frame, num_entries),
+            labels=(jyuni[keep] <= target_jyuni).astype(np.int64),
         )
 
-        # レースキーでグルーピング
-        entries_by_race: dict[tuple[str, ...], list[dict[str, Any]]] = defaultdict(list)
-        for entry in all_entries:
-            key = (entry["idYear"], entry["idMonthDay"], entry["idJyoCD"],
-                   entry["idKaiji"], entry["idNichiji"], entry["idRaceNum"])
-            if key in valid_keys:
-                entries_by_race[key].append(entry)
-
-        features_list: list[dict[str, Any]] = []
-        labels: list[int] = []
-
-        for key, rk in race_info_map.items():
-            entries = entries_by_race.get(key, [])
+        logger.info(
+            f"FactorDiscovery: {table.n_samples}サンプル読込 "
+            f"(正例率 {table.labels.mean() if table.n_samples else 0.0:.1%})"
+        )
+        return table
 
-            if not entries or len(entries) < 3:
-                continue
+    def _build_features(
+        self,
+        frame: pd.DataFrame,
+        num_entries: NDArray[np.int64],
+    ) -> dict[str, NDArray[Any]]:
+        """出走行から特徴量を列単位（特徴名→配列）で一括算出する。
 
-            num_entries = len(entries)
-            kyori = _safe_int(rk.get("Kyori", 0))
-            track_cd = str(rk.get("TrackCD", ""))
-
-            for horse in entries:
-                jyuni = _safe_int(horse.get("KakuteiJyuni", 0))
-                if jyuni <= 0:
-                    continue
-
-                label = 1 if jyuni <= target_jyuni else 0
-                labels.append(label)
-
-                feat: dict[str, Any] = {}
-                # 基本カラム
-                for col in self._BASE_COLUMNS:
-                    feat[col] = _safe_float(horse.get(col, 0))
-
-                # レース情報
-                feat["Kyori"] = kyori
-                feat["TrackCD"] = track_cd
-                feat["num_entries"] = num_entries
-
-                # 派生変数
-                umaban = _safe_int(horse.get("Umaban", 0))
-                feat["gate_position"] = umaban / max(num_entries, 1)
-                feat["is_inner"] = 1 if umaban <= max(num_entries // 3, 1) else 0
-                feat["is_outer"] = 1 if umaban > (num_entries * 2) // 3 else 0
-
-                ninki = _safe_int(horse.get("Ninki", 0))
-                feat["is_favorite"] = 1 if 1 <= ninki <= 3 else 0
-                feat["is_longshot"] = 1 if ninki >= max(num_entries - 3, 4) else 0
-
-                odds = _safe_float(horse.get("Odds", 0))
-                dm = _safe_float(horse.get("DMJyuni", 0))
-                feat["odds_dm_gap"] = abs(ninki - dm) if ninki > 0 and dm > 0 else 0
-                feat["odds_x_dm"] = odds * dm if odds > 0 and dm > 0 else 0
-
-                weight_diff = _safe_int(horse.get("ZogenSa", 0))
-                zogen_fugo = str(horse.get("ZogenFugo", "")).strip()
-                if zogen_fugo == "-":
-                    weight_diff = -weight_diff
-                feat["weight_diff"] = weight_diff
-                feat["weight_decrease"] = 1 if weight_diff < 0 else 0
-                feat["weight_increase_large"] = 1 if weight_diff >= 10 else 0
-
-                futan = _safe_float(horse.get("Futan", 0))
-                feat["futan_per_weight"] = (
-                    futan / max(_safe_float(horse.get("BaTaijyu", 1)), 1)
-                )
-
-                feat["is_turf"] = 1 if track_cd.startswith("1") else 0
-                feat["is_dirt"] = 1 if track_cd.startswith("2") else 0
-                feat["is_sprint"] = 1 if kyori <= 1400 else 0
-                feat["is_mile"] = 1 if 1400 < kyori <= 1800 else 0
-                feat["is_middle"] = 1 if 1800 < kyori <= 2200 else 0
-                feat["is_long"] = 1 if kyori > 2200 else 0
-
-                sex_cd = str(horse.get("SexCD", ""))
-                feat["is_female"] = 1 if sex_cd == "2" else 0
-                feat["is_gelding"] = 1 if sex_cd == "3" else 0
-
-                barei = _safe_int(horse.get("Barei", 0))
-                feat["is_young"] = 1 if barei <= 3 else 0
-                feat["is_old"] = 1 if barei >= 7 else 0
-
-                style = _safe_int(horse.get("KyakusituKubun", 0))
-                feat["is_front_runner"] = 1 if style in (1, 2) else 0
-                feat["is_closer"] = 1 if style in (3, 4) else 0
-
-                corner4 = _safe_float(horse.get("Jyuni4c", 0))
-                feat["corner4_relative"] = corner4 / max(num_entries, 1)
-
-                l3f = _safe_float(horse.get("HaronTimeL3", 0))
-                feat["l3f_fast"] = 1 if 0 < l3f <= 34.0 else 0
-                feat["l3f_slow"] = 1 if l3f >= 37.0 else 0
-
-                # 馬場状態
-                siba_baba = str(rk.get("SibaBabaCD", ""))
-                dirt_baba = str(rk.get("DirtBabaCD", ""))
-                feat["is_good_baba"] = 1 if siba_baba == "1" or dirt_baba == "1" else 0
-                feat["is_heavy_baba"] = 1 if siba_baba in ("3", "4") or dirt_baba in ("3", "4") else 0
-
-                # レースグレード
-                grade_cd = str(rk.get("GradeCD", ""))
-                feat["is_graded"] = 1 if grade_cd in ("A", "B", "C") else 0
-
-                # コーナー位置変化（追い込み度）
-                corner1 = _safe_int(horse.get("Jyuni1c", 0))
-                corner4_val = _safe_int(horse.get("Jyuni4c", 0))
-                feat["position_change"] = corner1 - corner4_val if corner1 > 0 and corner4_val > 0 else 0
-                feat["is_makuri"] = 1 if feat["position_change"] >= 5 else 0
-
-                features_list.append(feat)
+        0/1のフラグ特徴はuint8配列（1バイト/サンプル）で保持する。
 
-        logger.info(
-            f"FactorDiscovery: {len(features_list)}サンプル読込 "
-            f"(正例率 {sum(labels)/max(len(labels),1):.1%})"
-        )
-        return features_list, labels
+        Args:
+            frame: 対象馬の出走行（レース情報列を含む）
+            num_entries: 各馬の出走レースの頭数
+        """
+        feat: dict[str, NDArray[Any]] = {}
+        # 基本カラム
+        for col in self._BASE_COLUMNS:
+            feat[col] = _float_column(frame[col])
+
+        # レース情報
+        kyori = _int_column(frame["Kyori"])
+        track_cd = _str_column(frame["TrackCD"])
+        feat["Kyori"] = kyori
+        feat["TrackCD"] = track_cd
+        feat["num_entries"] = num_entries
+
+        # 派生変数
+        umaban = _int_column(frame["Umaban"])
+        feat["gate_position"] = umaban / np.maximum(num_entries, 1)
+        feat["is_inner"] = (umaban <= np.maximum(num_entries // 3, 1)).view(np.uint8)
+        feat["is_outer"] = (umaban > (num_entries * 2) // 3).view(np.uint8)
+
+        ninki = _int_column(frame["Ninki"])
+        feat["is_favorite"] = ((ninki >= 1) & (ninki <= 3)).view(np.uint8)
+        feat["is_longshot"] = (ninki >= np.maximum(num_entries - 3, 4)).view(np.uint8)
+
+        odds = feat["Odds"]
+        dm = feat["DMJyuni"]
+        feat["odds_dm_gap"] = np.where((ninki > 0) & (dm > 0), np.abs(ninki - dm), 0.0)
+        feat["odds_x_dm"] = np.where((odds > 0) & (dm > 0), odds * dm, 0.0)
+
+        weight_diff = _int_column(frame["ZogenSa"])
+        zogen_fugo = np.char.strip(_str_column(frame["ZogenFugo"]))
+        weight_diff = np.where(zogen_fugo == "-", -weight_diff, weight_diff)
+        feat["weight_diff"] = weight_diff
+        feat["weight_decrease"] = (weight_diff < 0).view(np.uint8)
+        feat["weight_increase_large"] = (weight_diff >= 10).view(np.uint8)
+
+        feat["futan_per_weight"] = feat["Futan"] / np.maximum(feat["BaTaijyu"], 1)
+
+        feat["is_turf"] = np.char.startswith(track_cd, "1").view(np.uint8)
+        feat["is_dirt"] = np.char.startswith(track_cd, "2").view(np.uint8)
+        feat["is_sprint"] = (kyori <= 1400).view(np.uint8)
+        feat["is_mile"] = ((kyori > 1400) & (kyori <= 1800)).view(np.uint8)
+        feat["is_middle"] = ((kyori > 1800) & (kyori <= 2200)).view(np.uint8)
+        feat["is_long"] = (kyori > 2200).view(np.uint8)
+
+        sex_cd = _str_column(frame["SexCD"])
+        feat["is_female"] = (sex_cd == "2").view(np.uint8)
+        feat["is_gelding"] = (sex_cd == "3").view(np.uint8)
+
+        barei = _int_column(frame["Barei"])
+        feat["is_young"] = (barei <= 3).view(np.uint8)
+        feat["is_old"] = (barei >= 7).view(np.uint8)
+
+        style = _int_column(frame["KyakusituKubun"])
+        feat["is_front_runner"] = np.isin(style, (1, 2)).view(np.uint8)
+        feat["is_closer"] = np.isin(style, (3, 4)).view(np.uint8)
+
+        feat["corner4_relative"] = feat["Jyuni4c"] / np.maximum(num_entries, 1)
+
+        l3f = feat["HaronTimeL3"]
+        feat["l3f_fast"] = ((l3f > 0) & (l3f <= 34.0)).view(np.uint8)
+        feat["l3f_slow"] = (l3f >= 37.0).view(np.uint8)
+
+        # 馬場状態（取得列に無い場合は空文字扱い）
+        siba_baba = _str_column(frame.get("SibaBabaCD"), len(frame))
+        dirt_baba = _str_column(frame.get("DirtBabaCD"), len(frame))
+        feat["is_good_baba"] = ((siba_baba == "1") | (dirt_baba == "1")).view(np.uint8)
+        feat["is_heavy_baba"] = (
+            np.isin(siba_baba, ("3", "4")) | np.isin(dirt_baba, ("3", "4"))
+        ).view(np.uint8)
+
+        # レースグレード
+        grade_cd = _str_column(frame.get("GradeCD"), len(frame))
+        feat["is_graded"] = np.isin(grade_cd, ("A", "B", "C")).view(np.uint8)
+
+        # コーナー位置変化（追い込み度）
+        corner1 = _int_column(frame.get("Jyuni1c"), len(frame))
+        corner4 = _int_column(frame["Jyuni4c"])
+        position_change = np.where((corner1 > 0) & (corner4 > 0), corner1 - corner4, 0)
+        feat["position_change"] = position_change
+        feat["is_makuri"] = (position_change >= 5).view(np.uint8)
+        return feat
 
     def discover(
         self,
@@ -377,44 +436,50 @@ class FactorDiscovery:
             progress_callback(0, 3, "データセットを読込中...")
 
         with self._jvlink_db.session():
-            features_list, labels = self._load_dataset(
+            table = self._load_dataset(
                 date_from, date_to, max_races, target_jyuni,
             )
 
-        if len(features_list) < 100:
+        n_samples = table.n_samples
+        n_pos = int(table.labels.sum())
+        if n_samples < 100:
             return {
-                "n_samples": len(features_list),
-                "n_positive": sum(labels),
+                "n_samples": n_samples,
+                "n_positive": n_pos,
                 "base_rate": 0.0,
                 "candidates": [],
                 "interactions": [],
             }
 
-        n_samples = len(features_list)
-        n_pos = sum(labels)
         base_rate = n_pos / n_samples
 
         # === 1. 単変量分析 ===
-        all_feature_names = sorted(set().union(*(f.keys() for f in features_list)))
         # 数値特徴のみ
-        numeric_features = [
-            name for name in all_feature_names
-            if name not in ("TrackCD",)
-            and any(isinstance(f.get(name), int | float) for f in features_list)
-        ]
+        numeric_features = table.numeric_names()
 
         if progress_callback:
             progress_callback(1, 3, "単変量分析中...")
 
+        # 数値特徴を (サンプル数, 特徴数) の行列にまとめ、全特徴のAUC・相関を一括計算する
+        X = table.matrix(numeric_features)
+        y = table.labels
+        # 列ごとのソートは1回だけ行い、AUC・五分位分析・定数列判定で共有する
+        sorted_X, sorted_y = _sort_columns(X, y)
+        aucs = _sorted_auc(sorted_X, sorted_y).tolist()
+        corrs = _point_biserial_columns(X, y).tolist()
+        # 五分位分析
+        all_quintiles = self._quintile_analysis(sorted_X, sorted_y)
+        # 定数列・二値（0/1のみ）列の判定
+        is_constant = (sorted_X[0] == sorted_X[-1]).tolist()
+        is_binary = ((X == 0) | (X == 1)).all(axis=0).tolist()
+
         candidates: list[dict[str, Any]] = []
-        for _feat_idx, feat_name in enumerate(numeric_features):
-            scores = [_safe_float(f.get(feat_name, 0)) for f in features_list]
-            unique_vals = set(scores)
-            if len(unique_vals) <= 1:
+        for feat_idx, feat_name in enumerate(numeric_features):
+            if is_constant[feat_idx]:
                 continue
 
             # AUC
-            auc = _auc_from_labels(scores, labels)
+            auc = aucs[feat_idx]
             # 方向を判定: AUC < 0.5 なら反転（低いほうが良い）
             if auc < 0.5:
                 direction = "lower_is_better"
@@ -424,10 +489,9 @@ class FactorDiscovery:
                 effective_auc = auc
 
             # 相関
-            corr = _point_biserial(scores, labels)
+            corr = corrs[feat_idx]
 
-            # 五分位分析
-            quintile_rates = self._quintile_analysis(scores, labels)
+            quintile_rates = all_quintiles[feat_idx]
 
             if effective_auc < min_auc:
                 continue
@@ -436,7 +500,7 @@ class FactorDiscovery:
             description = self._describe_feature(feat_name, direction, effective_auc)
             category = self._categorize_feature(feat_name)
             expression = self._suggest_expression(
-                feat_name, direction, scores, labels, quintile_rates,
+                feat_name, direction, X[:, feat_idx], y, quintile_rates, is_binary[feat_idx],
             )
 
             candidates.append({
@@ -459,9 +523,7 @@ class FactorDiscovery:
             progress_callback(2, 3, "交互作用分析中...")
 
         # === 2. 交互作用分析 ===
-        interactions = self._analyze_interactions(
-            features_list, labels, base_rate,
-        )
+        interactions = self._analyze_interactions(table, base_rate)
 
         return {
             "n_samples": n_samples,
@@ -472,33 +534,50 @@ class FactorDiscovery:
         }
 
     def _quintile_analysis(
-        self, scores: list[float], labels: list[int],
-    ) -> list[dict[str, Any]]:
-        """五分位別の的中率を計算する。"""
-        if not scores:
-            return []
+        self, sorted_scores: NDArray[np.float64], sorted_labels: NDArray[np.int64],
+    ) -> list[list[dict[str, Any]]]:
+        """特徴行列の各列について五分位別の的中率を一括計算する。
 
-        paired = sorted(zip(scores, labels, strict=False), key=lambda x: x[0])
-        n = len(paired)
-        quintiles = []
-        for q in range(5):
-            start = n * q // 5
-            end = n * (q + 1) // 5
-            subset = paired[start:end]
-            if not subset:
-                continue
-            vals = [s for s, _ in subset]
-            labs = [lb for _, lb in subset]
-            rate = sum(labs) / len(labs) if labs else 0.0
-            quintiles.append({
-                "quintile": q + 1,
-                "label": f"Q{q + 1}",
-                "min": round(min(vals), 2),
-                "max": round(max(vals), 2),
-                "count": len(subset),
-                "win_rate": round(rate, 4),
-            })
-        return quintiles
+        列ごとに安定ソート済みの値・ラベル（_sort_columns() の結果）を受け取り、
+        同数の5区間の正例数を np.add.reduceat で集計する。
+        区間の最小・最大値はソート済み列の区間両端から取る。
+
+        Returns:
+            列ごとの五分位リスト（空の区間は含めない）
+        """
+        n, n_features = sorted_scores.shape
+        if n == 0:
+            return [[] for _ in range(n_features)]
+
+        bounds = np.array([n * q // 5 for q in range(6)])
+        quintile_idx = np.flatnonzero(np.diff(bounds) > 0)
+        starts = bounds[quintile_idx]
+        ends = bounds[quintile_idx + 1]
+        counts = ends - starts
+        rates = np.add.reduceat(sorted_labels, starts, axis=0) / counts[:, None]
+
+        # 辞書の組み立てはPython値へ一括変換してから行う
+        q_list = quintile_idx.tolist()
+        count_list = counts.tolist()
+        return [
+            [
+                {
+                    "quintile": q + 1,
+                    "label": f"Q{q + 1}",
+                    "min": round(lo, 2),
+                    "max": round(hi, 2),
+                    "count": count,
+                    "win_rate": round(rate, 4),
+                }
+                for q, lo, hi, count, rate in zip(q_list, col_min, col_max, count_list, col_rate, strict=True)
+            ]
+            for col_min, col_max, col_rate in zip(
+                sorted_scores[starts].T.tolist(),
+                sorted_scores[ends - 1].T.tolist(),
+                rates.T.tolist(),
+                strict=True,
+            )
+        ]
 
     def _describe_feature(
         self, name: str, direction: str, auc: float,
@@ -543,14 +622,18 @@ class FactorDiscovery:
         self,
         name: str,
         direction: str,
-        scores: list[float],
-        labels: list[int],
+        scores: NDArray[np.float64],
+        labels: NDArray[Any],
         quintiles: list[dict[str, Any]],
+        is_binary: bool,
     ) -> str:
         """ファクター式の候補を自動生成する。
 
         五分位分析の結果から、最も的中率が高い区間を特定し、
         条件式を生成する。
+
+        Args:
+            is_binary: scoresが0/1のみの二値変数か
         """
         if not quintiles:
             return ""
@@ -560,16 +643,12 @@ class FactorDiscovery:
         min(quintiles, key=lambda q: q["win_rate"])
 
         # 二値変数（0/1のみ）の場合
-        unique_vals = set(scores)
-        if unique_vals <= {0.0, 1.0}:
-            cnt_1 = max(sum(1 for s in scores if s == 1), 1)
-            cnt_0 = max(sum(1 for s in scores if s == 0), 1)
-            rate_1 = sum(
-                lb for s, lb in zip(scores, labels, strict=False) if s == 1
-            ) / cnt_1
-            rate_0 = sum(
-                lb for s, lb in zip(scores, labels, strict=False) if s == 0
-            ) / cnt_0
+        if is_binary:
+            on = scores == 1
+            cnt_1 = max(int(on.sum()), 1)
+            cnt_0 = max(len(scores) - int(on.sum()), 1)
+            rate_1 = float(labels[on].sum()) / cnt_1
+            rate_0 = float(labels[~on].sum()) / cnt_0
             if rate_1 > rate_0:
                 return f"1 if {name} else 0"
             else:
@@ -641,13 +720,14 @@ class FactorDiscovery:
 
     def _analyze_interactions(
         self,
-        features_list: list[dict[str, Any]],
-        labels: list[int],
+        table: FeatureTable,
         base_rate: float,
     ) -> list[dict[str, Any]]:
         """交互作用（条件の組み合わせ）を分析する。
 
         二値変数同士の組み合わせで的中率が大きく変わるペアを発見する。
+        全ペアの該当数・正例数は、フラグ行列 M (サンプル数, 変数数) の
+        行列積 M.T @ M と M.T @ (M * y) で一括集計する。
         """
         binary_features = [
             "is_favorite", "is_longshot", "is_inner", "is_outer",
@@ -662,44 +742,53 @@ class FactorDiscovery:
         # 存在する変数のみ
         available = [
             f for f in binary_features
-            if any(feat.get(f, 0) != 0 for feat in features_list[:100])
+            if f in table.columns and bool((table.columns[f][:100] != 0).any())
         ]
+        if len(available) < 2:
+            return []
+
+        # フラグ行列はuint8で1つの連続バッファに詰める
+        flags = np.empty((table.n_samples, len(available)), dtype=np.uint8)
+        for j, f in enumerate(available):
+            np.equal(table.columns[f], 1, out=flags[:, j].view(bool))
+        # ペアごとの「両方1」のサンプル数・正例数。uint8同士の積は桁あふれするため
+        # float32（件数2^24未満まで厳密）に広げてBLASの行列積で集計する
+        flags_f = flags.astype(np.float32)
+        pair_counts = flags_f.T @ flags_f
+        pos_counts = flags_f.T @ (flags_f * table.labels.astype(np.float32)[:, None])
+
+        rows, cols = np.triu_indices(len(available), k=1)
+        n_both = pair_counts[rows, cols]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = pos_counts[rows, cols] / n_both
+        lifts = rates / max(base_rate, 0.001)
+        selected = np.flatnonzero((n_both >= 20) & (lifts >= 1.3))
 
         interactions: list[dict[str, Any]] = []
-        for i, f1 in enumerate(available):
-            for f2 in available[i + 1:]:
-                # 両方1のサンプルを抽出
-                both_on = [
-                    labels[j] for j in range(len(features_list))
-                    if features_list[j].get(f1, 0) == 1
-                    and features_list[j].get(f2, 0) == 1
-                ]
-                if len(both_on) < 20:
-                    continue
-
-                rate = sum(both_on) / len(both_on)
-                lift = rate / max(base_rate, 0.001)
-                if lift < 1.3:
-                    continue
-
-                ctx1 = self._get_context_var_name(f1)
-                ctx2 = self._get_context_var_name(f2)
-                if not ctx1 or not ctx2:
-                    continue
-
-                interactions.append({
-                    "feature_1": f1,
-                    "feature_2": f2,
-                    "n_samples": len(both_on),
-                    "win_rate": round(rate, 4),
-                    "lift": round(lift, 2),
-                    "suggested_expression": f"1 if {ctx1} and {ctx2} else 0",
-                    "description": (
-                        f"{self._COL_NAMES.get(f1, f1)} + "
-                        f"{self._COL_NAMES.get(f2, f2)}: "
-                        f"的中率 {rate:.1%} (Lift {lift:.1f}x)"
-                    ),
-                })
+        for k in selected.tolist():
+            f1 = available[rows[k]]
+            f2 = available[cols[k]]
+            rate = float(rates[k])
+            lift = float(lifts[k])
+
+            ctx1 = self._get_context_var_name(f1)
+            ctx2 = self._get_context_var_name(f2)
+            if not ctx1 or not ctx2:
+                continue
+
+            interactions.append({
+                "feature_1": f1,
+                "feature_2": f2,
+                "n_samples": int(n_both[k]),
+                "win_rate": round(rate, 4),
+                "lift": round(lift, 2),
+                "suggested_expression": f"1 if {ctx1} and {ctx2} else 0",
+                "description": (
+                    f"{self._COL_NAMES.get(f1, f1)} + "
+                    f"{self._COL_NAMES.get(f2, f2)}: "
+                    f"的中率 {rate:.1%} (Lift {lift:.1f}x)"
+                ),
+            })
 
         interactions.sort(key=lambda x: float(x["lift"]), reverse=True)
         return interactions[:20]  # 上位20件
@@ -0,0 +1,276 @@
+"""ファクタールール群を1つのカーネルに融合するスコアラー（Numbaバックエンド）。
+
+全ルールの sql_expression を連結して1つの関数ソースを生成する。
+各行で `out[j, i] = weight_j * float(<expr_j>)` を計算し、行軸を prange で並列化する。
+定数値の条件式は evaluator.normalize_branchless() で分岐なしの積和形に変換し、
+ループ本体を自動ベクトル化しやすくする。
+このソースを numba.njit でコンパイルする。
+生成ソースは式・重みのハッシュをファイル名としてユーザー専用のキャッシュディレクトリ
+（権限0700）に書き出し、そのファイル名で生成ソース自体をコンパイルした関数を
+njit(cache=True) するため、コンパイル済みカーネルはルールが変わらない限り
+プロセスをまたいで再利用される。キャッシュファイルの内容は実行しない
+（他ユーザーが置いたファイルがスコアリングプロセス内で実行されることを防ぐ）。
+
+カーネルに含めるのは次の条件を満たすルールのみ:
+    - 列単位評価（evaluator.compile_vectorized）が可能な構文
+    - 除算・剰余の右辺が0以外の定数（ゼロ除算時の行単位評価との差異を避ける）
+    - 参照する変数が全て数値・真偽値列
+それ以外のルールは evaluate_rule_vectorized() で評価する。
+"""
+
+import ast
+import hashlib
+import os
+import stat
+import sys
+import tempfile
+import types
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from src.scoring.evaluator import compile_vectorized, evaluate_rule_vectorized, normalize_branchless
+
+
+def _user_cache_root() -> Path:
+    """ユーザー単位のキャッシュルート（Windows: LOCALAPPDATA、それ以外: XDG_CACHE_HOME / ~/.cache）。"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA")
+        return Path(base) if base else Path.home() / "AppData" / "Local"
+    base = os.environ.get("XDG_CACHE_HOME")
+    return Path(base) if base else Path.home() / ".cache"
+
+
+DEFAULT_CACHE_DIR = _user_cache_root() / "keiba-data-analytics" / "fused_kernels"
+
+_KERNEL_NAME = "fused_kernel"
+
+
+def is_available() -> bool:
+    """numba が利用可能かを返す。"""
+    try:
+        import numba  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _KernelRenamer(ast.NodeTransformer):
+    """変数参照をカーネル内ローカル名（v_<name>）に置換し、参照変数を収集する。"""
+
+    def __init__(self) -> None:
+        self.names: set[str] = set()
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        # 関数名（abs/max/min等）は置換しない
+        node.args = [self.visit(a) for a in node.args]
+        return node
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        self.names.add(node.id)
+        return ast.Name(id=f"v_{node.id}", ctx=node.ctx)
+
+
+def _has_unsafe_division(tree: ast.AST) -> bool:
+    """右辺が0以外の数値定数でない除算・剰余を含むかを返す。"""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div | ast.FloorDiv | ast.Mod):
+            right = node.right
+            if not (
+                isinstance(right, ast.Constant)
+                and isinstance(right.value, int | float)
+                and not isinstance(right.value, bool)
+                and right.value != 0
+            ):
+                return True
+    return False
+
+
+def _has_non_numeric_constant(tree: ast.AST) -> bool:
+    """None・文字列等の数値以外の定数を含むかを返す（カーネル内の float() で失敗するため融合しない）。"""
+    return any(
+        isinstance(node, ast.Constant) and not isinstance(node.value, int | float)
+        for node in ast.walk(tree)
+    )
+
+
+def _to_kernel_expression(expression: str) -> tuple[str, frozenset[str]] | None:
+    """ルール式をカーネル内の行単位式に変換する。融合不可の式はNone。"""
+    if compile_vectorized(expression) is None:
+        return None
+    tree = ast.parse(expression.strip(), mode="eval")
+    if _has_unsafe_division(tree) or _has_non_numeric_constant(tree):
+        return None
+    renamer = _KernelRenamer()
+    body = renamer.visit(normalize_branchless(tree.body))
+    return ast.unparse(body), frozenset(renamer.names)
+
+
+def generate_kernel_source(
+    expressions: list[str],
+    weights: list[float],
+    variables: list[str],
+) -> str:
+    """融合カーネルのPythonソースを生成する。
+
+    Args:
+        expressions: _to_kernel_expression() 変換済みの行単位式
+        weights: 各ルールの重み
+        variables: カーネル引数とする変数名（引数順）
+
+    Returns:
+        `fused_kernel(<列配列...>, out)` を定義するソース文字列
+    """
+    args = ", ".join([*(f"c_{name}" for name in variables), "out"])
+    lines = [
+        "try:",
+        "    from numba import prange",
+        "except ImportError:",
+        "    prange = range",
+        "",
+        "",
+        f"def {_KERNEL_NAME}({args}):",
+        "    for i in prange(out.shape[1]):",
+    ]
+    lines += [f"        v_{name} = c_{name}[i]" for name in variables]
+    lines += [
+        f"        out[{j}, i] = {weight!r} * float({expr})"
+        for j, (expr, weight) in enumerate(zip(expressions, weights, strict=True))
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _prepare_cache_dir(cache_dir: Path) -> Path:
+    """キャッシュディレクトリを権限0700で作成し、現在のユーザー専用であることを確認する。
+
+    Raises:
+        PermissionError: 他ユーザー所有・シンボリックリンク・ディレクトリ以外の場合
+    """
+    cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if os.name != "posix":
+        return cache_dir
+    st = os.lstat(cache_dir)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        raise PermissionError(f"カーネルキャッシュが現在のユーザー専用のディレクトリではありません: {cache_dir}")
+    if st.st_mode & 0o077:
+        os.chmod(cache_dir, 0o700)
+    return cache_dir
+
+
+def _write_source(path: Path, source: str) -> None:
+    """同一ディレクトリの一時ファイル経由で置き換え、書きかけのファイルを残さない。"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".fused_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(source)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _load_kernel(source: str, cache_dir: Path, jit: bool) -> Callable[..., None]:
+    """生成ソースをハッシュ名のファイルに書き出してコンパイルし、必要に応じてJITコンパイルする。
+
+    実行するのは常に手元の生成ソースで、ファイルはnumbaのキャッシュ（ソース位置）用。
+    ファイル内容が生成ソースと異なる場合は書き直す。
+    """
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    path = _prepare_cache_dir(cache_dir) / f"fused_{digest}.py"
+    try:
+        current = path.read_text(encoding="utf-8")
+    except OSError:
+        current = None
+    if current != source:
+        _write_source(path, source)
+
+    module = types.ModuleType(f"_keiba_fused_{digest}")
+    module.__file__ = str(path)
+    exec(compile(source, str(path), "exec"), module.__dict__)  # noqa: S102 - 生成済みの検証済みソース
+    kernel: Callable[..., None] = getattr(module, _KERNEL_NAME)
+    if jit:
+        import numba
+
+        # nnan/ninf は行単位評価との差異（NaN比較）を生むため除外する
+        kernel = numba.njit(cache=True, parallel=True, fastmath={"contract", "arcp", "nsz", "reassoc"})(kernel)
+    return kernel
+
+
+class FusedRuleScorer:
+    """ルール群を融合カーネルで一括評価するスコアラー。
+
+    参照列の型はレースごとに異なり得るため、融合対象ルールの組み合わせごとに
+    カーネルを生成・保持する。
+    """
+
+    def __init__(
+        self,
+        rules: list[dict[str, Any]],
+        cache_dir: str | Path | None = None,
+        jit: bool = True,
+    ) -> None:
+        """
+        Args:
+            rules: ルールdictリスト（sql_expression, weight を参照）
+            cache_dir: 生成カーネルの保存先（Noneでユーザーキャッシュディレクトリ配下）
+            jit: numba.njitでコンパイルするか（Falseは純Python実行、検証用）
+        """
+        self._expressions = [str(rule.get("sql_expression", "") or "") for rule in rules]
+        self._weights = [float(rule.get("weight", 1.0)) for rule in rules]
+        self._cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self._jit = jit
+        self._kernels: dict[tuple[int, ...], tuple[Callable[..., None], list[str]]] = {}
+
+        self._candidates: dict[int, tuple[str, frozenset[str]]] = {}
+        for j, expression in enumerate(self._expressions):
+            converted = _to_kernel_expression(expression) if expression.strip() else None
+            if converted is not None:
+                self._candidates[j] = converted
+
+    def _kernel_for(self, fused: tuple[int, ...]) -> tuple[Callable[..., None], list[str]]:
+        if fused not in self._kernels:
+            variables = sorted(set().union(*(self._candidates[j][1] for j in fused)))
+            source = generate_kernel_source(
+                [self._candidates[j][0] for j in fused],
+                [self._weights[j] for j in fused],
+                variables,
+            )
+            self._kernels[fused] = (_load_kernel(source, self._cache_dir, self._jit), variables)
+        return self._kernels[fused]
+
+    def evaluate(self, columns: Mapping[str, NDArray[Any]], n_rows: int) -> NDArray[np.float64]:
+        """全ルールを評価し、重み付きスコア行列を返す。
+
+        Args:
+            columns: 変数名→np.ndarray のdict（build_eval_columns() の戻り値）
+            n_rows: 馬数
+
+        Returns:
+            shape=(len(rules), n_rows) の重み付きスコア行列
+        """
+        matrix = np.zeros((len(self._expressions), n_rows), dtype=np.float64)
+        if n_rows == 0:
+            return matrix
+
+        fused = tuple(
+            j for j, (_, names) in self._candidates.items()
+            if all(name in columns and columns[name].dtype != object for name in names)
+        )
+        remaining = [j for j in range(len(self._expressions)) if j not in fused]
+        if fused:
+            try:
+                kernel, variables = self._kernel_for(fused)
+                out = np.zeros((len(fused), n_rows), dtype=np.float64)
+                kernel(*(np.ascontiguousarray(columns[name]) for name in variables), out)
+                matrix[list(fused)] = out
+            except Exception as e:
+                logger.debug(f"融合カーネル評価エラーのため列単位評価にフォールバック: {e}")
+                remaining = list(range(len(self._expressions)))
+
+        for j in remaining:
+            matrix[j] = evaluate_rule_vectorized(self._expressions[j], columns, n_rows) * self._weights[j]
+        return matrix
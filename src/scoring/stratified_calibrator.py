@@ -163,11 +163,35 @@ class StratifiedCalibrator(ProbabilityCalibrator):
         Returns:
             推定勝率 (0.0〜1.0)
         """
-        stratum = get_stratum(track_type, distance)
-        cal = self._calibrators.get(stratum, self._fallback)
+        return self._calibrator_for(track_type, distance).predict_proba(score)
+
+    def predict_proba_batch(
+        self,
+        scores: NDArray[np.float64],
+        track_type: str = "turf",
+        distance: int = 1600,
+    ) -> NDArray[np.float64]:
+        """同一層のスコア配列をまとめて確率に変換する。
+
+        1レースの全馬は層を共有するため、層の解決は1回だけ行い、
+        該当層のキャリブレーターの一括変換に委譲する。
+
+        Args:
+            scores: GY指数スコア配列
+            track_type: "turf" or "dirt"
+            distance: 距離（メートル）
+
+        Returns:
+            推定勝率の配列
+        """
+        return self._calibrator_for(track_type, distance).predict_proba_batch(scores)
+
+    def _calibrator_for(self, track_type: str, distance: int) -> ProbabilityCalibrator:
+        """該当層のキャリブレーター（未学習の層はfallback）を返す。"""
+        cal = self._calibrators.get(get_stratum(track_type, distance), self._fallback)
         if cal is None:
             raise RuntimeError("キャリブレーターが未訓練です。fit()を先に呼び出してください。")
-        return cal.predict_proba(score)
+        return cal
 
     @property
     def strata_info(self) -> dict[str, str]:
@@ -357,6 +357,7 @@ class WeightOptimizer:
                     "UPDATE factor_rules SET training_from = ?, training_to = ? WHERE rule_id = ?",
                     (train_from_iso, train_to_iso, rule["rule_id"]),
                 )
+                self._registry.clear_cache()
 
             updated += 1
 
@@ -382,6 +383,6 @@ class WeightOptimizer:
             normalized = abs(coef) / max_abs * self.MAX_WEIGHT
             # 負の係数は小さいweightに（ファクター式自体が正負を含むため、
             # weightは正の値で維持し、寄与度の大きさのみ反映する）
-            weights[name] = round(max(0.1, normalized), 2)
+            weights[name] = round(max(0.1, float(normalized)), 2)
 
         return weights
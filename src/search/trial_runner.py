@@ -9,6 +9,7 @@ from typing import Any
 
 import numpy as np
 from loguru import logger
+from numpy.typing import NDArray
 
 from src.backtest.engine import BacktestConfig, BacktestEngine
 from src.backtest.metrics import calculate_metrics
@@ -17,6 +18,7 @@ from src.backtest.walk_forward import WalkForwardEngine, _filter_races, _parse_d
 from src.betting.bankroll import BankrollManager, BettingMethod
 from src.data.db import DatabaseManager
 from src.data.provider import JVLinkDataProvider
+from src.factors.base import FactorRule
 from src.factors.registry import FactorRegistry
 from src.scoring.batch_scorer import BatchScorer
 from src.scoring.calibration import (
@@ -25,7 +27,11 @@ from src.scoring.calibration import (
     ProbabilityCalibrator,
 )
 from src.scoring.engine import ScoringEngine
-from src.scoring.evaluator import evaluate_rule
+from src.scoring.evaluator import (
+    EvalContextFactory,
+    build_race_context,
+    compile_row_scorer,
+)
 from src.search.config import (
     SearchConfig,
     TrialConfig,
@@ -50,7 +56,13 @@ class TrialScoringEngine:
         ev_threshold: float = 1.05,
         jvlink_provider: JVLinkDataProvider | None = None,
     ) -> None:
-        self._rules = rules
+        # ホットループ（馬×ルール）でdictのキー参照・式の検査を繰り返さないよう、
+        # 型付きルールを経由してコンパイル済みの組に一度だけ変換
+        typed = [FactorRule.from_dict(r) for r in rules]
+        self._rule_names = [rule.name for rule in typed]
+        self._rule_weights = [rule.weight for rule in typed]
+        # 全ルールを1関数に展開した融合関数（馬ごとに1回呼ぶだけでルール群を評価する）
+        self._row_scorer = compile_row_scorer(tuple(rule.expression for rule in typed))
         self._calibrator = calibrator
         self._ev_threshold = ev_threshold
         self._provider = jvlink_provider
@@ -75,36 +87,29 @@ class TrialScoringEngine:
 
         # 前走データ取得
         prev_contexts: list[dict[str, Any] | None] = []
-        all_prev_l3f: list[float] | None = None
+        all_prev_l3f: NDArray[np.float64] | None = None
         if self._provider and race_key:
-            l3f_list: list[float] = []
-            for horse in entries:
-                ketto = str(horse.get("KettoNum", ""))
-                prev = (
-                    self._provider.get_previous_race_entry(ketto, race_key)
-                    if ketto else None
-                )
-                prev_contexts.append(prev)
-                l3f_list.append(
-                    self._safe_float(prev.get("HaronTimeL3", 0)) if prev else 0.0
-                )
-            all_prev_l3f = l3f_list
+            # 全馬の前走を1クエリで取得する
+            kettos = [str(horse.get("KettoNum", "")) for horse in entries]
+            prev_by_ketto = self._provider.get_previous_race_entries(kettos, race_key)
+            prev_contexts = [prev_by_ketto.get(ketto) for ketto in kettos]
+            all_prev_l3f = np.fromiter(
+                (self._safe_float(prev.get("HaronTimeL3", 0)) if prev else 0.0 for prev in prev_contexts),
+                dtype=np.float64, count=len(prev_contexts),
+            )
         else:
             prev_contexts = [None] * len(entries)
 
+        race_ctx = build_race_context(race, entries, all_prev_l3f)
+        contexts = EvalContextFactory()
         for i, horse in enumerate(entries):
-            total_score = self.BASE_SCORE
+            total_score = float(self.BASE_SCORE)
             factor_details: dict[str, float] = {}
-            for rule in self._rules:
-                expression = rule.get("sql_expression", "")
-                raw = evaluate_rule(
-                    expression, horse, race, entries,
-                    prev_context=prev_contexts[i],
-                    all_prev_l3f=all_prev_l3f,
-                )
-                weighted = raw * rule.get("weight", 1.0)
+            values = self._row_scorer(contexts.build(horse, race_ctx, prev_contexts[i], position=i))
+            for name, value, weight in zip(self._rule_names, values, self._rule_weights, strict=True):
+                weighted = value * weight
                 total_score += weighted
-                factor_details[rule["rule_name"]] = weighted
+                factor_details[name] = weighted
 
             umaban = str(horse.get("Umaban", ""))
             actual_odds = odds_map.get(umaban, 0.0)
@@ -511,7 +516,7 @@ class TrialRunner:
         weight_map = {}
         for name, coef in zip(selected_names, coefs, strict=False):
             normalized = abs(coef) / max_abs * 3.0
-            weight_map[name] = round(max(0.1, normalized), 2)
+            weight_map[name] = round(max(0.1, float(normalized)), 2)
 
         # ルールのコピーを作成してweight更新
         updated_rules = []
@@ -35,6 +35,18 @@ class Strategy(ABC):
         """戦略バージョンを返す（例: "1.0.0"）。"""
         ...
 
+    def prepare(self, races: list[dict[str, Any]], params: list[dict[str, Any]]) -> None:
+        """バックテスト開始前に、対象の全レースと各レースの戦略パラメータを受け取る。
+
+        run() は残高を引き継ぎながらレース順に逐次呼ばれるが、残高に依存しない処理
+        （スコアリング等）はここでまとめて行ってよい。既定では何もしない。
+
+        Args:
+            races: BacktestEngine.run() に渡されたレースのリスト
+            params: 各レースの run() に渡す戦略パラメータ（racesと同順）
+        """
+        return
+
     @abstractmethod
     def run(
         self,
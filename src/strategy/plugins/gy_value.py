@@ -11,6 +11,7 @@ Quarter Kelly方式で投票額を決定する。
     4. Betオブジェクトとして返却
 """
 
+from collections import Counter
 from typing import Any
 
 from loguru import logger
@@ -18,7 +19,7 @@ from loguru import logger
 from src.betting.bankroll import BankrollManager, BettingMethod
 from src.data.db import DatabaseManager
 from src.data.provider import JVLinkDataProvider
-from src.scoring.engine import ScoringEngine
+from src.scoring.engine import RaceInput, ScoringEngine
 from src.strategy.base import Bet, Strategy
 
 
@@ -34,6 +35,7 @@ class GYValueStrategy(Strategy):
         ev_threshold: バリューベット判定閾値（デフォルト1.05）
         method: 投票金額決定方式（デフォルトQuarter Kelly）
         max_per_race_rate: レースあたり投票上限率
+        n_jobs: バックテスト時のスコアリング並列数（1で逐次、-1でCPUコア数）
     """
 
     def __init__(
@@ -43,6 +45,7 @@ class GYValueStrategy(Strategy):
         ev_threshold: float = 1.05,
         method: BettingMethod = BettingMethod.QUARTER_KELLY,
         max_per_race_rate: float = 0.05,
+        n_jobs: int = 1,
     ) -> None:
         self._ext_db = ext_db
         self._ev_threshold = ev_threshold
@@ -52,6 +55,9 @@ class GYValueStrategy(Strategy):
         self._engine = ScoringEngine(
             ext_db, ev_threshold=ev_threshold, jvlink_provider=provider,
         )
+        self._n_jobs = n_jobs
+        # prepare() で算出済みのスコア（race_key → score_race() の結果）
+        self._prescored: dict[str, list[dict[str, Any]]] = {}
 
     def name(self) -> str:
         return "GY_VALUE"
@@ -59,6 +65,28 @@ class GYValueStrategy(Strategy):
     def version(self) -> str:
         return "1.0.0"
 
+    def prepare(self, races: list[dict[str, Any]], params: list[dict[str, Any]]) -> None:
+        """バックテスト対象の全レースを ScoringEngine.score_many() でまとめてスコアリングする。
+
+        n_jobs が1の場合は何もせず、run() でレースごとにスコアリングする。
+        race_key が重複するレースも run() 側でスコアリングする。
+        """
+        self._prescored = {}
+        if self._n_jobs == 1:
+            return
+        targets = [(race, p) for race, p in zip(races, params, strict=True) if race.get("entries") and race.get("odds")]
+        keys = Counter(self._build_race_key(race.get("race_info", {})) for race, _ in targets)
+        inputs: list[RaceInput] = []
+        as_of_dates: list[str | None] = []
+        for race, p in targets:
+            race_data = race.get("race_info", {})
+            race_key = self._build_race_key(race_data)
+            if keys[race_key] == 1:
+                inputs.append((race_data, race["entries"], race["odds"], race_key))
+                as_of_dates.append(p.get("as_of_date"))
+        scored = self._engine.score_many(inputs, n_jobs=self._n_jobs, as_of_dates=as_of_dates)
+        self._prescored = {race_key: result for (*_, race_key), result in zip(inputs, scored, strict=True)}
+
     def run(
         self,
         race_data: dict[str, Any],
@@ -89,10 +117,12 @@ class GYValueStrategy(Strategy):
         as_of_date = params.get("as_of_date")
         race_key = self._build_race_key(race_data)
 
-        # GY指数スコアリング
-        scored = self._engine.score_race(
-            race_data, entries, odds, race_key=race_key, as_of_date=as_of_date,
-        )
+        # GY指数スコアリング（prepare() で算出済みならその結果を使う）
+        scored = self._prescored.pop(race_key, None)
+        if scored is None:
+            scored = self._engine.score_race(
+                race_data, entries, odds, race_key=race_key, as_of_date=as_of_date,
+            )
         if not scored:
             return []
 
@@ -390,3 +390,39 @@ class TestBacktestEngine:
         engine.run(races, config)
 
         assert "as_of_date" not in ParamCapture2.captured_params
+
+    def test_prepare_receives_races_and_params(self) -> None:
+        """run()の前にprepare()へ全レースと各レースのparamsが渡ること。"""
+
+        class PrepareCapture(EmptyStrategy):
+            def __init__(self) -> None:
+                self.calls: list[str] = []
+                self.prepared: tuple[list[dict[str, Any]], list[dict[str, Any]]] | None = None
+                self.run_params: list[dict[str, Any]] = []
+
+            def prepare(self, races: list[dict[str, Any]], params: list[dict[str, Any]]) -> None:
+                self.calls.append("prepare")
+                self.prepared = (races, params)
+
+            def run(
+                self,
+                race_data: dict[str, Any],
+                entries: list[dict[str, Any]],
+                odds: dict[str, float],
+                bankroll: int,
+                params: dict[str, Any],
+            ) -> list[Bet]:
+                self.calls.append("run")
+                self.run_params.append(params)
+                return []
+
+        strategy = PrepareCapture()
+        config = BacktestConfig(date_from="2025-01-01", date_to="2025-01-31", exclude_overlapping_factors=True)
+        races = [_make_race(monthday="0105"), _make_race(monthday="0112")]
+        BacktestEngine(strategy).run(races, config)
+
+        assert strategy.calls == ["prepare", "run", "run"]
+        assert strategy.prepared is not None
+        assert strategy.prepared[0] is races
+        assert strategy.prepared[1] == strategy.run_params
+        assert [p["as_of_date"] for p in strategy.run_params] == ["2025-01-05", "2025-01-12"]
@@ -50,6 +50,61 @@ class TestDatabaseManager:
         results = db_manager.execute_query("SELECT * FROM items")
         assert results == []
 
+    def test_execute_query_tuples(self, db_manager: DatabaseManager) -> None:
+        """execute_query_tuplesがSELECT列順のプレーンなタプルを返すこと。"""
+        with db_manager.connect() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER, name TEXT)")
+            conn.executemany("INSERT INTO items VALUES (?, ?)", [(1, "alpha"), (2, "beta")])
+
+        rows = db_manager.execute_query_tuples("SELECT name, id FROM items WHERE id >= ? ORDER BY id", (1,))
+        assert rows == [("alpha", 1), ("beta", 2)]
+        assert all(type(row) is tuple for row in rows)
+
+    def test_iter_query_streams_all_rows(self, db_manager: DatabaseManager) -> None:
+        """iter_queryがチャンク境界をまたいで全行をdict形式で返すこと。"""
+        with db_manager.connect() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER, name TEXT)")
+            conn.executemany("INSERT INTO items VALUES (?, ?)", [(i, f"n{i}") for i in range(7)])
+
+        rows = db_manager.iter_query("SELECT * FROM items WHERE id >= ? ORDER BY id", (2,), chunk_size=2)
+        assert not isinstance(rows, list)
+        assert list(rows) == [{"id": i, "name": f"n{i}"} for i in range(2, 7)]
+
+    def test_iter_query_empty_result(self, db_manager: DatabaseManager) -> None:
+        """結果が空の場合、何も返さないこと。"""
+        with db_manager.connect() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER)")
+
+        assert list(db_manager.iter_query("SELECT * FROM items")) == []
+
+    def test_iter_chunks_yields_raw_tuples(self, db_manager: DatabaseManager) -> None:
+        """iter_chunksがchunk_size行ずつタプルのリストを返すこと。"""
+        with db_manager.connect() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER, name TEXT)")
+            conn.executemany("INSERT INTO items VALUES (?, ?)", [(i, f"n{i}") for i in range(5)])
+
+        chunks = list(db_manager.iter_chunks("SELECT * FROM items ORDER BY id", chunk_size=2))
+        assert [len(c) for c in chunks] == [2, 2, 1]
+        assert [row for c in chunks for row in c] == [(i, f"n{i}") for i in range(5)]
+
+    def test_execute_many_inserts_all_rows(self, db_manager: DatabaseManager) -> None:
+        """execute_manyが全行を挿入し、影響行数の合計を返すこと。"""
+        with db_manager.connect() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+
+        affected = db_manager.execute_many("INSERT INTO items VALUES (?, ?)", [(i, f"n{i}") for i in range(4)])
+        assert affected == 4
+        assert len(db_manager.execute_query("SELECT * FROM items")) == 4
+
+    def test_execute_many_rolls_back_on_error(self, db_manager: DatabaseManager) -> None:
+        """途中で失敗した場合、全行がロールバックされること。"""
+        with db_manager.connect() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+
+        with pytest.raises(sqlite3.IntegrityError):
+            db_manager.execute_many("INSERT INTO items VALUES (?, ?)", [(1, "a"), (1, "dup")])
+        assert db_manager.execute_query("SELECT * FROM items") == []
+
     def test_execute_write_returns_rowcount(self, db_manager: DatabaseManager) -> None:
         """execute_writeが影響行数を返すこと。"""
         with db_manager.connect() as conn:
@@ -314,6 +314,34 @@ class TestGetPreviousRaceEntry:
         provider = JVLinkDataProvider(jvlink_db_with_history)
         assert provider.get_previous_race_entry("0001", "short") is None
 
+    def test_get_previous_race_entries_matches_single(
+        self, jvlink_db_with_history: DatabaseManager,
+    ) -> None:
+        """一括取得が馬ごとの get_previous_race_entry と一致すること。"""
+        provider = JVLinkDataProvider(jvlink_db_with_history)
+        race_key = "2025010506010203"
+        prevs = provider.get_previous_race_entries(["0001", "0002", "", "0001"], race_key)
+        assert set(prevs) == {"0001"}
+        assert prevs["0001"] == provider.get_previous_race_entry("0001", race_key)
+
+    def test_get_previous_race_entries_chunked(
+        self, jvlink_db_with_history: DatabaseManager,
+    ) -> None:
+        """IN句を分割しても全馬分を取得できること。"""
+        provider = JVLinkDataProvider(jvlink_db_with_history)
+        provider.PREV_ENTRY_QUERY_CHUNK = 1
+        prevs = provider.get_previous_race_entries(["0002", "0001"], "2025011006010101")
+        assert prevs["0001"]["KakuteiJyuni"] == "1"  # 直近（1月5日）の着順
+        assert prevs["0002"]["HaronTimeL3"] == "352"
+
+    def test_get_previous_race_entries_invalid_key(
+        self, jvlink_db_with_history: DatabaseManager,
+    ) -> None:
+        """不正なrace_keyや空のKettoNumのみでは空dictを返すこと。"""
+        provider = JVLinkDataProvider(jvlink_db_with_history)
+        assert provider.get_previous_race_entries(["0001"], "short") == {}
+        assert provider.get_previous_race_entries(["", " "], "2025010506010203") == {}
+
 
 class TestFetchRacesBatch:
     """fetch_races_batchのテスト。"""
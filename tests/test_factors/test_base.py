@@ -2,9 +2,10 @@
 
 from typing import Any
 
+import numpy as np
 import pytest
 
-from src.factors.base import BaseFactor, FactorResult
+from src.factors.base import BaseFactor, FactorCategory, FactorResult, FactorRule, RuleSet
 
 
 class ConcreteFactor(BaseFactor):
@@ -111,3 +112,40 @@ class TestBaseFactor:
             all_entries=[],
         )
         assert "speed_index=60" in result.detail
+
+
+class TestFactorRule:
+    """FactorRule / RuleSetのテスト。"""
+
+    def test_from_dict(self) -> None:
+        """ルールdictから型付きルールを生成できること。"""
+        rule = FactorRule.from_dict({
+            "rule_id": 7, "rule_name": "内枠", "category": "gate",
+            "sql_expression": "1 if is_inner_gate else 0", "weight": "1.5",
+        })
+        assert rule == FactorRule("内枠", "1 if is_inner_gate else 0", 1.5, "gate", 7)
+        assert not hasattr(rule, "__dict__")
+
+    def test_from_dict_defaults(self) -> None:
+        """式・重み未設定のルールは空式・重み1.0となること。"""
+        rule = FactorRule.from_dict({"rule_name": "test", "sql_expression": None})
+        assert rule.expression == ""
+        assert rule.weight == 1.0
+
+    def test_rule_set_parallel_arrays(self) -> None:
+        """RuleSetが名前・式・重みの並列配列を保持すること。"""
+        rule_set = RuleSet.from_rules([
+            {"rule_name": "a", "sql_expression": "1", "weight": 2.0},
+            FactorRule("b", "Ninki", 0.5),
+        ])
+        assert len(rule_set) == 2
+        assert rule_set.names == ("a", "b")
+        assert rule_set.expressions == ("1", "Ninki")
+        np.testing.assert_array_equal(rule_set.weights, [2.0, 0.5])
+
+    def test_factor_category_is_plain_string(self) -> None:
+        """FactorCategoryはDB・JSONと同じ文字列として扱えること。"""
+        rule = FactorRule.from_dict({"rule_name": "a", "category": FactorCategory.FORM})
+        assert rule.category == "form"
+        assert type(rule.category) is str
+
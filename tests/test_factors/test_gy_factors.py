@@ -3,10 +3,23 @@
 各ファクタールールの式がevaluate_rule()で正しく評価されることを検証する。
 """
 
+import numpy as np
 import pytest
 
+from src.factors.base import FactorCategory
 from src.factors.rules.gy_factors import GY_INITIAL_FACTORS
-from src.scoring.evaluator import evaluate_rule
+from src.scoring.evaluator import (
+    FLAG_VARIABLES,
+    build_eval_columns,
+    build_eval_context,
+    compile_rule,
+    compile_vectorized,
+    evaluate_rule,
+    evaluate_rule_vectorized,
+    evaluate_rules_vectorized,
+    prepare_features,
+    specialize_for_race,
+)
 
 
 # --- テスト用ヘルパー ---
@@ -94,10 +107,83 @@ class TestGYFactorsStructure:
             result = evaluate_rule(f["sql_expression"], horse, race, entries, prev)
             assert isinstance(result, float), f"{f['rule_name']} returned non-float"
 
+    def test_vectorized_matches_row_eval(self) -> None:
+        """全ファクターが行単位・列単位にコンパイルでき、列単位評価が行単位評価と同じ結果を返すこと。"""
+        race = _base_race(Kyori="1200", TrackCD="23")
+        entries = [
+            _base_horse(Umaban=f"{i:02d}", Ninki=str(i), DMJyuni=str(13 - i), SexCD=str(i % 3 + 1),
+                        ZogenFugo="-" if i % 2 else "+", ZogenSa=str(i * 2), Barei=str(i % 6 + 2))
+            for i in range(1, 13)
+        ]
+        prevs = [_base_horse(KakuteiJyuni=str(i), KyakusituKubun=str(i % 4 + 1), Jyuni4c=str(i)) for i in range(12)]
+        l3f = [340.0 + i for i in range(12)]
+        columns = build_eval_columns([
+            build_eval_context(h, race, entries, prevs[i], l3f) for i, h in enumerate(entries)
+        ])
+
+        for f in GY_INITIAL_FACTORS:
+            assert compile_rule(f["sql_expression"]) is not None, f"{f['rule_name']} is not compiled"
+            assert compile_vectorized(f["sql_expression"]) is not None, f"{f['rule_name']} is not vectorized"
+            expected = [evaluate_rule(f["sql_expression"], h, race, entries, prevs[i], l3f)
+                        for i, h in enumerate(entries)]
+            np.testing.assert_array_equal(
+                evaluate_rule_vectorized(f["sql_expression"], columns, len(entries)),
+                expected,
+                err_msg=f["rule_name"],
+            )
+
+    @pytest.mark.parametrize("race_overrides", [
+        {"Kyori": "1200", "TrackCD": "23", "SibaBabaCD": "3", "GradeCD": "A"},
+        {"Kyori": "1800", "TrackCD": "11", "DirtBabaCD": "1"},
+        {"Kyori": "2400", "TrackCD": ""},
+    ])
+    def test_prepare_features_matches_context_flags(self, race_overrides: dict) -> None:
+        """prepare_featuresの列単位フラグがbuild_eval_contextのフラグと一致すること。"""
+        race = _base_race(**race_overrides)
+        entries = [
+            _base_horse(Umaban=f"{i:02d}", Ninki=str(i), SexCD=str(i % 3 + 1), KyakusituKubun=str(i % 5))
+            for i in range(1, 11)
+        ]
+        prevs = [_base_horse(KyakusituKubun=str((i + 2) % 5)) for i in range(10)]
+        expected = build_eval_columns([build_eval_context(h, race, entries, prevs[i]) for i, h in enumerate(entries)])
+        columns = prepare_features(build_eval_columns([
+            build_eval_context(h, race, entries, prevs[i], include_flags=False) for i, h in enumerate(entries)
+        ]))
+
+        for name in FLAG_VARIABLES:
+            assert columns[name].dtype == np.bool_
+            np.testing.assert_array_equal(columns[name], expected[name], err_msg=name)
+
+    @pytest.mark.parametrize("race_overrides", [
+        {"Kyori": "1200", "TrackCD": "11", "RaceNum": "11"},
+        {"Kyori": "2000", "TrackCD": "23", "TenkoCD": "3"},
+        {"Kyori": "2600", "TrackCD": "17"},
+    ])
+    def test_specialized_rules_match_row_eval(self, race_overrides: dict) -> None:
+        """レース条件で特化したルール群の評価結果が元の式の行単位評価と一致すること。"""
+        race = _base_race(**race_overrides)
+        entries = [
+            _base_horse(Umaban=f"{i:02d}", Ninki=str(i), DMJyuni=str(11 - i), KyakusituKubun=str(i % 5))
+            for i in range(1, 11)
+        ]
+        prevs = [_base_horse(KakuteiJyuni=str(i), KyakusituKubun=str((i + 2) % 5)) for i in range(10)]
+        expressions = tuple(f["sql_expression"] for f in GY_INITIAL_FACTORS)
+        columns = prepare_features(build_eval_columns([
+            build_eval_context(h, race, entries, prevs[i], include_flags=False) for i, h in enumerate(entries)
+        ]))
+
+        specialized = specialize_for_race(expressions, columns)
+        assert sum(expr == "0" for expr in specialized) > 0  # レース条件で無効になるルールは定数化される
+        matrix = evaluate_rules_vectorized(list(specialized), columns, len(entries))
+        for j, expression in enumerate(expressions):
+            expected = [evaluate_rule(expression, h, race, entries, prevs[i]) for i, h in enumerate(entries)]
+            np.testing.assert_array_equal(matrix[j], expected, err_msg=expression)
+
     def test_categories_not_empty(self) -> None:
         """全ファクターのcategoryが空でないこと。"""
         for f in GY_INITIAL_FACTORS:
             assert f["category"].strip(), f"{f['rule_name']} has empty category"
+            assert f["category"] in set(FactorCategory), f"{f['rule_name']} has unknown category"
 
 
 # --- 個別ファクターテスト ---
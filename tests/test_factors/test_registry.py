@@ -105,6 +105,61 @@ class TestFactorRegistry:
 
 
 @pytest.mark.unit
+class TestActiveRulesCache:
+    """get_active_rules(as_of_date) のキャッシュのテスト。"""
+
+    def _approve(self, registry: FactorRegistry, name: str) -> int:
+        rule_id = registry.create_rule({"rule_name": name, "weight": 1.0})
+        registry.transition_status(rule_id, "TESTING", reason="検証開始")
+        registry.transition_status(rule_id, "APPROVED", reason="検証合格")
+        return rule_id
+
+    def test_same_date_served_from_cache(self, initialized_db: DatabaseManager, monkeypatch) -> None:
+        """同じ時点日での再取得はDBを参照せず、複製した行を返すこと。"""
+        registry = FactorRegistry(initialized_db)
+        self._approve(registry, "ルールA")
+        first = registry.get_active_rules(as_of_date="2025-06-01")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("DBが再参照された")
+
+        monkeypatch.setattr(initialized_db, "execute_query", fail)
+        first[0]["weight"] = 99.0
+        second = registry.get_active_rules(as_of_date="2025-06-01")
+        assert [r["rule_name"] for r in second] == ["ルールA"]
+        assert second[0]["weight"] == 1.0
+
+    def test_update_invalidates_cache(self, initialized_db: DatabaseManager) -> None:
+        """更新系メソッド呼び出し後は最新の状態を返すこと。"""
+        registry = FactorRegistry(initialized_db)
+        rule_id = self._approve(registry, "ルールA")
+        assert registry.get_active_rules(as_of_date="2025-06-01")[0]["weight"] == 1.0
+
+        registry.update_weight(rule_id, 2.5, reason="テスト")
+        assert registry.get_active_rules(as_of_date="2025-06-01")[0]["weight"] == 2.5
+
+    def test_clear_cache_after_direct_write(self, initialized_db: DatabaseManager) -> None:
+        """DBを直接更新した場合はclear_cache()で反映されること。"""
+        registry = FactorRegistry(initialized_db)
+        rule_id = self._approve(registry, "ルールA")
+        assert len(registry.get_active_rules(as_of_date="2025-06-01")) == 1
+
+        initialized_db.execute_write(
+            "UPDATE factor_rules SET training_to = '2025-12-31' WHERE rule_id = ?", (rule_id,),
+        )
+        assert len(registry.get_active_rules(as_of_date="2025-06-01")) == 1
+        registry.clear_cache()
+        assert registry.get_active_rules(as_of_date="2025-06-01") == []
+
+    def test_lru_eviction(self, initialized_db: DatabaseManager, monkeypatch) -> None:
+        """保持件数の上限を超えると最も古い時点日から破棄されること。"""
+        monkeypatch.setattr(FactorRegistry, "ACTIVE_RULES_CACHE_SIZE", 2)
+        registry = FactorRegistry(initialized_db)
+        for date in ("2025-01-01", "2025-01-02", "2025-01-01", "2025-01-03"):
+            registry.get_active_rules(as_of_date=date)
+        assert list(registry._active_rules_cache) == ["2025-01-01", "2025-01-03"]
+
+
 class TestFactorRegistryAsOfDate:
     """get_active_rules(as_of_date) のテスト。"""
 
@@ -55,6 +55,27 @@ class TestLoadConfig:
         config = _load_config(None)
         assert isinstance(config, dict)
 
+    def test_parsed_once_until_modified(self, config_file: Path) -> None:
+        """ファイル未更新の間はYAMLを再パースせず、更新後は再読込すること。"""
+        import yaml
+
+        with patch("src.llm_gateway.config.yaml.load", wraps=yaml.load) as mock_load:
+            _load_config(str(config_file))
+            _load_config(str(config_file))
+            assert mock_load.call_count == 1
+
+            stat = config_file.stat()
+            config_file.write_text("llm_gateway: {}\n", encoding="utf-8")
+            os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            assert _load_config(str(config_file)) == {"llm_gateway": {}}
+            assert mock_load.call_count == 2
+
+    def test_returned_config_is_isolated(self, config_file: Path) -> None:
+        """返却値の変更がキャッシュに影響しないこと。"""
+        config = _load_config(str(config_file))
+        config["llm_gateway"]["model_routing"].clear()
+        assert _load_config(str(config_file))["llm_gateway"]["model_routing"]
+
 
 class TestCreateGateway:
     """create_gateway関数のテスト。"""
@@ -1,5 +1,7 @@
 """LLM Gatewayの単体テスト。"""
 
+import asyncio
+
 import pytest
 
 from src.llm_gateway.gateway import BaseLLMProvider, LLMGateway, LLMResponse
@@ -8,10 +10,17 @@ from src.llm_gateway.gateway import BaseLLMProvider, LLMGateway, LLMResponse
 class MockProvider(BaseLLMProvider):
     """テスト用モックプロバイダー。"""
 
-    def __init__(self, name: str = "mock", available: bool = True, fail: bool = False) -> None:
+    def __init__(
+        self, name: str = "mock", available: bool = True, fail: bool = False, delay: float = 0.0,
+    ) -> None:
         self._name = name
         self._available = available
         self._fail = fail
+        self._delay = delay
+        self.calls = 0
+        self.cancelled = False
+        self.in_flight = 0
+        self.max_in_flight = 0
 
     def name(self) -> str:
         return self._name
@@ -27,6 +36,17 @@ class MockProvider(BaseLLMProvider):
         temperature: float = 0.7,
         max_tokens: int = 4096,
     ) -> LLMResponse:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self._delay:
+                await asyncio.sleep(self._delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        finally:
+            self.in_flight -= 1
         if self._fail:
             raise RuntimeError("Mock failure")
         return LLMResponse(
@@ -102,3 +122,165 @@ class TestLLMGateway:
 
         with pytest.raises(RuntimeError, match="利用可能なモデルがありません"):
             await gateway.generate("test_case", "Hello")
+
+
+@pytest.mark.unit
+class TestHedgedGenerate:
+    """hedge_ms指定時のヘッジリクエストのテスト。"""
+
+    @staticmethod
+    def _config(hedge_ms: int) -> dict:
+        return {
+            "model_routing": {
+                "test_case": {"primary": "primary/model", "fallback": "fallback/model", "hedge_ms": hedge_ms},
+            },
+        }
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_hedged_by_fallback(self) -> None:
+        """プライマリが遅い場合、フォールバックの応答を採用しプライマリをキャンセルすること。"""
+        primary = MockProvider("primary", delay=5.0)
+        fallback = MockProvider("fallback")
+        gateway = LLMGateway(self._config(hedge_ms=10))
+        gateway.register_provider(primary)
+        gateway.register_provider(fallback)
+
+        result = await asyncio.wait_for(gateway.generate("test_case", "Hello"), timeout=2.0)
+        await asyncio.sleep(0)
+        assert result.provider == "fallback"
+        assert primary.cancelled
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_skips_fallback(self) -> None:
+        """プライマリがhedge_ms以内に応答した場合、フォールバックは起動しないこと。"""
+        primary = MockProvider("primary")
+        fallback = MockProvider("fallback")
+        gateway = LLMGateway(self._config(hedge_ms=1000))
+        gateway.register_provider(primary)
+        gateway.register_provider(fallback)
+
+        result = await gateway.generate("test_case", "Hello")
+        assert result.provider == "primary"
+        assert fallback.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_primary_failure_before_hedge_uses_fallback(self) -> None:
+        """プライマリがhedge_ms以内に失敗した場合、フォールバックで生成すること。"""
+        gateway = LLMGateway(self._config(hedge_ms=1000))
+        gateway.register_provider(MockProvider("primary", fail=True))
+        gateway.register_provider(MockProvider("fallback"))
+
+        result = await gateway.generate("test_case", "Hello")
+        assert result.provider == "fallback"
+
+    @pytest.mark.asyncio
+    async def test_both_fail_raises(self) -> None:
+        """ヘッジ後に両方失敗した場合RuntimeErrorとなること。"""
+        gateway = LLMGateway(self._config(hedge_ms=10))
+        gateway.register_provider(MockProvider("primary", fail=True, delay=0.05))
+        gateway.register_provider(MockProvider("fallback", fail=True))
+
+        with pytest.raises(RuntimeError, match="利用可能なモデルがありません"):
+            await gateway.generate("test_case", "Hello")
+
+
+@pytest.mark.unit
+class TestConcurrencyLimit:
+    """プロバイダーごとの同時実行数制限のテスト。"""
+
+    @pytest.mark.asyncio
+    async def test_max_concurrency_caps_in_flight_calls(self) -> None:
+        """max_concurrencyを超えてプロバイダーが同時に呼び出されないこと。"""
+        provider = MockProvider("mock", delay=0.01)
+        gateway = LLMGateway({
+            "mock": {"max_concurrency": 3},
+            "model_routing": {"test_case": {"primary": "mock/model"}},
+        })
+        gateway.register_provider(provider)
+
+        results = await asyncio.gather(*(gateway.generate("test_case", f"p{i}") for i in range(10)))
+        assert len(results) == 10
+        assert provider.calls == 10
+        assert provider.max_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_default_limit(self) -> None:
+        """未設定時はDEFAULT_MAX_CONCURRENCYで制限されること。"""
+        provider = MockProvider("mock", delay=0.01)
+        gateway = LLMGateway({"model_routing": {"test_case": {"primary": "mock/model"}}})
+        gateway.register_provider(provider)
+
+        n_calls = LLMGateway.DEFAULT_MAX_CONCURRENCY + 4
+        await asyncio.gather(*(gateway.generate("test_case", f"p{i}") for i in range(n_calls)))
+        assert provider.max_in_flight == LLMGateway.DEFAULT_MAX_CONCURRENCY
+
+
+@pytest.mark.unit
+class TestRouteResolution:
+    """モデルパス解決・利用可否キャッシュのテスト。"""
+
+    @pytest.mark.asyncio
+    async def test_resolution_cached_and_reset_on_register(self) -> None:
+        """解決結果がキャッシュされ、プロバイダー登録で破棄されること。"""
+        config = {
+            "model_routing": {"test_case": {"primary": "late/model"}},
+            "late": {"models": {"model": "late-model-id"}},
+        }
+        gateway = LLMGateway(config)
+        with pytest.raises(RuntimeError):
+            await gateway.generate("test_case", "Hello")
+        assert gateway._resolved["late/model"] is None
+
+        gateway.register_provider(MockProvider("late"))
+        result = await gateway.generate("test_case", "Hello")
+        assert result.model == "late-model-id"
+
+    @pytest.mark.asyncio
+    async def test_availability_checked_once_within_ttl(self) -> None:
+        """TTL内はis_available()を再評価しないこと。"""
+        provider = MockProvider("mock")
+        checks = []
+        original = provider.is_available
+        provider.is_available = lambda: checks.append(1) or original()  # type: ignore[method-assign]
+
+        gateway = LLMGateway({"model_routing": {"test_case": {"primary": "mock/model"}}})
+        gateway.register_provider(provider)
+        for _ in range(3):
+            await gateway.generate("test_case", "Hello")
+        assert len(checks) == 1
+
+
+@pytest.mark.unit
+class TestGenerateStream:
+    """generate_streamのテスト。"""
+
+    CONFIG = {"model_routing": {"test_case": {"primary": "failing/model", "fallback": "working/model"}}}
+
+    @pytest.mark.asyncio
+    async def test_default_stream_yields_full_content(self) -> None:
+        """ストリーミング非対応プロバイダーは全文を1チャンクで返すこと。"""
+        gateway = LLMGateway({"model_routing": {"test_case": {"primary": "mock/model"}}})
+        gateway.register_provider(MockProvider("mock"))
+
+        chunks = [c async for c in gateway.generate_stream("test_case", "Hello")]
+        assert chunks == ["Mock response: Hello"]
+
+    @pytest.mark.asyncio
+    async def test_fallback_when_primary_fails_before_first_chunk(self) -> None:
+        """最初のチャンク前にプライマリが失敗した場合フォールバックで生成すること。"""
+        gateway = LLMGateway(self.CONFIG)
+        gateway.register_provider(MockProvider("failing", fail=True))
+        gateway.register_provider(MockProvider("working"))
+
+        chunks = [c async for c in gateway.generate_stream("test_case", "Hello")]
+        assert chunks == ["Mock response: Hello"]
+
+    @pytest.mark.asyncio
+    async def test_raises_when_all_fail(self) -> None:
+        """全モデルが失敗した場合RuntimeErrorとなること。"""
+        gateway = LLMGateway(self.CONFIG)
+        gateway.register_provider(MockProvider("failing", fail=True))
+        gateway.register_provider(MockProvider("working", fail=True))
+
+        with pytest.raises(RuntimeError, match="利用可能なモデルがありません"):
+            _ = [c async for c in gateway.generate_stream("test_case", "Hello")]
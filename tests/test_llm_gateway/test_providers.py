@@ -1,7 +1,10 @@
 """LLMプロバイダーの単体テスト。"""
 
+import asyncio
 import os
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
 
 from src.llm_gateway.azure_provider import AzureProvider
 from src.llm_gateway.vertex_provider import VertexProvider
@@ -49,6 +52,70 @@ class TestAzureProvider:
         provider = AzureProvider({"endpoint": "https://test.openai.azure.com"})
         assert provider._api_version == "2024-12-01-preview"
 
+    def test_client_reused_across_concurrent_calls(self) -> None:
+        """同一イベントループ内の並行generateで同一HTTPクライアントが再利用されること。"""
+        provider = AzureProvider({"endpoint": "https://test.openai.azure.com"})
+        response = httpx.Response(
+            200,
+            json={"choices": [{"message": {"content": "ok"}}], "usage": {}},
+            request=httpx.Request("POST", "https://test.openai.azure.com"),
+        )
+
+        async def run() -> list:
+            results = await asyncio.gather(*(provider.generate("hi", model="gpt-4o") for _ in range(3)))
+            client = provider._client
+            await provider.close()
+            return [results, client]
+
+        with patch.object(httpx.AsyncClient, "post", new=AsyncMock(return_value=response)) as mock_post:
+            results, client = asyncio.run(run())
+        assert [r.content for r in results] == ["ok"] * 3
+        assert mock_post.call_count == 3
+        assert client is not None
+        assert provider._client is None
+
+    def test_stale_client_closed_when_loop_changes(self) -> None:
+        """イベントループが変わった場合、古いHTTPクライアントを閉じて作り直すこと。"""
+        provider = AzureProvider({"endpoint": "https://test.openai.azure.com"})
+
+        async def get_client() -> httpx.AsyncClient:
+            client = provider._get_client()
+            await asyncio.sleep(0)  # 旧クライアントのクローズ処理を実行させる
+            await asyncio.sleep(0)
+            return client
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+        assert first is not second
+        assert first.is_closed
+        assert not second.is_closed
+        asyncio.run(provider.close())
+
+    def test_generate_stream_parses_sse(self) -> None:
+        """SSEのdeltaを順に返し、[DONE]で終了すること。"""
+        provider = AzureProvider({"endpoint": "https://test.openai.azure.com"})
+        sse = (
+            'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'
+            'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+            'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+            "data: [DONE]\n\n"
+        )
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, text=sse)
+
+        async def run() -> list[str]:
+            provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            provider._client_loop = asyncio.get_running_loop()
+            chunks = [c async for c in provider.generate_stream("hi", model="gpt-4o")]
+            await provider.close()
+            return chunks
+
+        assert asyncio.run(run()) == ["Hel", "lo"]
+        assert b'"stream":true' in requests[0].content.replace(b" ", b"")
+
 
 class TestVertexProvider:
     """VertexProviderクラスのテスト。"""
@@ -80,3 +147,21 @@ class TestVertexProvider:
         """カスタムlocationが設定されること。"""
         provider = VertexProvider({"project_id": "test", "location": "asia-northeast1"})
         assert provider._location == "asia-northeast1"
+
+
+    def test_generate_initializes_sdk_once(self) -> None:
+        """vertexai.initは初回のみ呼ばれ、生成は非同期APIで実行されること。"""
+        provider = VertexProvider({"project_id": "test"})
+        response = MagicMock(text="ok", usage_metadata=None)
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=response)
+
+        with patch("vertexai.init") as mock_init, \
+                patch("vertexai.generative_models.GenerativeModel", return_value=model):
+            for _ in range(2):
+                result = asyncio.run(provider.generate("hi", model="gemini-2.0-flash"))
+                assert result.content == "ok"
+
+        mock_init.assert_called_once_with(project="test", location="us-central1")
+        assert model.generate_content_async.await_count == 2
+        model.generate_content.assert_not_called()
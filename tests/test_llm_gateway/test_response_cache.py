@@ -0,0 +1,94 @@
+"""LLM応答キャッシュの単体テスト。"""
+
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.llm_gateway.gateway import LLMGateway, LLMResponse
+from src.llm_gateway.response_cache import LLMResponseCache
+from tests.test_llm_gateway.test_gateway import MockProvider
+
+CONFIG = {"model_routing": {"test_case": {"primary": "mock/model"}}}
+
+
+@pytest.mark.unit
+class TestLLMResponseCache:
+    """LLMResponseCacheクラスのテスト。"""
+
+    def test_put_and_get(self, tmp_path: Path) -> None:
+        """保存した応答をraw_responseなしで取得できること。"""
+        cache = LLMResponseCache(str(tmp_path / "cache.db"))
+        key = cache.make_key("mock", "model", "prompt", "", 0.0, 100)
+        assert key is not None
+        assert cache.get(key) is None
+
+        cache.put(key, LLMResponse("text", "model", "mock", {"prompt_tokens": 1}, raw_response=object()))
+        cached = cache.get(key)
+        assert cached == LLMResponse("text", "model", "mock", {"prompt_tokens": 1})
+
+    def test_high_temperature_not_cacheable(self) -> None:
+        """temperatureが0.01を超える場合はキーを生成しないこと。"""
+        assert LLMResponseCache.make_key("mock", "model", "prompt", "", 0.7, 100) is None
+
+    def test_key_depends_on_inputs(self) -> None:
+        """入力が異なればキーも異なること。"""
+        base = LLMResponseCache.make_key("mock", "model", "prompt", "sys", 0.0, 100)
+        assert base != LLMResponseCache.make_key("mock", "model", "prompt", "other", 0.0, 100)
+        assert base != LLMResponseCache.make_key("mock", "model", "prompt", "sys", 0.0, 200)
+
+    def test_key_unambiguous_across_fields(self) -> None:
+        """区切り文字を含む入力でも、フィールド境界の異なる組は別キーになること。"""
+        key = LLMResponseCache.make_key
+        assert key("mock", "model", "c", "a|b", 0.0, 100) != key("mock", "model", "b|c", "a", 0.0, 100)
+        assert key("mock", "model|x", "p", "", 0.0, 100) != key("mock|model", "x", "p", "", 0.0, 100)
+
+
+@pytest.mark.unit
+class TestGatewayWithCache:
+    """応答キャッシュ付きLLMGatewayのテスト。"""
+
+    @pytest.mark.asyncio
+    async def test_deterministic_call_served_from_cache(self, tmp_path: Path) -> None:
+        """temperature=0の2回目以降の呼び出しはキャッシュから返し、別インスタンスでも有効なこと。"""
+        provider = MockProvider("mock")
+        gateway = LLMGateway(CONFIG, cache=LLMResponseCache(str(tmp_path / "cache.db")))
+        gateway.register_provider(provider)
+
+        first = await gateway.generate("test_case", "Hello", temperature=0.0)
+        second = await gateway.generate("test_case", "Hello", temperature=0.0)
+        assert provider.calls == 1
+        assert second.content == first.content
+
+        other = LLMGateway(CONFIG, cache=LLMResponseCache(str(tmp_path / "cache.db")))
+        other_provider = MockProvider("mock")
+        other.register_provider(other_provider)
+        await other.generate("test_case", "Hello", temperature=0.0)
+        assert other_provider.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_sampling_call_not_cached(self, tmp_path: Path) -> None:
+        """temperatureが高い呼び出しは毎回プロバイダーを呼ぶこと。"""
+        provider = MockProvider("mock")
+        gateway = LLMGateway(CONFIG, cache=LLMResponseCache(str(tmp_path / "cache.db")))
+        gateway.register_provider(provider)
+
+        for _ in range(2):
+            await gateway.generate("test_case", "Hello", temperature=0.7)
+        assert provider.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_errors_do_not_lose_response(self, tmp_path: Path) -> None:
+        """キャッシュの読み書きに失敗しても、プロバイダーの応答を返すこと。"""
+        provider = MockProvider("mock")
+        cache = LLMResponseCache(str(tmp_path / "cache.db"))
+        gateway = LLMGateway(CONFIG, cache=cache)
+        gateway.register_provider(provider)
+
+        locked = sqlite3.OperationalError("database is locked")
+        with patch.object(cache, "get", side_effect=locked), patch.object(cache, "put", side_effect=locked):
+            response = await gateway.generate("test_case", "Hello", temperature=0.0)
+        assert response.content
+        assert provider.calls == 1
+
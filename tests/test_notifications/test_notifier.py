@@ -1,7 +1,13 @@
 """通知システムのテスト。"""
 
+import smtplib
+import sys
+import threading
 from unittest.mock import MagicMock, patch
 
+import httpx
+from loguru import logger
+
 from src.notifications.notifier import NotificationConfig, Notifier
 
 
@@ -88,24 +94,22 @@ class TestNotifier:
 
     def test_slack_send_success(self) -> None:
         """Slack送信の成功ケース。"""
-        cfg = NotificationConfig(slack_webhook_url="https://hooks.slack.com/test")
+        cfg = NotificationConfig(slack_webhook_url="https://hooks.slack.com/test", sync=True)
         notifier = Notifier(cfg)
 
         mock_resp = MagicMock()
-        mock_resp.status = 200
-        mock_resp.__enter__ = MagicMock(return_value=mock_resp)
-        mock_resp.__exit__ = MagicMock(return_value=False)
+        mock_resp.status_code = 200
 
-        with patch("urllib.request.urlopen", return_value=mock_resp):
+        with patch("httpx.Client.post", return_value=mock_resp):
             result = notifier.send("テスト", "メッセージ", "INFO")
         assert result["slack"] is True
 
     def test_slack_send_failure(self) -> None:
         """Slack送信の失敗ケース。"""
-        cfg = NotificationConfig(slack_webhook_url="https://hooks.slack.com/test")
+        cfg = NotificationConfig(slack_webhook_url="https://hooks.slack.com/test", sync=True)
         notifier = Notifier(cfg)
 
-        with patch("urllib.request.urlopen", side_effect=Exception("network error")):
+        with patch("httpx.Client.post", side_effect=Exception("network error")):
             result = notifier.send("テスト", "メッセージ", "INFO")
         assert result["slack"] is False
 
@@ -117,3 +121,171 @@ class TestNotifier:
             data={"key": "value", "num": 123}
         )
         assert result["console"] is True
+
+    def test_console_text_built_only_when_level_enabled(self) -> None:
+        """シンクが受け付けないレベルではコンソール本文（data のJSON化）を組み立てないこと。"""
+        notifier = Notifier(NotificationConfig(min_level="DEBUG", dedup_ttl=0))
+        messages: list[str] = []
+        logger.remove()
+        handler_id = logger.add(messages.append, level="WARNING", format="{message}")
+        try:
+            with patch.object(Notifier, "_console_text", return_value="本文") as build:
+                notifier.send("テスト", "メッセージ", "INFO", data={"key": "value"})
+                build.assert_not_called()
+                notifier.send("テスト", "メッセージ", "WARNING", data={"key": "value"})
+                build.assert_called_once_with("テスト", "メッセージ", {"key": "value"})
+        finally:
+            logger.remove(handler_id)
+            logger.add(sys.stderr)
+        assert messages == ["本文\n"]
+
+    def test_async_send_returns_before_delivery(self) -> None:
+        """非同期送信ではsend()が送信完了を待たずに返り、flush()で完了すること。"""
+        cfg = NotificationConfig(slack_webhook_url="https://hooks.slack.com/test")
+        notifier = Notifier(cfg)
+        released = threading.Event()
+        delivered = []
+
+        def slow_slack(*args) -> bool:
+            released.wait(timeout=5)
+            delivered.append(args[0])
+            return True
+
+        with patch.object(notifier, "_send_slack", side_effect=slow_slack):
+            result = notifier.send("テスト", "メッセージ", "INFO")
+            assert result["slack"] is True
+            assert result["email"] is False  # 未設定チャネルは投入しない
+            assert delivered == []
+            released.set()
+            assert notifier.flush(timeout=5)
+        assert delivered == ["テスト"]
+        notifier.close()
+
+    def test_sync_override_waits_for_delivery(self) -> None:
+        """send(sync=True) は非同期設定でも呼び出しスレッドで送信し、送信成否を返すこと。"""
+        notifier = Notifier(NotificationConfig(slack_webhook_url="https://hooks.slack.com/test"))
+        with patch.object(notifier, "_send_slack", return_value=False) as mock_slack:
+            assert notifier.send("テスト", "メッセージ", "ERROR", sync=True)["slack"] is False
+        assert mock_slack.call_count == 1
+        assert notifier._executor is None
+
+    def test_async_send_retries_on_failure(self) -> None:
+        """非同期送信の失敗時に再試行すること。"""
+        cfg = NotificationConfig(
+            slack_webhook_url="https://hooks.slack.com/test", max_retries=2, retry_backoff=0.0,
+        )
+        notifier = Notifier(cfg)
+        with patch.object(notifier, "_send_slack", side_effect=[False, False, True]) as mock_slack:
+            notifier.send("テスト", "メッセージ", "INFO")
+            notifier.close()
+        assert mock_slack.call_count == 3
+
+    def test_duplicate_notification_suppressed(self) -> None:
+        """同一内容の通知はdedup_ttl内に再送されないこと。"""
+        notifier = Notifier()
+        assert notifier.send("テスト", "メッセージ", "INFO", {"race": 1})["console"] is True
+        assert notifier.send("テスト", "メッセージ", "INFO", {"race": 1})["console"] is False
+        assert notifier.send("テスト", "メッセージ", "INFO", {"race": 2})["console"] is True
+
+    def test_duplicate_allowed_after_ttl(self) -> None:
+        """dedup_ttl経過後、またはdedup_ttl=0の場合は再送されること。"""
+        notifier = Notifier(NotificationConfig(dedup_ttl=10.0))
+        with patch("src.notifications.notifier.time.monotonic", side_effect=[100.0, 111.0]):
+            assert notifier.send("テスト", "メッセージ")["console"] is True
+            assert notifier.send("テスト", "メッセージ")["console"] is True
+
+        notifier = Notifier(NotificationConfig(dedup_ttl=0))
+        assert notifier.send("テスト", "メッセージ")["console"] is True
+        assert notifier.send("テスト", "メッセージ")["console"] is True
+
+    def test_failed_delivery_not_deduplicated(self) -> None:
+        """送信に失敗した通知は重複扱いにせず、次回送信で再送されること。"""
+        cfg = NotificationConfig(slack_webhook_url="https://hooks.slack.com/test", sync=True)
+        notifier = Notifier(cfg)
+        with patch.object(notifier, "_send_slack", side_effect=[False, True, True]) as mock_slack:
+            assert notifier.send("テスト", "メッセージ")["slack"] is False
+            assert notifier.send("テスト", "メッセージ")["slack"] is True
+            assert notifier.send("テスト", "メッセージ")["slack"] is False  # 成功後は抑止
+        assert mock_slack.call_count == 2
+
+    def test_async_failed_delivery_not_deduplicated(self) -> None:
+        """バックグラウンド送信が再試行後も失敗した場合、重複記録を取り消すこと。"""
+        cfg = NotificationConfig(
+            slack_webhook_url="https://hooks.slack.com/test", max_retries=1, retry_backoff=0.0,
+        )
+        notifier = Notifier(cfg)
+        with patch.object(notifier, "_send_slack", side_effect=[False, False, True]) as mock_slack:
+            notifier.send("テスト", "メッセージ")
+            assert notifier.flush(timeout=5)
+            assert notifier.send("テスト", "メッセージ")["slack"] is True
+            notifier.close()
+        assert mock_slack.call_count == 3
+
+    def test_duplicate_check_thread_safe(self) -> None:
+        """複数スレッドから同一内容を同時に送信しても1回だけ送信されること。"""
+        notifier = Notifier()
+        barrier = threading.Barrier(8)
+        results = []
+
+        def worker() -> None:
+            barrier.wait()
+            results.append(notifier.send("テスト", "メッセージ")["console"])
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(results) == [False] * 7 + [True]
+
+    def test_slack_connection_reused(self) -> None:
+        """複数回のSlack送信で同一のHTTPクライアント（接続プール）を再利用すること。"""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200)
+
+        cfg = NotificationConfig(slack_webhook_url="https://hooks.slack.com/test", sync=True)
+        notifier = Notifier(cfg)
+        notifier._http = httpx.Client(transport=httpx.MockTransport(handler))
+        client = notifier._http_client()
+
+        assert notifier.send("テスト1", "メッセージ")["slack"] is True
+        assert notifier.send("テスト2", "メッセージ")["slack"] is True
+        assert notifier._http_client() is client
+        assert len(requests) == 2
+        assert b"\\u30c6\\u30b9\\u30c81" in requests[0].content
+        notifier.close()
+
+    def test_smtp_connection_reused(self) -> None:
+        """複数回のEmail送信でSMTP接続・ログインを再利用すること。"""
+        cfg = NotificationConfig(
+            smtp_host="smtp.example.com", smtp_user="user", smtp_password="pw",
+            email_to=["a@example.com", "b@example.com"], sync=True,
+        )
+        notifier = Notifier(cfg)
+        with patch("smtplib.SMTP") as mock_smtp:
+            server = mock_smtp.return_value
+            server.noop.return_value = (250, b"OK")
+            assert notifier.send("テスト1", "メッセージ")["email"] is True
+            assert notifier.send("テスト2", "メッセージ")["email"] is True
+            notifier.close()
+
+        mock_smtp.assert_called_once()
+        server.login.assert_called_once_with("user", "pw")
+        assert server.send_message.call_count == 2
+        assert server.send_message.call_args[0][0]["To"] == "a@example.com, b@example.com"
+        server.quit.assert_called_once()
+
+    def test_smtp_reconnects_after_disconnect(self) -> None:
+        """切断された接続はNOOPで検出して再接続すること。"""
+        cfg = NotificationConfig(smtp_host="smtp.example.com", email_to=["a@example.com"], sync=True)
+        notifier = Notifier(cfg)
+        with patch("smtplib.SMTP") as mock_smtp:
+            server = mock_smtp.return_value
+            server.noop.side_effect = smtplib.SMTPServerDisconnected("closed")
+            assert notifier.send("テスト1", "メッセージ")["email"] is True
+            assert notifier.send("テスト2", "メッセージ")["email"] is True
+
+        assert mock_smtp.call_count == 2
@@ -124,6 +124,22 @@ class TestTaxReportGenerator:
         assert len(report.top_payouts) == 2  # 的中2件
         assert report.top_payouts[0]["payout"] >= report.top_payouts[1]["payout"]
 
+    def test_top_payouts_limited_to_ten(self, ext_db: DatabaseManager) -> None:
+        """高額払戻は払戻額の降順で上位10件のみ、月次集計は全件を対象とすること。"""
+        with ext_db.connect() as conn:
+            conn.executemany(
+                """INSERT INTO bets (race_key, bet_type, selection, stake_yen,
+                       status, result, payout_yen, settled_at)
+                   VALUES (?, 'WIN', '01', 100, 'SETTLED', 'WIN', ?, ?)""",
+                [(f"X{i:02d}", 1000 + i * 100, f"2025-07-{i + 1:02d}T10:00:00") for i in range(12)],
+            )
+        report = TaxReportGenerator(ext_db).generate(2025)
+        assert [p["payout"] for p in report.top_payouts] == [6000, 5000] + [2100 - i * 100 for i in range(8)]
+        assert report.top_payouts[2]["date"] == "2025-07-12"
+        assert report.monthly_breakdown[-1].n_bets == 12
+        assert report.n_bets == 15
+        assert report.total_payout == 11000 + sum(1000 + i * 100 for i in range(12))
+
     def test_empty_year(self, ext_db: DatabaseManager) -> None:
         """データのない年で空レポート。"""
         gen = TaxReportGenerator(ext_db)
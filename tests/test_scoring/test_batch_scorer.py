@@ -1,9 +1,11 @@
 """BatchScorerのテスト。"""
 
+import numpy as np
 import pytest
 
 from src.data.db import DatabaseManager
-from src.scoring.batch_scorer import BatchScorer
+from src.scoring.batch_scorer import BatchScorer, PrevRecord
+from src.scoring.evaluator import build_eval_context
 
 
 def _setup_dbs(tmp_path):
@@ -167,6 +169,115 @@ class TestBatchScorer:
         assert len(matrix["scores"]) == 12
         assert len(matrix["factor_names"]) == 2
 
+    def test_parallel_matches_sequential(self, dbs, monkeypatch) -> None:
+        """プロセス並列評価の結果が逐次評価と一致すること。"""
+        jvlink_db, ext_db = dbs
+        sequential = BatchScorer(jvlink_db, ext_db).build_factor_matrix()
+        monkeypatch.setattr(BatchScorer, "PARALLEL_MIN_RACES", 0)
+        parallel = BatchScorer(jvlink_db, ext_db, n_jobs=2).build_factor_matrix()
+
+        np.testing.assert_array_equal(parallel["X"], sequential["X"])
+        np.testing.assert_array_equal(parallel["scores"], sequential["scores"])
+        assert parallel["race_keys"] == sequential["race_keys"]
+
+    def test_cudf_backend_falls_back_to_numpy(self, dbs) -> None:
+        """cudf未導入環境でbackend="cudf"を指定してもNumPy評価で同じ結果を返すこと。"""
+        from src.factors.rules import gy_factors_gpu
+
+        if gy_factors_gpu.is_available():
+            pytest.skip("cudfが導入済みの環境")
+        jvlink_db, ext_db = dbs
+        scorer = BatchScorer(jvlink_db, ext_db, backend="cudf")
+        assert scorer._backend == "numpy"
+        np.testing.assert_array_equal(
+            scorer.build_factor_matrix()["X"], BatchScorer(jvlink_db, ext_db).build_factor_matrix()["X"],
+        )
+        with pytest.raises(ValueError, match="backend"):
+            BatchScorer(jvlink_db, ext_db, backend="opencl")
+
+    def test_gpu_path_concatenates_races(self, dbs, monkeypatch) -> None:
+        """GPU一括評価で連結・分割したファクター行列が、レース単位の評価と一致すること。"""
+        from src.factors.rules import gy_factors_gpu
+        from src.scoring.evaluator import evaluate_rules_vectorized
+
+        calls: list[int] = []
+
+        def evaluate_on_host(expressions, columns, n_rows):
+            calls.append(n_rows)
+            return evaluate_rules_vectorized(list(expressions), columns, n_rows)
+
+        jvlink_db, ext_db = dbs
+        expected = BatchScorer(jvlink_db, ext_db).build_factor_matrix()
+        monkeypatch.setattr(gy_factors_gpu, "is_available", lambda: True)
+        monkeypatch.setattr(gy_factors_gpu, "evaluate_rules_gpu", evaluate_on_host)
+        result = BatchScorer(jvlink_db, ext_db, backend="cudf").build_factor_matrix()
+
+        assert len(calls) == 1
+        np.testing.assert_array_equal(result["X"], expected["X"])
+        np.testing.assert_array_equal(result["scores"], expected["scores"])
+
+    def test_compiled_rules_reused_across_calls(self, dbs, monkeypatch) -> None:
+        """レース種別ごとのコンパイル結果がインスタンスに保持され、再呼び出しで再利用されること。"""
+        import src.scoring.batch_scorer as batch_scorer_module
+
+        calls: list[tuple[str, ...]] = []
+        original = batch_scorer_module.compile_rule_set
+
+        def counting(expressions: tuple[str, ...]):
+            calls.append(expressions)
+            return original(expressions)
+
+        monkeypatch.setattr(batch_scorer_module, "compile_rule_set", counting)
+        jvlink_db, ext_db = dbs
+        scorer = BatchScorer(jvlink_db, ext_db)
+        first = scorer.build_factor_matrix()
+        n_compiled = len(calls)
+        second = scorer.build_factor_matrix()
+
+        assert n_compiled == len(scorer._compiled_rules) > 0
+        assert len(calls) == n_compiled
+        np.testing.assert_array_equal(first["X"], second["X"])
+
+    def test_worker_chunk_shares_compiled_rules(self, dbs, monkeypatch) -> None:
+        """並列ワーカーのチャンク内でレース種別ごとのコンパイル結果を共有すること。"""
+        import src.scoring.batch_scorer as batch_scorer_module
+
+        captured: list = []
+        original_evaluate = BatchScorer._evaluate_races
+
+        def capture(self, tasks, expressions):
+            captured.append((list(tasks), expressions))
+            return original_evaluate(self, tasks, expressions)
+
+        monkeypatch.setattr(BatchScorer, "_evaluate_races", capture)
+        jvlink_db, ext_db = dbs
+        scorer = BatchScorer(jvlink_db, ext_db)
+        scorer.build_factor_matrix()
+        tasks, expressions = captured[0]
+
+        calls: list[tuple[str, ...]] = []
+        original_compile = batch_scorer_module.compile_rule_set
+
+        def counting(exprs: tuple[str, ...]):
+            calls.append(exprs)
+            return original_compile(exprs)
+
+        monkeypatch.setattr(batch_scorer_module, "compile_rule_set", counting)
+        results = batch_scorer_module._score_race_chunk(tasks, expressions)
+
+        assert len(results) == len(tasks)
+        assert len(calls) == len(scorer._compiled_rules) < len(tasks)
+
+    def test_build_factor_matrix_dtypes(self, dbs) -> None:
+        """数値配列がFP32/int32で返ること。"""
+        jvlink_db, ext_db = dbs
+        matrix = BatchScorer(jvlink_db, ext_db).build_factor_matrix()
+
+        for key in ("X", "scores", "odds"):
+            assert matrix[key].dtype == np.float32
+        for key in ("y", "jyuni", "distances"):
+            assert matrix[key].dtype == np.int32
+
     def test_build_factor_matrix_date_filter(self, dbs) -> None:
         """範囲外の日付でValueError。"""
         jvlink_db, ext_db = dbs
@@ -197,6 +308,7 @@ class TestBatchScorer:
         # BASE_SCORE=100ベースのスコア
         for score in matrix["scores"]:
             assert score != 0  # 何かしらのスコアが付いている
+        np.testing.assert_allclose(matrix["scores"], 100 + matrix["X"] @ np.array([1.5, 1.0]))
 
     def test_jyuni_values(self, dbs) -> None:
         """確定着順が正しく取得されること。"""
@@ -240,3 +352,33 @@ class TestBatchScorer:
 
         # Day1 R1では全馬が初出走（キャッシュ空）→ prev_jyuni=0 → ファクター=0
         assert all(v == 0.0 for v in day1_r1_factor_values)
+
+    def test_to_int_array(self) -> None:
+        """着順の一括変換で、変換不能値・欠損値が0になること。"""
+        values = ["01", "3", None, "", "x", 5, 2.0]
+        assert BatchScorer._to_int_array(values).tolist() == [1, 3, 0, 0, 0, 5, 2]
+
+    def test_to_int_array_matches_safe_int(self) -> None:
+        """着順の一括変換が _safe_int() と同じ値を返すこと（小数・指数表記は0、全角数字は数値）。"""
+        values = ["1.5", "1e1", "１", " 2 ", "-3", "10.0"]
+        expected = [BatchScorer._safe_int(v) for v in values]
+        assert expected == [0, 0, 1, 2, -3, 0]
+        assert BatchScorer._to_int_array(values).tolist() == expected
+
+
+class TestPrevRecord:
+    """前走キャッシュ（PrevRecord）のテスト。"""
+
+    def test_as_context_matches_full_prev_dict(self) -> None:
+        """PrevRecordから復元したprev_contextが出走馬dictと同じ評価コンテキストを与えること。"""
+        prev_horse = {"KakuteiJyuni": "2", "HaronTimeL3": "345", "KyakusituKubun": "3", "Jyuni4c": "5",
+                      "Umaban": "07", "BaTaijyu": "470"}
+        record = PrevRecord(jyuni=2, last_3f=345.0, running_style=3, corner4_pos=5)
+        horse = {"Umaban": "01", "Ninki": "1"}
+        race = {"Kyori": "1600", "TrackCD": "11"}
+
+        expected = build_eval_context(horse, race, [horse], prev_context=prev_horse, all_prev_l3f=[345.0])
+        actual = build_eval_context(horse, race, [horse], prev_context=record.as_context(), all_prev_l3f=[345.0])
+        assert {k: v for k, v in actual.items() if k.startswith("prev_")} == {
+            k: v for k, v in expected.items() if k.startswith("prev_")
+        }
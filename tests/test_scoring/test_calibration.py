@@ -7,6 +7,10 @@ from src.scoring.calibration import (
     IsotonicCalibrator,
     PlattCalibrator,
     ProbabilityCalibrator,
+    _pav_loop,
+    _pav_sklearn,
+    _platt_sums_loop,
+    _platt_sums_numpy,
 )
 
 
@@ -56,6 +60,58 @@ class TestPlattCalibrator:
         assert 0.0 <= calibrator.predict_proba(-1000.0) <= 1.0
         assert 0.0 <= calibrator.predict_proba(1000.0) <= 1.0
 
+    def test_predict_proba_batch_matches_scalar(self) -> None:
+        """predict_proba_batchがpredict_probaの要素ごとの結果と一致すること。"""
+        calibrator = PlattCalibrator()
+        calibrator.fit(np.array([10.0, 90.0, 20.0, 80.0]), np.array([0, 1, 0, 1]))
+
+        grid = np.array([-1000.0, 0.0, 35.0, 50.0, 65.0, 1000.0])
+        batch = calibrator.predict_proba_batch(grid)
+        expected = [calibrator.predict_proba(float(s)) for s in grid]
+        np.testing.assert_allclose(batch, expected)
+
+    def test_fit_matches_weighted_logistic_regression(self) -> None:
+        """Newton法の解が平滑化ターゲットでの無正則化ロジスティック回帰と一致すること。"""
+        from sklearn.linear_model import LogisticRegression
+
+        rng = np.random.default_rng(0)
+        scores = rng.normal(100.0, 10.0, 400)
+        labels = (rng.random(400) < 1.0 / (1.0 + np.exp(-(scores - 105.0) / 5.0))).astype(np.int64)
+        calibrator = PlattCalibrator()
+        calibrator.fit(scores, labels)
+
+        n_pos = labels.sum()
+        n_neg = len(labels) - n_pos
+        target = np.where(labels == 1, (n_pos + 1) / (n_pos + 2), 1 / (n_neg + 2))
+        x = np.concatenate([scores, scores]).reshape(-1, 1)
+        y = np.concatenate([np.ones(400), np.zeros(400)])
+        ref = LogisticRegression(C=1e12, tol=1e-12, max_iter=10000)
+        ref.fit(x, y, sample_weight=np.concatenate([target, 1 - target]))
+
+        assert calibrator._a == pytest.approx(ref.coef_[0][0], rel=1e-4)
+        assert calibrator._b == pytest.approx(ref.intercept_[0], rel=1e-4)
+
+    def test_newton_sums_loop_matches_numpy(self) -> None:
+        """JIT用ループ版の勾配・ヘッセ集計がNumPy版と一致すること（極端なlogitを含む）。"""
+        rng = np.random.default_rng(1)
+        x = rng.normal(100.0, 30.0, 50)
+        y = rng.random(50)
+        for a, b in [(0.0, 0.0), (0.05, -5.0), (10.0, -1000.0)]:
+            np.testing.assert_allclose(_platt_sums_loop(x, y, a, b), _platt_sums_numpy(x, y, a, b), atol=1e-12)
+
+    def test_fit_separable_data_stays_finite(self) -> None:
+        """完全分離データでもパラメータが発散しないこと。"""
+        calibrator = PlattCalibrator()
+        calibrator.fit(np.array([10.0, 20.0, 80.0, 90.0]), np.array([0, 0, 1, 1]))
+
+        assert np.isfinite(calibrator._a) and np.isfinite(calibrator._b)
+        assert 0.0 < calibrator.predict_proba(0.0) < calibrator.predict_proba(100.0) < 1.0
+
+    def test_predict_proba_batch_before_fit_raises(self) -> None:
+        """fit前のpredict_proba_batchがRuntimeErrorを発生させること。"""
+        with pytest.raises(RuntimeError, match="未訓練"):
+            PlattCalibrator().predict_proba_batch(np.array([1.0]))
+
     def test_is_fitted_flag(self) -> None:
         """fit後にis_fittedフラグがTrueになること。"""
         calibrator = PlattCalibrator()
@@ -111,6 +167,50 @@ class TestIsotonicCalibrator:
         for i in range(len(probs) - 1):
             assert probs[i] <= probs[i + 1]
 
+    def test_predict_proba_batch_matches_scalar(self) -> None:
+        """predict_proba_batchがpredict_probaの要素ごとの結果と一致すること。"""
+        calibrator = IsotonicCalibrator()
+        scores = np.array([10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0, 90.0, 100.0])
+        labels = np.array([0, 0, 0, 1, 0, 1, 0, 1, 1, 1])
+        calibrator.fit(scores, labels)
+
+        grid = np.array([0.0, 25.0, 55.0, 85.0, 200.0])
+        batch = calibrator.predict_proba_batch(grid)
+        assert batch.dtype == np.float64
+        np.testing.assert_allclose(batch, [calibrator.predict_proba(float(s)) for s in grid])
+
+    def test_matches_sklearn_isotonic_regression(self) -> None:
+        """同一スコア（タイ）を含むデータでsklearnのIsotonicRegressionと同じ予測になること。"""
+        from sklearn.isotonic import IsotonicRegression
+
+        rng = np.random.default_rng(2)
+        scores = np.round(rng.normal(100.0, 15.0, 500))
+        labels = (rng.random(500) < 1.0 / (1.0 + np.exp(-(scores - 100.0) / 10.0))).astype(np.int64)
+        calibrator = IsotonicCalibrator()
+        calibrator.fit(scores, labels)
+        ref = IsotonicRegression(out_of_bounds="clip").fit(scores, labels)
+
+        grid = np.linspace(40.0, 160.0, 241)
+        np.testing.assert_allclose(calibrator.predict_proba_batch(grid), ref.predict(grid), atol=1e-12)
+
+    def test_pav_loop_matches_sklearn(self) -> None:
+        """JIT用ループ版PAVがsklearnのPAVと一致すること。"""
+        rng = np.random.default_rng(3)
+        y = rng.random(200)
+        w = rng.integers(1, 5, 200).astype(np.float64)
+        np.testing.assert_allclose(_pav_loop(y, w), _pav_sklearn(y, w), atol=1e-12)
+
+    def test_load_legacy_pickle_state(self) -> None:
+        """sklearnモデルを保持していた旧形式の状態から復元できること。"""
+        from sklearn.isotonic import IsotonicRegression
+
+        model = IsotonicRegression(out_of_bounds="clip").fit([10.0, 20.0, 30.0], [0, 1, 1])
+        restored = IsotonicCalibrator.__new__(IsotonicCalibrator)
+        restored.__setstate__({"_model": model, "_is_fitted": True})
+
+        assert restored.predict_proba(15.0) == pytest.approx(float(model.predict([15.0])[0]))
+        assert restored.predict_proba(100.0) == pytest.approx(1.0)
+
     def test_is_fitted_flag(self) -> None:
         """fit後にis_fittedフラグがTrueになること。"""
         calibrator = IsotonicCalibrator()
@@ -128,3 +228,33 @@ class TestProbabilityCalibrator:
         """抽象クラスを直接インスタンス化できないこと。"""
         with pytest.raises(TypeError):
             ProbabilityCalibrator()  # type: ignore[abstract]
+
+    def test_save_load_roundtrip(self, tmp_path) -> None:
+        """圧縮保存したモデルを読み込んで同じ予測が得られること。"""
+        calibrator = IsotonicCalibrator()
+        scores = np.linspace(50.0, 150.0, 200)
+        calibrator.fit(scores, (scores > 100.0).astype(np.int64))
+        path = tmp_path / "models" / "calibrator.joblib"
+        calibrator.save(path)
+
+        loaded = ProbabilityCalibrator.load(path)
+        assert isinstance(loaded, IsotonicCalibrator)
+        np.testing.assert_array_equal(loaded.predict_proba_batch(scores), calibrator.predict_proba_batch(scores))
+
+    def test_load_missing_file_raises(self, tmp_path) -> None:
+        """存在しないファイルの読込でFileNotFoundErrorとなること。"""
+        with pytest.raises(FileNotFoundError):
+            ProbabilityCalibrator.load(tmp_path / "missing.joblib")
+
+    def test_predict_proba_batch_default_loops_scalar(self) -> None:
+        """既定のpredict_proba_batchがpredict_probaを要素ごとに呼ぶこと。"""
+
+        class _Half(ProbabilityCalibrator):
+            def fit(self, scores: np.ndarray, labels: np.ndarray) -> None:
+                pass
+
+            def predict_proba(self, score: float) -> float:
+                return score / 2
+
+        result = _Half().predict_proba_batch(np.array([1.0, 4.0]))
+        np.testing.assert_allclose(result, [0.5, 2.0])
@@ -76,6 +76,54 @@ class TestCalibrationTrainer:
         assert len(labels) == len(scores)
         assert set(np.unique(labels)).issubset({0, 1})
 
+    def test_build_training_data_chunked_fetch(self, dbs, monkeypatch) -> None:
+        """fetchmanyのチャンクを小さくしても同じ訓練データになること。"""
+        jvlink_db, ext_db = dbs
+        trainer = CalibrationTrainer(jvlink_db, ext_db)
+        expected_scores, expected_labels = trainer.build_training_data(target_jyuni=3, min_samples=10)
+
+        monkeypatch.setattr(CalibrationTrainer, "SCORE_FETCH_CHUNK", 7)
+        scores, labels = trainer.build_training_data(target_jyuni=3, min_samples=10)
+        np.testing.assert_array_equal(scores, expected_scores)
+        np.testing.assert_array_equal(labels, expected_labels)
+
+    def test_build_training_data_from_batch_passes_n_jobs(self, dbs, monkeypatch) -> None:
+        """n_jobsがBatchScorerへ引き渡されること。"""
+        import src.scoring.batch_scorer as batch_scorer_module
+
+        created: list[int] = []
+
+        class FakeBatchScorer:
+            def __init__(self, jvlink_db, ext_db, n_jobs: int = 1) -> None:
+                created.append(n_jobs)
+
+            def build_factor_matrix(self, *args, **kwargs):
+                return {
+                    "scores": np.linspace(40, 60, 20, dtype=np.float32),
+                    "jyuni": np.tile(np.arange(1, 5, dtype=np.int32), 5),
+                }
+
+        monkeypatch.setattr(batch_scorer_module, "BatchScorer", FakeBatchScorer)
+        jvlink_db, ext_db = dbs
+        trainer = CalibrationTrainer(jvlink_db, ext_db, n_jobs=-1)
+        scores, labels = trainer.build_training_data_from_batch(min_samples=10)
+
+        assert created == [-1]
+        assert len(scores) == 20
+        assert int(labels.sum()) == 5
+
+    def test_batch_get_kakutei_jyuni_only_requested_races(self, dbs, monkeypatch) -> None:
+        """指定レースの着順のみを、チャンク分割しても漏れなく取得すること。"""
+        jvlink_db, ext_db = dbs
+        trainer = CalibrationTrainer(jvlink_db, ext_db)
+        monkeypatch.setattr(CalibrationTrainer, "KAKUTEI_QUERY_CHUNK", 1)
+
+        result = trainer._batch_get_kakutei_jyuni({"2025010506010101", "2025010506010103", "short"})
+
+        assert {rk for rk, _ in result} == {"2025010506010101", "2025010506010103"}
+        assert len(result) == 24
+        assert result[("2025010506010103", "05")] == 5
+
     def test_build_training_data_insufficient(self, tmp_path) -> None:
         """サンプル不足時のエラー。"""
         jvlink_db = DatabaseManager(str(tmp_path / "jv.db"), wal_mode=False)
@@ -128,6 +176,29 @@ class TestCalibrationTrainer:
         assert 0.0 <= metrics["calibration_error"] <= 1.0
         assert metrics["total_samples"] > 0
 
+    def test_evaluate_calibration_bins(self, dbs) -> None:
+        """ビン集計がビンごとのマスク集計と一致し、ECEが件数加重の乖離和になること。"""
+        jvlink_db, ext_db = dbs
+        trainer = CalibrationTrainer(jvlink_db, ext_db)
+        calibrator = trainer.train(method="isotonic", target_jyuni=3, min_samples=10)
+        metrics = trainer.evaluate_calibration(calibrator, target_jyuni=3, n_bins=5)
+
+        scores, labels = trainer.build_training_data(3, min_samples=10)
+        probs = calibrator.predict_proba_batch(scores)
+        edges = np.linspace(0, 1, 6)
+        expected = []
+        for lo, hi in zip(edges[:-1], edges[1:], strict=True):
+            mask = (probs >= lo) & (probs < hi)
+            if mask.any():
+                expected.append((int(mask.sum()), float(probs[mask].mean()), float(labels[mask].mean())))
+
+        details = metrics["bin_details"]
+        assert [d["count"] for d in details] == [c for c, _, _ in expected]
+        np.testing.assert_allclose([d["predicted_prob"] for d in details], [p for _, p, _ in expected])
+        np.testing.assert_allclose([d["actual_rate"] for d in details], [a for _, _, a in expected])
+        ece = sum(abs(p - a) * c for c, p, a in expected) / len(labels)
+        assert metrics["calibration_error"] == pytest.approx(ece)
+
     def test_no_horse_scores_table(self, tmp_path) -> None:
         """horse_scoresテーブルなしでエラー。"""
         jvlink_db = DatabaseManager(str(tmp_path / "jv.db"), wal_mode=False)
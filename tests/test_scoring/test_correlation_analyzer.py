@@ -1,5 +1,6 @@
 """CorrelationAnalyzerのテスト。"""
 
+import numpy as np
 import pytest
 
 from src.data.db import DatabaseManager
@@ -139,6 +140,25 @@ class TestCorrelationAnalyzer:
         result = analyzer.analyze_correlations()
         assert isinstance(result["redundant_pairs"], list)
 
+    def test_redundant_pairs_match_matrix(self, dbs) -> None:
+        """冗長ペアが相関行列の上三角と一致し、|r|降順であること。"""
+        jvlink_db, ext_db = dbs
+        analyzer = CorrelationAnalyzer(jvlink_db, ext_db)
+        result = analyzer.analyze_correlations()
+        names = result["factor_names"]
+        matrix = result["correlation_matrix"]
+
+        expected = {
+            (names[i], names[j])
+            for i in range(len(names))
+            for j in range(i + 1, len(names))
+            if abs(matrix[i][j]) > 0.7
+        }
+        pairs = result["redundant_pairs"]
+        assert {(p["factor_a"], p["factor_b"]) for p in pairs} == expected
+        abs_r = [abs(p["correlation"]) for p in pairs]
+        assert abs_r == sorted(abs_r, reverse=True)
+
     def test_sensitivity_analysis(self, dbs) -> None:
         """感度分析が正常に実行されること。"""
         jvlink_db, ext_db = dbs
@@ -164,3 +184,18 @@ class TestCorrelationAnalyzer:
 
         assert len(result["deltas"]) == 2
         assert len(result["sensitivity_matrix"][0]) == 2
+
+    def test_sensitivity_matches_elementwise(self, dbs) -> None:
+        """感度マトリクスが要素ごとの平均絶対変化量と一致すること。"""
+        jvlink_db, ext_db = dbs
+        analyzer = CorrelationAnalyzer(jvlink_db, ext_db)
+        deltas = [-0.5, 0.25]
+        result = analyzer.sensitivity_analysis(weight_deltas=deltas)
+        X = analyzer._batch_scorer.build_factor_matrix()["X"]
+        weights = {"DM予想上位": 1.5, "前走上位着順減点": 1.0}
+
+        for i, name in enumerate(result["factor_names"]):
+            w = weights[name]
+            for j, delta in enumerate(deltas):
+                expected = float(np.mean(np.abs(X[:, i] * (w * delta))))
+                assert result["sensitivity_matrix"][i][j] == pytest.approx(expected, abs=1e-3)
@@ -1,5 +1,7 @@
 """スコアリングエンジンの単体テスト。"""
 
+from unittest.mock import MagicMock, patch
+
 import pytest
 
 from src.data.db import DatabaseManager
@@ -66,6 +68,48 @@ class TestScoringEngine:
         )
         assert result_no_prev["total_score"] == 100.0
 
+    def test_score_horse_builds_context_once(self, initialized_db: DatabaseManager) -> None:
+        """ルール数によらず評価コンテキストは馬ごとに1回だけ構築されること。"""
+        import src.scoring.engine as engine_module
+
+        engine = ScoringEngine(initialized_db)
+        rules = [
+            {"rule_name": f"r{i}", "sql_expression": f"1 if Umaban == {i} else 0", "weight": 1.0}
+            for i in range(5)
+        ]
+        with patch.object(engine_module, "build_eval_context", wraps=engine_module.build_eval_context) as build:
+            result = engine.score_horse(
+                horse={"Umaban": "03"}, race={}, all_entries=[{"Umaban": "03"}], rules=rules,
+            )
+        build.assert_called_once()
+        assert result["total_score"] == 101.0
+
+    def test_score_race_fetches_prev_entries_once(self, initialized_db: DatabaseManager) -> None:
+        """前走データを1レース分まとめて1回だけ取得し、各馬に割り当てること。"""
+        from src.factors.registry import FactorRegistry
+
+        registry = FactorRegistry(initialized_db)
+        rule_id = registry.create_rule({
+            "rule_name": "前走1着", "sql_expression": "1 if prev_jyuni == 1 else 0", "weight": 1.0,
+        })
+        registry.transition_status(rule_id, "TESTING", reason="テスト")
+        registry.transition_status(rule_id, "APPROVED", reason="承認")
+
+        provider = MagicMock()
+        provider.get_previous_race_entries.return_value = {"0001": {"KakuteiJyuni": "1", "HaronTimeL3": "340"}}
+        engine = ScoringEngine(initialized_db, jvlink_provider=provider)
+        results = engine.score_race(
+            race={"Kyori": "1600", "TrackCD": "10"},
+            entries=[{"Umaban": "01", "KettoNum": "0001"}, {"Umaban": "02", "KettoNum": "0002"}],
+            odds_map={"01": 5.0, "02": 5.0},
+            race_key="2025010506010203",
+        )
+
+        provider.get_previous_race_entries.assert_called_once_with(["0001", "0002"], "2025010506010203")
+        provider.get_previous_race_entry.assert_not_called()
+        scores = {r["umaban"]: r["total_score"] for r in results}
+        assert scores == {"01": 101.0, "02": 100.0}
+
     def test_score_race_backward_compatible(self, initialized_db: DatabaseManager) -> None:
         """jvlink_providerなしでscore_raceが従来通り動作すること。"""
         engine = ScoringEngine(initialized_db)
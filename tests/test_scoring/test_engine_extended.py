@@ -1,10 +1,12 @@
 """ScoringEngineの拡張テスト（score_race、校正モデル連携）。"""
 
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 from src.data.db import DatabaseManager
+from src.factors.base import RuleSet
 from src.scoring.engine import ScoringEngine
 
 
@@ -45,6 +47,107 @@ class TestScoringEngineExtended:
         evs = [r["expected_value"] for r in results]
         assert evs == sorted(evs, reverse=True)
 
+    def test_score_race_ties_keep_entry_order(self, scoring_db: DatabaseManager) -> None:
+        """EVが同値の馬は出走順のまま並ぶこと。"""
+        engine = ScoringEngine(scoring_db)
+        entries = [{"Umaban": u} for u in ("03", "01", "02", "04")]
+        odds_map = {"01": 4.0, "02": 4.0, "03": 4.0, "04": 8.0}
+
+        results = engine.score_race({"RaceName": "テスト"}, entries, odds_map)
+        assert [r["umaban"] for r in results] == ["04", "03", "01", "02"]
+
+    @pytest.mark.parametrize("top_k", [0, 2, 10])
+    def test_score_race_top_k(self, scoring_db: DatabaseManager, top_k: int) -> None:
+        """top_k指定時はEV上位k頭（全馬ソート結果の先頭）のみ返すこと。"""
+        engine = ScoringEngine(scoring_db)
+        entries = [{"Umaban": f"{i:02d}"} for i in range(1, 6)]
+        odds_map = {"01": 3.0, "02": 9.0, "03": 0.0, "04": 6.0, "05": 9.0}
+
+        full = engine.score_race({"RaceName": "テスト"}, entries, odds_map)
+        assert engine.score_race({"RaceName": "テスト"}, entries, odds_map, top_k=top_k) == full[:top_k]
+
+    def test_iter_score_race_matches_score_race(self, scoring_db: DatabaseManager) -> None:
+        """ジェネレータ版がscore_raceと同じ順序・内容のScoreResultを返すこと。"""
+        from src.scoring.engine import ScoreResult
+
+        engine = ScoringEngine(scoring_db)
+        entries = [{"Umaban": f"{i:02d}"} for i in range(1, 5)]
+        odds_map = {"01": 3.0, "02": 0.0, "03": 8.0, "04": 12.0}
+
+        expected = engine.score_race({"RaceName": "テスト"}, entries, odds_map)
+        results = list(engine.iter_score_race({"RaceName": "テスト"}, entries, odds_map))
+        assert all(isinstance(r, ScoreResult) for r in results)
+        assert [r.to_dict() for r in results] == expected
+        # ルール名のタプルは全馬で共有される
+        assert results[0].factor_names is results[-1].factor_names
+        assert results[0].factor_details == {"test_speed": pytest.approx(results[0].factor_values[0])}
+
+    @pytest.mark.parametrize("n_jobs", [1, 2])
+    def test_score_many_matches_score_race(
+        self, scoring_db: DatabaseManager, monkeypatch: pytest.MonkeyPatch, n_jobs: int,
+    ) -> None:
+        """score_manyが逐次・並列ともに入力順でscore_raceと同じ結果を返すこと。"""
+        monkeypatch.setattr(ScoringEngine, "PARALLEL_MIN_RACES", 0)
+        monkeypatch.setattr(ScoringEngine, "PARALLEL_CHUNK_SIZE", 2)
+        engine = ScoringEngine(scoring_db)
+        races = [
+            ({"RaceName": f"R{n}"}, [{"Umaban": f"{i:02d}"} for i in range(1, n + 2)],
+             {f"{i:02d}": float(i + n) for i in range(1, n + 2)}, "")
+            for n in range(5)
+        ]
+
+        expected = [engine.score_race(race, entries, odds_map) for race, entries, odds_map, _ in races]
+        assert list(engine.score_many(races, n_jobs=n_jobs)) == expected
+
+    def test_score_many_pickles_engine_once(
+        self, scoring_db: DatabaseManager, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """並列時はエンジンをチャンクごとではなく1回だけpickleし、レースごとの時点日を反映すること。"""
+        monkeypatch.setattr(ScoringEngine, "PARALLEL_MIN_RACES", 0)
+        monkeypatch.setattr(ScoringEngine, "PARALLEL_CHUNK_SIZE", 1)
+        scoring_db.execute_write("UPDATE factor_rules SET training_to = '2025-12-31'")
+        engine = ScoringEngine(scoring_db)
+        races = [
+            ({"RaceName": f"R{n}"}, [{"Umaban": "01"}, {"Umaban": "02"}], {"01": 3.0, "02": float(n + 4)}, "")
+            for n in range(6)
+        ]
+        dates = ["2025-06-01", "2026-06-01"] * 3
+        expected = [
+            engine.score_race(race, entries, odds_map, as_of_date=date)
+            for (race, entries, odds_map, _), date in zip(races, dates, strict=True)
+        ]
+        # 時点日より後まで訓練されたルールは除外される
+        assert [r["factor_details"] for r in expected[0]] == [{}, {}]
+        assert all("test_speed" in r["factor_details"] for r in expected[1])
+
+        pickled = 0
+        getstate = ScoringEngine.__getstate__
+
+        def counting_getstate(self: ScoringEngine) -> dict:
+            nonlocal pickled
+            pickled += 1
+            return getstate(self)
+
+        monkeypatch.setattr(ScoringEngine, "__getstate__", counting_getstate)
+        assert list(engine.score_many(races, n_jobs=2, as_of_dates=dates)) == expected
+        assert pickled == 1
+
+        with pytest.raises(ValueError, match="as_of_dates"):
+            list(engine.score_many(races, as_of_dates=dates[:2]))
+
+    def test_engine_picklable_after_scoring(self, scoring_db: DatabaseManager) -> None:
+        """スコアリング後（融合スコアラー保持中）もエンジンをpickleできること。"""
+        import pickle
+
+        engine = ScoringEngine(scoring_db)
+        entries = [{"Umaban": "01"}, {"Umaban": "02"}]
+        odds_map = {"01": 3.0, "02": 6.0}
+        expected = engine.score_race({"RaceName": "テスト"}, entries, odds_map)
+
+        with scoring_db.session():
+            restored = pickle.loads(pickle.dumps(engine))
+        assert restored.score_race({"RaceName": "テスト"}, entries, odds_map) == expected
+
     def test_score_race_skips_zero_odds(self, scoring_db: DatabaseManager) -> None:
         """オッズが0の馬はスキップされること。"""
         engine = ScoringEngine(scoring_db)
@@ -72,6 +175,37 @@ class TestScoringEngineExtended:
         results = engine.score_race(race, entries, odds_map)
         assert len(results) == 1
 
+    def test_score_race_matches_score_horse(self, initialized_db: DatabaseManager) -> None:
+        """列単位評価のscore_raceがscore_horseの行単位評価と一致すること。"""
+        from src.factors.registry import FactorRegistry
+
+        registry = FactorRegistry(initialized_db)
+        for name, expr, weight in [
+            ("内枠", "1 if is_inner_gate else 0", 1.5),
+            ("人気薄", "0.5 if Ninki >= 3 else 0", 0.8),
+            ("天候", "1 if TenkoCD >= 2 else 0", 1.0),
+        ]:
+            rule_id = registry.create_rule({"rule_name": name, "sql_expression": expr, "weight": weight})
+            registry.transition_status(rule_id, "TESTING", reason="テスト")
+            registry.transition_status(rule_id, "APPROVED", reason="承認")
+
+        engine = ScoringEngine(initialized_db)
+        race = {"Kyori": "1200", "TrackCD": "10", "TenkoCD": "2"}
+        entries = [{"Umaban": f"{i:02d}", "Ninki": str(i)} for i in range(1, 7)]
+        results = engine.score_race(race, entries, {f"{i:02d}": 5.0 for i in range(1, 7)})
+
+        rules = registry.get_active_rules()
+        rule_set = RuleSet.from_rules(rules)
+        for r in results:
+            horse = next(e for e in entries if e["Umaban"] == r["umaban"])
+            expected = engine.score_horse(horse, race, entries, rules)
+            assert r["total_score"] == pytest.approx(expected["total_score"])
+            assert r["factor_details"] == pytest.approx(expected["factor_details"])
+            # 事前変換したRuleSetを渡しても同じ結果になる
+            assert engine.score_horse(horse, race, entries, rule_set) == expected
+            # 合計スコアはベーススコアとファクター内訳の和に一致する
+            assert r["total_score"] == pytest.approx(engine.BASE_SCORE + sum(r["factor_details"].values()))
+
     def test_score_horse_with_rules(self, scoring_db: DatabaseManager) -> None:
         """ルール適用時にファクター詳細が含まれること。"""
         engine = ScoringEngine(scoring_db)
@@ -99,6 +233,28 @@ class TestScoringEngineExtended:
         assert ev_result["expected_value"] == 0.25 * 5.0
         assert ev_result["is_value_bet"] is True
 
+    def test_score_race_calibrates_once_per_race(self, scoring_db: DatabaseManager) -> None:
+        """score_raceがオッズのある全馬分のスコアで校正モデルを1回だけ呼ぶこと。"""
+        from src.scoring.calibration import PlattCalibrator
+
+        calibrator = PlattCalibrator()
+        calibrator.fit(np.linspace(80, 120, 40), np.tile([0, 0, 0, 1], 10))
+        engine = ScoringEngine(scoring_db, calibrator=calibrator)
+        entries = [{"Umaban": f"{i:02d}"} for i in range(1, 5)]
+        odds_map = {"01": 3.0, "02": 0.0, "03": 8.0, "04": 12.0}
+
+        with patch.object(calibrator, "predict_proba_batch", wraps=calibrator.predict_proba_batch) as batch:
+            results = engine.score_race({"RaceName": "テスト"}, entries, odds_map)
+
+        batch.assert_called_once()
+        assert len(batch.call_args.args[0]) == 3
+        for r in results:
+            expected = engine.calculate_ev(
+                {k: r[k] for k in ("umaban", "total_score", "factor_details")}, r["actual_odds"],
+            )
+            assert r["estimated_prob"] == pytest.approx(expected["estimated_prob"])
+            assert r["expected_value"] == pytest.approx(expected["expected_value"])
+
     def test_calculate_ev_without_calibrator_fallback(self, scoring_db: DatabaseManager) -> None:
         """校正モデルなしの場合フォールバック変換が使われること。"""
         engine = ScoringEngine(scoring_db, calibrator=None)
@@ -109,6 +265,34 @@ class TestScoringEngineExtended:
         assert ev_result["estimated_prob"] == 0.5
         assert ev_result["expected_value"] == 0.5 * 3.0
 
+    def test_estimate_probs_fallback_clips(self, scoring_db: DatabaseManager) -> None:
+        """校正モデルなしの一括変換がscore/200を[0.01, 0.99]に丸めること。"""
+        engine = ScoringEngine(scoring_db, calibrator=None)
+        probs = engine.estimate_probs(np.array([0.0, 100.0, 150.0, 250.0]))
+        np.testing.assert_allclose(probs, [0.01, 0.5, 0.75, 0.99])
+
+    def test_calculate_ev_batch_matches_scalar(self, scoring_db: DatabaseManager) -> None:
+        """一括版の期待値計算が calculate_ev() の各馬の結果と一致すること。"""
+        engine = ScoringEngine(scoring_db, calibrator=None, ev_threshold=1.5)
+        scores = np.array([40.0, 100.0, 150.0])
+        odds = np.array([2.0, 3.0, 10.0])
+
+        batch = engine.calculate_ev_batch(scores, odds)
+        for i in range(len(scores)):
+            expected = engine.calculate_ev({"total_score": scores[i]}, actual_odds=odds[i])
+            for key in ("estimated_prob", "fair_odds", "expected_value", "is_value_bet"):
+                assert batch[key][i] == pytest.approx(expected[key]), key
+
+    def test_calculate_ev_batch_zero_prob(self, scoring_db: DatabaseManager) -> None:
+        """推定勝率0の馬の公正オッズが無限大になること。"""
+        calibrator = MagicMock()
+        calibrator.predict_proba_batch.return_value = np.array([0.0, 0.25])
+        engine = ScoringEngine(scoring_db, calibrator=calibrator)
+
+        batch = engine.calculate_ev_batch(np.array([10.0, 120.0]), np.array([50.0, 4.0]))
+        assert batch["fair_odds"].tolist() == [float("inf"), 4.0]
+        assert batch["expected_value"].tolist() == [0.0, 1.0]
+
     def test_ev_threshold_parameter(self, scoring_db: DatabaseManager) -> None:
         """ev_thresholdパラメータが正しく機能すること。"""
         engine = ScoringEngine(scoring_db, calibrator=None, ev_threshold=2.0)
@@ -117,3 +301,35 @@ class TestScoringEngineExtended:
         ev_result = engine.calculate_ev(score_result, actual_odds=3.0)
         # EV = 0.5 * 3.0 = 1.5 < 2.0
         assert ev_result["is_value_bet"] is False
+
+    def test_invalid_backend_raises(self, scoring_db: DatabaseManager) -> None:
+        """未対応のbackend指定でValueErrorが送出されること。"""
+        with pytest.raises(ValueError, match="backend"):
+            ScoringEngine(scoring_db, backend="opencl")
+        with pytest.raises(ValueError, match="backend"):
+            ScoringEngine(scoring_db, backend="cudf")
+
+    def test_fused_scorer_warmed_up_on_rule_load(self, initialized_db: DatabaseManager, monkeypatch) -> None:
+        """融合スコアラー生成時にダミー列で評価し、実レースと同じカーネルを準備すること。"""
+        import src.scoring.engine as engine_module
+        from src.factors.registry import FactorRegistry
+        from src.scoring.fused_scorer import FusedRuleScorer
+
+        monkeypatch.setattr(engine_module, "FusedRuleScorer", lambda rules: FusedRuleScorer(rules, jit=False))
+        monkeypatch.setattr(engine_module.fused_scorer, "is_available", lambda: True)
+        registry = FactorRegistry(initialized_db)
+        rule_id = registry.create_rule(
+            {"rule_name": "内枠", "sql_expression": "1 if is_inner_gate else 0", "weight": 1.5},
+        )
+        registry.transition_status(rule_id, "TESTING", reason="テスト")
+        registry.transition_status(rule_id, "APPROVED", reason="承認")
+
+        engine = ScoringEngine(initialized_db, backend="numba")
+        scorer = engine._get_fused_scorer(registry.get_active_rules())
+        kernels_after_load = dict(scorer._kernels)
+        assert len(kernels_after_load) == 1
+
+        engine.score_race({"Kyori": "1200"}, [{"Umaban": f"{i:02d}"} for i in range(1, 7)],
+                          {f"{i:02d}": 5.0 for i in range(1, 7)})
+        assert engine._get_fused_scorer(registry.get_active_rules()) is scorer
+        assert scorer._kernels == kernels_after_load
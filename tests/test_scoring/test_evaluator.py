@@ -3,9 +3,36 @@
 JVLink実スキーマ（BaTaijyu/ZogenFugo/ZogenSa、DMJyuni、HaronTimeL3等）に準拠。
 """
 
+import ast
+
+import numpy as np
 import pytest
 
-from src.scoring.evaluator import build_eval_context, evaluate_rule
+from src.scoring.evaluator import (
+    _EVAL_GLOBALS,
+    FLAG_DEFINITIONS,
+    EvalContextFactory,
+    _safe_float,
+    _safe_int,
+    build_eval_columns,
+    build_eval_context,
+    build_horse_context,
+    build_race_columns,
+    build_race_context,
+    compile_checked_rule,
+    compile_row_scorer,
+    compile_rule,
+    compile_rule_set,
+    compile_vectorized,
+    evaluate_compiled,
+    evaluate_rule,
+    evaluate_rule_vectorized,
+    evaluate_rules_vectorized,
+    is_safe_expression,
+    normalize_branchless,
+    race_bindings,
+    specialize_rule_set,
+)
 
 
 @pytest.fixture
@@ -108,6 +135,130 @@ class TestBuildEvalContext:
         assert "max" in ctx
 
 
+class TestSafeConversion:
+    """_safe_int / _safe_float のテスト。"""
+
+    @pytest.mark.parametrize(("value", "expected"), [
+        ("480", 480), (" 3", 3), (5, 5), (True, 1), (2.9, 2), (np.int64(7), 7),
+        ("", -1), (None, -1), ("  ", -1), ("abc", -1), ("3.5", -1),
+    ])
+    def test_safe_int(self, value, expected):
+        assert _safe_int(value, -1) == expected
+
+    @pytest.mark.parametrize(("value", "expected"), [
+        ("350", 350.0), ("3.5", 3.5), (2, 2.0), (np.float64(1.5), 1.5),
+        ("", -1.0), (None, -1.0), ("x", -1.0),
+    ])
+    def test_safe_float(self, value, expected):
+        assert _safe_float(value, -1.0) == expected
+
+
+class TestBuildRaceContext:
+    """build_race_context() / build_horse_context() のテスト。"""
+
+    def test_shared_race_context_matches_eval_context(self, sample_race):
+        """1回構築したレースコンテキストを共有しても馬ごとの構築結果と一致すること。"""
+        entries = [
+            {"Umaban": "01", "HaronTimeL3": "350", "KyakusituKubun": "1"},
+            {"Umaban": "02", "HaronTimeL3": "340", "Ninki": "5"},
+            {"Umaban": "03", "HaronTimeL3": "350", "SexCD": "2"},
+            {"Umaban": "04", "HaronTimeL3": ""},
+        ]
+        prevs = [{"HaronTimeL3": "345"}, None, {"HaronTimeL3": "338"}, {"HaronTimeL3": "0"}]
+        all_prev_l3f = [345.0, 0.0, 338.0, 0.0]
+
+        race_ctx = build_race_context(sample_race, entries, all_prev_l3f)
+        for i, (horse, prev) in enumerate(zip(entries, prevs, strict=True)):
+            expected = build_eval_context(horse, sample_race, entries, prev, all_prev_l3f)
+            assert build_horse_context(horse, race_ctx, prev) == expected
+            # 出走順の位置を渡すと事前計算済みの順位を参照し、結果は同じ
+            assert build_horse_context(horse, race_ctx, prev, position=i) == expected
+
+    def test_l3f_ranks_by_binary_search(self, sample_race):
+        """上がり3F順位が同値は上位・欠損は頭数扱いで求まること。"""
+        entries = [{"HaronTimeL3": v} for v in ("350", "340", "350", "", "360")]
+        race_ctx = build_race_context(sample_race, entries, [345.0, 0.0, 338.0, 0.0, 0.0])
+        ranks = [build_horse_context(h, race_ctx)["last_3f_rank"] for h in entries]
+        assert ranks == [2, 1, 2, 5, 4]
+
+        prev_ranks = [
+            build_horse_context({}, race_ctx, {"HaronTimeL3": v})["prev_last_3f_rank"]
+            for v in ("345", "338", "0", "341")
+        ]
+        assert prev_ranks == [2, 1, 5, 5]
+
+    def test_context_factory_reuses_buffer(self, sample_race):
+        """EvalContextFactoryが同じdictを使い回し、内容は馬ごとの構築結果と一致すること。"""
+        entries = [{"Umaban": "01", "HaronTimeL3": "350"}, {"Umaban": "02", "Ninki": "5"}]
+        race_ctx = build_race_context(sample_race, entries)
+        factory = EvalContextFactory()
+
+        first = factory.build(entries[0], race_ctx, position=0)
+        assert first == build_horse_context(entries[0], race_ctx)
+        # 評価中に追加されたキーは次の馬へ持ち越さない
+        first["leak"] = 1
+        second = factory.build(entries[1], race_ctx, {"KakuteiJyuni": "1"}, position=1)
+        assert second is first
+        assert second == build_horse_context(entries[1], race_ctx, {"KakuteiJyuni": "1"})
+
+    def test_position_rank_ignores_mismatched_prev(self, sample_race):
+        """前走データが all_prev_l3f と食い違う場合は値から順位を求めること。"""
+        entries = [{"HaronTimeL3": "350"}, {"HaronTimeL3": "340"}]
+        race_ctx = build_race_context(sample_race, entries, [345.0, 338.0])
+        ctx = build_horse_context(entries[0], race_ctx, {"HaronTimeL3": "338"}, position=0)
+        assert ctx["last_3f_rank"] == 2
+        assert ctx["prev_last_3f_rank"] == 1
+
+    @pytest.mark.parametrize(("track_cd", "is_turf", "is_dirt"), [
+        ("10", True, False), ("23", False, True), ("", False, False),
+    ])
+    def test_flags_follow_definitions(self, sample_race, track_cd, is_turf, is_dirt):
+        """行単位のフラグが FLAG_DEFINITIONS から求まり、真偽値で格納されること。"""
+        assert all(is_safe_expression(expr) for expr in FLAG_DEFINITIONS.values())
+        race = {**sample_race, "TrackCD": track_cd}
+        entries = [{"Umaban": "01", "Ninki": "1", "SexCD": "3"}, {"Umaban": "02", "Ninki": "9"}]
+        ctx = build_horse_context(entries[0], build_race_context(race, entries), {"KyakusituKubun": "4"})
+
+        assert (ctx["is_turf"], ctx["is_dirt"]) == (is_turf, is_dirt)
+        assert ctx["is_favorite"] and ctx["is_gelding"] and ctx["prev_is_closer"]
+        assert all(type(ctx[name]) is bool for name in FLAG_DEFINITIONS)
+
+
+class TestBuildRaceColumns:
+    """build_race_columns() のテスト。"""
+
+    @staticmethod
+    def _reference(race, entries, prevs, all_prev_l3f):
+        return build_eval_columns([
+            build_eval_context(horse, race, entries, prevs[i], all_prev_l3f, include_flags=False)
+            for i, horse in enumerate(entries)
+        ])
+
+    @pytest.mark.parametrize("with_prev_l3f", [True, False])
+    def test_matches_per_horse_contexts(self, sample_race, with_prev_l3f):
+        """馬ごとのコンテキストを転置した列とキー・dtype・値が一致すること。"""
+        entries = [
+            {"Umaban": "01", "HaronTimeL3": "350", "DMJyuni": "0", "ZogenFugo": "-", "ZogenSa": "4"},
+            {"Umaban": "02", "HaronTimeL3": "340", "DMJyuni": "2", "ZogenFugo": "+", "ZogenSa": "x"},
+            {"Umaban": "03", "HaronTimeL3": "350", "SexCD": None, "Jyuni1c": "5", "Jyuni4c": "2"},
+            {"Umaban": "04", "HaronTimeL3": "", "Odds": "12.5", "Futan": "550"},
+        ]
+        prevs = [{"HaronTimeL3": "345", "KakuteiJyuni": "1"}, None, {"HaronTimeL3": "338"}, {"HaronTimeL3": "0"}]
+        all_prev_l3f = np.array([345.0, 0.0, 338.0, 0.0]) if with_prev_l3f else None
+
+        actual = build_race_columns(sample_race, entries, prevs, all_prev_l3f)
+        expected = self._reference(sample_race, entries, prevs, all_prev_l3f)
+
+        assert list(actual) == list(expected)
+        for name, column in expected.items():
+            assert actual[name].dtype == column.dtype, name
+            np.testing.assert_array_equal(actual[name], column, err_msg=name)
+
+    def test_empty_entries(self, sample_race):
+        """出走馬なしでは空dictを返すこと。"""
+        assert build_race_columns(sample_race, []) == {}
+
+
 class TestEvaluateRule:
     """evaluate_rule のテスト。"""
 
@@ -143,6 +294,49 @@ class TestEvaluateRule:
         )
         assert result == 0.0
 
+    @pytest.mark.parametrize("expression", [
+        "().__class__.__bases__[0]",
+        "Umaban.__class__",
+        "__builtins__",
+        "(1).real._x",
+        "'{0.__class__}'.format(Umaban)",
+        "'{x.__class__}'.format_map({'x': 1})",
+        "(lambda: 1)()",
+        "f'{Umaban!r}'",
+        "Ninki.bit_length()",
+    ])
+    def test_attribute_escape_rejected(self, expression, sample_horse, sample_race, sample_entries):
+        """正規表現では検出できない属性経由の脱出をAST検査で拒否すること。"""
+        assert is_safe_expression(expression) is False
+        assert compile_checked_rule(expression) is None
+        assert evaluate_rule(expression, sample_horse, sample_race, sample_entries) == 0.0
+
+    def test_assignment_expression_rejected(self, sample_horse, sample_race, sample_entries):
+        """共有コンテキストの変数を書き換えられる代入式を拒否すること。"""
+        assert is_safe_expression("(Ninki := 1) * 0") is False
+        assert is_safe_expression("max(y for x in (1, 2) if (y := x))") is False
+        assert evaluate_rule("(Ninki := 1) * 0", sample_horse, sample_race, sample_entries) == 0.0
+
+    def test_safe_expression_allowed(self):
+        """通常のルール式・構文エラーの式は安全性検査を通過すること。"""
+        assert is_safe_expression("1 if is_inner_gate and Ninki <= 3 else 0") is True
+        assert is_safe_expression("1 if else") is True
+        assert compile_checked_rule("1 if else") is None
+        assert is_safe_expression("1 if str(Umaban).startswith('0') else max(x for x in (Ninki, 3))") is True
+
+    def test_repeated_error_logged_once(self, sample_horse, sample_race, sample_entries):
+        """同じ式の同じ種類の評価エラーはDEBUGログに1回だけ出力されること。"""
+        from loguru import logger
+
+        messages: list[str] = []
+        handler_id = logger.add(messages.append, level="DEBUG", format="{message}")
+        try:
+            for _ in range(5):
+                assert evaluate_rule("1 / (Barei - Barei)", sample_horse, sample_race, sample_entries) == 0.0
+        finally:
+            logger.remove(handler_id)
+        assert sum("ルール評価エラー (1 / (Barei - Barei))" in m for m in messages) == 1
+
     def test_invalid_expression(self, sample_horse, sample_race, sample_entries):
         result = evaluate_rule(
             "undefined_variable + 1",
@@ -271,6 +465,18 @@ class TestPrevContext:
         # prev_last_3f=340.0 は最速 → rank=1
         assert ctx["prev_last_3f_rank"] == 1
 
+    def test_prev_last_3f_rank_ndarray(self, sample_horse, sample_race, sample_entries):
+        """ndarrayでも前走なし(0.0)を除外し、同タイムは上位の順位になること。"""
+        prev = {"HaronTimeL3": "355"}
+        l3f = [0.0, 355.0, 340.0, 340.0, 355.0, 360.0]
+        ranks = [
+            build_eval_context(
+                sample_horse, sample_race, sample_entries, prev_context=prev, all_prev_l3f=values,
+            )["prev_last_3f_rank"]
+            for values in (l3f, np.array(l3f))
+        ]
+        assert ranks == [3, 3]
+
     def test_prev_last_3f_rank_no_data(self, sample_horse, sample_race, sample_entries):
         """前走L3Fデータなし時のランクはnum_entriesになること。"""
         ctx = build_eval_context(
@@ -358,3 +564,265 @@ class TestExtendedContextVariables:
         )
         # is_graded=True, is_favorite=False(Ninki=8) → 0
         assert result == 0.0
+
+
+class TestVectorizedEvaluation:
+    """列単位ベクトル評価（evaluate_rule_vectorized）のテスト。"""
+
+    @pytest.fixture
+    def columns(self, sample_race, sample_entries):
+        contexts = [build_eval_context(h, sample_race, sample_entries) for h in sample_entries]
+        return build_eval_columns(contexts)
+
+    def _row_results(self, expression, sample_race, sample_entries):
+        return np.array([evaluate_rule(expression, h, sample_race, sample_entries) for h in sample_entries])
+
+    @pytest.mark.parametrize("expression", [
+        "1 if is_longshot and dm_rank <= 3 else 0",
+        "0.5 if 4 <= Ninki <= 6 else 0",
+        "1.5 if Ninki - dm_rank >= 5 else (0.5 if Ninki - dm_rank >= 3 else 0)",
+        "-1 if abs(weight_diff) >= 4 else 0",
+        "0.3 if Wakuban % 2 == 0 else 0",
+        "1 if running_style in (3, 4) and not is_favorite else 0",
+        "1 if SexCD == '2' or num_entries // 2 > 10 else 0",
+    ])
+    def test_matches_row_evaluation(self, expression, columns, sample_race, sample_entries):
+        """ベクトル評価の結果が行単位評価と一致すること。"""
+        assert compile_vectorized(expression) is not None
+        result = evaluate_rule_vectorized(expression, columns, len(sample_entries))
+        np.testing.assert_array_equal(result, self._row_results(expression, sample_race, sample_entries))
+
+    def test_type_error_falls_back_to_row(self, columns, sample_race, sample_entries):
+        """文字列と数値の比較等のエラーは行単位評価と同じく0になること。"""
+        expression = "1 if TenkoCD >= 2 else 0"
+        result = evaluate_rule_vectorized(expression, columns, len(sample_entries))
+        np.testing.assert_array_equal(result, self._row_results(expression, sample_race, sample_entries))
+
+    @pytest.mark.parametrize("expression", [
+        "1 if is_longshot else None",
+        "None",
+        "Ninki if dm_rank <= 3 else None",
+    ])
+    def test_none_result_matches_row_evaluation(self, expression, columns, sample_race, sample_entries):
+        """None を返す行は行単位評価と同じく0.0となり、NaNにならないこと。"""
+        expected = self._row_results(expression, sample_race, sample_entries)
+        result = evaluate_rule_vectorized(expression, columns, len(sample_entries))
+        np.testing.assert_array_equal(result, expected)
+        matrix = evaluate_rules_vectorized([expression, "1"], columns, len(sample_entries))
+        np.testing.assert_array_equal(matrix[0], expected)
+
+    def test_unvectorizable_expression_uses_row_eval(self, columns, sample_race, sample_entries):
+        """ベクトル化非対応の式でも行単位評価で同じ結果を返すこと。"""
+        expression = "len(SexCD)"
+        assert compile_vectorized(expression) is None
+        result = evaluate_rule_vectorized(expression, columns, len(sample_entries))
+        np.testing.assert_array_equal(result, self._row_results(expression, sample_race, sample_entries))
+
+    @pytest.mark.parametrize("expression", [
+        "max(x for x in (Ninki, dm_rank))",
+        "len(str(Umaban)) + min(Ninki, 5)",
+        "sum([Ninki, Wakuban])",
+    ])
+    def test_row_fallback_uses_referenced_names(self, expression, columns, sample_race, sample_entries):
+        """参照変数のみで構築した行コンテキストでも行単位評価と同じ結果になること。"""
+        result = evaluate_rule_vectorized(expression, columns, len(sample_entries))
+        np.testing.assert_array_equal(result, self._row_results(expression, sample_race, sample_entries))
+
+    def test_constant_expression_broadcast(self, columns, sample_entries):
+        """定数式が全馬分にブロードキャストされること。"""
+        result = evaluate_rule_vectorized("2", columns, len(sample_entries))
+        assert result.shape == (len(sample_entries),)
+        assert (result == 2.0).all()
+
+    def test_empty_expression(self, columns, sample_entries):
+        """空式は全馬0.0を返すこと。"""
+        result = evaluate_rule_vectorized("", columns, len(sample_entries))
+        assert (result == 0.0).all()
+
+    def test_forbidden_pattern_not_compiled(self, columns, sample_entries):
+        """禁止パターンを含む式はコンパイルされず0.0を返すこと。"""
+        expression = "__import__('os').system('echo hacked')"
+        assert compile_vectorized(expression) is None
+        result = evaluate_rule_vectorized(expression, columns, len(sample_entries))
+        assert (result == 0.0).all()
+
+    def test_attribute_access_not_vectorized(self):
+        """属性参照を含む式はベクトル化されないこと。"""
+        assert compile_vectorized("Umaban.real") is None
+
+
+class TestRuleSetEvaluation:
+    """共通部分式を共有するルール群一括評価（evaluate_rules_vectorized）のテスト。"""
+
+    EXPRESSIONS = [
+        "-1 if prev_jyuni > 0 and prev_jyuni <= 3 else 0",
+        "1 if prev_jyuni > 0 and dm_rank <= 5 else 0",
+        "1 if TenkoCD >= 2 and dm_rank <= 5 else 0",
+        "len(SexCD)",
+        "",
+        "0.5 if dm_rank <= 5 else -0.5",
+    ]
+
+    def test_matches_row_evaluation(self, sample_race, sample_entries):
+        """一括評価の各行がルールごとの行単位評価と一致すること。"""
+        prev = {"KakuteiJyuni": "2"}
+        contexts = [build_eval_context(h, sample_race, sample_entries, prev) for h in sample_entries]
+        matrix = evaluate_rules_vectorized(self.EXPRESSIONS, build_eval_columns(contexts), len(sample_entries))
+
+        assert matrix.shape == (len(self.EXPRESSIONS), len(sample_entries))
+        for j, expression in enumerate(self.EXPRESSIONS):
+            expected = [evaluate_rule(expression, h, sample_race, sample_entries, prev) for h in sample_entries]
+            np.testing.assert_array_equal(matrix[j], expected, err_msg=expression)
+
+    def test_shared_subexpression_failure_is_isolated(self):
+        """失敗した部分式を参照するルールのみNoneとなり、他のルールは評価されること。"""
+        columns = {"TenkoCD": np.array(["1", "2"], dtype=object), "dm_rank": np.array([3, 7])}
+        results = compile_rule_set((
+            "1 if TenkoCD >= 2 and dm_rank <= 5 else 0",
+            "2 if dm_rank <= 5 else 0",
+        ))(columns)
+        assert results[0] is None
+        np.testing.assert_array_equal(results[1], [2, 0])
+
+
+class TestCompileRule:
+    """行単位評価用コードオブジェクトのキャッシュ（compile_rule）のテスト。"""
+
+    def test_code_object_cached(self):
+        """同一式のコンパイル結果が再利用されること。"""
+        code = compile_rule("1 if Ninki <= 3 else 0")
+        assert code is not None
+        assert compile_rule("1 if Ninki <= 3 else 0") is code
+
+    def test_syntax_error_returns_none(self, sample_horse, sample_race, sample_entries):
+        """構文エラーの式はNoneとなり、評価結果は0.0となること。"""
+        assert compile_rule("1 if else") is None
+        assert evaluate_rule("1 if else", sample_horse, sample_race, sample_entries) == 0.0
+
+    def test_leading_whitespace_allowed(self, sample_horse, sample_race, sample_entries):
+        """eval(str)と同様に先頭の空白を許容すること。"""
+        assert evaluate_rule("  2", sample_horse, sample_race, sample_entries) == 2.0
+
+    def test_shared_globals_not_polluted(self, sample_horse, sample_race, sample_entries):
+        """共有グローバル名前空間を使っても組み込み関数は使えず、評価ごとに汚染されないこと。"""
+        ctx = build_eval_context(sample_horse, sample_race, sample_entries)
+        assert evaluate_compiled(compile_rule("print(1)"), ctx) == 0.0
+        assert evaluate_compiled(compile_checked_rule("(x := 3) + x"), ctx) == 0.0
+        assert "x" not in ctx
+        fresh_ctx = build_eval_context(sample_horse, sample_race, sample_entries)
+        assert evaluate_compiled(compile_rule("x"), fresh_ctx) == 0.0
+        assert _EVAL_GLOBALS == {"__builtins__": {}}
+
+
+class TestCompileRowScorer:
+    """行単位評価のルール群融合（compile_row_scorer）のテスト。"""
+
+    EXPRESSIONS = (
+        "1 if is_inner_gate and Ninki <= 3 else 0",
+        "-1 if abs(weight_diff) >= 4 else 0",
+        "1 / (Barei - Barei)",
+        "",
+        "__import__('os')",
+        "().__class__",
+        "(y := 2) + y",
+        "max(x for x in (Ninki, dm_rank))",
+        "1 if TenkoCD >= 2 else 0",
+        "1 if else",
+        "undefined_variable",
+        "  0.5",
+    )
+
+    def test_matches_per_rule_eval(self, sample_horse, sample_race, sample_entries):
+        """融合関数の結果が各式を個別に評価した結果と一致すること。"""
+        scorer = compile_row_scorer(self.EXPRESSIONS)
+        ctx = build_eval_context(sample_horse, sample_race, sample_entries)
+        expected = [evaluate_compiled(compile_checked_rule(e), dict(ctx)) for e in self.EXPRESSIONS]
+        assert scorer(dict(ctx)) == expected
+
+    def test_cached_per_expression_set(self):
+        """同じ式の組では生成済みの関数を再利用すること。"""
+        assert compile_row_scorer(("1", "Ninki")) is compile_row_scorer(("1", "Ninki"))
+        assert compile_row_scorer(()) ({}) == []
+
+
+class TestNormalizeBranchless:
+    """定数値条件式の分岐なし積和形への変換（normalize_branchless）のテスト。"""
+
+    @staticmethod
+    def _normalize(expression):
+        return ast.unparse(normalize_branchless(ast.parse(expression, mode="eval").body))
+
+    @pytest.mark.parametrize(("expression", "expected"), [
+        ("1.5 if dm_rank <= 3 else 0", "1.5 * (dm_rank <= 3)"),
+        ("1 if is_favorite else 0", "is_favorite"),
+        (
+            "-1 if is_longshot and dm_rank > num_entries // 2 else 0",
+            "-1 * (is_longshot and dm_rank > num_entries // 2)",
+        ),
+        (
+            "1.5 if Ninki - dm_rank >= 5 else (0.5 if Ninki - dm_rank >= 3 else 0)",
+            "0.5 * (Ninki - dm_rank >= 3) + (Ninki - dm_rank >= 5)",
+        ),
+        (  # 包含関係が逆の場合は一般形
+            "1.5 if Ninki - dm_rank >= 3 else (0.5 if Ninki - dm_rank >= 5 else 0)",
+            "1.5 * (Ninki - dm_rank >= 3) + 0.5 * (Ninki - dm_rank >= 5) * (not Ninki - dm_rank >= 3)",
+        ),
+        ("0.5 if dm_rank <= 5 else -0.5", "0.5 * (dm_rank <= 5) + -0.5 * (not dm_rank <= 5)"),
+    ])
+    def test_rewrites_constant_branches(self, expression, expected):
+        """定数値の条件式が積和形に変換されること。"""
+        assert self._normalize(expression) == expected
+
+    @pytest.mark.parametrize("expression", [
+        "1 if dm_rank else 0",  # 条件がboolでない
+        "dm_rank if is_favorite else 0",  # 分岐が定数でない
+    ])
+    def test_keeps_unsafe_branches(self, expression):
+        """意味が変わり得る条件式は分岐なし形に変換しないこと。"""
+        assert "if" in self._normalize(expression)
+
+    @pytest.mark.parametrize("expression", [
+        "1.5 if Ninki - dm_rank >= 5 else (0.5 if Ninki - dm_rank >= 3 else 0)",
+        "1.5 if Ninki - dm_rank >= 3 else (0.5 if Ninki - dm_rank >= 5 else 0)",
+        "0.5 if dm_rank <= 5 else (-0.5 if Ninki > 3 else 1)",
+        "-1 if is_favorite and dm_rank > num_entries // 2 else 0",
+    ])
+    def test_matches_row_evaluation(self, expression, sample_race, sample_entries):
+        """変換後の列単位評価が行単位評価と一致すること。"""
+        columns = build_eval_columns([build_eval_context(h, sample_race, sample_entries) for h in sample_entries])
+        result = evaluate_rule_vectorized(expression, columns, len(sample_entries))
+        expected = [evaluate_rule(expression, h, sample_race, sample_entries) for h in sample_entries]
+        np.testing.assert_array_equal(result, expected)
+
+
+class TestSpecializeRuleSet:
+    """レース条件の部分評価（race_bindings / specialize_rule_set）のテスト。"""
+
+    def test_bindings_from_race_level_columns(self):
+        """全馬で共通のレース条件アトムのみ束縛されること。"""
+        columns = {
+            "is_turf": np.array([True, True]),
+            "RaceNum": np.array([11, 11]),
+            "TenkoCD": np.array(["1", "1"], dtype=object),
+            "dm_rank": np.array([1, 5]),
+        }
+        bindings = dict(race_bindings((
+            "1 if is_turf and dm_rank <= 3 else 0",
+            "0.5 if RaceNum >= 11 else 0",
+            "1 if TenkoCD >= 2 else 0",  # 評価エラーのアトムは束縛しない
+            "1 if is_dirt else 0",  # 列がないアトムは束縛しない
+        ), columns))
+        assert bindings == {"is_turf": True, "RaceNum >= 11": True}
+
+    @pytest.mark.parametrize(("expression", "expected"), [
+        ("1 if is_turf and is_sprint and dm_rank <= 3 else 0", "1 if dm_rank <= 3 else 0"),
+        ("1 if is_dirt and dm_rank <= 3 else 0", "0"),
+        ("1 if is_dirt or dm_rank <= 3 else 0", "1 if dm_rank <= 3 else 0"),
+        ("0.5 if RaceNum >= 11 and is_longshot else 0", "0.5 if is_longshot else 0"),
+        ("1 if dm_rank <= 3 and is_turf else 0", "1 if dm_rank <= 3 and True else 0"),
+        ("1 if TenkoCD >= 2 else 0", "1 if TenkoCD >= 2 else 0"),
+    ])
+    def test_folds_race_constants(self, expression, expected):
+        """束縛したアトムが畳み込まれ、無効なルールは定数になること。"""
+        bindings = (("is_turf", True), ("is_sprint", True), ("is_dirt", False), ("RaceNum >= 11", True))
+        assert specialize_rule_set((expression,), bindings) == (expected,)
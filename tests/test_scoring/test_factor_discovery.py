@@ -1,13 +1,23 @@
 """データドリブンファクター発見のテスト。"""
 
+import math
+
+import numpy as np
+import pandas as pd
 import pytest
 
 from src.scoring.factor_discovery import (
     FactorDiscovery,
+    FeatureTable,
+    _auc_columns,
     _auc_from_labels,
+    _float_column,
+    _int_column,
     _point_biserial,
+    _point_biserial_columns,
     _safe_float,
     _safe_int,
+    _sort_columns,
 )
 
 
@@ -25,6 +35,20 @@ class TestUtilities:
         assert _safe_int("abc", -1) == -1
 
 
+class TestColumnConversion:
+    """DB値の列一括変換のテスト。"""
+
+    VALUES = pd.Series(["480", " 12 ", "-4", "3.5", "", "x", None], dtype=object)
+
+    def test_float_column(self) -> None:
+        assert _float_column(self.VALUES).tolist() == [480.0, 12.0, -4.0, 3.5, 0.0, 0.0, 0.0]
+
+    def test_int_column(self) -> None:
+        """整数に変換できない値（小数を含む）は0になること。"""
+        assert _int_column(self.VALUES).tolist() == [480, 12, -4, 0, 0, 0, 0]
+        assert _int_column(None, 3).tolist() == [0, 0, 0]
+
+
 class TestAUC:
     """AUC計算のテスト。"""
 
@@ -49,6 +73,21 @@ class TestAUC:
     def test_empty(self) -> None:
         assert _auc_from_labels([], []) == 0.5
 
+    def test_columns_match_single_feature(self) -> None:
+        """行列一括計算が列ごとのAUC（同値は平均ランク）と一致すること。"""
+        matrix = np.array([
+            [0.1, 3.0, 1.0],
+            [0.2, 1.0, 1.0],
+            [0.2, 2.0, 0.0],
+            [0.9, 1.0, 1.0],
+            [0.5, 2.0, 0.0],
+        ])
+        labels = [0, 1, 0, 1, 0]
+        aucs = _auc_columns(matrix, np.array(labels))
+        expected = [_auc_from_labels(matrix[:, j].tolist(), labels) for j in range(3)]
+        assert aucs.tolist() == pytest.approx(expected)
+        assert aucs.tolist() == pytest.approx([4.5 / 6, 0.0, 5 / 6])
+
     def test_no_positives(self) -> None:
         assert _auc_from_labels([0.5], [0]) == 0.5
 
@@ -78,6 +117,16 @@ class TestPointBiserial:
         """全て同じ値の場合。"""
         assert _point_biserial([5, 5, 5], [0, 1, 0]) == 0.0
 
+    def test_columns_match_single_feature(self) -> None:
+        """行列一括計算が列ごとの相関と一致し、定数列は0になること。"""
+        matrix = np.array([[1.0, 5.0, 0.0], [2.0, 5.0, 1.0], [3.0, 5.0, 1.0], [4.0, 5.0, 0.0]])
+        labels = np.array([0, 0, 1, 1])
+        corrs = _point_biserial_columns(matrix, labels)
+        assert corrs[0] == pytest.approx(2 / math.sqrt(1.25) * 0.5)
+        assert corrs[1] == 0.0
+        assert corrs[2] == pytest.approx(0.0)
+        assert _point_biserial_columns(matrix, np.zeros(4)).tolist() == [0.0, 0.0, 0.0]
+
 
 class TestFactorDiscovery:
     """FactorDiscoveryクラスのテスト。"""
@@ -179,6 +228,97 @@ class TestFactorDiscovery:
                 assert "win_rate" in q
                 assert "count" in q
 
+    def test_load_dataset_features(self, discovery: FactorDiscovery) -> None:
+        """データセットの派生変数がレース単位の頭数・馬番から算出されること。"""
+        with discovery._jvlink_db.session():
+            table = discovery._load_dataset(max_races=100)
+        assert table.n_samples == 120
+        assert all(len(col) == 120 for col in table.columns.values())
+
+        # 同一レース内は馬番順に並ぶ
+        def first_race(name: str) -> list:
+            return table.columns[name][:6].tolist()
+
+        assert first_race("Umaban") == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+        assert table.labels[:6].tolist() == [1, 0, 0, 0, 0, 0]
+        assert first_race("num_entries") == [6] * 6
+        assert first_race("is_inner") == [1, 1, 0, 0, 0, 0]
+        assert first_race("is_outer") == [0, 0, 0, 0, 1, 1]
+        assert first_race("gate_position")[2] == pytest.approx(0.5)
+        assert first_race("weight_diff")[2] == 3
+        assert first_race("is_favorite")[:4] == [1, 1, 1, 0]
+        assert first_race("Kyori")[0] == 1600
+        assert first_race("is_mile")[0] == 1
+        assert first_race("is_turf")[0] == 1
+        assert first_race("TrackCD")[0] == "10"
+        assert "TrackCD" not in table.numeric_names()
+        # フラグ特徴は1バイト/サンプルで保持される
+        assert table.columns["is_turf"].dtype == np.uint8
+        assert table.columns["is_makuri"].dtype == np.uint8
+
+    def test_load_dataset_limits_to_latest_races(self, discovery: FactorDiscovery) -> None:
+        """max_racesで新しい日付のレースから件数を絞り込むこと。"""
+        with discovery._jvlink_db.session():
+            latest = discovery._load_dataset(max_races=5)
+            ranged = discovery._load_dataset(date_from="20250102", date_to="20250103", max_races=100)
+        assert latest.n_samples == 30
+        assert ranged.n_samples == 60
+
+    def test_quintile_analysis_columns(self, tmp_path) -> None:
+        """五分位分析が列ごとに同数区間の的中率・範囲を返し、空区間を除くこと。"""
+        from src.data.db import DatabaseManager
+
+        fd = FactorDiscovery(DatabaseManager(str(tmp_path / "q.db"), wal_mode=False), None)
+        matrix = np.column_stack([np.arange(10, 0, -1, dtype=float), np.ones(10)])
+        labels = np.array([1, 1, 0, 0, 0, 0, 0, 0, 1, 0])
+        first, constant = fd._quintile_analysis(*_sort_columns(matrix, labels))
+        assert [q["count"] for q in first] == [2] * 5
+        assert [q["win_rate"] for q in first] == [0.5, 0.0, 0.0, 0.0, 1.0]
+        assert (first[0]["min"], first[0]["max"]) == (1.0, 2.0)
+        # 同値は元の並び順を保つ（安定ソート）
+        assert [q["win_rate"] for q in constant] == [1.0, 0.0, 0.0, 0.0, 0.5]
+
+        few = fd._quintile_analysis(*_sort_columns(np.array([[3.0], [1.0], [2.0]]), np.array([1, 0, 0])))[0]
+        assert [q["quintile"] for q in few] == [2, 4, 5]
+        assert [q["win_rate"] for q in few] == [0.0, 0.0, 1.0]
+
+    def test_analyze_interactions_pair_counts(self, tmp_path) -> None:
+        """フラグのペアごとの該当数・的中率・Liftが集計されること。"""
+        from src.data.db import DatabaseManager
+
+        fd = FactorDiscovery(DatabaseManager(str(tmp_path / "i.db"), wal_mode=False), None)
+        # is_favorite かつ is_inner: 40件中30件的中、それ以外は全て不的中
+        favorite = np.r_[np.ones(60), np.zeros(40)]
+        inner = np.r_[np.zeros(20), np.ones(40), np.zeros(40)]
+        labels = np.r_[np.zeros(20), np.ones(30), np.zeros(50)]
+        table = FeatureTable(
+            columns={"is_favorite": favorite, "is_inner": inner, "is_dirt": np.zeros(100)},
+            labels=labels.astype(np.int64),
+        )
+
+        result = fd._analyze_interactions(table, 0.3)
+        assert len(result) == 1
+        inter = result[0]
+        assert (inter["feature_1"], inter["feature_2"]) == ("is_favorite", "is_inner")
+        assert inter["n_samples"] == 40
+        assert inter["win_rate"] == 0.75
+        assert inter["lift"] == 2.5
+        assert inter["suggested_expression"] == "1 if is_favorite and is_inner_gate else 0"
+
+    def test_suggest_expression_binary(self, tmp_path) -> None:
+        """二値変数ではフラグ有無の的中率の高い側の式を提案すること。"""
+        from src.data.db import DatabaseManager
+
+        fd = FactorDiscovery(DatabaseManager(str(tmp_path / "s.db"), wal_mode=False), None)
+        scores = np.array([1.0, 1.0, 0.0, 0.0, 0.0])
+        quintiles = [{"win_rate": 0.5, "min": 0.0, "max": 1.0}]
+        on_wins = fd._suggest_expression("is_sprint", "higher_is_better", scores, np.array([1, 0, 0, 0, 0]),
+                                         quintiles, True)
+        off_wins = fd._suggest_expression("is_sprint", "higher_is_better", scores, np.array([0, 0, 1, 1, 0]),
+                                          quintiles, True)
+        assert on_wins == "1 if is_sprint else 0"
+        assert off_wins == "1 if not is_sprint else 0"
+
     def test_empty_db(self, tmp_path) -> None:
         """空DBではサンプル0件で返ること。"""
         from src.data.db import DatabaseManager
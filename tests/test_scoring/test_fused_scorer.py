@@ -0,0 +1,124 @@
+"""融合カーネルスコアラーのテスト。
+
+numba未導入環境でも検証できるよう、生成カーネルを純Python（jit=False）で実行する。
+"""
+
+import os
+import stat
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.factors.rules.gy_factors import GY_INITIAL_FACTORS
+from src.scoring.evaluator import (
+    build_eval_columns,
+    build_eval_context,
+    evaluate_rule,
+    evaluate_rule_vectorized,
+)
+from src.scoring.fused_scorer import FusedRuleScorer, generate_kernel_source
+
+
+def _race_inputs() -> tuple[dict, list[dict], list[dict], list[float]]:
+    race = {"Kyori": "1200", "TrackCD": "23", "TenkoCD": "2", "BabaCD": "1"}
+    entries = [
+        {"Umaban": f"{i:02d}", "Wakuban": str((i + 1) // 2), "Ninki": str(i), "DMJyuni": str(13 - i),
+         "SexCD": str(i % 3 + 1), "Barei": str(i % 6 + 2), "Futan": str(540 + i * 5),
+         "BaTaijyu": str(460 + i), "ZogenFugo": "-" if i % 2 else "+", "ZogenSa": str(i * 2),
+         "HaronTimeL3": str(340 + i), "KyakusituKubun": str(i % 4 + 1), "Odds": str(i * 30)}
+        for i in range(1, 13)
+    ]
+    prevs = [{"KakuteiJyuni": str(i + 1), "KyakusituKubun": str(i % 4 + 1), "Jyuni4c": str(i)} for i in range(12)]
+    l3f = [340.0 + i for i in range(12)]
+    return race, entries, prevs, l3f
+
+
+class TestFusedRuleScorer:
+    """FusedRuleScorerのテスト。"""
+
+    def test_matches_row_eval_for_gy_factors(self, tmp_path: Path) -> None:
+        """全GYファクターの融合評価が行単位評価×重みと一致すること。"""
+        race, entries, prevs, l3f = _race_inputs()
+        columns = build_eval_columns([
+            build_eval_context(h, race, entries, prevs[i], l3f) for i, h in enumerate(entries)
+        ])
+        rules = [dict(f) for f in GY_INITIAL_FACTORS]
+
+        matrix = FusedRuleScorer(rules, cache_dir=tmp_path, jit=False).evaluate(columns, len(entries))
+
+        for j, rule in enumerate(rules):
+            expected = [
+                evaluate_rule(str(rule["sql_expression"]), h, race, entries, prevs[i], l3f) * float(rule["weight"])
+                for i, h in enumerate(entries)
+            ]
+            np.testing.assert_allclose(matrix[j], expected, err_msg=str(rule["rule_name"]))
+
+    def test_kernel_source_cached_by_hash(self, tmp_path: Path) -> None:
+        """同一ルール群のカーネルソースは1ファイルのみ生成されること。"""
+        rules = [{"sql_expression": "1 if Ninki <= 3 else 0", "weight": 2.0}]
+        columns = {"Ninki": np.array([1, 5, 3])}
+        for _ in range(2):
+            scorer = FusedRuleScorer(rules, cache_dir=tmp_path, jit=False)
+            np.testing.assert_array_equal(scorer.evaluate(columns, 3), [[2.0, 0.0, 2.0]])
+        assert len(list(tmp_path.glob("fused_*.py"))) == 1
+
+    def test_planted_cache_file_is_not_executed(self, tmp_path: Path) -> None:
+        """キャッシュファイルが書き換えられていても実行せず、生成ソースで上書きすること。"""
+        rules = [{"sql_expression": "1 if Ninki <= 3 else 0", "weight": 2.0}]
+        columns = {"Ninki": np.array([1, 5, 3])}
+        FusedRuleScorer(rules, cache_dir=tmp_path, jit=False).evaluate(columns, 3)
+        (path,) = tmp_path.glob("fused_*.py")
+        source = path.read_text(encoding="utf-8")
+        path.write_text("raise RuntimeError('planted')\n", encoding="utf-8")
+
+        scorer = FusedRuleScorer(rules, cache_dir=tmp_path, jit=False)
+        np.testing.assert_array_equal(scorer.evaluate(columns, 3), [[2.0, 0.0, 2.0]])
+        assert path.read_text(encoding="utf-8") == source
+
+    @pytest.mark.skipif(os.name != "posix", reason="POSIXの権限ビットのみ検証")
+    def test_cache_dir_is_private(self, tmp_path: Path) -> None:
+        """キャッシュディレクトリは所有者のみアクセス可能（0700）にすること。"""
+        cache_dir = tmp_path / "kernels"
+        cache_dir.mkdir(mode=0o777)
+        cache_dir.chmod(0o777)
+        FusedRuleScorer([{"sql_expression": "Ninki", "weight": 1.0}], cache_dir=cache_dir, jit=False).evaluate(
+            {"Ninki": np.array([1.0])}, 1,
+        )
+        assert stat.S_IMODE(cache_dir.stat().st_mode) == 0o700
+
+    def test_numba_kernel_matches_python(self, tmp_path: Path) -> None:
+        """numbaでJITコンパイルしたカーネルが純Python実行と一致すること。"""
+        pytest.importorskip("numba")
+        race, entries, prevs, l3f = _race_inputs()
+        columns = build_eval_columns([
+            build_eval_context(h, race, entries, prevs[i], l3f) for i, h in enumerate(entries)
+        ])
+        rules = [dict(f) for f in GY_INITIAL_FACTORS]
+
+        scorer = FusedRuleScorer(rules, cache_dir=tmp_path, jit=True)
+        jitted = scorer.evaluate(columns, len(entries))
+        python = FusedRuleScorer(rules, cache_dir=tmp_path, jit=False).evaluate(columns, len(entries))
+        np.testing.assert_allclose(jitted, python)
+        # フォールバックではなくJITカーネルで評価されたこと
+        kernels = [kernel for kernel, _ in scorer._kernels.values()]
+        assert kernels and all(hasattr(kernel, "py_func") for kernel in kernels)
+
+    @pytest.mark.parametrize(
+        "expression",
+        ["1 if x / y > 1 else 0", "len(name)", "1 if name == 'a' else 0", "1 if x > 1 else None"],
+    )
+    def test_unfusable_rules_use_vectorized_path(self, tmp_path: Path, expression: str) -> None:
+        """変数除算・非対応構文・文字列列・None定数の式は列単位評価にフォールバックすること。"""
+        columns = {"x": np.array([1, 2]), "y": np.array([0, 1]), "name": np.array(["a", "bb"], dtype=object)}
+        scorer = FusedRuleScorer([{"sql_expression": expression, "weight": 1.0}], cache_dir=tmp_path, jit=False)
+        np.testing.assert_array_equal(
+            scorer.evaluate(columns, 2)[0], evaluate_rule_vectorized(expression, columns, 2),
+        )
+
+    def test_generate_kernel_source(self) -> None:
+        """生成ソースが重み付き代入文を含むこと。"""
+        source = generate_kernel_source(["1 if v_a > 0 else 0"], [1.5], ["a"])
+        assert "v_a = c_a[i]" in source
+        assert "out[0, i] = 1.5 * float(1 if v_a > 0 else 0)" in source
+
@@ -2,6 +2,7 @@
 
 import json
 
+import numpy as np
 import pytest
 
 from src.data.db import DatabaseManager
@@ -112,3 +113,31 @@ class TestSaveScores:
         engine = ScoringEngine(factor_db)
         saved = engine.save_scores("test", [{"umaban": "01", "total_score": 100}], bare_db)
         assert saved == 0
+
+    def test_save_falls_back_per_row_on_bulk_error(self, factor_db, ext_db) -> None:
+        """一括挿入が失敗した場合、不正な行のみ除外して保存されること。"""
+        engine = ScoringEngine(factor_db)
+        scored = [
+            {"umaban": "01", "total_score": 101.0},
+            {"umaban": None, "total_score": 99.0},  # NOT NULL制約違反
+            {"umaban": "03", "total_score": 97.0},
+        ]
+        saved = engine.save_scores("2025010506010101", scored, ext_db)
+        assert saved == 2
+
+        rows = ext_db.execute_query("SELECT umaban FROM horse_scores ORDER BY umaban")
+        assert [r["umaban"] for r in rows] == ["01", "03"]
+
+    def test_factor_details_json_keeps_unicode_and_numpy(self, factor_db, ext_db) -> None:
+        """factor_detailsのJSONが非ASCIIをエスケープせず、NumPy数値を数値として保存すること。"""
+        engine = ScoringEngine(factor_db)
+        scored = [{
+            "umaban": "01",
+            "total_score": 101.0,
+            "factor_details": {"内枠有利": np.float64(0.5), "DM予想上位": 1.5},
+        }]
+        engine.save_scores("2025010506010101", scored, ext_db)
+
+        raw = ext_db.execute_query("SELECT factor_details FROM horse_scores")[0]["factor_details"]
+        assert "内枠有利" in raw
+        assert json.loads(raw) == {"内枠有利": 0.5, "DM予想上位": 1.5}
@@ -168,3 +168,20 @@ class TestStratifiedCalibrator:
             # 異なる層のキャリブレーターが別オブジェクトであること
             s1, s2 = trained_strata[0], trained_strata[1]
             assert cal._calibrators[s1] is not cal._calibrators[s2]
+
+    @pytest.mark.parametrize(("track_type", "distance"), [("turf", 1600), ("dirt", 1200), ("dirt", 2400)])
+    def test_predict_proba_batch_matches_scalar(self, training_data, track_type, distance):
+        """一括予測が層ごとのスカラー予測と一致すること（fallback層を含む）。"""
+        scores, labels, track_types, distances = training_data
+        cal = StratifiedCalibrator(base_method="platt")
+        cal.fit(scores, labels, track_types, distances)
+
+        batch_scores = np.array([85.0, 100.0, 112.5])
+        probs = cal.predict_proba_batch(batch_scores, track_type=track_type, distance=distance)
+        expected = [cal.predict_proba(s, track_type=track_type, distance=distance) for s in batch_scores]
+        np.testing.assert_allclose(probs, expected, rtol=1e-12)
+
+    def test_predict_proba_batch_without_fit_raises(self):
+        """未学習時の一括予測もRuntimeErrorとなること。"""
+        with pytest.raises(RuntimeError):
+            StratifiedCalibrator().predict_proba_batch(np.array([100.0]))
@@ -91,3 +91,47 @@ class TestGYValueStrategy:
             params={"max_bets_per_race": 2},
         )
         assert len(bets) <= 2
+
+    def test_prepare_scores_races_with_score_many(
+        self, strategy_db: DatabaseManager, monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """n_jobs指定時はprepare()でscore_manyによりまとめてスコアリングし、run()の結果は逐次時と一致すること。"""
+        from src.backtest.engine import BacktestConfig, BacktestEngine
+        from src.scoring.engine import ScoringEngine
+
+        races = [
+            {
+                "race_info": {"Kyori": "1600", "TrackCD": "10", "Year": "2025", "MonthDay": f"01{d:02d}",
+                              "JyoCD": "06", "Kaiji": "01", "Nichiji": "01", "RaceNum": "01"},
+                "entries": [{"Umaban": "01", "Barei": "3"}, {"Umaban": "02", "Barei": "5"}],
+                "odds": {"01": 5.0, "02": 2.5},
+            }
+            for d in range(1, 5)
+        ]
+        config = BacktestConfig(date_from="2025-01-01", date_to="2025-01-31", exclude_overlapping_factors=True)
+        expected = BacktestEngine(GYValueStrategy(strategy_db, ev_threshold=0.5)).run(races, config)
+
+        score_many_calls: list[list[str | None]] = []
+        score_many = ScoringEngine.score_many
+
+        def spy_score_many(self, races, *args, as_of_dates=None, **kwargs):
+            score_many_calls.append(list(as_of_dates))
+            return score_many(self, races, *args, as_of_dates=as_of_dates, **kwargs)
+
+        def fail_score_race(*args, **kwargs):
+            raise AssertionError("prepare() 済みのレースを再スコアリングした")
+
+        monkeypatch.setattr(ScoringEngine, "score_many", spy_score_many)
+        strategy = GYValueStrategy(strategy_db, ev_threshold=0.5, n_jobs=2)
+        prepare = strategy.prepare
+
+        def prepare_then_forbid_scoring(races, params):
+            prepare(races, params)
+            monkeypatch.setattr(strategy._engine, "score_race", fail_score_race)
+
+        monkeypatch.setattr(strategy, "prepare", prepare_then_forbid_scoring)
+        result = BacktestEngine(strategy).run(races, config)
+
+        assert score_many_calls == [["2025-01-01", "2025-01-02", "2025-01-03", "2025-01-04"]]
+        assert result.bets == expected.bets
+        assert strategy._prescored == {}